@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Benchmark engine analisa: indikator, divergence, confluence score, chart, dan format balasan
+
+Fixture OHLCV sintetis (random walk deterministik) pada 200, 2k, 20k, dan 200k bar.
+Hasil disimpan ke JSON; mode compare menandai regresi antar commit.
+
+Contoh:
+    python benchmarks/bench_engine.py run -o benchmarks/results/head.json
+    python benchmarks/bench_engine.py compare base.json head.json
+    python benchmarks/bench_engine.py compare --ref main
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+warnings.filterwarnings("ignore", module="mplfinance")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [200, 2_000, 20_000, 200_000]
+# mplfinance merender setiap candle; di atas batas ini satu chart butuh beberapa menit
+DEFAULT_MAX_CHART_BARS = 20_000
+DEFAULT_THRESHOLD = 0.15
+# Selisih di bawah ini dianggap noise pengukuran, bukan regresi
+NOISE_FLOOR_MS = 0.05
+
+SAMPLE_ANALYSIS = """**PREDIKSI 1 JAM:** Naik menuju resistance terdekat
+**SINYAL:** [BUY] - EMA20 di atas EMA50, RSI keluar dari oversold
+**KEKUATAN SINYAL:** 7/10
+**HARGA SAAT INI:** $64,250.00
+**HARGA MASUK IDEAL:** $64,100.00
+**TARGET PROFIT 1:** $64,900.00
+**TARGET PROFIT 2:** $65,600.00
+**TARGET PROFIT 3:** $66,400.00
+**STOP LOSS:** $63,400.00
+**RASIO RR:** 1:2.1
+**POLA CANDLESTICK:** Bullish engulfing di area support
+**TREN EMA:** Uptrend, EMA20 > EMA50 > EMA200
+**KONDISI RSI:** 54 - netral, momentum naik
+**KONDISI STOCH RSI:** Golden cross dari area 20
+**KONDISI MACD:** Histogram positif dan melebar
+**POSISI BOLLINGER:** Di atas middle band
+**LEVEL FIBONACCI:** Memantul dari 61.8%
+**SUPPORT KUNCI:** $63,800 / $63,200
+**RESISTANCE KUNCI:** $65,000 / $66,500
+**KONFIRMASI:** Close 1 jam di atas $64,500
+**PERINGATAN RISIKO:** Volatilitas tinggi menjelang rilis data
+**KESIMPULAN:** Bias bullish selama support $63,800 bertahan."""
+
+# Respons mode JSON (responseSchema) dengan isi yang sama dengan SAMPLE_ANALYSIS
+SAMPLE_ANALYSIS_JSON = json.dumps({
+    "signal": "BUY",
+    "signal_reason": "EMA20 di atas EMA50, RSI keluar dari oversold",
+    "signal_strength": "7 dari 8 indikator mendukung",
+    "prediction": "NAIK",
+    "confidence": "SEDANG",
+    "prediction_reason": "Naik menuju resistance terdekat",
+    "current_price": 64250.0,
+    "entry": 64100.0,
+    "tp1": 64900.0,
+    "tp2": 65600.0,
+    "tp3": 66400.0,
+    "stop_loss": 63400.0,
+    "supports": [63800, 63200],
+    "resistances": [65000, 66500],
+    "indicators": {
+        "candlestick": "Bullish engulfing di area support",
+        "ema": "Uptrend, EMA20 > EMA50 > EMA200",
+        "rsi": "54 - netral, momentum naik",
+        "stoch_rsi": "Golden cross dari area 20",
+        "macd": "Histogram positif dan melebar",
+        "bollinger": "Di atas middle band",
+        "fibonacci": "Memantul dari 61.8%",
+    },
+    "risk_warning": "Volatilitas tinggi menjelang rilis data",
+    "narrative": "Bias bullish selama support $63,800 bertahan.",
+}, ensure_ascii=False)
+
+
+def make_ohlcv(n_bars, interval_seconds=3600, seed=42, start_price=50_000.0, end_ts=None):
+    """
+    Candle sintetis [timestamp, open, close, high, low, volume] dari random walk log-normal (deterministik per seed).
+    end_ts: timestamp candle terakhir (default: titik tetap di masa lalu supaya hasil bisa diulang)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, 0.004, n_bars)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0.0, 0.002, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(3.0, 0.5, n_bars)
+    if end_ts is None:
+        start_ts = 1_600_000_000 - 1_600_000_000 % interval_seconds
+    else:
+        start_ts = end_ts - end_ts % interval_seconds - (n_bars - 1) * interval_seconds
+    timestamps = start_ts + np.arange(n_bars) * interval_seconds
+    return [
+        [int(ts), float(o), float(c), float(h), float(lo), float(v)]
+        for ts, o, c, h, lo, v in zip(timestamps, open_, close, high, low, volume)
+    ]
+
+
+def quiet(func):
+    """Bungkam output konsol (log_success chart) supaya tidak bercampur dengan tabel hasil"""
+    def wrapper():
+        logging.disable(logging.INFO)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return func()
+        finally:
+            logging.disable(logging.NOTSET)
+    return wrapper
+
+
+def build_benchmarks(data, chart_dir):
+    """Daftar (nama, callable) untuk satu fixture; persiapan input dilakukan di luar pengukuran"""
+    from engine import indicators
+    from engine.charting import generate_chart
+    from engine.prompts import render_analysis_prompt
+
+    df = indicators.build_ohlc_dataframe(data)
+    close = df["Close"]
+    rsi = indicators.calculate_rsi(close)
+    macd_line, _, _ = indicators.calculate_macd(close)
+    chart_path = os.path.join(chart_dir, "bench_chart.png")
+    confluence = indicators.calculate_confluence_score(df)
+
+    return [
+        ("build_ohlc_dataframe", lambda: indicators.build_ohlc_dataframe(data)),
+        ("calculate_rsi", lambda: indicators.calculate_rsi(close)),
+        ("calculate_macd", lambda: indicators.calculate_macd(close)),
+        ("calculate_bollinger_bands", lambda: indicators.calculate_bollinger_bands(close)),
+        ("calculate_fibonacci_levels", lambda: indicators.calculate_fibonacci_levels(df)),
+        ("calculate_atr", lambda: indicators.calculate_atr(df)),
+        ("calculate_stochastic_rsi", lambda: indicators.calculate_stochastic_rsi(close)),
+        ("calculate_adx", lambda: indicators.calculate_adx(df)),
+        ("calculate_vwap", lambda: indicators.calculate_vwap(df)),
+        ("calculate_ema", lambda: indicators.calculate_ema(close, 200)),
+        ("detect_rsi_divergence", lambda: indicators.detect_rsi_divergence(df, rsi)),
+        ("detect_macd_divergence", lambda: indicators.detect_macd_divergence(df, macd_line)),
+        ("calculate_confluence_score", lambda: indicators.calculate_confluence_score(df)),
+        ("render_analysis_prompt", lambda: render_analysis_prompt("BTC", "crypto", "1hour", confluence)),
+        ("generate_chart", quiet(lambda: generate_chart(data, chart_path, "BTC", "1hour"))),
+    ]
+
+
+def time_call(func, min_time, max_time, min_runs, max_runs):
+    """Ulangi func sampai min_time dan min_runs terpenuhi (dibatasi max_time/max_runs); GC dimatikan seperti timeit"""
+    timings = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(timings) < max_runs:
+            t0 = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - started
+            if elapsed >= max_time or (elapsed >= min_time and len(timings) >= min_runs):
+                break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    ms = [t * 1000 for t in timings]
+    return {
+        "runs": len(ms),
+        "min_ms": min(ms),
+        "median_ms": statistics.median(ms),
+        "mean_ms": statistics.fmean(ms),
+        "stdev_ms": statistics.stdev(ms) if len(ms) > 1 else 0.0,
+    }
+
+
+def git_commit(root):
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, timeout=10
+        )
+        commit = result.stdout.strip() or None
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True, timeout=30
+        ).stdout.strip()
+        return f"{commit}-dirty" if commit and dirty else commit
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def benchmark_chart_image(record, chart_dir, args):
+    """Ukur optimasi gambar chart untuk Gemini (waktu + ukuran PNG vs hasil) pada chart fixture terkecil"""
+    from engine.charting import generate_chart
+    from engine.imaging import optimize_chart_image
+
+    if args.only and "optimize_chart_image" not in args.only.split(","):
+        return None
+    bars = min(args.sizes)
+    chart_path = os.path.join(chart_dir, "bench_image.png")
+    quiet(lambda: generate_chart(make_ohlcv(bars, seed=args.seed), chart_path, "BTC", "1hour"))()
+    with open(chart_path, "rb") as f:
+        png = f.read()
+
+    record("optimize_chart_image", bars, lambda: optimize_chart_image(png))
+    _, mime_type, stats = optimize_chart_image(png)
+    print(f"  {'':<28} {stats['original_bytes'] / 1024:.0f} KB PNG -> {stats['bytes'] / 1024:.0f} KB {mime_type}")
+    return {"mime_type": mime_type, **stats}
+
+
+def run_benchmarks(args):
+    """Jalankan semua benchmark untuk setiap ukuran fixture dan kembalikan dokumen hasil"""
+    sys.path.insert(0, args.root)
+    import pandas as pd
+    from engine.analysis import parse_analysis_json
+    from engine.formatting import extract_signal_from_analysis, format_analysis_reply
+
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+
+    def record(name, bars, func):
+        if only and name not in only:
+            return
+        stats = time_call(func, args.min_time, args.max_time, args.min_runs, args.max_runs)
+        results.append({"name": name, "bars": bars, **stats})
+        label = f"{bars:>7}" if bars else "      -"
+        print(f"  {name:<28} {label} bar  {stats['median_ms']:>11.3f} ms  (n={stats['runs']})", flush=True)
+
+    with tempfile.TemporaryDirectory() as chart_dir:
+        for bars in args.sizes:
+            data = make_ohlcv(bars, seed=args.seed)
+            for name, func in build_benchmarks(data, chart_dir):
+                if name == "generate_chart" and bars > args.max_chart_bars:
+                    if not only or name in only:
+                        results.append({"name": name, "bars": bars, "skipped": f"> --max-chart-bars {args.max_chart_bars}"})
+                        print(f"  {name:<28} {bars:>7} bar  dilewati (--max-chart-bars {args.max_chart_bars})")
+                    continue
+                record(name, bars, func)
+
+        image_meta = benchmark_chart_image(record, chart_dir, args)
+
+    record("format_analysis_reply", None, lambda: format_analysis_reply(SAMPLE_ANALYSIS))
+    record("extract_signal_from_analysis", None, lambda: extract_signal_from_analysis(SAMPLE_ANALYSIS))
+    record("parse_render_analysis_json", None,
+           lambda: format_analysis_reply(parse_analysis_json(SAMPLE_ANALYSIS_JSON, "BTC")))
+
+    return {
+        "meta": {
+            "commit": git_commit(args.root),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "seed": args.seed,
+            "chart_image": image_meta,
+        },
+        "results": results,
+    }
+
+
+def compare_results(base, head, threshold, noise_floor_ms=NOISE_FLOOR_MS):
+    """Bandingkan median per (nama, bar); regresi jika lebih lambat dari threshold relatif dan di atas noise floor"""
+    base_index = {(r["name"], r["bars"]): r for r in base["results"] if "median_ms" in r}
+    rows = []
+    for result in head["results"]:
+        key = (result["name"], result["bars"])
+        if "median_ms" not in result or key not in base_index:
+            continue
+        before = base_index[key]["median_ms"]
+        after = result["median_ms"]
+        change = (after - before) / before if before else 0.0
+        if change > threshold and after - before > noise_floor_ms:
+            status = "regression"
+        elif change < -threshold and before - after > noise_floor_ms:
+            status = "improvement"
+        else:
+            status = "same"
+        rows.append({"name": key[0], "bars": key[1], "base_ms": before, "head_ms": after, "change": change, "status": status})
+    return rows
+
+
+def print_comparison(rows, base_meta, head_meta):
+    from engine.console import Colors
+
+    print(f"  base: {base_meta.get('commit')}  head: {head_meta.get('commit')}")
+    print()
+    colors = {"regression": Colors.RED, "improvement": Colors.GREEN, "same": Colors.DIM}
+    for row in rows:
+        bars = f"{row['bars']:>7}" if row["bars"] else "      -"
+        color = colors[row["status"]]
+        print(
+            f"{color}  {row['name']:<28} {bars}  {row['base_ms']:>11.3f} → {row['head_ms']:>11.3f} ms  "
+            f"{row['change'] * 100:+7.1f}%  {row['status']}{Colors.RESET}"
+        )
+    regressions = sum(1 for row in rows if row["status"] == "regression")
+    print()
+    print(f"  {regressions} regresi dari {len(rows)} pengukuran")
+    return regressions
+
+
+def run_in_worktree(ref, run_args):
+    """Jalankan harness ini terhadap engine pada commit lain (git worktree sementara) dan kembalikan hasilnya"""
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = os.path.join(tmp, "tree")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], cwd=REPO_ROOT, check=True, capture_output=True)
+        try:
+            if not os.path.isdir(os.path.join(worktree, "engine")):
+                raise SystemExit(f"Commit {ref} belum memiliki paket engine/")
+            output = os.path.join(tmp, "base.json")
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "run", "--root", worktree, "-o", output, *run_args],
+                check=True
+            )
+            with open(output) as f:
+                return json.load(f)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=REPO_ROOT, capture_output=True)
+
+
+def add_run_options(parser):
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_SIZES,
+                        help="Jumlah bar fixture, dipisah koma (default: 200,2000,20000,200000)")
+    parser.add_argument("--only", help="Hanya benchmark tertentu, dipisah koma (mis. calculate_rsi,generate_chart)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Waktu minimal per benchmark (detik)")
+    parser.add_argument("--max-time", type=float, default=30.0, help="Batas waktu per benchmark (detik)")
+    parser.add_argument("--min-runs", type=int, default=3)
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--max-chart-bars", type=int, default=DEFAULT_MAX_CHART_BARS,
+                        help="Lewati generate_chart di atas jumlah bar ini")
+
+
+def forwarded_run_args(args):
+    """Opsi run yang diteruskan ke harness di worktree supaya kedua sisi diukur dengan cara yang sama"""
+    forwarded = [
+        "--sizes", ",".join(map(str, args.sizes)), "--seed", str(args.seed),
+        "--min-time", str(args.min_time), "--max-time", str(args.max_time),
+        "--min-runs", str(args.min_runs), "--max-runs", str(args.max_runs),
+        "--max-chart-bars", str(args.max_chart_bars),
+    ]
+    if args.only:
+        forwarded += ["--only", args.only]
+    return forwarded
+
+
+def write_results(document, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"  Hasil disimpan ke {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engine analisa teknikal")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Jalankan benchmark dan simpan hasil ke JSON")
+    add_run_options(run_parser)
+    run_parser.add_argument("--root", default=REPO_ROOT, help=argparse.SUPPRESS)
+    run_parser.add_argument("-o", "--output", help="File JSON hasil (default: benchmarks/results/<commit>.json)")
+
+    compare_parser = sub.add_parser("compare", help="Bandingkan dua hasil dan tandai regresi")
+    compare_parser.add_argument("base", nargs="?", help="JSON hasil baseline")
+    compare_parser.add_argument("head", nargs="?", help="JSON hasil pembanding (default: jalankan sekarang)")
+    compare_parser.add_argument("--ref", help="Ukur baseline dari commit/branch ini lewat git worktree")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Ambang regresi relatif terhadap median (default: 0.15 = 15%%)")
+    add_run_options(compare_parser)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        document = run_benchmarks(args)
+        output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results", f"{document['meta']['commit'] or 'local'}.json")
+        write_results(document, output)
+        return
+
+    if bool(args.base) == bool(args.ref):
+        parser.error("compare butuh tepat satu baseline: file JSON atau --ref")
+
+    if args.ref:
+        base = run_in_worktree(args.ref, forwarded_run_args(args))
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+
+    if args.head:
+        with open(args.head) as f:
+            head = json.load(f)
+    else:
+        args.root = REPO_ROOT
+        head = run_benchmarks(args)
+
+    sys.path.insert(0, REPO_ROOT)
+    rows = compare_results(base, head, args.threshold)
+    regressions = print_comparison(rows, base["meta"], head["meta"])
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
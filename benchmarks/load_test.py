@@ -0,0 +1,901 @@
+#!/usr/bin/env python3
+"""
+Load test end-to-end bot: main.py dijalankan sebagai proses terpisah terhadap server stub lokal
+
+Stub menggantikan Telegram Bot API, Gemini generateContent, KuCoin REST, dan WebSocket TradingView,
+masing-masing dengan latency dan injeksi error yang bisa diatur. Virtual user (closed loop) mengirim
+Update sintetis lewat getUpdates (mode polling) atau POST ke webhook, lalu harness mengukur
+throughput, latency tail per skenario, dan pemakaian CPU/RSS/thread proses bot.
+
+Contoh:
+    python benchmarks/load_test.py --users 20 --duration 60
+    python benchmarks/load_test.py --mode both --latency gemini=3,telegram=0.03 --errors gemini=0.05
+    python benchmarks/load_test.py --mix tf=1 --env RENDER_CONCURRENCY=4 -o /tmp/load.json
+"""
+
+import argparse
+import asyncio
+import base64
+import email
+import hashlib
+import json
+import os
+import random
+import re
+import signal
+import socket
+import socketserver
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench_engine import REPO_ROOT, SAMPLE_ANALYSIS, SAMPLE_ANALYSIS_JSON, make_ohlcv
+
+sys.path.insert(0, REPO_ROOT)
+
+from engine.config import FOREX_PAIRS, INTERVAL_MAP, KUCOIN_INTERVAL_MAP, SUPPORTED_COINS  # noqa: E402
+
+BOT_TOKEN = "123456:LOADTEST"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "LoadTestBot", "username": "loadtest_bot"}
+FIRST_USER_ID = 100_000
+
+DEFAULT_LATENCY = {"telegram": 0.03, "gemini": 2.0, "kucoin": 0.15, "tradingview": 0.3}
+DEFAULT_ERRORS = {"telegram": 0.0, "gemini": 0.0, "kucoin": 0.0, "tradingview": 0.0}
+DEFAULT_MIX = {"tf": 5, "analyze": 1, "mtf": 1, "price": 2, "start": 1}
+
+# Metode Bot API yang tidak pernah diberi error injeksi (kontrol sesi, bukan balasan ke user)
+CONTROL_METHODS = {"getMe", "getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo", "close", "logOut"}
+
+TV_RESOLUTION_SECONDS = {"1": 60, "5": 300, "15": 900, "30": 1800, "60": 3600, "240": 14400, "1D": 86400, "1W": 604800}
+
+
+def parse_service_map(text, defaults):
+    """'gemini=2,telegram=0.05' -> dict layanan -> float (layanan lain memakai default)"""
+    values = dict(defaults)
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.partition("=")
+        if name not in defaults:
+            raise argparse.ArgumentTypeError(f"layanan tidak dikenal: {name} (pilih {', '.join(defaults)})")
+        values[name] = float(value)
+    return values
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServiceStub:
+    """Latency (base + jitter acak) dan injeksi error bersama untuk satu layanan stub"""
+
+    def __init__(self, name, latency, error_rate, jitter=0.25, seed=0):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Catat request, tunggu latency, dan kembalikan True jika request ini harus gagal"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def connected(self):
+        """Catat koneksi baru (WebSocket); request per koneksi menunjukkan sesi dipakai ulang"""
+        with self._lock:
+            self.connections += 1
+
+    def received(self, size):
+        """Catat ukuran body request (mis. payload gambar Gemini)"""
+        with self._lock:
+            self.bytes_in += size
+
+    def stats(self):
+        stats = {"requests": self.requests, "injected_errors": self.errors, "latency_s": self.latency, "error_rate": self.error_rate}
+        if self.bytes_in:
+            stats["bytes_in"] = self.bytes_in
+            stats["avg_request_kb"] = round(self.bytes_in / 1024 / max(1, self.requests), 1)
+        if self.connections:
+            stats["connections"] = self.connections
+        return stats
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, service, **attrs):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.service = service
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # Klien memutus koneksi (long poll dibatalkan saat bot berhenti) bukan kegagalan stub
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name=f"stub-{self.service.name}", daemon=True).start()
+        return self
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TelegramStubState:
+    """Antrean update untuk getUpdates, penomoran message_id, dan pengamat setiap panggilan Bot API"""
+
+    def __init__(self):
+        self.pending = []
+        self.condition = threading.Condition()
+        self.message_ids = iter(range(1_000_000, sys.maxsize))
+        self.method_counts = {}
+        self.listener = None
+
+    def push(self, update):
+        with self.condition:
+            self.pending.append(update)
+            self.condition.notify_all()
+
+    def take(self, offset, limit, timeout):
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                self.pending = [u for u in self.pending if u["update_id"] >= offset]
+                remaining = deadline - time.monotonic()
+                if self.pending or remaining <= 0:
+                    return self.pending[:limit]
+                self.condition.wait(remaining)
+
+
+class TelegramHandler(JSONHandler):
+    def do_POST(self):
+        match = re.match(r"^/bot[^/]+/(\w+)", self.path)
+        if not match:
+            self.send_json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        method = match.group(1)
+        params = self.parse_params(self.read_body())
+        state = self.server.state
+        state.method_counts[method] = state.method_counts.get(method, 0) + 1
+
+        if method == "getUpdates":
+            offset = int(params.get("offset") or 0)
+            limit = int(params.get("limit") or 100)
+            timeout = min(float(params.get("timeout") or 0), 5.0)
+            self.send_json(200, {"ok": True, "result": state.take(offset, limit, timeout)})
+            return
+        if method not in CONTROL_METHODS and self.server.service.begin():
+            self.send_json(429, {
+                "ok": False, "error_code": 429,
+                "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}
+            })
+            return
+
+        result = self.result_for(method, params)
+        self.send_json(200, {"ok": True, "result": result})
+        if state.listener and "chat_id" in params:
+            state.listener(int(params["chat_id"]), method, params)
+
+    def parse_params(self, body):
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            params = {}
+            for part in message.get_payload():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    params[name] = "<file>"
+                else:
+                    params[name] = part.get_payload(decode=True).decode()
+            return params
+        if content_type.startswith("application/json"):
+            return {k: v if isinstance(v, str) else json.dumps(v) for k, v in json.loads(body or b"{}").items()}
+        return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+    def result_for(self, method, params):
+        if method == "getMe":
+            return BOT_USER
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        if method in ("sendMessage", "sendPhoto", "editMessageText", "editMessageCaption", "editMessageReplyMarkup"):
+            chat_id = int(params.get("chat_id", 0))
+            message_id = int(params["message_id"]) if "message_id" in params else next(self.server.state.message_ids)
+            message = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "from": BOT_USER,
+            }
+            if "text" in params:
+                message["text"] = params["text"]
+            if "caption" in params:
+                message["caption"] = params["caption"]
+            if method == "sendPhoto":
+                file_id = params["photo"] if params.get("photo") != "<file>" else f"stub-photo-{message_id}"
+                message["photo"] = [{"file_id": file_id, "file_unique_id": f"u{message_id}", "width": 1280, "height": 960}]
+            return message
+        return True
+
+
+class GeminiHandler(JSONHandler):
+    def do_POST(self):
+        body = self.read_body()
+        self.server.service.received(len(body))
+        if urlparse(self.path).path.endswith("/cachedContents"):
+            self.create_cached_content(body)
+            return
+        if ":generateContent" not in self.path:
+            self.send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            return
+        if self.server.service.begin():
+            status = self.server.service.random.choice([429, 500])
+            self.send_json(status, {"error": {"code": status, "message": "Injected error"}})
+            return
+        try:
+            config = json.loads(body).get("generationConfig", {})
+        except ValueError:
+            config = {}
+        text = SAMPLE_ANALYSIS_JSON if config.get("responseMimeType") == "application/json" else SAMPLE_ANALYSIS
+        self.send_json(200, {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]})
+
+    def create_cached_content(self, body):
+        """Stub cachedContents: nama cache unik, token dihitung kasar dari panjang instruksi"""
+        if self.server.service.begin():
+            self.send_json(500, {"error": {"code": 500, "message": "Injected error"}})
+            return
+        try:
+            text = json.loads(body)["systemInstruction"]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self.send_json(400, {"error": {"code": 400, "message": "systemInstruction wajib diisi"}})
+            return
+        name = f"cachedContents/stub-{hashlib.md5(text.encode()).hexdigest()[:12]}"
+        self.send_json(200, {"name": name, "usageMetadata": {"totalTokenCount": len(text) // 4}})
+
+
+def symbol_seed(symbol):
+    return int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
+
+
+class KucoinHandler(JSONHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.server.service.begin():
+            self.send_json(500, {"code": "500000", "msg": "Injected error"})
+            return
+
+        if url.path == "/api/v1/market/candles":
+            interval = KUCOIN_INTERVAL_MAP.get(query.get("type"), 60)
+            end_at = int(query.get("endAt") or time.time())
+            start_at = int(query.get("startAt") or end_at - 200 * interval)
+            bars = max(1, min(1500, (end_at - start_at) // interval))
+            candles = make_ohlcv(bars, interval, seed=symbol_seed(query.get("symbol", "")), end_ts=end_at)
+            data = [[str(c[0]), str(c[1]), str(c[2]), str(c[3]), str(c[4]), str(c[5]), str(c[5] * c[2])] for c in reversed(candles)]
+            self.send_json(200, {"code": "200000", "data": data})
+        elif url.path == "/api/v1/market/orderbook/level1":
+            price = make_ohlcv(1, seed=symbol_seed(query.get("symbol", "")), end_ts=int(time.time()))[0][2]
+            self.send_json(200, {"code": "200000", "data": {"price": str(price), "time": int(time.time() * 1000)}})
+        else:
+            self.send_json(404, {"code": "404000", "msg": "Not Found"})
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class TradingViewHandler(socketserver.BaseRequestHandler):
+    """WebSocket minimal (RFC 6455, frame teks) yang meniru sesi chart TradingView: create_series/request_more_data -> timescale_update"""
+
+    def handle(self):
+        sock = self.request
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        key = re.search(rb"Sec-WebSocket-Key:\s*(\S+)", request, re.IGNORECASE)
+        if not key:
+            return
+        accept = base64.b64encode(hashlib.sha1(key.group(1) + WS_GUID.encode()).digest()).decode()
+        sock.sendall(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+
+        self.server.service.connected()
+        symbols = {}
+        # series_id -> [symbol, resolution, ts bar tertua yang sudah dikirim] untuk request_more_data
+        series_state = {}
+        send_lock = threading.Lock()
+        try:
+            while True:
+                opcode, payload = self.read_frame(sock)
+                if opcode is None or opcode == 0x8:
+                    return
+                if opcode == 0x9:
+                    with send_lock:
+                        self.send_frame(sock, payload, opcode=0xA)
+                    continue
+                for message in re.split(r"~m~\d+~m~", payload.decode(errors="replace")):
+                    if not message.startswith("{"):
+                        continue
+                    packet = json.loads(message)
+                    if packet.get("m") == "resolve_symbol":
+                        found = re.search(r'"symbol":"([^"]+)"', packet["p"][2])
+                        symbols[packet["p"][1]] = found.group(1) if found else "BINANCE:BTCUSDT"
+                    elif packet.get("m") == "create_series":
+                        chart_session, series_id, symbol_id, resolution, bars = (
+                            packet["p"][0], packet["p"][1], packet["p"][3], packet["p"][4], int(packet["p"][5])
+                        )
+                        symbol = symbols.get(symbol_id, "BINANCE:BTCUSDT")
+                        interval = TV_RESOLUTION_SECONDS.get(resolution, 3600)
+                        end_ts = int(time.time())
+                        series_state[series_id] = [symbol, resolution, end_ts - (bars - 1) * interval]
+                        # Series dalam satu sesi dilayani bersamaan, seperti server TradingView (multipleks)
+                        threading.Thread(
+                            target=self.serve_series,
+                            args=(sock, send_lock, chart_session, series_id, symbol, resolution, bars, end_ts),
+                            daemon=True
+                        ).start()
+                    elif packet.get("m") == "request_more_data" and packet["p"][1] in series_state:
+                        chart_session, series_id, bars = packet["p"][0], packet["p"][1], int(packet["p"][2])
+                        symbol, resolution, oldest = series_state[series_id]
+                        interval = TV_RESOLUTION_SECONDS.get(resolution, 3600)
+                        series_state[series_id][2] = oldest - bars * interval
+                        threading.Thread(
+                            target=self.serve_series,
+                            args=(sock, send_lock, chart_session, series_id, symbol, resolution, bars, oldest - interval),
+                            daemon=True
+                        ).start()
+        except (OSError, ValueError):
+            return
+
+    def serve_series(self, sock, send_lock, chart_session, series_id, symbol, resolution, bars, end_ts):
+        try:
+            if self.server.service.begin():
+                sock.shutdown(socket.SHUT_RDWR)
+                return
+            with send_lock:
+                self.send_series(sock, chart_session, series_id, symbol, resolution, bars, end_ts)
+        except OSError:
+            pass
+
+    def send_series(self, sock, chart_session, series_id, symbol, resolution, bars, end_ts):
+        interval = TV_RESOLUTION_SECONDS.get(resolution, 3600)
+        candles = make_ohlcv(bars, interval, seed=symbol_seed(symbol), end_ts=end_ts)
+        series = [{"i": i, "v": [c[0], c[1], c[3], c[4], c[2], c[5]]} for i, c in enumerate(candles)]
+        update = json.dumps({"m": "timescale_update", "p": [chart_session, {series_id: {"s": series}}]}, separators=(",", ":"))
+        completed = json.dumps({"m": "series_completed", "p": [chart_session, series_id, "streaming"]}, separators=(",", ":"))
+        for message in (update, completed):
+            self.send_frame(sock, f"~m~{len(message)}~m~{message}".encode())
+
+    @staticmethod
+    def recv_exact(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise OSError("connection closed")
+            data += chunk
+        return data
+
+    def read_frame(self, sock):
+        try:
+            first, second = self.recv_exact(sock, 2)
+        except OSError:
+            return None, b""
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self.recv_exact(sock, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self.recv_exact(sock, 8))[0]
+        mask = self.recv_exact(sock, 4) if second & 0x80 else b"\0\0\0\0"
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.recv_exact(sock, length)))
+        return first & 0x0F, payload
+
+    @staticmethod
+    def send_frame(sock, payload, opcode=0x1):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack(">Q", len(payload))
+        sock.sendall(header + payload)
+
+
+class TradingViewStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service):
+        super().__init__(("127.0.0.1", 0), TradingViewHandler)
+        self.service = service
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.server_address[1]}/socket.io/websocket"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-tradingview", daemon=True).start()
+        return self
+
+
+class StubCluster:
+    """Keempat server stub beserta statistiknya"""
+
+    def __init__(self, latency, errors, seed):
+        self.services = {name: ServiceStub(name, latency[name], errors[name], seed=seed + i) for i, name in enumerate(latency)}
+        self.telegram_state = TelegramStubState()
+        self.telegram = StubHTTPServer(TelegramHandler, self.services["telegram"], state=self.telegram_state).start()
+        self.gemini = StubHTTPServer(GeminiHandler, self.services["gemini"]).start()
+        self.kucoin = StubHTTPServer(KucoinHandler, self.services["kucoin"]).start()
+        self.tradingview = TradingViewStubServer(self.services["tradingview"]).start()
+
+    def bot_env(self):
+        return {
+            "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+            "TELEGRAM_API_BASE_URL": self.telegram.url,
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_URL": self.gemini.url,
+            "KUCOIN_API_URL": self.kucoin.url,
+            "TRADINGVIEW_WS_URL": self.tradingview.url,
+            "YAHOO_FINANCE": "off",
+            "LIVE_FEED": "off",
+        }
+
+    def stats(self):
+        return {name: service.stats() for name, service in self.services.items()}
+
+    def shutdown(self):
+        for server in (self.telegram, self.gemini, self.kucoin, self.tradingview):
+            server.shutdown()
+            server.server_close()
+
+
+class ProcessSampler:
+    """Sampling /proc/<pid> (Linux): CPU (utime+stime), RSS, dan jumlah thread proses bot"""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.available = os.path.exists(f"/proc/{pid}/stat")
+        self._ticks = os.sysconf("SC_CLK_TCK") if self.available else 100
+        self._page = os.sysconf("SC_PAGE_SIZE") if self.available else 4096
+        self._stop = threading.Event()
+
+    def process_tree(self):
+        """pid bot beserta semua turunannya (worker pada mode BOT_WORKERS > 1)"""
+        pids, index = [self.pid], 0
+        while index < len(pids):
+            task_dir = f"/proc/{pids[index]}/task"
+            for tid in os.listdir(task_dir):
+                try:
+                    with open(f"{task_dir}/{tid}/children") as f:
+                        pids.extend(int(child) for child in f.read().split())
+                except OSError:
+                    continue
+            index += 1
+        return pids
+
+    def read(self):
+        sample = {"t": time.monotonic(), "cpu_s": 0.0, "rss_mb": 0.0, "threads": 0, "processes": 0}
+        for pid in self.process_tree():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            sample["cpu_s"] += (int(fields[11]) + int(fields[12])) / self._ticks
+            sample["rss_mb"] += int(fields[21]) * self._page / 2**20
+            sample["threads"] += int(fields[17])
+            sample["processes"] += 1
+        return sample
+
+    def start(self):
+        if self.available:
+            threading.Thread(target=self._run, name="sampler", daemon=True).start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.samples.append(self.read())
+            except (OSError, IndexError, ValueError):
+                return
+
+    def stop(self):
+        self._stop.set()
+
+    def summary(self, since):
+        window = [s for s in self.samples if s["t"] >= since]
+        if len(window) < 2:
+            return {"available": False}
+        cpu_percent = [
+            100 * (b["cpu_s"] - a["cpu_s"]) / (b["t"] - a["t"]) for a, b in zip(window, window[1:]) if b["t"] > a["t"]
+        ]
+        elapsed = window[-1]["t"] - window[0]["t"]
+        return {
+            "available": True,
+            "cpu_percent_avg": 100 * (window[-1]["cpu_s"] - window[0]["cpu_s"]) / elapsed if elapsed else 0.0,
+            "cpu_percent_peak": max(cpu_percent) if cpu_percent else 0.0,
+            "rss_mb_avg": statistics.fmean(s["rss_mb"] for s in window),
+            "rss_mb_peak": max(s["rss_mb"] for s in window),
+            "threads_peak": max(s["threads"] for s in window),
+            "processes": max(s["processes"] for s in window),
+        }
+
+
+class CompletionTracker:
+    """Menentukan kapan satu request virtual user selesai berdasarkan panggilan Bot API ke chat-nya"""
+
+    BUSY_PREFIXES = ("⏳ Server sedang sibuk", "⏳ Kuota analisa kamu habis. Coba lagi")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.waiters = {}
+        self._lock = threading.Lock()
+
+    def expect(self, chat_id, kind):
+        future = self.loop.create_future()
+        with self._lock:
+            self.waiters[chat_id] = (kind, future)
+        return future
+
+    def discard(self, chat_id):
+        with self._lock:
+            self.waiters.pop(chat_id, None)
+
+    def on_call(self, chat_id, method, params):
+        """Dipanggil dari thread stub Telegram untuk setiap panggilan yang membawa chat_id"""
+        if method not in ("sendMessage", "sendPhoto", "editMessageText"):
+            return
+        with self._lock:
+            entry = self.waiters.get(chat_id)
+            if not entry:
+                return
+            outcome = self.classify(entry[0], params)
+            if outcome is None:
+                return
+            del self.waiters[chat_id]
+        self.loop.call_soon_threadsafe(lambda: entry[1].done() or entry[1].set_result(outcome))
+
+    def classify(self, kind, params):
+        text = params.get("text", "")
+        if text.startswith("❌"):
+            return "error"
+        if text.startswith(self.BUSY_PREFIXES):
+            return "rejected"
+        if kind == "reply":
+            return "ok"
+        # Analisa selesai saat keyboard setelah-analisa (tombol Menu Utama) dikirim
+        return "ok" if "back_to_main" in params.get("reply_markup", "") else None
+
+
+class LoadGenerator:
+    """Virtual user closed-loop: kirim satu Update, tunggu balasan akhir, (opsional) think time, ulangi"""
+
+    def __init__(self, args, stubs, deliver):
+        self.args = args
+        self.stubs = stubs
+        self.deliver = deliver
+        self.update_ids = iter(range(1, sys.maxsize))
+        self.records = []
+        self.scenarios = [name for name, weight in args.mix.items() if weight > 0]
+        self.weights = [args.mix[name] for name in self.scenarios]
+        self.symbols = [("crypto", s) for s in SUPPORTED_COINS] + [("forex", s) for s in FOREX_PAIRS]
+
+    def build_update(self, scenario, user_id, rng):
+        market_type, symbol = rng.choice(self.symbols)
+        intervals = [i for i in INTERVAL_MAP if not (market_type == "forex" and i == "1week")]
+        interval = rng.choice(intervals)
+        update_id = next(self.update_ids)
+        user = {"id": user_id, "is_bot": False, "first_name": f"load{user_id}"}
+        chat = {"id": user_id, "type": "private"}
+
+        if scenario == "tf":
+            return "analysis", {
+                "update_id": update_id,
+                "callback_query": {
+                    "id": str(update_id), "from": user, "chat_instance": str(user_id),
+                    "data": f"tf_{market_type}_{symbol}_{interval}",
+                    "message": {"message_id": update_id, "date": int(time.time()), "chat": chat, "text": "Pilih timeframe"},
+                },
+            }
+
+        text, kind = {
+            "analyze": (f"/analyze {symbol} {interval}", "analysis"),
+            "mtf": (f"/mtf {symbol}", "analysis"),
+            "price": (f"/price {symbol}", "reply"),
+            "start": ("/start", "reply"),
+        }[scenario]
+        command_length = len(text.split()[0])
+        return kind, {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id, "date": int(time.time()), "chat": chat, "from": user, "text": text,
+                "entities": [{"type": "bot_command", "offset": 0, "length": command_length}],
+            },
+        }
+
+    async def virtual_user(self, index, tracker, deadline):
+        rng = random.Random(self.args.seed * 7919 + index)
+        user_id = FIRST_USER_ID + index
+        await asyncio.sleep(self.args.ramp_up * index / max(1, self.args.users))
+        while time.monotonic() < deadline:
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            kind, update = self.build_update(scenario, user_id, rng)
+            future = tracker.expect(user_id, kind)
+            started = time.monotonic()
+            await self.deliver(update)
+            try:
+                outcome = await asyncio.wait_for(future, self.args.request_timeout)
+            except asyncio.TimeoutError:
+                tracker.discard(user_id)
+                outcome = "timeout"
+            finished = time.monotonic()
+            self.records.append({"scenario": scenario, "outcome": outcome, "latency_s": finished - started, "finished": finished})
+            if self.args.think_time > 0:
+                await asyncio.sleep(rng.expovariate(1 / self.args.think_time))
+
+    async def run(self):
+        tracker = CompletionTracker(asyncio.get_running_loop())
+        self.stubs.telegram_state.listener = tracker.on_call
+        started = time.monotonic()
+        deadline = started + self.args.duration
+        await asyncio.gather(*(self.virtual_user(i, tracker, deadline) for i in range(self.args.users)))
+        self.stubs.telegram_state.listener = None
+        return started, time.monotonic()
+
+
+def summarize_records(records, elapsed):
+    def latency_stats(items):
+        values = sorted(r["latency_s"] * 1000 for r in items)
+        return {
+            "p50_ms": percentile(values, 50), "p90_ms": percentile(values, 90),
+            "p99_ms": percentile(values, 99), "max_ms": values[-1] if values else None,
+        }
+
+    scenarios = {}
+    for name in sorted({r["scenario"] for r in records}):
+        items = [r for r in records if r["scenario"] == name]
+        ok = [r for r in items if r["outcome"] == "ok"]
+        outcomes = {}
+        for r in items:
+            outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+        scenarios[name] = {"requests": len(items), "outcomes": outcomes, **latency_stats(ok)}
+
+    ok = [r for r in records if r["outcome"] == "ok"]
+    return {
+        "requests": len(records),
+        "completed_ok": len(ok),
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_ok": latency_stats(ok),
+        "scenarios": scenarios,
+    }
+
+
+def start_bot(mode, stubs, workdir, extra_env):
+    env = dict(os.environ, **stubs.bot_env(), BOT_MODE=mode, **extra_env)
+    webhook = None
+    if mode == "webhook":
+        port = free_port()
+        webhook = f"http://127.0.0.1:{port}/loadtest"
+        env.update(WEBHOOK_URL=f"http://127.0.0.1:{port}", WEBHOOK_PATH="/loadtest", WEBHOOK_PORT=str(port))
+    log_path = os.path.join(workdir, f"bot-{mode}.log")
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "main.py")],
+        cwd=workdir, env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+    return process, webhook, log_path, log_file
+
+
+def stop_bot(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def post_json(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+async def run_mode(mode, args):
+    """Satu putaran load test: stub baru, proses bot baru, lalu virtual user selama --duration"""
+    stubs = StubCluster(args.latency, args.errors, args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        process, webhook, log_path, log_file = start_bot(mode, stubs, workdir, args.env)
+        try:
+            startup = time.monotonic()
+            # Mode webhook multi-worker: siap setelah setiap worker memanggil setWebhook
+            workers = int(args.env.get("BOT_WORKERS", "1")) if mode == "webhook" else 1
+            while stubs.telegram_state.method_counts.get("setWebhook" if webhook else "getUpdates", 0) < workers:
+                if process.poll() is not None or time.monotonic() - startup > args.startup_timeout:
+                    with open(log_path) as f:
+                        tail = f.read()[-2000:]
+                    raise SystemExit(f"Bot ({mode}) gagal start:\n{tail}")
+                await asyncio.sleep(0.05)
+            if webhook:
+                await asyncio.sleep(0.5)
+            ready_s = time.monotonic() - startup
+
+            if mode == "polling":
+                async def deliver(update):
+                    stubs.telegram_state.push(update)
+            else:
+                async def deliver(update):
+                    await asyncio.to_thread(post_json, webhook, update)
+
+            sampler = ProcessSampler(process.pid).start()
+            print(f"  [{mode}] bot siap dalam {ready_s:.2f}s, {args.users} user selama {args.duration:.0f}s...", flush=True)
+            generator = LoadGenerator(args, stubs, deliver)
+            started, finished = await generator.run()
+            sampler.stop()
+        finally:
+            stop_bot(process)
+            log_file.close()
+            stubs.shutdown()
+
+    return {
+        "mode": mode,
+        "ready_s": ready_s,
+        "duration_s": finished - started,
+        **summarize_records(generator.records, finished - started),
+        "bot_api_calls": dict(sorted(stubs.telegram_state.method_counts.items())),
+        "upstream": stubs.stats(),
+        "resources": sampler.summary(started),
+    }
+
+
+def fmt_ms(value):
+    return f"{value:>9.0f}" if value is not None else f"{'-':>9}"
+
+
+def print_report(report):
+    print()
+    print(f"  Mode {report['mode'].upper()}: {report['completed_ok']}/{report['requests']} selesai OK, "
+          f"{report['throughput_rps']:.2f} req/s")
+    print(f"  {'skenario':<10} {'req':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}  hasil")
+    for name, s in report["scenarios"].items():
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(s["outcomes"].items()))
+        print(f"  {name:<10} {s['requests']:>6} {fmt_ms(s['p50_ms'])} {fmt_ms(s['p90_ms'])} {fmt_ms(s['p99_ms'])} {fmt_ms(s['max_ms'])}  {outcomes}")
+    total = report["latency_ok"]
+    print(f"  {'semua OK':<10} {report['completed_ok']:>6} {fmt_ms(total['p50_ms'])} {fmt_ms(total['p90_ms'])} {fmt_ms(total['p99_ms'])} {fmt_ms(total['max_ms'])}")
+    resources = report["resources"]
+    if resources.get("available"):
+        print(f"  Proses bot: CPU rata-rata {resources['cpu_percent_avg']:.0f}% (puncak {resources['cpu_percent_peak']:.0f}%), "
+              f"RSS rata-rata {resources['rss_mb_avg']:.0f} MB (puncak {resources['rss_mb_peak']:.0f} MB), "
+              f"thread puncak {resources['threads_peak']}, {resources['processes']} proses")
+    upstream = ", ".join(f"{name} {s['requests']}" + (f" ({s['injected_errors']} error)" if s["injected_errors"] else "")
+                         for name, s in report["upstream"].items())
+    print(f"  Upstream: {upstream}")
+    gemini = report["upstream"].get("gemini", {})
+    if gemini.get("bytes_in"):
+        print(f"  Upload Gemini: {gemini['bytes_in'] / 1024:.0f} KB total, rata-rata {gemini['avg_request_kb']:.0f} KB/request")
+    tradingview = report["upstream"].get("tradingview", {})
+    if tradingview.get("connections"):
+        print(f"  TradingView: {tradingview['requests']} series lewat {tradingview['connections']} koneksi WebSocket")
+    calls = ", ".join(f"{k} {v}" for k, v in report["bot_api_calls"].items() if k not in CONTROL_METHODS)
+    print(f"  Bot API: {calls}")
+
+
+def parse_mix(text):
+    mix = {name: 0.0 for name in DEFAULT_MIX}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"skenario tidak dikenal: {name} (pilih {', '.join(mix)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_env(items):
+    env = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--env harus KEY=VALUE: {item}")
+        env[key] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test end-to-end bot dengan server stub lokal")
+    parser.add_argument("--mode", choices=["polling", "webhook", "both"], default="polling")
+    parser.add_argument("--users", type=int, default=10, help="Jumlah virtual user (masing-masing satu chat)")
+    parser.add_argument("--duration", type=float, default=60, help="Durasi pengukuran per mode (detik)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="User mulai bertahap selama N detik")
+    parser.add_argument("--think-time", type=float, default=0, help="Rata-rata jeda antar request per user (detik)")
+    parser.add_argument("--request-timeout", type=float, default=120, help="Batas tunggu balasan akhir per request")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Bobot skenario, mis. tf=5,analyze=1,mtf=1,price=2,start=1")
+    parser.add_argument("--latency", type=lambda s: parse_service_map(s, DEFAULT_LATENCY), default=DEFAULT_LATENCY,
+                        help="Latency stub (detik), mis. gemini=3,telegram=0.05,kucoin=0.1,tradingview=0.3")
+    parser.add_argument("--errors", type=lambda s: parse_service_map(s, DEFAULT_ERRORS), default=DEFAULT_ERRORS,
+                        help="Rasio error injeksi 0-1 per layanan, mis. gemini=0.05,tradingview=0.1")
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE", help="Environment tambahan untuk proses bot")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="Simpan laporan JSON")
+    args = parser.parse_args()
+    args.env = parse_env(args.env)
+
+    modes = ["polling", "webhook"] if args.mode == "both" else [args.mode]
+    reports = []
+    for mode in modes:
+        report = asyncio.run(run_mode(mode, args))
+        print_report(report)
+        reports.append(report)
+
+    if args.output:
+        document = {
+            "config": {
+                "users": args.users, "duration_s": args.duration, "think_time_s": args.think_time,
+                "mix": args.mix, "latency": args.latency, "errors": args.errors, "env": args.env, "seed": args.seed,
+            },
+            "runs": reports,
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\n  Laporan disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Engine analisa teknikal bersama
+
+Dipakai oleh semua entry point bot (main.py, test.py, src/btc_analyzer.py, src/xau_analyzer.py):
+- data: pengambilan candle (TradingView, Yahoo Finance, KuCoin) dengan cache dan resampling
+- indicators: indikator teknikal dan confluence score
+- charting: chart candlestick multi-panel dan chart multi-timeframe
+- llm: analisa chart dengan Gemini Vision
+- formatting / keyboards: teks balasan dan inline keyboard Telegram
+"""
@@ -0,0 +1,150 @@
+"""
+Hasil analisa Gemini terstruktur (mode JSON)
+
+Gemini diminta mengisi objek JSON sesuai ANALYSIS_SCHEMA (responseSchema), lalu respons di-parse
+sekali menjadi AnalysisResult. Sinyal, harga, dan level dibaca langsung dari field ini; tidak ada
+lagi pencarian regex di teks bebas. Persentase TP/SL dan rasio RR dihitung lokal dari angka.
+"""
+
+import json
+
+from engine.console import get_logger
+
+
+logger = get_logger(__name__)
+
+SIGNALS = ["STRONG_BUY", "BUY", "HOLD", "SELL", "STRONG_SELL"]
+
+_TEXT = {"type": "STRING"}
+_NUMBER = {"type": "NUMBER"}
+
+# Subset OpenAPI yang diterima generationConfig.responseSchema Gemini
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "signal": {"type": "STRING", "enum": SIGNALS},
+        "signal_reason": _TEXT,
+        "signal_strength": _TEXT,
+        "prediction": {"type": "STRING", "enum": ["NAIK", "TURUN", "SIDEWAYS"]},
+        "confidence": {"type": "STRING", "enum": ["TINGGI", "SEDANG", "RENDAH"]},
+        "prediction_reason": _TEXT,
+        "movement": _TEXT,
+        "current_price": _NUMBER,
+        "entry": _NUMBER,
+        "tp1": _NUMBER,
+        "tp2": _NUMBER,
+        "tp3": {"type": "NUMBER", "nullable": True},
+        "stop_loss": _NUMBER,
+        "supports": {"type": "ARRAY", "items": _NUMBER},
+        "resistances": {"type": "ARRAY", "items": _NUMBER},
+        "main_trend": _TEXT,
+        "best_timeframe": _TEXT,
+        "indicators": {
+            "type": "OBJECT",
+            "properties": {
+                "candlestick": _TEXT,
+                "ema": _TEXT,
+                "rsi": _TEXT,
+                "stoch_rsi": _TEXT,
+                "macd": _TEXT,
+                "bollinger": _TEXT,
+                "fibonacci": _TEXT,
+            },
+        },
+        "risk_warning": _TEXT,
+        "narrative": _TEXT,
+    },
+    "required": ["signal", "entry", "tp1", "tp2", "stop_loss", "narrative"],
+    "propertyOrdering": [
+        "signal", "signal_reason", "signal_strength", "prediction", "confidence", "prediction_reason",
+        "movement", "current_price", "entry", "tp1", "tp2", "tp3", "stop_loss", "supports", "resistances",
+        "main_trend", "best_timeframe", "indicators", "risk_warning", "narrative",
+    ],
+}
+
+INDICATOR_KEYS = ["candlestick", "ema", "rsi", "stoch_rsi", "macd", "bollinger", "fibonacci"]
+
+
+def _to_price(value):
+    """Angka dari JSON; toleran terhadap string seperti "$64,250.00" jika model tidak patuh tipe"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    try:
+        price = float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+
+def _to_text(value):
+    return str(value).strip() if value not in (None, "") else ""
+
+
+class AnalysisResult:
+    """Satu hasil analisa Gemini yang sudah di-parse (harga dalam float, level terurut dari terdekat)"""
+
+    def __init__(self, data, symbol=None):
+        signal = str(data.get("signal", "")).upper().replace(" ", "_")
+        if signal not in SIGNALS:
+            raise ValueError(f"Sinyal tidak valid: {data.get('signal')!r}")
+
+        self.symbol = symbol
+        self.signal = signal
+        self.signal_reason = _to_text(data.get("signal_reason"))
+        self.signal_strength = _to_text(data.get("signal_strength"))
+        self.prediction = _to_text(data.get("prediction")).upper()
+        self.confidence = _to_text(data.get("confidence")).capitalize()
+        self.prediction_reason = _to_text(data.get("prediction_reason"))
+        self.movement = _to_text(data.get("movement"))
+        self.current_price = _to_price(data.get("current_price"))
+        self.entry = _to_price(data.get("entry"))
+        self.tp1 = _to_price(data.get("tp1"))
+        self.tp2 = _to_price(data.get("tp2"))
+        self.tp3 = _to_price(data.get("tp3"))
+        self.stop_loss = _to_price(data.get("stop_loss"))
+        self.supports = sorted(filter(None, map(_to_price, data.get("supports") or [])), reverse=True)
+        self.resistances = sorted(filter(None, map(_to_price, data.get("resistances") or [])))
+        self.main_trend = _to_text(data.get("main_trend"))
+        self.best_timeframe = _to_text(data.get("best_timeframe"))
+        indicators = data.get("indicators") or {}
+        self.indicators = {key: _to_text(indicators.get(key)) for key in INDICATOR_KEYS}
+        self.risk_warning = _to_text(data.get("risk_warning"))
+        self.narrative = _to_text(data.get("narrative"))
+
+        if self.entry is None:
+            raise ValueError("Harga entry tidak ada")
+
+    def __repr__(self):
+        return f"AnalysisResult({self.symbol} {self.signal} entry={self.entry} tp1={self.tp1} sl={self.stop_loss})"
+
+    def __str__(self):
+        return self.narrative
+
+    def pct_from_entry(self, price):
+        """Jarak harga dari entry dalam persen (bertanda)"""
+        if price is None or not self.entry:
+            return None
+        return (price - self.entry) / self.entry * 100
+
+    @property
+    def risk_reward(self):
+        """Rasio reward:risk TP1 terhadap SL (None jika SL/TP tidak lengkap)"""
+        if self.tp1 is None or self.stop_loss is None or self.entry == self.stop_loss:
+            return None
+        return abs(self.tp1 - self.entry) / abs(self.entry - self.stop_loss)
+
+
+def parse_analysis_json(text, symbol=None):
+    """Parse respons JSON Gemini menjadi AnalysisResult; None (dengan warning) jika tidak sesuai schema"""
+    try:
+        data = json.loads(text)
+        if isinstance(data, list) and data:
+            data = data[0]
+        if not isinstance(data, dict):
+            raise ValueError("Respons bukan objek JSON")
+        return AnalysisResult(data, symbol)
+    except ValueError as e:
+        logger.warning("Respons JSON Gemini %s tidak valid (%s); memakai teks mentah", symbol, e)
+        return None
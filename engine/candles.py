@@ -0,0 +1,59 @@
+"""Utilitas candle: batas candle UTC selaras TradingView dan resampling"""
+
+import time
+
+from engine.config import TIMEFRAME_SECONDS
+
+
+# Epoch jatuh pada hari Kamis; candle mingguan TradingView dimulai Senin 00:00 UTC
+WEEKLY_CANDLE_OFFSET = 4 * 86400
+
+
+def get_candle_bucket_start(timestamp, interval):
+    """Menghitung awal candle (UTC) tempat timestamp berada, selaras dengan jadwal penutupan TradingView"""
+    interval_seconds = TIMEFRAME_SECONDS[interval]
+    offset = WEEKLY_CANDLE_OFFSET if interval == "1week" else 0
+    return timestamp - ((timestamp - offset) % interval_seconds)
+
+
+def resample_candles(candles, interval):
+    """Menggabungkan candle timeframe kecil menjadi candle OHLCV timeframe yang lebih besar"""
+    if not candles or interval not in TIMEFRAME_SECONDS:
+        return []
+    
+    resampled = []
+    current = None
+    
+    for item in candles:
+        timestamp = int(item[0])
+        bucket = get_candle_bucket_start(timestamp, interval)
+        open_price = float(item[1])
+        close_price = float(item[2])
+        high_price = float(item[3])
+        low_price = float(item[4])
+        volume = float(item[5]) if len(item) > 5 else 0
+        
+        if current is None or bucket != current[0]:
+            if current is not None:
+                resampled.append(current)
+            current = [bucket, open_price, close_price, high_price, low_price, volume]
+        else:
+            current[2] = close_price
+            current[3] = max(current[3], high_price)
+            current[4] = min(current[4], low_price)
+            current[5] += volume
+    
+    if current is not None:
+        resampled.append(current)
+    
+    # Candle pertama tidak lengkap jika seri dasar dimulai di tengah periode
+    if resampled and int(candles[0][0]) != resampled[0][0]:
+        resampled = resampled[1:]
+    
+    return resampled
+
+
+def get_next_candle_close(interval, now=None):
+    """Waktu (epoch UTC) penutupan candle yang sedang berjalan"""
+    now = int(now if now is not None else time.time())
+    return get_candle_bucket_start(now, interval) + TIMEFRAME_SECONDS[interval]
@@ -0,0 +1,160 @@
+"""Pembuatan chart candlestick dan chart multi-timeframe"""
+
+from engine.lazy import mpf, mpl_figure, pd
+from engine.console import log_success
+from engine.config import MTF_LABELS
+from engine.indicators import build_ohlc_dataframe, calculate_bollinger_bands, calculate_confluence_score, calculate_ema, calculate_fibonacci_levels, calculate_macd, calculate_rsi, calculate_stochastic_rsi
+
+
+def generate_chart(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
+    """Generate chart candlestick dengan RSI, MACD, Bollinger Bands, Fibonacci, Stochastic RSI, dan EMA200"""
+    if not data:
+        return None
+    
+    try:
+        df = build_ohlc_dataframe(data)
+
+        mc = mpf.make_marketcolors(
+            up='#00AA00', down='#FF0000',
+            wick={'up': '#00AA00', 'down': '#FF0000'},
+            volume={'up': '#00AA00', 'down': '#FF0000'}
+        )
+        style = mpf.make_mpf_style(
+            marketcolors=mc,
+            gridstyle=':',
+            gridcolor='#cccccc',
+            facecolor='#f5f5f5',
+            edgecolor='#666666'
+        )
+
+        ema20 = df['Close'].ewm(span=20, adjust=False).mean()
+        ema50 = df['Close'].ewm(span=50, adjust=False).mean()
+        ema200 = df['Close'].ewm(span=200, adjust=False).mean()
+        
+        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(df['Close'])
+        
+        rsi = calculate_rsi(df['Close'])
+        rsi_overbought = pd.Series([70] * len(df), index=df.index)
+        rsi_oversold = pd.Series([30] * len(df), index=df.index)
+        rsi_middle = pd.Series([50] * len(df), index=df.index)
+        
+        stoch_k, stoch_d = calculate_stochastic_rsi(df['Close'])
+        stoch_overbought = pd.Series([80] * len(df), index=df.index)
+        stoch_oversold = pd.Series([20] * len(df), index=df.index)
+        
+        macd_line, signal_line, macd_histogram = calculate_macd(df['Close'])
+        
+        fib_levels = calculate_fibonacci_levels(df)
+        fib_236 = pd.Series([fib_levels['23.6%']] * len(df), index=df.index)
+        fib_382 = pd.Series([fib_levels['38.2%']] * len(df), index=df.index)
+        fib_500 = pd.Series([fib_levels['50.0%']] * len(df), index=df.index)
+        fib_618 = pd.Series([fib_levels['61.8%']] * len(df), index=df.index)
+        
+        macd_colors = ['#00AA00' if val >= 0 else '#FF0000' for val in macd_histogram]
+        
+        addplots = [
+            mpf.make_addplot(ema20, color='blue', width=1.2),
+            mpf.make_addplot(ema50, color='orange', width=1.2),
+            mpf.make_addplot(ema200, color='red', width=1.5, linestyle='-'),
+            
+            mpf.make_addplot(bb_upper, color='purple', width=0.8, linestyle='--'),
+            mpf.make_addplot(bb_middle, color='purple', width=0.5, linestyle=':'),
+            mpf.make_addplot(bb_lower, color='purple', width=0.8, linestyle='--'),
+            
+            mpf.make_addplot(fib_236, color='#FFD700', width=0.5, linestyle='-.'),
+            mpf.make_addplot(fib_382, color='#FFA500', width=0.5, linestyle='-.'),
+            mpf.make_addplot(fib_500, color='#FF6347', width=0.7, linestyle='-.'),
+            mpf.make_addplot(fib_618, color='#FF4500', width=0.5, linestyle='-.'),
+            
+            mpf.make_addplot(rsi, panel=2, color='#9C27B0', width=1.2, ylabel='RSI'),
+            mpf.make_addplot(rsi_overbought, panel=2, color='red', width=0.5, linestyle='--'),
+            mpf.make_addplot(rsi_oversold, panel=2, color='green', width=0.5, linestyle='--'),
+            mpf.make_addplot(rsi_middle, panel=2, color='gray', width=0.3, linestyle=':'),
+            
+            mpf.make_addplot(stoch_k, panel=3, color='#2196F3', width=1.2, ylabel='Stoch RSI'),
+            mpf.make_addplot(stoch_d, panel=3, color='#FF9800', width=1),
+            mpf.make_addplot(stoch_overbought, panel=3, color='red', width=0.5, linestyle='--'),
+            mpf.make_addplot(stoch_oversold, panel=3, color='green', width=0.5, linestyle='--'),
+            
+            mpf.make_addplot(macd_line, panel=4, color='blue', width=1, ylabel='MACD'),
+            mpf.make_addplot(signal_line, panel=4, color='red', width=1),
+            mpf.make_addplot(macd_histogram, panel=4, type='bar', color=macd_colors, width=0.7),
+        ]
+
+        if market_type == "crypto":
+            ylabel = "Harga (USDT)"
+        else:
+            ylabel = "Harga"
+
+        mpf.plot(
+            df, type='candle', volume=True, style=style,
+            ylabel=ylabel,
+            ylabel_lower="Volume",
+            savefig=dict(fname=filename, dpi=150, bbox_inches='tight'),
+            figratio=(16, 14),
+            figscale=1.5,
+            tight_layout=True,
+            addplot=addplots,
+            warn_too_much_data=500,
+            panel_ratios=(6, 2, 1.5, 1.5, 1.5)
+        )
+        
+        log_success("Chart %s (%s) dibuat", symbol, tf)
+        return filename
+        
+    except Exception:
+        return None
+
+
+def generate_chart_with_confluence(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
+    """Generate chart dan hitung confluence score"""
+    if not data:
+        return None, None
+    
+    try:
+        df = build_ohlc_dataframe(data)
+        
+        confluence = calculate_confluence_score(df, market_type)
+        
+        chart_path = generate_chart(data, filename, symbol, tf, market_type)
+        
+        return chart_path, confluence
+        
+    except Exception:
+        return None, None
+
+
+def generate_mtf_chart(mtf_results, filename="mtf_chart.png", symbol="BTC"):
+    """Generate satu chart gabungan: harga + EMA20/EMA50 untuk setiap timeframe"""
+    if not mtf_results:
+        return None
+    
+    try:
+        cols = 2
+        rows = (len(mtf_results) + cols - 1) // cols
+        fig = mpl_figure.Figure(figsize=(14, 3.2 * rows))
+        axes = fig.subplots(rows, cols, squeeze=False).flatten()
+        
+        for ax, (interval, result) in zip(axes, mtf_results.items()):
+            close = result["df"]["Close"].tail(120)
+            c = result["confluence"]
+            ax.plot(close.index, close.values, color='black', linewidth=1)
+            ax.plot(close.index, calculate_ema(result["df"]["Close"], 20).tail(120).values, color='blue', linewidth=0.8)
+            ax.plot(close.index, calculate_ema(result["df"]["Close"], 50).tail(120).values, color='orange', linewidth=0.8)
+            title_color = '#00AA00' if c['signal'] in ("BUY", "STRONG_BUY") else '#FF0000' if c['signal'] in ("SELL", "STRONG_SELL") else '#666666'
+            ax.set_title(f"{symbol} {MTF_LABELS[interval]} | {c['signal'].replace('_', ' ')} | RSI {c['rsi']:.0f} | ADX {c['adx']:.0f}", color=title_color, fontsize=10)
+            ax.grid(linestyle=':', color='#cccccc')
+            ax.set_facecolor('#f5f5f5')
+            ax.tick_params(labelsize=7)
+        
+        for ax in axes[len(mtf_results):]:
+            ax.set_visible(False)
+        
+        fig.tight_layout()
+        fig.savefig(filename, dpi=110)
+        
+        log_success("Chart MTF %s dibuat", symbol)
+        return filename
+        
+    except Exception:
+        return None
@@ -0,0 +1,104 @@
+"""Konfigurasi bersama: daftar simbol, peta interval, dan konstanta timeframe"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+# json = respons terstruktur (responseSchema) diparse sekali; text = format teks lama + parsing regex
+GEMINI_OUTPUT_MODE = os.environ.get("GEMINI_OUTPUT", "json").lower()
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+# Cache konteks Gemini (cachedContents) untuk prefix instruksi statis; TTL dalam detik
+GEMINI_CONTEXT_CACHE = os.environ.get("GEMINI_CONTEXT_CACHE", "on").lower() not in ("0", "off", "false", "no")
+GEMINI_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", "3600"))
+
+# Endpoint eksternal; bisa diarahkan ke server stub lokal (benchmarks/load_test.py)
+GEMINI_API_URL = os.environ.get("GEMINI_API_URL", "https://generativelanguage.googleapis.com").rstrip("/")
+KUCOIN_API_URL = os.environ.get("KUCOIN_API_URL", "https://api.kucoin.com").rstrip("/")
+TRADINGVIEW_WS_URL = os.environ.get("TRADINGVIEW_WS_URL", "wss://data.tradingview.com/socket.io/websocket")
+YAHOO_FINANCE_ENABLED = os.environ.get("YAHOO_FINANCE", "on").lower() not in ("0", "off", "false", "no")
+
+# Backend cache bersama antar worker: memory | sqlite:///store.db | redis://host:port/db
+SHARED_STORE = os.environ.get("SHARED_STORE", "memory")
+
+SUPPORTED_COINS = {
+    "BTC": {"name": "Bitcoin", "emoji": "₿", "color": "#F7931A", "yf_symbol": "BTC-USD", "tv_symbol": "BTCUSDT"},
+    "ETH": {"name": "Ethereum", "emoji": "Ξ", "color": "#627EEA", "yf_symbol": "ETH-USD", "tv_symbol": "ETHUSDT"},
+    "SOL": {"name": "Solana", "emoji": "◎", "color": "#00FFA3", "yf_symbol": "SOL-USD", "tv_symbol": "SOLUSDT"},
+    "BNB": {"name": "BNB", "emoji": "🔶", "color": "#F3BA2F", "yf_symbol": "BNB-USD", "tv_symbol": "BNBUSDT"},
+    "XRP": {"name": "Ripple", "emoji": "✕", "color": "#23292F", "yf_symbol": "XRP-USD", "tv_symbol": "XRPUSDT"},
+    "ADA": {"name": "Cardano", "emoji": "₳", "color": "#0033AD", "yf_symbol": "ADA-USD", "tv_symbol": "ADAUSDT"},
+    "DOGE": {"name": "Dogecoin", "emoji": "🐕", "color": "#C2A633", "yf_symbol": "DOGE-USD", "tv_symbol": "DOGEUSDT"},
+    "AVAX": {"name": "Avalanche", "emoji": "🔺", "color": "#E84142", "yf_symbol": "AVAX-USD", "tv_symbol": "AVAXUSDT"},
+    "MATIC": {"name": "Polygon", "emoji": "⬡", "color": "#8247E5", "yf_symbol": "MATIC-USD", "tv_symbol": "MATICUSDT"},
+    "LINK": {"name": "Chainlink", "emoji": "⬡", "color": "#2A5ADA", "yf_symbol": "LINK-USD", "tv_symbol": "LINKUSDT"},
+    "DOT": {"name": "Polkadot", "emoji": "●", "color": "#E6007A", "yf_symbol": "DOT-USD", "tv_symbol": "DOTUSDT"},
+    "ATOM": {"name": "Cosmos", "emoji": "⚛", "color": "#2E3148", "yf_symbol": "ATOM-USD", "tv_symbol": "ATOMUSDT"},
+    "UNI": {"name": "Uniswap", "emoji": "🦄", "color": "#FF007A", "yf_symbol": "UNI-USD", "tv_symbol": "UNIUSDT"},
+    "LTC": {"name": "Litecoin", "emoji": "Ł", "color": "#345D9D", "yf_symbol": "LTC-USD", "tv_symbol": "LTCUSDT"},
+}
+
+FOREX_PAIRS = {
+    "XAUUSD": {"name": "Emas", "emoji": "🥇", "yf_symbol": "GC=F", "category": "commodity"},
+    "XAGUSD": {"name": "Perak", "emoji": "🥈", "yf_symbol": "SI=F", "category": "commodity"},
+    "EURUSD": {"name": "EUR/USD", "emoji": "💶", "yf_symbol": "EURUSD=X", "category": "major"},
+    "GBPUSD": {"name": "GBP/USD", "emoji": "💷", "yf_symbol": "GBPUSD=X", "category": "major"},
+    "USDJPY": {"name": "USD/JPY", "emoji": "💴", "yf_symbol": "USDJPY=X", "category": "major"},
+    "USDCHF": {"name": "USD/CHF", "emoji": "🇨🇭", "yf_symbol": "USDCHF=X", "category": "major"},
+    "AUDUSD": {"name": "AUD/USD", "emoji": "🇦🇺", "yf_symbol": "AUDUSD=X", "category": "major"},
+    "USDCAD": {"name": "USD/CAD", "emoji": "🇨🇦", "yf_symbol": "USDCAD=X", "category": "major"},
+    "NZDUSD": {"name": "NZD/USD", "emoji": "🇳🇿", "yf_symbol": "NZDUSD=X", "category": "major"},
+    "EURGBP": {"name": "EUR/GBP", "emoji": "🇪🇺", "yf_symbol": "EURGBP=X", "category": "cross"},
+    "EURJPY": {"name": "EUR/JPY", "emoji": "🇪🇺", "yf_symbol": "EURJPY=X", "category": "cross"},
+    "GBPJPY": {"name": "GBP/JPY", "emoji": "🇬🇧", "yf_symbol": "GBPJPY=X", "category": "cross"},
+    "AUDJPY": {"name": "AUD/JPY", "emoji": "🇦🇺", "yf_symbol": "AUDJPY=X", "category": "cross"},
+    "EURAUD": {"name": "EUR/AUD", "emoji": "🇪🇺", "yf_symbol": "EURAUD=X", "category": "cross"},
+    "EURCHF": {"name": "EUR/CHF", "emoji": "🇪🇺", "yf_symbol": "EURCHF=X", "category": "cross"},
+    "USOIL": {"name": "Minyak Mentah", "emoji": "🛢️", "yf_symbol": "CL=F", "category": "commodity"},
+}
+
+INTERVAL_MAP = {
+    "1min": "1m", "5min": "5m", "15min": "15m",
+    "30min": "30m", "1hour": "1h", "4hour": "4h",
+    "1day": "1d", "1week": "1wk"
+}
+
+KUCOIN_INTERVAL_MAP = {
+    "1min": 60, "3min": 180, "5min": 300, "15min": 900,
+    "30min": 1800, "1hour": 3600, "2hour": 7200,
+    "4hour": 14400, "6hour": 21600, "8hour": 28800,
+    "12hour": 43200, "1day": 86400, "1week": 604800
+}
+
+TIMEFRAME_SECONDS = {
+    "1min": 60,
+    "5min": 300,
+    "15min": 900,
+    "30min": 1800,
+    "1hour": 3600,
+    "4hour": 14400,
+    "1day": 86400,
+    "1week": 604800
+}
+
+
+CANDLE_SYNC_BUFFER = 5
+
+
+MTF_INTERVALS = ["1min", "5min", "15min", "30min", "1hour", "4hour", "1day", "1week"]
+
+MTF_LABELS = {
+    "1min": "1m", "5min": "5m", "15min": "15m", "30min": "30m",
+    "1hour": "1j", "4hour": "4j", "1day": "1h", "1week": "1mg"
+}
+
+SIGNAL_EMOJI = {
+    "STRONG_BUY": "🟢🟢",
+    "BUY": "🟢",
+    "HOLD": "🟡",
+    "SELL": "🔴",
+    "STRONG_SELL": "🔴🔴"
+}
@@ -0,0 +1,231 @@
+"""
+Output konsol berwarna dan logger bersama untuk semua bot
+
+Semua log (logger modul maupun helper log_info/log_data/...) masuk antrean dan ditulis oleh satu thread
+listener, jadi handler Telegram tidak pernah menunggu I/O konsol. Argumen log diformat di thread listener
+(gunakan gaya log_info("... %s", nilai) untuk argumen yang mahal). Log DEBUG dibatasi per baris kode
+(LOG_DEBUG_RATE per detik, selebihnya disampel) dan LOG_FORMAT=json menghasilkan satu objek JSON per baris.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# console (berwarna) | json (satu objek per baris, untuk agregator log)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "console").lower()
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Per baris kode: maksimal N log DEBUG per detik, selebihnya hanya 1 dari LOG_DEBUG_SAMPLE yang ditulis
+LOG_DEBUG_RATE = int(os.environ.get("LOG_DEBUG_RATE", "5"))
+LOG_DEBUG_SAMPLE = int(os.environ.get("LOG_DEBUG_SAMPLE", "100"))
+
+
+class Colors:
+    RESET = '\033[0m'
+    BOLD = '\033[1m'
+    DIM = '\033[2m'
+
+    RED = '\033[91m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    MAGENTA = '\033[95m'
+    CYAN = '\033[96m'
+    WHITE = '\033[97m'
+
+    BG_RED = '\033[41m'
+    BG_GREEN = '\033[42m'
+    BG_BLUE = '\033[44m'
+
+
+def record_suffix(record):
+    """Catatan log yang ditekan sampler atau dibuang karena antrean penuh sejak record sebelumnya"""
+    notes = []
+    if getattr(record, "suppressed", 0):
+        notes.append(f"+{record.suppressed} log serupa dilewati")
+    if getattr(record, "dropped", 0):
+        notes.append(f"{record.dropped} log dibuang, antrean penuh")
+    return f" ({'; '.join(notes)})" if notes else ""
+
+
+class ColoredFormatter(logging.Formatter):
+    LEVEL_STYLES = {
+        logging.DEBUG: Colors.DIM,
+        logging.INFO: Colors.CYAN,
+        logging.WARNING: Colors.YELLOW,
+        logging.ERROR: f"{Colors.RED}{Colors.BOLD}",
+        logging.CRITICAL: f"{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}",
+    }
+
+    def format(self, record):
+        message = record.getMessage() + record_suffix(record)
+        icon = getattr(record, "icon", None)
+        if icon:
+            text = f"{record.color}  {icon} {message}{Colors.RESET}"
+        else:
+            text = f"{self.LEVEL_STYLES.get(record.levelno, '')}{message}{Colors.RESET}"
+        if record.exc_info:
+            text = f"{text}\n{self.formatException(record.exc_info)}"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per record: ts, level, logger, msg (+ kind helper, jumlah log yang ditekan, exc)"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("kind", "suppressed", "dropped"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class QuietFilter(logging.Filter):
+    def filter(self, record):
+        noisy_messages = [
+            'HTTP Request',
+            'httpx',
+            'httpcore',
+            'urllib3',
+            'Retrying',
+            'Starting new HTTP',
+        ]
+        return not any(msg in record.getMessage() for msg in noisy_messages)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Batasi log DEBUG per baris kode: LOG_DEBUG_RATE per detik, setelah itu 1 dari LOG_DEBUG_SAMPLE.
+    Jumlah yang dilewati dilaporkan di record berikutnya dari baris yang sama (atribut suppressed).
+    """
+
+    def __init__(self, rate, sample):
+        super().__init__()
+        self.rate = rate
+        self.sample = max(1, sample)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                record.suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                return True
+            window[1] += 1
+            if window[1] <= self.rate or window[1] % self.sample == 0:
+                record.suppressed, window[2] = window[2], 0
+                return True
+            window[2] += 1
+            return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler tanpa format di thread pemanggil: msg % args dikerjakan listener.
+    Antrean penuh tidak pernah memblokir; record dibuang dan jumlahnya dilaporkan di record berikutnya.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped, self.dropped = self.dropped, 0
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1 + getattr(record, "dropped", 0)
+
+
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('httpcore').setLevel(logging.WARNING)
+logging.getLogger('urllib3').setLevel(logging.WARNING)
+logging.getLogger('telegram').setLevel(logging.WARNING)
+logging.getLogger('yfinance').setLevel(logging.WARNING)
+
+console_handler = logging.StreamHandler(sys.stderr)
+console_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else ColoredFormatter())
+console_handler.addFilter(QuietFilter())
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = LazyQueueHandler(log_queue)
+queue_handler.addFilter(DebugSampler(LOG_DEBUG_RATE, LOG_DEBUG_SAMPLE))
+
+log_listener = logging.handlers.QueueListener(log_queue, console_handler)
+log_listener.start()
+# Tulis sisa antrean sebelum proses keluar
+atexit.register(log_listener.stop)
+
+
+def get_logger(name):
+    """Logger dengan handler antrean bersama (tanpa propagasi ke root)"""
+    logger = logging.getLogger(name)
+    logger.setLevel(LOG_LEVEL)
+    logger.handlers = []
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    return logger
+
+
+_console = get_logger("console")
+
+
+def _emit(level, kind, icon, color, message, args):
+    if _console.isEnabledFor(level):
+        # stacklevel: baris pemanggil log_*() yang tercatat (dan menjadi kunci DebugSampler)
+        _console.log(level, message, *args, extra={"kind": kind, "icon": icon, "color": color}, stacklevel=3)
+
+
+def log_success(message, *args):
+    _emit(logging.INFO, "success", "✓", Colors.GREEN, message, args)
+
+
+def log_warning(message, *args):
+    _emit(logging.WARNING, "warning", "⚠", Colors.YELLOW, message, args)
+
+
+def log_error(message, *args):
+    _emit(logging.ERROR, "error", "✗", Colors.RED, message, args)
+
+
+def log_info(message, *args):
+    _emit(logging.INFO, "info", "ℹ", Colors.CYAN, message, args)
+
+
+def log_data(message, *args):
+    _emit(logging.INFO, "data", "📡", Colors.MAGENTA, message, args)
+
+
+def log_analysis(message, *args):
+    _emit(logging.INFO, "analysis", "🤖", Colors.BLUE, message, args)
+
+
+def log_debug(message, *args):
+    """Diagnostik rinci; tidak ditulis pada LOG_LEVEL default dan disampel jika terlalu sering"""
+    _emit(logging.DEBUG, "debug", "·", Colors.DIM, message, args)
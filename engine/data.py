@@ -0,0 +1,803 @@
+"""Pengambilan data pasar (TradingView, Yahoo Finance, KuCoin) dengan cache candle"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from engine import live
+from engine.lazy import is_module_available, pd, requests, yf
+from engine.console import log_data, log_error
+from engine.config import (
+    FOREX_PAIRS, INTERVAL_MAP, KUCOIN_API_URL, KUCOIN_INTERVAL_MAP, SUPPORTED_COINS, TIMEFRAME_SECONDS,
+)
+from engine.candles import resample_candles
+from engine.store import get_store
+from engine.tradingview import (
+    TV_FETCH_TIMEOUT, TV_MAX_BARS_PER_REQUEST, TV_RESOLUTIONS, TradingViewError, get_tv_pool,
+)
+
+
+TV_AVAILABLE = is_module_available("websocket")
+
+# Exchange TradingView yang dicoba berurutan jika simbol ditolak exchange sebelumnya
+TV_EXCHANGES = {
+    "crypto": ['BINANCE', 'BYBIT', 'COINBASE', 'KRAKEN', 'BITSTAMP'],
+    "forex": ['OANDA', 'FXCM', 'FX_IDC', 'FOREXCOM', 'CAPITALCOM'],
+}
+
+# Timeframe yang bisa diturunkan dari seri dasar yang lebih kecil
+RESAMPLE_SOURCES = {
+    "5min": "1min",
+    "15min": "5min",
+    "30min": "5min",
+    "1hour": "5min",
+    "4hour": "1hour",
+    "1day": "1hour",
+}
+
+# Candle harian/mingguan forex upstream mengikuti rollover sesi FX (17:00 New York), bukan tengah malam UTC:
+# bucket UTC dari 1hour menghasilkan candle Minggu malam yang terpotong, jadi keduanya selalu diambil upstream
+LOCAL_RESAMPLE_EXCLUDED = {"forex": {"1day", "1week"}}
+
+# Kedalaman seri dasar, cukup untuk menghasilkan 200 candle pada timeframe turunan terbesar
+BASE_SERIES_BARS = {
+    "1min": 1200,
+    "5min": 2500,
+    "1hour": 5000,
+}
+
+CANDLE_BARS = 200
+
+
+CANDLE_CACHE_TTL = int(os.environ.get("CANDLE_CACHE_TTL", "60"))
+# Seri dasar disimpan di kunci terpisah dan dipakai ulang selama BASE_SERIES_TTL: setelah CANDLE_CACHE_TTL
+# hanya ekornya (CANDLE_BARS terbaru) yang diambil ulang dan disambung, bukan seluruh BASE_SERIES_BARS
+BASE_SERIES_TTL = int(os.environ.get("BASE_SERIES_TTL", "1800"))
+
+# Cache candle ada di store bersama (SHARED_STORE) agar worker lain ikut memakai hasil fetch
+candle_cache_lock = threading.Lock()
+base_series_locks = {}
+
+
+def get_tv_symbol(market_type, symbol):
+    """Nama simbol TradingView tanpa exchange (crypto memakai pasangan USDT)"""
+    if market_type == "crypto":
+        return SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
+    return symbol
+
+
+def fetch_tradingview_bulk(series):
+    """
+    Banyak seri dalam satu sesi TradingView multipleks. series: {(market_type, symbol, interval): n_bars}.
+    Seri yang ditolak exchange pertama dicoba lagi di exchange berikutnya (satu batch per putaran).
+    Mengembalikan {(market_type, symbol, interval): candles}; seri yang gagal tidak disertakan.
+    """
+    results = {}
+    if not TV_AVAILABLE:
+        return results
+    
+    remaining = {key: n_bars for key, n_bars in series.items() if key[2] in TV_RESOLUTIONS}
+    for round_index in range(max(map(len, TV_EXCHANGES.values()))):
+        series_by_request = {}
+        for key, n_bars in remaining.items():
+            exchanges = TV_EXCHANGES[key[0]]
+            if round_index < len(exchanges):
+                tv_symbol = f"{exchanges[round_index]}:{get_tv_symbol(key[0], key[1])}"
+                series_by_request[(tv_symbol, key[2], n_bars)] = key
+        if not series_by_request:
+            break
+        
+        try:
+            batch = get_tv_pool().fetch_many(series_by_request)
+        except TradingViewError as e:
+            log_error("Batch TradingView (%s seri) gagal: %s", len(series_by_request), e)
+            break
+        
+        for request, key in series_by_request.items():
+            candles = batch.get(request)
+            if candles is None and request in batch:
+                # Simbol ditolak exchange ini, coba exchange berikutnya
+                continue
+            # Selesai (atau lewat deadline) - tidak dicoba lagi di TradingView
+            del remaining[key]
+            if candles and len(candles) >= 20:
+                results[key] = candles
+        if not remaining:
+            break
+    
+    log_data("%s/%s seri dari batch TradingView", len(results), len(series))
+    return results
+
+
+def fetch_tradingview_candles(market_type, symbol, interval, n_bars, timeout=None):
+    """Candle satu simbol dari TradingView, mencoba TV_EXCHANGES berurutan sampai ada yang menerima simbolnya"""
+    tv_symbol = get_tv_symbol(market_type, symbol)
+    
+    for exchange in TV_EXCHANGES[market_type]:
+        try:
+            candles = get_tv_pool().fetch(f"{exchange}:{tv_symbol}", interval, n_bars, timeout)
+        except TradingViewError:
+            # Koneksi bermasalah, bukan simbolnya - exchange lain tidak akan lebih baik
+            break
+        
+        if candles:
+            log_data("%s (%s): %s candle dari TradingView", symbol, interval, len(candles))
+            return candles
+    
+    return None
+
+
+def fetch_crypto_from_tradingview(symbol="BTC", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Crypto dari TradingView"""
+    
+    if not TV_AVAILABLE:
+        return None
+    
+    if interval not in TV_RESOLUTIONS:
+        return None
+    
+    if symbol not in SUPPORTED_COINS:
+        return None
+    
+    return fetch_tradingview_candles("crypto", symbol, interval, n_bars)
+
+
+# Yahoo tidak menyediakan 4h: ambil 1h lalu resample lokal (batas candle UTC sama dengan TradingView)
+YF_RESAMPLE_SOURCES = {"4hour": "1hour"}
+
+# Rentang fetch Yahoo = jumlah bar x durasi bar x padding; pasar non-crypto tutup di akhir pekan/libur
+YF_WINDOW_PADDING = {"crypto": 1.1, "forex": 1.6}
+YF_CLOSED_MARKET_SLACK = 3 * 86400
+
+# Request chart Yahoo per simbol yang dijalankan paralel oleh yf.download
+YF_BULK_THREADS = 8
+
+# Batas histori intraday Yahoo (detik ke belakang dari sekarang)
+YF_MAX_LOOKBACK = {
+    "1m": 7 * 86400,
+    "5m": 59 * 86400,
+    "15m": 59 * 86400,
+    "30m": 59 * 86400,
+    "1h": 729 * 86400,
+}
+
+
+def frame_to_candles(df):
+    """DataFrame OHLCV (index waktu) -> [[timestamp, open, close, high, low, volume], ...] tanpa iterasi per baris"""
+    df = df.rename(columns=str.lower).dropna(subset=["open", "high", "low", "close"])
+    if df.empty:
+        return []
+    index = df.index.tz_localize("UTC") if df.index.tz is None else df.index
+    # Selisih terhadap epoch, tidak bergantung resolusi index (ns/us/s)
+    timestamps = ((index - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).tolist()
+    volume = df["volume"].fillna(0).tolist() if "volume" in df else [0.0] * len(df)
+    return [
+        [int(ts), float(o), float(c), float(h), float(lo), float(v)]
+        for ts, o, c, h, lo, v in zip(
+            timestamps, df["open"].tolist(), df["close"].tolist(), df["high"].tolist(), df["low"].tolist(), volume
+        )
+    ]
+
+
+def yfinance_request(interval, n_bars, market_type):
+    """
+    Parameter request Yahoo untuk n_bars candle terakhir: rentang start/end dihitung dari n_bars
+    (bukan period="1y"); 4hour diambil sebagai 1h lalu di-resample.
+    """
+    source_interval = YF_RESAMPLE_SOURCES.get(interval, interval)
+    ratio = TIMEFRAME_SECONDS[interval] // TIMEFRAME_SECONDS[source_interval]
+    # Satu candle ekstra: candle pertama hasil resample dibuang jika seri dimulai di tengah periode
+    source_bars = (n_bars + 1) * ratio
+    yf_interval = INTERVAL_MAP[source_interval]
+
+    end = int(time.time())
+    window = source_bars * TIMEFRAME_SECONDS[source_interval] * YF_WINDOW_PADDING[market_type]
+    if market_type != "crypto":
+        window += YF_CLOSED_MARKET_SLACK
+    start = max(end - int(window), end - YF_MAX_LOOKBACK.get(yf_interval, end))
+    return {
+        "start": datetime.fromtimestamp(start, timezone.utc),
+        "end": datetime.fromtimestamp(end, timezone.utc),
+        "interval": yf_interval,
+        "actions": False,
+    }
+
+
+def yfinance_frame_to_candles(df, interval, n_bars):
+    """Frame hasil request yfinance_request -> n_bars candle terakhir pada interval yang diminta"""
+    candles = frame_to_candles(df)
+    if interval in YF_RESAMPLE_SOURCES:
+        candles = resample_candles(candles, interval)
+    return candles[-n_bars:] if len(candles) > n_bars else candles
+
+
+def fetch_yfinance_candles(yf_symbol, interval, n_bars, market_type="crypto"):
+    """Ambil n_bars candle terakhir satu simbol dari Yahoo Finance"""
+    df = yf.Ticker(yf_symbol).history(**yfinance_request(interval, n_bars, market_type))
+    if df is None or df.empty:
+        return None
+    return yfinance_frame_to_candles(df, interval, n_bars)
+
+
+def fetch_yfinance_candles_bulk(yf_symbols, interval, n_bars, market_type="forex"):
+    """
+    Ambil banyak simbol Yahoo sekaligus lewat yf.download: satu sesi (cookie/crumb) dan satu frame gabungan,
+    lalu dipecah per simbol. Mengembalikan {yf_symbol: candles}; simbol tanpa data tidak disertakan.
+    """
+    yf_symbols = list(yf_symbols)
+    df = yf.download(
+        yf_symbols,
+        group_by="ticker",
+        threads=min(len(yf_symbols), YF_BULK_THREADS),
+        ignore_tz=False,
+        progress=False,
+        **yfinance_request(interval, n_bars, market_type),
+    )
+    if df is None or df.empty:
+        return {}
+    # Rilis yfinance lama (tanpa multi_level_index) mengembalikan kolom datar untuk satu ticker
+    if not isinstance(df.columns, pd.MultiIndex):
+        df.columns = pd.MultiIndex.from_product([yf_symbols[:1], df.columns])
+
+    results = {}
+    tickers = set(df.columns.get_level_values(0))
+    for yf_symbol in yf_symbols:
+        if yf_symbol not in tickers:
+            continue
+        candles = yfinance_frame_to_candles(df[yf_symbol], interval, n_bars)
+        if candles:
+            results[yf_symbol] = candles
+    return results
+
+
+def fetch_crypto_from_yfinance(symbol="BTC", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Crypto dari Yahoo Finance (cadangan)"""
+    
+    if not yf:
+        return None
+    
+    if interval not in INTERVAL_MAP:
+        return None
+    
+    if symbol not in SUPPORTED_COINS:
+        return None
+
+    try:
+        candles = fetch_yfinance_candles(SUPPORTED_COINS[symbol]["yf_symbol"], interval, n_bars, "crypto")
+        if not candles:
+            return None
+        
+        log_data("%s (%s): %s candle dari Yahoo Finance", symbol, interval, len(candles))
+        return candles
+        
+    except Exception:
+        return None
+
+
+# KuCoin membatasi satu response /market/candles ke 1500 candle; histori lebih panjang dipecah per jendela
+KUCOIN_MAX_CANDLES = 1500
+KUCOIN_BACKFILL_WORKERS = int(os.environ.get("KUCOIN_BACKFILL_WORKERS", "4"))
+# Jeda minimal antar request KuCoin dari semua thread (batas rate endpoint publik)
+KUCOIN_REQUEST_INTERVAL = float(os.environ.get("KUCOIN_REQUEST_INTERVAL", "0.1"))
+KUCOIN_RETRIES = 3
+
+# Batas kedalaman backfill_candles agar satu permintaan tidak menghabiskan rate limit sumber data
+BACKFILL_MAX_BARS = int(os.environ.get("BACKFILL_MAX_BARS", "20000"))
+
+
+class RateLimiter:
+    """Memberi jarak minimal antar request dari semua thread; pause() menunda semua request berikutnya"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+kucoin_rate_limiter = RateLimiter(KUCOIN_REQUEST_INTERVAL)
+
+
+def fetch_kucoin_window(pair, interval, start_at, end_at):
+    """Satu request candle KuCoin (maks. 1500); 429 ditunggu sesuai gw-ratelimit-reset lalu diulang"""
+    for attempt in range(KUCOIN_RETRIES):
+        kucoin_rate_limiter.wait()
+        response = requests.get(
+            f"{KUCOIN_API_URL}/api/v1/market/candles",
+            params={"symbol": pair, "type": interval, "startAt": start_at, "endAt": end_at},
+            timeout=30
+        )
+        if response.status_code == 429:
+            reset_ms = response.headers.get("gw-ratelimit-reset")
+            kucoin_rate_limiter.pause(int(reset_ms) / 1000 if reset_ms and reset_ms.isdigit() else 2 ** attempt)
+            continue
+        response.raise_for_status()
+        data = response.json()
+        if data.get("code") == "429000":
+            kucoin_rate_limiter.pause(2 ** attempt)
+            continue
+        if data.get("code") != "200000":
+            return None
+        return data.get("data") or []
+    return None
+
+
+def stitch_candles(chunks):
+    """Gabungkan potongan candle: dedupe per timestamp (potongan terakhir menang) dan urutkan"""
+    merged = {}
+    for chunk in chunks:
+        for candle in chunk or []:
+            merged[int(candle[0])] = candle
+    return [merged[ts] for ts in sorted(merged)]
+
+
+def fetch_crypto_kucoin(symbol="BTC", interval="15min", candle_limit=200):
+    """
+    Mengambil data candlestick dari KuCoin API (cadangan). candle_limit di atas 1500 dipecah per jendela
+    1500 candle yang diambil paralel (KUCOIN_BACKFILL_WORKERS, dibatasi rate limiter) lalu disambung.
+    """
+    pair = f"{symbol}-USDT"
+    
+    if interval not in KUCOIN_INTERVAL_MAP:
+        return None
+    
+    step = KUCOIN_INTERVAL_MAP[interval]
+    end_at = int(datetime.now(timezone.utc).timestamp())
+    start_at = end_at - step * candle_limit
+    windows = [
+        (window_start, min(window_start + step * KUCOIN_MAX_CANDLES, end_at))
+        for window_start in range(start_at, end_at, step * KUCOIN_MAX_CANDLES)
+    ]
+
+    try:
+        if len(windows) == 1:
+            chunks = [fetch_kucoin_window(pair, interval, start_at, end_at)]
+        else:
+            workers = min(KUCOIN_BACKFILL_WORKERS, len(windows))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kucoin-backfill") as executor:
+                chunks = list(executor.map(lambda window: fetch_kucoin_window(pair, interval, *window), windows))
+        
+        # Jendela yang gagal meninggalkan celah: pakai hanya bagian kontinu setelah kegagalan terakhir
+        failed = [index for index, chunk in enumerate(chunks) if chunk is None]
+        if failed:
+            chunks = chunks[failed[-1] + 1:]
+        
+        candles = stitch_candles(chunks)
+        if not candles:
+            return None
+        
+        candles = candles[-candle_limit:]
+        log_data("%s (%s): %s candle dari KuCoin (%s request)", symbol, interval, len(candles), len(windows))
+        return candles
+        
+    except Exception:
+        return None
+
+
+def fetch_crypto_data(symbol="BTC", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Crypto - prioritas TradingView, cadangan Yahoo Finance, lalu KuCoin"""
+    
+    if symbol not in SUPPORTED_COINS:
+        return None
+    
+    data = fetch_crypto_from_tradingview(symbol, interval, n_bars)
+    if data and len(data) >= 20:
+        return data
+    
+    return fetch_crypto_fallback(symbol, interval, n_bars)
+
+
+def fetch_crypto_fallback(symbol, interval, n_bars):
+    """Sumber cadangan crypto setelah TradingView: Yahoo Finance, lalu KuCoin"""
+    data = fetch_crypto_from_yfinance(symbol, interval, n_bars)
+    if data and len(data) >= 20:
+        return data
+    
+    data = fetch_crypto_kucoin(symbol, interval, n_bars)
+    if data and len(data) >= 20:
+        return data
+    
+    log_error("Gagal mengambil data %s", symbol)
+    return None
+
+
+def fetch_forex_from_tradingview(symbol="XAUUSD", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Forex dari TradingView"""
+    
+    if not TV_AVAILABLE:
+        return None
+    
+    if interval not in TV_RESOLUTIONS or interval == "1week":
+        return None
+    
+    if symbol not in FOREX_PAIRS:
+        return None
+    
+    return fetch_tradingview_candles("forex", symbol, interval, n_bars)
+
+
+def fetch_forex_from_yfinance(symbol="XAUUSD", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Forex dari Yahoo Finance (cadangan)"""
+    
+    if not yf:
+        return None
+    
+    if interval not in INTERVAL_MAP or interval == "1week":
+        return None
+    
+    if symbol not in FOREX_PAIRS:
+        return None
+
+    try:
+        candles = fetch_yfinance_candles(FOREX_PAIRS[symbol]["yf_symbol"], interval, n_bars, "forex")
+        if not candles:
+            return None
+        
+        log_data("%s (%s): %s candle dari Yahoo Finance", symbol, interval, len(candles))
+        return candles
+        
+    except Exception:
+        return None
+
+
+def fetch_forex_data(symbol="XAUUSD", interval="1hour", n_bars=200):
+    """Mengambil data candlestick Forex - prioritas TradingView, cadangan Yahoo Finance"""
+    
+    forex_interval_map = {k: v for k, v in INTERVAL_MAP.items() if k != "1week"}
+    
+    if interval not in forex_interval_map:
+        return None
+    
+    if symbol not in FOREX_PAIRS:
+        return None
+    
+    data = fetch_forex_from_tradingview(symbol, interval, n_bars)
+    if data and len(data) >= 20:
+        return data
+    
+    data = fetch_forex_from_yfinance(symbol, interval, n_bars)
+    if data and len(data) >= 20:
+        return data
+    
+    log_error("Gagal mengambil data %s", symbol)
+    return None
+
+
+def backfill_candles(symbol, interval, n_bars, market_type="crypto"):
+    """
+    Histori panjang (di atas batas satu request) untuk backtest dan indikator dengan lookback panjang,
+    mis. pemanasan EMA200 di timeframe besar. Crypto lewat KuCoin: jendela 1500 candle diambil paralel,
+    lebih cepat dari halaman TradingView yang berurutan. Forex (dan crypto jika KuCoin gagal) lewat
+    TradingView dengan request_more_data. Hasil disambung, tanpa duplikat, dan urut waktu; None jika gagal.
+    """
+    n_bars = min(n_bars, BACKFILL_MAX_BARS)
+    if market_type == "crypto":
+        if symbol not in SUPPORTED_COINS:
+            return None
+        candles = fetch_crypto_kucoin(symbol, interval, n_bars)
+        if candles and len(candles) >= min(n_bars, 20):
+            return candles
+    elif symbol not in FOREX_PAIRS or interval == "1week":
+        return None
+    
+    if not TV_AVAILABLE or interval not in TV_RESOLUTIONS:
+        return None
+    pages = -(-n_bars // TV_MAX_BARS_PER_REQUEST)
+    return fetch_tradingview_candles(market_type, symbol, interval, n_bars, timeout=TV_FETCH_TIMEOUT * pages)
+
+
+def fetch_forex_bulk(symbols, interval="1hour", n_bars=200):
+    """
+    Candle banyak pasangan forex sekaligus: satu batch TradingView multipleks, lalu semua simbol yang gagal
+    diambil dalam satu bulk download Yahoo Finance. Mengembalikan {symbol: candles}.
+    """
+    if interval not in INTERVAL_MAP or interval == "1week":
+        return {}
+    
+    symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in FOREX_PAIRS]
+    batch = fetch_tradingview_bulk({("forex", symbol, interval): n_bars for symbol in symbols})
+    results = {key[1]: candles for key, candles in batch.items()}
+    
+    missing = [symbol for symbol in symbols if symbol not in results]
+    results.update(fetch_forex_bulk_from_yfinance(missing, interval, n_bars))
+    
+    for symbol in symbols:
+        if symbol not in results:
+            log_error("Gagal mengambil data %s", symbol)
+    return results
+
+
+def fetch_forex_bulk_from_yfinance(symbols, interval, n_bars):
+    """Pasangan forex dalam satu bulk download Yahoo Finance (cadangan); {symbol: candles}"""
+    results = {}
+    if not symbols or not yf:
+        return results
+    
+    yf_symbols = {FOREX_PAIRS[symbol]["yf_symbol"]: symbol for symbol in symbols}
+    try:
+        bulk = fetch_yfinance_candles_bulk(yf_symbols, interval, n_bars, "forex")
+    except Exception as e:
+        log_error("Bulk Yahoo Finance %s gagal: %s", interval, e)
+        bulk = {}
+    for yf_symbol, data in bulk.items():
+        if len(data) >= 20:
+            results[yf_symbols[yf_symbol]] = data
+    log_data("%s/%s pasangan (%s) dari bulk Yahoo Finance", len(results), len(symbols), interval)
+    return results
+
+
+def get_cached_candles(market_type, symbol, interval, fetched_after=None):
+    """Mengambil candle dari cache jika masih segar (dan diambil setelah fetched_after, jika diberikan)"""
+    entry = get_store().get(f"candles:{market_type}:{symbol}:{interval}")
+    
+    if not entry or time.time() - entry["fetched_at"] >= CANDLE_CACHE_TTL:
+        return None
+    if fetched_after and entry["fetched_at"] < fetched_after:
+        return None
+    return entry["candles"]
+
+
+def store_cached_candles(market_type, symbol, interval, candles, fetched_at=None):
+    """Menyimpan candle ke cache"""
+    get_store().set(
+        f"candles:{market_type}:{symbol}:{interval}",
+        {"candles": candles, "fetched_at": fetched_at or time.time()},
+        ttl=CANDLE_CACHE_TTL
+    )
+
+
+def get_base_series_entry(market_type, symbol, interval):
+    """Entri seri dasar (candles, fetched_at = ekor terakhir diperbarui, created_at = fetch penuh)"""
+    entry = get_store().get(f"base:{market_type}:{symbol}:{interval}")
+    if not entry or time.time() - entry["created_at"] >= BASE_SERIES_TTL:
+        return None
+    return entry
+
+
+def is_base_series_fresh(entry, fetched_after=None):
+    if not entry or time.time() - entry["fetched_at"] >= CANDLE_CACHE_TTL:
+        return False
+    return not fetched_after or entry["fetched_at"] >= fetched_after
+
+
+def store_base_series(market_type, symbol, interval, candles, fetched_at=None, created_at=None):
+    fetched_at = fetched_at or time.time()
+    get_store().set(
+        f"base:{market_type}:{symbol}:{interval}",
+        {"candles": candles, "fetched_at": fetched_at, "created_at": created_at or fetched_at},
+        ttl=BASE_SERIES_TTL
+    )
+
+
+def extend_base_series(market_type, symbol, interval, entry, tail, fetched_at=None):
+    """
+    Sambung ekor terbaru ke seri dasar lama dan simpan. None jika ekor tidak bertemu seri lama (ada celah),
+    sehingga pemanggil harus mengambil ulang seri penuh.
+    """
+    if not tail or int(tail[0][0]) > int(entry["candles"][-1][0]):
+        return None
+    candles = stitch_candles([entry["candles"], tail])[-BASE_SERIES_BARS.get(interval, CANDLE_BARS):]
+    store_base_series(market_type, symbol, interval, candles, fetched_at, entry["created_at"])
+    return candles
+
+
+def get_resample_source(market_type, interval):
+    """Timeframe dasar untuk menurunkan interval secara lokal, None jika harus diambil upstream"""
+    if interval in LOCAL_RESAMPLE_EXCLUDED.get(market_type, ()):
+        return None
+    return RESAMPLE_SOURCES.get(interval)
+
+
+def fetch_base_series(symbol, interval, market_type="crypto", fetched_after=None):
+    """Mengambil seri dasar yang panjang (dari cache jika ada) untuk diturunkan ke timeframe lebih besar"""
+    key = (market_type, symbol, interval)
+    with candle_cache_lock:
+        series_lock = base_series_locks.setdefault(key, threading.Lock())
+    
+    # Satu fetch per seri dasar - request paralel untuk timeframe turunan menunggu hasil yang sama
+    with series_lock:
+        entry = get_base_series_entry(market_type, symbol, interval)
+        if is_base_series_fresh(entry, fetched_after):
+            return entry["candles"]
+        
+        if entry:
+            # Seri pendek timeframe dasar itu sendiri (cache atau satu fetch biasa) cukup untuk ekornya
+            fetched_at = time.time()
+            tail = get_cached_candles(market_type, symbol, interval, fetched_after)
+            if not tail:
+                tail = fetch_market_data(symbol, interval, market_type, fetched_after, derive=False)
+            candles = extend_base_series(market_type, symbol, interval, entry, tail, fetched_at)
+            if candles:
+                return candles
+        
+        n_bars = BASE_SERIES_BARS.get(interval, CANDLE_BARS)
+        if market_type == "crypto":
+            candles = fetch_crypto_data(symbol, interval, n_bars)
+        else:
+            candles = fetch_forex_data(symbol, interval, n_bars)
+        
+        if candles:
+            store_base_series(market_type, symbol, interval, candles)
+        return candles
+
+
+def fetch_market_data(symbol, interval, market_type="crypto", fetched_after=None, derive=True):
+    """Mengambil candle lewat cache - timeframe besar diturunkan dari seri dasar tanpa request tambahan"""
+    candles = get_cached_candles(market_type, symbol, interval, fetched_after)
+    if candles:
+        return candles
+    
+    base_interval = get_resample_source(market_type, interval) if derive else None
+    if base_interval:
+        base = fetch_base_series(symbol, base_interval, market_type, fetched_after)
+        derived = resample_candles(base, interval)
+        if len(derived) >= CANDLE_BARS:
+            derived = derived[-CANDLE_BARS:]
+            store_cached_candles(market_type, symbol, interval, derived)
+            log_data("%s (%s): %s candle diturunkan dari %s", symbol, interval, len(derived), base_interval)
+            return derived
+    
+    if market_type == "crypto":
+        candles = fetch_crypto_data(symbol, interval)
+    else:
+        candles = fetch_forex_data(symbol, interval)
+    
+    if candles:
+        store_cached_candles(market_type, symbol, interval, candles)
+    return candles
+
+
+def prefetch_market_data(symbols, intervals, fetched_after=None):
+    """
+    Isi cache candle banyak simbol (crypto dan forex) x timeframe sekaligus, untuk job yang memproses banyak
+    simbol; fetch_market_data per simbol sesudahnya membaca cache. Timeframe turunan mengisi seri dasarnya.
+    Semua seri diambil dalam satu batch TradingView multipleks; yang gagal lewat bulk Yahoo (forex) atau
+    sumber cadangan per simbol (crypto). Mengembalikan jumlah seri yang di-cache.
+    """
+    if isinstance(intervals, str):
+        intervals = [intervals]
+    
+    series = {}
+    # Seri dasar yang masih dalam BASE_SERIES_TTL: cukup ambil ekornya lalu disambung
+    base_entries = {}
+    for symbol in dict.fromkeys(symbols):
+        market_type = "crypto" if symbol in SUPPORTED_COINS else "forex" if symbol in FOREX_PAIRS else None
+        if market_type is None:
+            continue
+        for interval in intervals:
+            base_interval = get_resample_source(market_type, interval)
+            fetch_interval = base_interval or interval
+            if market_type == "forex" and fetch_interval == "1week":
+                continue
+            if get_cached_candles(market_type, symbol, interval, fetched_after):
+                continue
+            key = (market_type, symbol, fetch_interval)
+            n_bars = CANDLE_BARS
+            if base_interval:
+                entry = get_base_series_entry(market_type, symbol, fetch_interval)
+                if is_base_series_fresh(entry, fetched_after):
+                    continue
+                if entry:
+                    base_entries[key] = entry
+                else:
+                    n_bars = BASE_SERIES_BARS.get(fetch_interval, CANDLE_BARS)
+            series[key] = max(series.get(key, 0), n_bars)
+    if len(series) < 2:
+        return 0
+    
+    fetched_at = time.time()
+    results = fetch_tradingview_bulk(series)
+    
+    forex_missing = {}
+    for key, n_bars in series.items():
+        if key in results:
+            continue
+        market_type, symbol, interval = key
+        if market_type == "forex":
+            forex_missing.setdefault((interval, n_bars), []).append(symbol)
+        else:
+            candles = fetch_crypto_fallback(symbol, interval, n_bars)
+            if candles:
+                results[key] = candles
+    for (interval, n_bars), missing in forex_missing.items():
+        for symbol, candles in fetch_forex_bulk_from_yfinance(missing, interval, n_bars).items():
+            results[("forex", symbol, interval)] = candles
+    
+    for key, candles in results.items():
+        market_type, symbol, interval = key
+        store_cached_candles(market_type, symbol, interval, candles[-CANDLE_BARS:], fetched_at)
+        if len(candles) > CANDLE_BARS:
+            store_base_series(market_type, symbol, interval, candles, fetched_at)
+        elif key in base_entries:
+            extend_base_series(market_type, symbol, interval, base_entries[key], candles, fetched_at)
+    return len(results)
+
+
+def get_crypto_price(symbol="BTC"):
+    """Mengambil harga crypto terkini"""
+    
+    if symbol not in SUPPORTED_COINS:
+        return None
+    
+    # Tick live di proses ini, atau harga yang dipublikasikan leader ke store bersama
+    price = live.get_live_price(symbol)
+    if price:
+        return price
+    
+    if TV_AVAILABLE:
+        try:
+            tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
+            candles = get_tv_pool().fetch(f"BINANCE:{tv_symbol}", "1min", 1)
+            if candles:
+                return candles[-1][2]
+        except Exception:
+            pass
+    
+    if yf:
+        try:
+            yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
+            ticker = yf.Ticker(yf_symbol)
+            data = ticker.history(period="1d", interval="1m")
+            if not data.empty:
+                return float(data.iloc[-1]["Close"])
+        except Exception:
+            pass
+    
+    pair = f"{symbol}-USDT"
+    try:
+        response = requests.get(
+            f"{KUCOIN_API_URL}/api/v1/market/orderbook/level1",
+            params={"symbol": pair},
+            timeout=10
+        )
+        data = response.json()
+        if data.get("code") == "200000" and data.get("data"):
+            return float(data["data"].get("price", 0))
+    except Exception:
+        pass
+    
+    return None
+
+
+def get_forex_price(symbol="XAUUSD"):
+    """Mengambil harga forex/komoditas terkini"""
+    
+    if symbol not in FOREX_PAIRS:
+        return None
+    
+    price = live.get_live_price(symbol)
+    if price:
+        return price
+    
+    if TV_AVAILABLE:
+        try:
+            candles = get_tv_pool().fetch(f"OANDA:{symbol}", "1min", 1)
+            if candles:
+                return candles[-1][2]
+        except Exception:
+            pass
+    
+    if yf:
+        try:
+            yf_symbol = FOREX_PAIRS[symbol]["yf_symbol"]
+            ticker = yf.Ticker(yf_symbol)
+            data = ticker.history(period="1d", interval="1m")
+            if not data.empty:
+                return float(data.iloc[-1]["Close"])
+        except Exception:
+            pass
+    
+    return None
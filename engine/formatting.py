@@ -0,0 +1,345 @@
+"""Format teks hasil analisa untuk Telegram"""
+
+import re
+
+from engine.analysis import AnalysisResult
+from engine.console import get_logger
+from engine.config import FOREX_PAIRS, MTF_LABELS
+
+logger = get_logger(__name__)
+
+SIGNAL_EMOJI = {
+    "STRONG_BUY": "🟢🟢",
+    "BUY": "🟢",
+    "HOLD": "🟡",
+    "SELL": "🔴",
+    "STRONG_SELL": "🔴🔴"
+}
+
+
+def format_symbol_price(symbol, price):
+    """Format harga sesuai jenis aset (crypto/komoditas dalam $, forex 5 desimal)"""
+    if symbol in FOREX_PAIRS and FOREX_PAIRS[symbol]["category"] != "commodity":
+        return f"{price:.5f}"
+    return f"${price:,.2f}"
+
+
+def format_price_level(symbol, price):
+    """Format level harga hasil analisa; aset murah tetap menampilkan desimal yang cukup"""
+    if symbol in FOREX_PAIRS and FOREX_PAIRS[symbol]["category"] != "commodity":
+        return f"{price:.5f}"
+    if price >= 100:
+        return f"${price:,.2f}"
+    return f"${price:.4f}" if price >= 1 else f"${price:.6f}"
+
+
+def format_mtf_matrix(mtf_results):
+    """Membuat tabel ringkas keselarasan multi-timeframe (monospace)"""
+    lines = ["TF   Sinyal       Tren      RSI   ADX"]
+    for interval, result in mtf_results.items():
+        c = result["confluence"]
+        lines.append(
+            f"{MTF_LABELS[interval]:<4} {c['signal'].replace('_', ' '):<12} "
+            f"{c['trend_direction']:<9} {c['rsi']:>4.0f} {c['adx']:>5.1f}"
+        )
+    return "\n".join(lines)
+
+
+def extract_signal_from_analysis(text):
+    """Mengekstrak sinyal trading dari hasil analisa Gemini"""
+    if isinstance(text, AnalysisResult):
+        return text.signal, f"{SIGNAL_EMOJI[text.signal]} Sinyal AI: {text.signal.replace('_', ' ')}"
+    if not text or text.startswith("Error") or text.startswith("Timeout"):
+        return None, None
+    
+    text_upper = text.upper()
+    
+    signal_patterns = [
+        (r'SINYAL[:\s]*\*?\[?(STRONG[\s_]?BUY)\]?\*?', 'STRONG_BUY'),
+        (r'SINYAL[:\s]*\*?\[?(STRONG[\s_]?SELL)\]?\*?', 'STRONG_SELL'),
+        (r'SINYAL[:\s]*\*?\[?(BUY)\]?\*?', 'BUY'),
+        (r'SINYAL[:\s]*\*?\[?(SELL)\]?\*?', 'SELL'),
+        (r'SINYAL[:\s]*\*?\[?(HOLD|NETRAL|NEUTRAL)\]?\*?', 'HOLD'),
+        (r'SIGNAL[:\s]*\*?\[?(STRONG[\s_]?BUY)\]?\*?', 'STRONG_BUY'),
+        (r'SIGNAL[:\s]*\*?\[?(STRONG[\s_]?SELL)\]?\*?', 'STRONG_SELL'),
+        (r'SIGNAL[:\s]*\*?\[?(BUY)\]?\*?', 'BUY'),
+        (r'SIGNAL[:\s]*\*?\[?(SELL)\]?\*?', 'SELL'),
+        (r'SIGNAL[:\s]*\*?\[?(HOLD|NETRAL|NEUTRAL)\]?\*?', 'HOLD'),
+        (r'\[STRONG[\s_]?BUY\]', 'STRONG_BUY'),
+        (r'\[STRONG[\s_]?SELL\]', 'STRONG_SELL'),
+        (r'\[BUY\]', 'BUY'),
+        (r'\[SELL\]', 'SELL'),
+        (r'\[HOLD\]', 'HOLD'),
+        (r'REKOMENDASI[:\s]*\*?(STRONG[\s_]?BUY)\*?', 'STRONG_BUY'),
+        (r'REKOMENDASI[:\s]*\*?(STRONG[\s_]?SELL)\*?', 'STRONG_SELL'),
+        (r'REKOMENDASI[:\s]*\*?(BUY|BELI)\*?', 'BUY'),
+        (r'REKOMENDASI[:\s]*\*?(SELL|JUAL)\*?', 'SELL'),
+        (r'REKOMENDASI[:\s]*\*?(HOLD|TAHAN|NETRAL)\*?', 'HOLD'),
+        (r'AKSI[:\s]*\*?(STRONG[\s_]?BUY)\*?', 'STRONG_BUY'),
+        (r'AKSI[:\s]*\*?(STRONG[\s_]?SELL)\*?', 'STRONG_SELL'),
+        (r'AKSI[:\s]*\*?(BUY|BELI)\*?', 'BUY'),
+        (r'AKSI[:\s]*\*?(SELL|JUAL)\*?', 'SELL'),
+        (r'AKSI[:\s]*\*?(HOLD|TAHAN)\*?', 'HOLD'),
+    ]
+    
+    for pattern, signal in signal_patterns:
+        match = re.search(pattern, text_upper)
+        if match:
+            signal_emoji = SIGNAL_EMOJI.get(signal, "⚪")
+            
+            signal_display = signal.replace("_", " ")
+            logger.debug("Signal ditemukan: %s dari pattern: %s", signal, pattern)
+            return signal, f"{signal_emoji} Sinyal AI: {signal_display}"
+    
+    if "STRONG BUY" in text_upper or "STRONG_BUY" in text_upper:
+        return "STRONG_BUY", "🟢🟢 Sinyal AI: STRONG BUY"
+    elif "STRONG SELL" in text_upper or "STRONG_SELL" in text_upper:
+        return "STRONG_SELL", "🔴🔴 Sinyal AI: STRONG SELL"
+    elif "BUY" in text_upper or "BELI" in text_upper:
+        return "BUY", "🟢 Sinyal AI: BUY"
+    elif "SELL" in text_upper or "JUAL" in text_upper:
+        return "SELL", "🔴 Sinyal AI: SELL"
+    elif "HOLD" in text_upper or "TAHAN" in text_upper or "NETRAL" in text_upper:
+        return "HOLD", "🟡 Sinyal AI: HOLD"
+    
+    logger.warning("Tidak dapat menemukan sinyal dalam analisa. Text (100 karakter pertama): %s", text[:100])
+    return None, None
+
+
+def analysis_fields(result):
+    """Nilai tampilan per field template dari AnalysisResult (string kosong = baris dilewati)"""
+    symbol = result.symbol
+
+    def level(price, with_pct=False):
+        if price is None:
+            return ""
+        text = format_price_level(symbol, price)
+        pct = result.pct_from_entry(price) if with_pct else None
+        return f"{text} ({pct:+.2f}%)" if pct is not None else text
+
+    def levels(prefix, prices):
+        return " | ".join(f"{prefix}{i} {format_price_level(symbol, p)}" for i, p in enumerate(prices[:3], 1))
+
+    prediction = " - ".join(filter(None, [
+        result.prediction,
+        f"Keyakinan {result.confidence}" if result.confidence else "",
+        result.prediction_reason,
+    ]))
+    signal = result.signal.replace("_", " ")
+    rr = result.risk_reward
+    profit = result.pct_from_entry(result.tp1)
+    loss = result.pct_from_entry(result.stop_loss)
+
+    return {
+        "prediction": prediction,
+        "movement": result.movement,
+        "signal": f"{signal} - {result.signal_reason}" if result.signal_reason else signal,
+        "signal_strength": result.signal_strength,
+        "current_price": level(result.current_price),
+        "entry": level(result.entry),
+        "tp1": level(result.tp1, True),
+        "tp2": level(result.tp2, True),
+        "tp3": level(result.tp3, True),
+        "stop_loss": level(result.stop_loss, True),
+        "rr": f"1:{rr:.1f}" if rr else "",
+        "profit": f"{abs(profit):.2f}%" if profit is not None else "",
+        "loss": f"{abs(loss):.2f}%" if loss is not None else "",
+        "supports": levels("S", result.supports),
+        "resistances": levels("R", result.resistances),
+        "main_trend": result.main_trend,
+        "best_timeframe": result.best_timeframe,
+        **result.indicators,
+        "risk_warning": result.risk_warning,
+        "narrative": result.narrative,
+    }
+
+
+# (judul bagian, [(emoji, label, field)]); urutan dan gaya sama dengan format_analysis_reply
+ANALYSIS_TEMPLATE = [
+    ("Prediksi Harga", [
+        ("🔮", "PREDIKSI", "prediction"),
+        ("📍", "PERKIRAAN PERGERAKAN", "movement"),
+    ]),
+    (None, [
+        ("📊", "SINYAL", "signal"),
+        ("📊", "KEKUATAN SINYAL", "signal_strength"),
+    ]),
+    ("Setup Trading", [
+        ("💵", "HARGA SAAT INI", "current_price"),
+        ("🎯", "HARGA MASUK IDEAL", "entry"),
+        ("💰", "TARGET PROFIT 1", "tp1"),
+        ("💎", "TARGET PROFIT 2", "tp2"),
+        ("🏆", "TARGET PROFIT 3", "tp3"),
+        ("🛑", "STOP LOSS", "stop_loss"),
+        ("⚖️", "RASIO RR", "rr"),
+        ("📈", "POTENSI PROFIT", "profit"),
+        ("📉", "POTENSI LOSS", "loss"),
+    ]),
+    ("Support & Resistance", [
+        ("🔻", "SUPPORT KUNCI", "supports"),
+        ("🔺", "RESISTANCE KUNCI", "resistances"),
+    ]),
+    ("Analisa Teknikal", [
+        ("📈", "TREN UTAMA", "main_trend"),
+        ("🎯", "TIMEFRAME TERBAIK", "best_timeframe"),
+        ("🕯️", "POLA CANDLESTICK", "candlestick"),
+        ("📈", "TREN EMA", "ema"),
+    ]),
+    ("Indikator", [
+        ("📉", "KONDISI RSI", "rsi"),
+        ("📊", "KONDISI STOCH RSI", "stoch_rsi"),
+        ("📊", "KONDISI MACD", "macd"),
+        ("〰️", "POSISI BOLLINGER", "bollinger"),
+        ("🔢", "LEVEL FIBONACCI", "fibonacci"),
+    ]),
+    ("Peringatan", [("⚠️", "PERINGATAN RISIKO", "risk_warning")]),
+    ("Kesimpulan", [("🧠", "KESIMPULAN", "narrative")]),
+]
+
+
+def render_analysis(result):
+    """Render AnalysisResult dengan ANALYSIS_TEMPLATE (tanpa parsing teks)"""
+    fields = analysis_fields(result)
+    result_parts = []
+    for title, rows in ANALYSIS_TEMPLATE:
+        entries = [f"{emoji} *{label}:*\n{fields[key]}" for emoji, label, key in rows if fields[key]]
+        if not entries:
+            continue
+        if result_parts:
+            result_parts.append('')
+        if title:
+            result_parts.append(f'─── {title} ───')
+        result_parts.append('\n\n'.join(entries))
+    return '\n'.join(result_parts)
+
+
+def format_analysis_reply(text):
+    """Format hasil analisa menjadi lebih mudah dibaca"""
+    if isinstance(text, AnalysisResult):
+        return render_analysis(text)
+    if not text or text.startswith("Error") or text.startswith("Timeout"):
+        return text
+    
+    text_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text_clean = re.sub(r'\*([^*]+)\*', r'\1', text_clean)
+    text_clean = re.sub(r'`([^`]+)`', r'\1', text_clean)
+    text_clean = re.sub(r'^\s*[-•]\s*', '', text_clean, flags=re.MULTILINE)
+    
+    section_keywords = [
+        {'keywords': ['prediksi 1 menit', 'prediksi 5 menit', 'prediksi 15 menit', 'prediksi 30 menit', 
+                      'prediksi 1 jam', 'prediksi 4 jam', 'prediksi 1 hari', 'prediksi 1 minggu',
+                      'prediksi arah', 'prediksi'], 'emoji': '🔮', 'group': 'prediction'},
+        {'keywords': ['perkiraan pergerakan', 'perkiraan'], 'emoji': '📍', 'group': 'prediction'},
+        {'keywords': ['sinyal', 'signal', 'kekuatan sinyal'], 'emoji': '📊', 'group': 'signal'},
+        {'keywords': ['harga saat ini', 'harga sekarang', 'current price'], 'emoji': '💵', 'group': 'trading'},
+        {'keywords': ['harga masuk ideal', 'harga masuk', 'entry', 'masuk'], 'emoji': '🎯', 'group': 'trading'},
+        {'keywords': ['target profit 1', 'tp1', 'tp 1'], 'emoji': '💰', 'group': 'trading'},
+        {'keywords': ['target profit 2', 'tp2', 'tp 2'], 'emoji': '💎', 'group': 'trading'},
+        {'keywords': ['target profit 3', 'tp3', 'tp 3'], 'emoji': '🏆', 'group': 'trading'},
+        {'keywords': ['target profit', 'take profit', 'target'], 'emoji': '💰', 'group': 'trading'},
+        {'keywords': ['stop loss', 'stoploss', 'sl'], 'emoji': '🛑', 'group': 'trading'},
+        {'keywords': ['rasio rr', 'rasio risk', 'risk reward', 'rr ratio'], 'emoji': '⚖️', 'group': 'trading'},
+        {'keywords': ['potensi profit', 'potensi keuntungan'], 'emoji': '📈', 'group': 'trading'},
+        {'keywords': ['potensi loss', 'potensi rugi'], 'emoji': '📉', 'group': 'trading'},
+        {'keywords': ['waktu hold', 'holding time', 'durasi'], 'emoji': '⏱️', 'group': 'trading'},
+        {'keywords': ['pola candlestick', 'pola', 'pattern', 'candlestick'], 'emoji': '🕯️', 'group': 'analysis'},
+        {'keywords': ['tren ema', 'tren', 'trend'], 'emoji': '📈', 'group': 'analysis'},
+        {'keywords': ['kondisi rsi', 'rsi'], 'emoji': '📉', 'group': 'indicators'},
+        {'keywords': ['kondisi stoch', 'stoch rsi', 'stochastic'], 'emoji': '📊', 'group': 'indicators'},
+        {'keywords': ['kondisi macd', 'macd'], 'emoji': '📊', 'group': 'indicators'},
+        {'keywords': ['posisi bollinger', 'bollinger', 'bb'], 'emoji': '〰️', 'group': 'indicators'},
+        {'keywords': ['level fibonacci', 'fibonacci', 'fib'], 'emoji': '🔢', 'group': 'indicators'},
+        {'keywords': ['support kunci', 'support', 's1', 's2', 's3'], 'emoji': '🔻', 'group': 'levels'},
+        {'keywords': ['resistance kunci', 'resistance', 'r1', 'r2', 'r3'], 'emoji': '🔺', 'group': 'levels'},
+        {'keywords': ['konfirmasi', 'confirmation'], 'emoji': '✅', 'group': 'confirmation'},
+        {'keywords': ['peringatan risiko', 'peringatan', 'risiko', 'warning'], 'emoji': '⚠️', 'group': 'warning'},
+        {'keywords': ['kesimpulan', 'conclusion', 'ringkasan'], 'emoji': '🧠', 'group': 'conclusion'},
+        {'keywords': ['analisa teknikal detail', 'analisa teknikal'], 'emoji': '📋', 'group': 'analysis'},
+    ]
+    
+    sections = {
+        'prediction': [],
+        'signal': [],
+        'trading': [],
+        'analysis': [],
+        'indicators': [],
+        'levels': [],
+        'confirmation': [],
+        'warning': [],
+        'conclusion': [],
+        'other': []
+    }
+    
+    lines = text_clean.strip().split('\n')
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        if ':' in line:
+            parts = line.split(':', 1)
+            key = parts[0].strip().lower()
+            value = parts[1].strip() if len(parts) > 1 else ''
+            
+            if not value:
+                continue
+            
+            matched = False
+            for config in section_keywords:
+                for keyword in config['keywords']:
+                    if keyword in key:
+                        sections[config['group']].append(f"{config['emoji']} *{parts[0].strip().upper()}:*\n{value}")
+                        matched = True
+                        break
+                if matched:
+                    break
+            
+            if not matched and value and len(value) > 3:
+                sections['other'].append(f"• {parts[0].strip()}: {value}")
+    
+    result_parts = []
+    if sections['prediction']:
+        result_parts.append('─── Prediksi Harga ───')
+        result_parts.append('\n\n'.join(sections['prediction']))
+    if sections['signal']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('\n\n'.join(sections['signal']))
+    if sections['trading']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Setup Trading ───')
+        result_parts.append('\n\n'.join(sections['trading']))
+    if sections['levels']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Support & Resistance ───')
+        result_parts.append('\n\n'.join(sections['levels']))
+    if sections['analysis']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Analisa Teknikal ───')
+        result_parts.append('\n\n'.join(sections['analysis']))
+    if sections['indicators']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Indikator ───')
+        result_parts.append('\n\n'.join(sections['indicators']))
+    if sections['confirmation']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Konfirmasi Sinyal ───')
+        result_parts.append('\n\n'.join(sections['confirmation']))
+    if sections['warning']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Peringatan ───')
+        result_parts.append('\n\n'.join(sections['warning']))
+    if sections['conclusion']:
+        if result_parts:
+            result_parts.append('')
+        result_parts.append('─── Kesimpulan ───')
+        result_parts.append('\n\n'.join(sections['conclusion']))
+    
+    return '\n'.join(result_parts) if result_parts else text
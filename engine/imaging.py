@@ -0,0 +1,116 @@
+"""
+Optimasi gambar chart sebelum dikirim ke Gemini
+
+Chart PNG 150 dpi (~1500x1300, ~350 KB, +33% saat base64) sebagian besar berisi warna datar, jadi
+kuantisasi palet + WebP lossless memperkecil ukuran berkali lipat tanpa mengaburkan teks dan garis.
+Batas bawah (warna, kualitas, sisi terpanjang) menjaga chart tetap terbaca walau target ukuran belum tercapai.
+"""
+
+import base64
+import io
+import os
+import time
+
+from engine.lazy import is_module_available, pil_image
+from engine.console import get_logger
+
+
+logger = get_logger(__name__)
+
+# webp | png | jpeg | original (kirim PNG apa adanya)
+GEMINI_IMAGE_FORMAT = os.environ.get("GEMINI_IMAGE_FORMAT", "webp").lower()
+# Gemini memotong gambar besar menjadi tile 768 px; 1536 = maksimal 2x2 tile
+GEMINI_IMAGE_MAX_SIDE = int(os.environ.get("GEMINI_IMAGE_MAX_SIDE", "1536"))
+# Jumlah warna palet (0 = tanpa kuantisasi, WebP/JPEG lossy)
+GEMINI_IMAGE_COLORS = int(os.environ.get("GEMINI_IMAGE_COLORS", "64"))
+GEMINI_IMAGE_QUALITY = int(os.environ.get("GEMINI_IMAGE_QUALITY", "80"))
+GEMINI_IMAGE_MAX_BYTES = int(os.environ.get("GEMINI_IMAGE_MAX_BYTES", "150000"))
+
+# Batas kualitas: di bawah ini teks sumbu dan label indikator mulai sulit dibaca
+MIN_COLORS = 32
+MIN_QUALITY = 60
+MIN_SIDE = 1024
+
+MIME_TYPES = {"webp": "image/webp", "png": "image/png", "jpeg": "image/jpeg"}
+
+PIL_AVAILABLE = is_module_available("PIL")
+
+
+def encode_image(image, image_format, colors, quality):
+    """Encode satu kandidat; palet -> lossless (WebP/PNG), tanpa palet -> lossy (WebP/JPEG)"""
+    buffer = io.BytesIO()
+    if colors and image_format != "jpeg":
+        paletted = image.quantize(colors, method=pil_image.Quantize.FASTOCTREE)
+        if image_format == "webp":
+            paletted.convert("RGB").save(buffer, format="WEBP", lossless=True, method=4)
+        else:
+            paletted.save(buffer, format="PNG", optimize=True)
+    elif image_format == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def optimize_chart_image(data, image_format=None, max_side=None, colors=None, quality=None, max_bytes=None):
+    """
+    Perkecil gambar chart (bytes PNG) untuk Gemini.
+    Turunkan warna/kualitas lalu resolusi bertahap sampai <= max_bytes, tidak melewati batas kualitas.
+    Mengembalikan (bytes, mime_type, statistik); gambar asli dipakai jika hasil tidak lebih kecil.
+    """
+    image_format = (image_format or GEMINI_IMAGE_FORMAT).lower()
+    max_side = max_side or GEMINI_IMAGE_MAX_SIDE
+    colors = GEMINI_IMAGE_COLORS if colors is None else colors
+    quality = quality or GEMINI_IMAGE_QUALITY
+    max_bytes = max_bytes or GEMINI_IMAGE_MAX_BYTES
+
+    stats = {"original_bytes": len(data), "format": "png", "bytes": len(data), "ms": 0.0}
+    if image_format not in MIME_TYPES or not PIL_AVAILABLE:
+        return data, "image/png", stats
+
+    started = time.perf_counter()
+    image = pil_image.open(io.BytesIO(data)).convert("RGB")
+    scale = min(1.0, max_side / max(image.size))
+
+    while True:
+        size = (round(image.width * scale), round(image.height * scale))
+        candidate_image = image if scale == 1.0 else image.resize(size, pil_image.LANCZOS)
+        encoded = encode_image(candidate_image, image_format, colors, quality)
+
+        if len(encoded) <= max_bytes:
+            break
+        if colors and colors // 2 >= MIN_COLORS:
+            colors //= 2
+        elif not colors and quality - 10 >= MIN_QUALITY:
+            quality -= 10
+        elif max(size) * 0.8 >= MIN_SIDE:
+            scale *= 0.8
+        else:
+            break
+
+    stats.update({
+        "format": image_format,
+        "bytes": len(encoded),
+        "size": list(size),
+        "colors": colors,
+        "quality": None if colors else quality,
+        "ms": (time.perf_counter() - started) * 1000,
+    })
+    if len(encoded) >= len(data):
+        stats.update(format="png", bytes=len(data))
+        return data, "image/png", stats
+    return encoded, MIME_TYPES[image_format], stats
+
+
+def load_chart_for_gemini(image_path):
+    """Baca chart dari disk, optimasi, dan kembalikan (base64, mime_type, statistik)"""
+    with open(image_path, "rb") as f:
+        data = f.read()
+    try:
+        data, mime_type, stats = optimize_chart_image(data)
+    except (OSError, ValueError) as e:
+        logger.warning("Optimasi gambar gagal, kirim PNG asli: %s", e)
+        mime_type, stats = "image/png", {"original_bytes": len(data), "format": "png", "bytes": len(data), "ms": 0.0}
+    return base64.b64encode(data).decode("utf-8"), mime_type, stats
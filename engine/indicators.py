@@ -0,0 +1,468 @@
+"""Indikator teknikal dan skor konfluensi multi-indikator"""
+
+from datetime import datetime
+
+from pytz import timezone as tz
+
+from engine.lazy import pd
+
+
+def calculate_rsi(series, period=14):
+    """Menghitung RSI (Relative Strength Index)"""
+    delta = series.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_macd(series, fast=12, slow=26, signal=9):
+    """Menghitung MACD (Moving Average Convergence Divergence)"""
+    ema_fast = series.ewm(span=fast, adjust=False).mean()
+    ema_slow = series.ewm(span=slow, adjust=False).mean()
+    macd_line = ema_fast - ema_slow
+    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+    histogram = macd_line - signal_line
+    return macd_line, signal_line, histogram
+
+
+def calculate_bollinger_bands(series, period=20, std_dev=2):
+    """Menghitung Bollinger Bands"""
+    sma = series.rolling(window=period).mean()
+    std = series.rolling(window=period).std()
+    upper_band = sma + (std * std_dev)
+    lower_band = sma - (std * std_dev)
+    return upper_band, sma, lower_band
+
+
+def calculate_fibonacci_levels(df):
+    """Menghitung level Fibonacci retracement"""
+    high = df['High'].max()
+    low = df['Low'].min()
+    diff = high - low
+    
+    levels = {
+        '0.0%': high,
+        '23.6%': high - (diff * 0.236),
+        '38.2%': high - (diff * 0.382),
+        '50.0%': high - (diff * 0.5),
+        '61.8%': high - (diff * 0.618),
+        '78.6%': high - (diff * 0.786),
+        '100.0%': low
+    }
+    return levels
+
+
+def calculate_atr(df, period=14):
+    """Menghitung ATR (Average True Range) - untuk volatilitas dan penentuan SL/TP"""
+    high = df['High']
+    low = df['Low']
+    close = df['Close']
+    
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+    
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean()
+    return atr
+
+
+def calculate_stochastic_rsi(series, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3):
+    """Menghitung Stochastic RSI - lebih sensitif dari RSI biasa"""
+    rsi = calculate_rsi(series, rsi_period)
+    
+    rsi_min = rsi.rolling(window=stoch_period).min()
+    rsi_max = rsi.rolling(window=stoch_period).max()
+    
+    stoch_rsi = ((rsi - rsi_min) / (rsi_max - rsi_min)) * 100
+    stoch_rsi = stoch_rsi.fillna(50)
+    
+    stoch_k = stoch_rsi.rolling(window=smooth_k).mean()
+    stoch_d = stoch_k.rolling(window=smooth_d).mean()
+    
+    return stoch_k, stoch_d
+
+
+def calculate_adx(df, period=14):
+    """Menghitung ADX (Average Directional Index) - mengukur kekuatan tren"""
+    high = df['High']
+    low = df['Low']
+    close = df['Close']
+    
+    plus_dm = high.diff()
+    minus_dm = -low.diff()
+    
+    plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0)
+    minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0)
+    
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    
+    atr = tr.rolling(window=period).mean()
+    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
+    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx = dx.rolling(window=period).mean()
+    
+    return adx, plus_di, minus_di
+
+
+def calculate_vwap(df):
+    """Menghitung VWAP (Volume Weighted Average Price)"""
+    typical_price = (df['High'] + df['Low'] + df['Close']) / 3
+    vwap = (typical_price * df['Volume']).cumsum() / df['Volume'].cumsum()
+    return vwap
+
+
+def calculate_ema(series, period):
+    """Menghitung EMA dengan period tertentu"""
+    return series.ewm(span=period, adjust=False).mean()
+
+
+def detect_rsi_divergence(df, rsi, lookback=10):
+    """Mendeteksi RSI divergence (bullish/bearish)"""
+    close = df['Close']
+    divergence = []
+    
+    for i in range(lookback, len(df)):
+        price_window = close.iloc[i-lookback:i+1]
+        rsi_window = rsi.iloc[i-lookback:i+1]
+        
+        price_min_idx = price_window.idxmin()
+        price_max_idx = price_window.idxmax()
+        
+        current_price = close.iloc[i]
+        current_rsi = rsi.iloc[i]
+        
+        if current_price <= price_window.min() * 1.01:
+            rsi_at_prev_low = rsi.loc[price_min_idx] if price_min_idx in rsi.index else current_rsi
+            if current_rsi > rsi_at_prev_low:
+                divergence.append("bullish")
+                continue
+        
+        if current_price >= price_window.max() * 0.99:
+            rsi_at_prev_high = rsi.loc[price_max_idx] if price_max_idx in rsi.index else current_rsi
+            if current_rsi < rsi_at_prev_high:
+                divergence.append("bearish")
+                continue
+        
+        divergence.append("none")
+    
+    result = ['none'] * lookback + divergence
+    return result[-1] if result else "none"
+
+
+def detect_macd_divergence(df, macd_line, lookback=10):
+    """Mendeteksi MACD divergence (bullish/bearish)"""
+    close = df['Close']
+    
+    for i in range(lookback, len(df)):
+        price_window = close.iloc[i-lookback:i+1]
+        macd_window = macd_line.iloc[i-lookback:i+1]
+        
+        current_price = close.iloc[i]
+        current_macd = macd_line.iloc[i]
+        
+        if current_price <= price_window.min() * 1.01:
+            prev_macd_at_low = macd_window.min()
+            if current_macd > prev_macd_at_low:
+                return "bullish"
+        
+        if current_price >= price_window.max() * 0.99:
+            prev_macd_at_high = macd_window.max()
+            if current_macd < prev_macd_at_high:
+                return "bearish"
+    
+    return "none"
+
+
+def calculate_confluence_score(df, market_type="crypto"):
+    """Menghitung skor konfluensi dari berbagai indikator untuk sinyal trading"""
+    close = df['Close']
+    current_price = close.iloc[-1]
+    
+    ema20 = calculate_ema(close, 20)
+    ema50 = calculate_ema(close, 50)
+    ema200 = calculate_ema(close, 200)
+    
+    rsi = calculate_rsi(close, 14)
+    current_rsi = rsi.iloc[-1]
+    
+    macd_line, signal_line, histogram = calculate_macd(close)
+    current_macd = macd_line.iloc[-1]
+    current_signal = signal_line.iloc[-1]
+    current_hist = histogram.iloc[-1]
+    prev_hist = histogram.iloc[-2] if len(histogram) > 1 else 0
+    
+    bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(close)
+    
+    stoch_k, stoch_d = calculate_stochastic_rsi(close)
+    current_stoch_k = stoch_k.iloc[-1]
+    current_stoch_d = stoch_d.iloc[-1]
+    
+    adx, plus_di, minus_di = calculate_adx(df)
+    current_adx = adx.iloc[-1] if not pd.isna(adx.iloc[-1]) else 20
+    current_plus_di = plus_di.iloc[-1] if not pd.isna(plus_di.iloc[-1]) else 25
+    current_minus_di = minus_di.iloc[-1] if not pd.isna(minus_di.iloc[-1]) else 25
+    
+    atr = calculate_atr(df)
+    current_atr = atr.iloc[-1] if not pd.isna(atr.iloc[-1]) else 0
+    
+    rsi_divergence = detect_rsi_divergence(df, rsi)
+    macd_divergence = detect_macd_divergence(df, macd_line)
+    
+    bullish_signals = 0
+    bearish_signals = 0
+    neutral_signals = 0
+    total_weight = 0
+    
+    signal_details = {
+        "bullish": [],
+        "bearish": [],
+        "neutral": []
+    }
+    
+    weight = 2
+    total_weight += weight
+    if current_price > ema20.iloc[-1] and current_price > ema50.iloc[-1]:
+        bullish_signals += weight
+        signal_details["bullish"].append("Harga di atas EMA20 & EMA50")
+    elif current_price < ema20.iloc[-1] and current_price < ema50.iloc[-1]:
+        bearish_signals += weight
+        signal_details["bearish"].append("Harga di bawah EMA20 & EMA50")
+    else:
+        neutral_signals += weight
+        signal_details["neutral"].append("Harga di antara EMA20 & EMA50")
+    
+    if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]):
+        weight = 1.5
+        total_weight += weight
+        if current_price > ema200.iloc[-1]:
+            bullish_signals += weight
+            signal_details["bullish"].append("Harga di atas EMA200 (tren jangka panjang bullish)")
+        else:
+            bearish_signals += weight
+            signal_details["bearish"].append("Harga di bawah EMA200 (tren jangka panjang bearish)")
+    
+    weight = 1.5
+    total_weight += weight
+    if ema20.iloc[-1] > ema50.iloc[-1]:
+        if ema20.iloc[-2] <= ema50.iloc[-2]:
+            bullish_signals += weight * 1.5
+            signal_details["bullish"].append("Golden Cross EMA20/EMA50 (sinyal kuat)")
+        else:
+            bullish_signals += weight
+            signal_details["bullish"].append("EMA20 di atas EMA50")
+    else:
+        if ema20.iloc[-2] >= ema50.iloc[-2]:
+            bearish_signals += weight * 1.5
+            signal_details["bearish"].append("Death Cross EMA20/EMA50 (sinyal kuat)")
+        else:
+            bearish_signals += weight
+            signal_details["bearish"].append("EMA20 di bawah EMA50")
+    
+    weight = 2
+    total_weight += weight
+    if current_rsi < 30:
+        bullish_signals += weight
+        signal_details["bullish"].append(f"RSI oversold ({current_rsi:.1f})")
+    elif current_rsi > 70:
+        bearish_signals += weight
+        signal_details["bearish"].append(f"RSI overbought ({current_rsi:.1f})")
+    elif current_rsi > 50:
+        bullish_signals += weight * 0.5
+        signal_details["bullish"].append(f"RSI bullish zone ({current_rsi:.1f})")
+    else:
+        bearish_signals += weight * 0.5
+        signal_details["bearish"].append(f"RSI bearish zone ({current_rsi:.1f})")
+    
+    weight = 2
+    total_weight += weight
+    if current_macd > current_signal:
+        if macd_line.iloc[-2] <= signal_line.iloc[-2]:
+            bullish_signals += weight * 1.5
+            signal_details["bullish"].append("MACD Bullish Crossover (sinyal beli)")
+        else:
+            bullish_signals += weight
+            signal_details["bullish"].append("MACD di atas Signal Line")
+    else:
+        if macd_line.iloc[-2] >= signal_line.iloc[-2]:
+            bearish_signals += weight * 1.5
+            signal_details["bearish"].append("MACD Bearish Crossover (sinyal jual)")
+        else:
+            bearish_signals += weight
+            signal_details["bearish"].append("MACD di bawah Signal Line")
+    
+    weight = 1
+    total_weight += weight
+    if current_hist > 0 and current_hist > prev_hist:
+        bullish_signals += weight
+        signal_details["bullish"].append("MACD histogram meningkat (momentum bullish)")
+    elif current_hist < 0 and current_hist < prev_hist:
+        bearish_signals += weight
+        signal_details["bearish"].append("MACD histogram menurun (momentum bearish)")
+    else:
+        neutral_signals += weight
+        signal_details["neutral"].append("MACD histogram netral")
+    
+    weight = 1.5
+    total_weight += weight
+    if current_price <= bb_lower.iloc[-1]:
+        bullish_signals += weight
+        signal_details["bullish"].append("Harga di bawah Lower Bollinger Band (oversold)")
+    elif current_price >= bb_upper.iloc[-1]:
+        bearish_signals += weight
+        signal_details["bearish"].append("Harga di atas Upper Bollinger Band (overbought)")
+    else:
+        bb_position = (current_price - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
+        if bb_position < 0.3:
+            bullish_signals += weight * 0.5
+            signal_details["bullish"].append("Harga mendekati Lower BB")
+        elif bb_position > 0.7:
+            bearish_signals += weight * 0.5
+            signal_details["bearish"].append("Harga mendekati Upper BB")
+        else:
+            neutral_signals += weight
+            signal_details["neutral"].append("Harga di tengah Bollinger Bands")
+    
+    weight = 1.5
+    total_weight += weight
+    if current_stoch_k < 20:
+        bullish_signals += weight
+        signal_details["bullish"].append(f"Stochastic RSI oversold ({current_stoch_k:.1f})")
+    elif current_stoch_k > 80:
+        bearish_signals += weight
+        signal_details["bearish"].append(f"Stochastic RSI overbought ({current_stoch_k:.1f})")
+    elif current_stoch_k > current_stoch_d:
+        bullish_signals += weight * 0.5
+        signal_details["bullish"].append("Stochastic RSI bullish")
+    else:
+        bearish_signals += weight * 0.5
+        signal_details["bearish"].append("Stochastic RSI bearish")
+    
+    weight = 1.5
+    total_weight += weight
+    if current_adx > 25:
+        if current_plus_di > current_minus_di:
+            bullish_signals += weight
+            signal_details["bullish"].append(f"ADX kuat ({current_adx:.1f}) dengan +DI dominan")
+        else:
+            bearish_signals += weight
+            signal_details["bearish"].append(f"ADX kuat ({current_adx:.1f}) dengan -DI dominan")
+    else:
+        neutral_signals += weight
+        signal_details["neutral"].append(f"ADX lemah ({current_adx:.1f}) - tren tidak jelas")
+    
+    weight = 2
+    if rsi_divergence == "bullish":
+        bullish_signals += weight
+        signal_details["bullish"].append("RSI Bullish Divergence terdeteksi (sinyal reversal)")
+    elif rsi_divergence == "bearish":
+        bearish_signals += weight
+        signal_details["bearish"].append("RSI Bearish Divergence terdeteksi (sinyal reversal)")
+    
+    if macd_divergence == "bullish":
+        bullish_signals += weight
+        signal_details["bullish"].append("MACD Bullish Divergence terdeteksi")
+    elif macd_divergence == "bearish":
+        bearish_signals += weight
+        signal_details["bearish"].append("MACD Bearish Divergence terdeteksi")
+    
+    total_signals = bullish_signals + bearish_signals + neutral_signals
+    
+    if total_signals > 0:
+        bullish_pct = (bullish_signals / total_signals) * 100
+        bearish_pct = (bearish_signals / total_signals) * 100
+    else:
+        bullish_pct = 50
+        bearish_pct = 50
+    
+    if bullish_signals > bearish_signals * 1.3:
+        if bullish_pct >= 70:
+            signal = "STRONG_BUY"
+            confidence = "TINGGI"
+        else:
+            signal = "BUY"
+            confidence = "SEDANG"
+    elif bearish_signals > bullish_signals * 1.3:
+        if bearish_pct >= 70:
+            signal = "STRONG_SELL"
+            confidence = "TINGGI"
+        else:
+            signal = "SELL"
+            confidence = "SEDANG"
+    else:
+        signal = "HOLD"
+        confidence = "RENDAH"
+    
+    trend_strength = "TIDAK JELAS"
+    if current_adx > 40:
+        trend_strength = "SANGAT KUAT"
+    elif current_adx > 25:
+        trend_strength = "KUAT"
+    elif current_adx > 20:
+        trend_strength = "SEDANG"
+    else:
+        trend_strength = "LEMAH"
+    
+    if current_price > ema20.iloc[-1] > ema50.iloc[-1]:
+        trend_direction = "UPTREND"
+    elif current_price < ema20.iloc[-1] < ema50.iloc[-1]:
+        trend_direction = "DOWNTREND"
+    else:
+        trend_direction = "SIDEWAYS"
+    
+    atr_pct = (current_atr / current_price) * 100 if current_price > 0 else 0
+    
+    return {
+        "signal": signal,
+        "confidence": confidence,
+        "bullish_score": bullish_signals,
+        "bearish_score": bearish_signals,
+        "neutral_score": neutral_signals,
+        "bullish_pct": bullish_pct,
+        "bearish_pct": bearish_pct,
+        "trend_direction": trend_direction,
+        "trend_strength": trend_strength,
+        "adx": current_adx,
+        "rsi": current_rsi,
+        "stoch_rsi": current_stoch_k,
+        "atr": current_atr,
+        "atr_pct": atr_pct,
+        "rsi_divergence": rsi_divergence,
+        "macd_divergence": macd_divergence,
+        "signal_details": signal_details,
+        "ema20": ema20.iloc[-1],
+        "ema50": ema50.iloc[-1],
+        "ema200": ema200.iloc[-1] if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]) else None,
+        "bb_upper": bb_upper.iloc[-1],
+        "bb_lower": bb_lower.iloc[-1],
+        "bb_middle": bb_middle.iloc[-1],
+        "macd": current_macd,
+        "macd_signal": current_signal,
+        "macd_hist": current_hist
+    }
+
+
+def build_ohlc_dataframe(data):
+    """Mengubah list candle [timestamp, open, close, high, low, volume] menjadi DataFrame OHLCV (WIB)"""
+    ohlc = []
+    for item in data:
+        ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
+        ohlc.append([
+            ts,
+            float(item[1]),
+            float(item[3]),
+            float(item[4]),
+            float(item[2]),
+            float(item[5])
+        ])
+    
+    df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
+    df.set_index("Date", inplace=True)
+    return df
@@ -0,0 +1,129 @@
+"""Inline keyboard Telegram bersama"""
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from engine.config import FOREX_PAIRS, SUPPORTED_COINS
+
+
+def get_main_menu_keyboard():
+    """Generate keyboard untuk menu utama"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("💰 Cryptocurrency", callback_data='market_crypto')],
+        [InlineKeyboardButton("💱 Forex & Komoditas", callback_data='market_forex')],
+    ])
+
+
+def get_crypto_keyboard():
+    """Generate keyboard untuk pilihan cryptocurrency"""
+    buttons = []
+    row = []
+    for symbol, info in SUPPORTED_COINS.items():
+        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'crypto_{symbol}'))
+        if len(row) == 3:
+            buttons.append(row)
+            row = []
+    if row:
+        buttons.append(row)
+    
+    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
+    return InlineKeyboardMarkup(buttons)
+
+
+def get_forex_keyboard():
+    """Generate keyboard untuk pilihan forex"""
+    commodities = [s for s, info in FOREX_PAIRS.items() if info["category"] == "commodity"]
+    majors = [s for s, info in FOREX_PAIRS.items() if info["category"] == "major"]
+    crosses = [s for s, info in FOREX_PAIRS.items() if info["category"] == "cross"]
+    
+    buttons = []
+    
+    buttons.append([InlineKeyboardButton("─── Komoditas ───", callback_data='ignore')])
+    row = []
+    for symbol in commodities:
+        info = FOREX_PAIRS[symbol]
+        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
+        if len(row) == 3:
+            buttons.append(row)
+            row = []
+    if row:
+        buttons.append(row)
+    
+    buttons.append([InlineKeyboardButton("─── Pasangan Utama ───", callback_data='ignore')])
+    row = []
+    for symbol in majors:
+        info = FOREX_PAIRS[symbol]
+        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
+        if len(row) == 3:
+            buttons.append(row)
+            row = []
+    if row:
+        buttons.append(row)
+    
+    buttons.append([InlineKeyboardButton("─── Pasangan Silang ───", callback_data='ignore')])
+    row = []
+    for symbol in crosses:
+        info = FOREX_PAIRS[symbol]
+        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
+        if len(row) == 3:
+            buttons.append(row)
+            row = []
+    if row:
+        buttons.append(row)
+    
+    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
+    return InlineKeyboardMarkup(buttons)
+
+
+def get_timeframe_keyboard(symbol, market_type, show_mtf=True):
+    """Generate keyboard untuk pilihan timeframe (show_mtf=False untuk bot tanpa handler MTF)"""
+    if market_type == "crypto":
+        rows = [
+            [
+                InlineKeyboardButton("1m", callback_data=f'tf_crypto_{symbol}_1min'),
+                InlineKeyboardButton("5m", callback_data=f'tf_crypto_{symbol}_5min'),
+                InlineKeyboardButton("15m", callback_data=f'tf_crypto_{symbol}_15min'),
+                InlineKeyboardButton("30m", callback_data=f'tf_crypto_{symbol}_30min'),
+            ],
+            [
+                InlineKeyboardButton("1j", callback_data=f'tf_crypto_{symbol}_1hour'),
+                InlineKeyboardButton("4j", callback_data=f'tf_crypto_{symbol}_4hour'),
+                InlineKeyboardButton("1h", callback_data=f'tf_crypto_{symbol}_1day'),
+                InlineKeyboardButton("1mg", callback_data=f'tf_crypto_{symbol}_1week'),
+            ],
+        ]
+        back = InlineKeyboardButton("⬅️ Kembali ke Daftar Koin", callback_data='market_crypto')
+    else:
+        rows = [
+            [
+                InlineKeyboardButton("1m", callback_data=f'tf_forex_{symbol}_1min'),
+                InlineKeyboardButton("5m", callback_data=f'tf_forex_{symbol}_5min'),
+                InlineKeyboardButton("15m", callback_data=f'tf_forex_{symbol}_15min'),
+                InlineKeyboardButton("30m", callback_data=f'tf_forex_{symbol}_30min'),
+            ],
+            [
+                InlineKeyboardButton("1j", callback_data=f'tf_forex_{symbol}_1hour'),
+                InlineKeyboardButton("4j", callback_data=f'tf_forex_{symbol}_4hour'),
+                InlineKeyboardButton("1h", callback_data=f'tf_forex_{symbol}_1day'),
+            ],
+        ]
+        back = InlineKeyboardButton("⬅️ Kembali ke Daftar Pair", callback_data='market_forex')
+    
+    if show_mtf:
+        rows.append([InlineKeyboardButton("🧭 Semua Timeframe (MTF)", callback_data=f'mtf_{market_type}_{symbol}')])
+    rows.append([back])
+    return InlineKeyboardMarkup(rows)
+
+
+def get_after_analysis_keyboard(symbol, market_type):
+    """Generate keyboard setelah analisa"""
+    if market_type == "crypto":
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'crypto_{symbol}')],
+            [InlineKeyboardButton("💰 Pilih Koin Lain", callback_data='market_crypto')],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
+        ])
+    else:
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'forex_{symbol}')],
+            [InlineKeyboardButton("💱 Pilih Pair Lain", callback_data='market_forex')],
+            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
+        ])
@@ -0,0 +1,36 @@
+"""Import tertunda untuk dependensi berat (pandas, matplotlib, yfinance, ...)"""
+
+import importlib
+import importlib.util
+
+from engine.config import YAHOO_FINANCE_ENABLED
+
+
+class LazyModule:
+    """Proxy modul yang baru di-import saat atribut pertamanya diakses (import lock menjaga thread-safety)"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def is_module_available(name):
+    """Cek modul terpasang tanpa meng-import-nya"""
+    return importlib.util.find_spec(name) is not None
+
+
+# Modul berat di-import saat pertama dipakai, bukan saat bot start
+requests = LazyModule("requests")
+websocket = LazyModule("websocket")
+mpf = LazyModule("mplfinance")
+pd = LazyModule("pandas")
+mpl_figure = LazyModule("matplotlib.figure")
+pil_image = LazyModule("PIL.Image")
+
+
+yf = LazyModule("yfinance") if YAHOO_FINANCE_ENABLED and is_module_available("yfinance") else None
@@ -0,0 +1,135 @@
+"""
+Leader election berbasis lease di store bersama (SHARED_STORE)
+
+Setiap instance memperpanjang lease secara berkala; hanya pemegang lease yang menjalankan job singleton
+(verifikasi terjadwal, scanner, broadcast). Jika leader mati, lease kedaluwarsa dalam LEADER_LEASE_SECONDS
+dan instance lain mengambil alih pada putaran perpanjangan berikutnya.
+"""
+
+import functools
+import os
+import socket
+import threading
+import time
+import uuid
+
+from engine.console import get_logger
+from engine.store import get_store, open_store
+
+
+logger = get_logger(__name__)
+
+LEADER_LEASE_SECONDS = float(os.environ.get("LEADER_LEASE_SECONDS", "10"))
+
+# Leader menganggap dirinya tidak lagi leader sedikit sebelum lease habis (jeda jam antar proses/host)
+LEASE_SAFETY_MARGIN = 0.2
+
+# Lease di SHARED_STORE=memory hanya berlaku di proses ini (setiap instance jadi leader), jadi election
+# memakai file SQLite ini sebagai gantinya; instance di host yang sama tetap saling eksklusif
+LEADER_FALLBACK_STORE = os.environ.get("LEADER_FALLBACK_STORE", "sqlite:///shared_store.db")
+
+_lease_store = None
+_lease_store_lock = threading.Lock()
+
+
+def get_lease_store():
+    """Store untuk lease leader: SHARED_STORE jika dibagi antar proses, selain itu LEADER_FALLBACK_STORE"""
+    global _lease_store
+    store = get_store()
+    if store.shared:
+        return store
+    with _lease_store_lock:
+        if _lease_store is None:
+            _lease_store = open_store(LEADER_FALLBACK_STORE)
+            if not _lease_store.shared:
+                logger.error(
+                    "Lease leader tidak dibagi antar proses (SHARED_STORE dan LEADER_FALLBACK_STORE = memory): "
+                    "jalankan hanya satu instance"
+                )
+            else:
+                logger.warning(
+                    "SHARED_STORE=memory tidak dibagi antar proses - lease leader memakai %s "
+                    "(hanya untuk instance di host yang sama; pakai redis:// untuk beberapa host)",
+                    LEADER_FALLBACK_STORE
+                )
+    return _lease_store
+
+
+class LeaderElection:
+    """Satu lease bernama; is_leader hanya True selama perpanjangan terakhir masih berlaku"""
+
+    def __init__(self, name, lease_seconds=LEADER_LEASE_SECONDS, store=None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.store = store or get_lease_store()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    @property
+    def is_leader(self):
+        return time.monotonic() < self._valid_until
+
+    def add_listener(self, callback):
+        """callback(is_leader) dipanggil setiap kali status leader instance ini berubah (dari thread perpanjangan)"""
+        self._listeners.append(callback)
+
+    def _notify(self, is_leader):
+        for callback in self._listeners:
+            try:
+                callback(is_leader)
+            except Exception as e:
+                logger.warning("Listener leader '%s' gagal: %s", self.name, e)
+
+    def renew(self):
+        """Satu putaran ambil/perpanjang lease; mengembalikan status leader setelahnya"""
+        was_leader = self.is_leader
+        started = time.monotonic()
+        if self.store.acquire_lease(self.name, self.owner, self.lease_seconds):
+            self._valid_until = started + self.lease_seconds * (1 - LEASE_SAFETY_MARGIN)
+        else:
+            self._valid_until = 0.0
+
+        if self.is_leader and not was_leader:
+            logger.info("Leader '%s': instance ini menjadi leader (%s)", self.name, self.owner)
+            self._notify(True)
+        elif was_leader and not self.is_leader:
+            logger.warning("Leader '%s': lease lepas, job singleton berhenti di instance ini", self.name)
+            self._notify(False)
+        return self.is_leader
+
+    def start(self):
+        """Perpanjang lease di thread latar setiap sepertiga durasi lease"""
+        if self._thread is None:
+            self.renew()
+            self._thread = threading.Thread(target=self._run, name=f"leader-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            self.renew()
+
+    def stop(self):
+        """Berhenti memperpanjang dan lepas lease agar instance lain bisa langsung mengambil alih"""
+        self._stop.set()
+        was_leader = self.is_leader
+        if was_leader:
+            self.store.release_lease(self.name, self.owner)
+        self._valid_until = 0.0
+        if was_leader:
+            self._notify(False)
+
+
+def leader_only(election):
+    """Dekorator callback JobQueue: job hanya dijalankan di instance yang sedang memegang lease"""
+    def decorator(callback):
+        @functools.wraps(callback)
+        async def wrapper(context):
+            if not election.is_leader:
+                return None
+            return await callback(context)
+        return wrapper
+    return decorator
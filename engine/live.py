@@ -0,0 +1,366 @@
+"""
+Live feed harga via WebSocket (KuCoin trade stream dan TradingView quote session)
+
+Di deployment multi-worker hanya leader yang membuka WebSocket; harga terakhirnya dipublikasikan ke store
+bersama ("live_price:<simbol>", paling sering sekali per LIVE_PRICE_PUBLISH_INTERVAL per simbol) dan
+worker lain membacanya lewat get_live_price().
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from engine.lazy import requests, websocket
+from engine.console import get_logger, log_success, log_warning
+from engine.config import FOREX_PAIRS, KUCOIN_API_URL, SUPPORTED_COINS, TIMEFRAME_SECONDS, TRADINGVIEW_WS_URL
+from engine.candles import get_candle_bucket_start
+from engine.store import get_store
+
+logger = get_logger(__name__)
+
+
+LIVE_FEED_ENABLED = os.environ.get("LIVE_FEED", "on").lower() not in ("0", "off", "false", "no")
+LIVE_PRICE_MAX_AGE = int(os.environ.get("LIVE_PRICE_MAX_AGE", "30"))
+LIVE_PRICE_PUBLISH_INTERVAL = 1.0
+
+
+class LiveMarketFeed:
+    """Tabel harga terakhir dan candle berjalan (semua timeframe) yang diisi dari tick streaming"""
+
+    def __init__(self, intervals=None):
+        self.intervals = list(intervals or TIMEFRAME_SECONDS.keys())
+        self.sources = []
+        self._lock = threading.Lock()
+        self._prices = {}
+        self._candles = {}
+        self._tick_listeners = []
+        self._close_listeners = []
+        self.running = False
+        # Store bersama untuk mempublikasikan harga ke worker lain (None = hanya di proses ini)
+        self.store = None
+        self._published = {}
+
+    def add_source(self, source):
+        source.feed = self
+        self.sources.append(source)
+        return source
+
+    def add_tick_listener(self, callback):
+        """callback(symbol, price, timestamp) dipanggil untuk setiap tick"""
+        self._tick_listeners.append(callback)
+
+    def add_candle_close_listener(self, callback):
+        """callback(symbol, interval, candle) dipanggil saat candle berjalan ditutup"""
+        self._close_listeners.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for source in self.sources:
+            source.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        for source in self.sources:
+            source.stop()
+
+    def on_tick(self, symbol, price, volume=0.0, timestamp=None):
+        """Memperbarui harga terakhir dan candle berjalan dari satu tick"""
+        timestamp = timestamp or time.time()
+        closed = []
+        
+        with self._lock:
+            self._prices[symbol] = (price, timestamp)
+            for interval in self.intervals:
+                bucket = get_candle_bucket_start(int(timestamp), interval)
+                key = (symbol, interval)
+                candle = self._candles.get(key)
+                
+                if candle is None or bucket > candle[0]:
+                    if candle is not None:
+                        closed.append((interval, candle))
+                    self._candles[key] = [bucket, price, price, price, price, volume]
+                elif bucket == candle[0]:
+                    candle[2] = price
+                    candle[3] = max(candle[3], price)
+                    candle[4] = min(candle[4], price)
+                    candle[5] += volume
+        
+        if self.store is not None:
+            self._publish(symbol, price, timestamp)
+        
+        for callback in self._tick_listeners:
+            try:
+                callback(symbol, price, timestamp)
+            except Exception as e:
+                logger.warning("Listener tick gagal: %s", e)
+        
+        for interval, candle in closed:
+            for callback in self._close_listeners:
+                try:
+                    callback(symbol, interval, candle)
+                except Exception as e:
+                    logger.warning("Listener candle close gagal: %s", e)
+
+    def _publish(self, symbol, price, timestamp):
+        now = time.monotonic()
+        if now - self._published.get(symbol, 0.0) < LIVE_PRICE_PUBLISH_INTERVAL:
+            return
+        self._published[symbol] = now
+        self.store.set(f"live_price:{symbol}", [price, timestamp], ttl=LIVE_PRICE_MAX_AGE)
+
+    def get_price(self, symbol, max_age=None):
+        """Harga terakhir dari memori, None jika belum ada tick atau sudah basi"""
+        entry = self._prices.get(symbol)
+        if not entry:
+            return None
+        max_age = LIVE_PRICE_MAX_AGE if max_age is None else max_age
+        if time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def get_forming_candle(self, symbol, interval):
+        """Candle yang sedang berjalan dalam format [timestamp, open, close, high, low, volume]"""
+        with self._lock:
+            candle = self._candles.get((symbol, interval))
+            return list(candle) if candle else None
+
+
+class LocalTickSource:
+    """Sumber tick lokal pengganti streaming - tick dimasukkan manual lewat push() (untuk pengujian)"""
+
+    def __init__(self):
+        self.feed = None
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def push(self, symbol, price, volume=0.0, timestamp=None):
+        self.feed.on_tick(symbol, float(price), float(volume), timestamp)
+
+    def replay(self, ticks):
+        """Memutar ulang daftar tick (symbol, price, volume, timestamp)"""
+        for tick in ticks:
+            self.push(*tick)
+
+
+class KucoinTickSource:
+    """Subscriber trade publik KuCoin (/market/match) untuk koin yang didukung"""
+
+    def __init__(self, symbols):
+        self.feed = None
+        self.pairs = {f"{symbol}-USDT": symbol for symbol in symbols}
+        self._stop = threading.Event()
+        self._thread = None
+        self._ws = None
+
+    def start(self):
+        # Event baru per run: sumber bisa dijalankan ulang setelah stop() (mis. saat kembali menjadi leader)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="kucoin-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def _connect(self):
+        response = requests.post(f"{KUCOIN_API_URL}/api/v1/bullet-public", timeout=10)
+        response.raise_for_status()
+        data = response.json()["data"]
+        server = data["instanceServers"][0]
+        
+        ws = websocket.create_connection(
+            f"{server['endpoint']}?token={data['token']}&connectId={int(time.time() * 1000)}",
+            timeout=10
+        )
+        ws.send(json.dumps({
+            "id": str(int(time.time() * 1000)),
+            "type": "subscribe",
+            "topic": "/market/match:" + ",".join(self.pairs),
+            "privateChannel": False,
+            "response": True
+        }))
+        return ws, server.get("pingInterval", 18000) / 1000, server.get("pingTimeout", 10000) / 1000
+
+    def _run(self, stop):
+        backoff = 1
+        while not stop.is_set():
+            try:
+                self._ws, ping_interval, ping_timeout = self._connect()
+                # Ping di tengah pingInterval agar jeda jaringan tidak membuat server memutus koneksi,
+                # dan recv() kembali lebih cepat dari pingTimeout supaya jadwal ping tidak terlewat
+                ping_every = ping_interval / 2
+                self._ws.settimeout(min(ping_every, ping_timeout / 2))
+                log_success("Live feed KuCoin terhubung (%s koin)", len(self.pairs))
+                backoff = 1
+                last_ping = last_received = time.time()
+                
+                while not stop.is_set():
+                    try:
+                        message = json.loads(self._ws.recv())
+                        last_received = time.time()
+                    except websocket.WebSocketTimeoutException:
+                        message = None
+                        # Pong pun tidak datang: koneksi mati tanpa close frame
+                        if time.time() - last_received > ping_interval + ping_timeout:
+                            raise ConnectionError("tidak ada pesan/pong dari server")
+                    
+                    if time.time() - last_ping >= ping_every:
+                        self._ws.send(json.dumps({"id": str(int(time.time() * 1000)), "type": "ping"}))
+                        last_ping = time.time()
+                    
+                    if not message or message.get("type") != "message":
+                        continue
+                    
+                    trade = message.get("data", {})
+                    symbol = self.pairs.get(trade.get("symbol"))
+                    if symbol:
+                        self.feed.on_tick(
+                            symbol,
+                            float(trade["price"]),
+                            float(trade.get("size", 0)),
+                            int(trade["time"]) / 1e9
+                        )
+            except Exception as e:
+                if stop.is_set():
+                    break
+                log_warning("Live feed KuCoin terputus: %s - reconnect dalam %s detik", e, backoff)
+                stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+class TradingViewQuoteSource:
+    """Subscriber quote TradingView (field lp) untuk pasangan forex/komoditas"""
+
+    def __init__(self, symbols, exchange="OANDA"):
+        self.feed = None
+        self.tv_symbols = {f"{exchange}:{symbol}": symbol for symbol in symbols}
+        self._stop = threading.Event()
+        self._thread = None
+        self._ws = None
+
+    def start(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="tradingview-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def _send(self, func_name, params):
+        message = json.dumps({"m": func_name, "p": params}, separators=(",", ":"))
+        self._ws.send(f"~m~{len(message)}~m~{message}")
+
+    def _run(self, stop):
+        backoff = 1
+        while not stop.is_set():
+            try:
+                self._ws = websocket.create_connection(
+                    TRADINGVIEW_WS_URL,
+                    header={"Origin": "https://data.tradingview.com"},
+                    timeout=30
+                )
+                session = f"qs_live_{int(time.time())}"
+                self._send("set_auth_token", ["unauthorized_user_token"])
+                self._send("quote_create_session", [session])
+                self._send("quote_set_fields", [session, "lp", "lp_time"])
+                self._send("quote_add_symbols", [session, *self.tv_symbols])
+                log_success("Live feed TradingView terhubung (%s pair)", len(self.tv_symbols))
+                backoff = 1
+                
+                while not stop.is_set():
+                    raw = self._ws.recv()
+                    for payload in re.split(r"~m~\d+~m~", raw):
+                        if not payload:
+                            continue
+                        if payload.startswith("~h~"):
+                            self._ws.send(f"~m~{len(payload)}~m~{payload}")
+                            continue
+                        self._handle_payload(payload)
+            except Exception as e:
+                if stop.is_set():
+                    break
+                log_warning("Live feed TradingView terputus: %s - reconnect dalam %s detik", e, backoff)
+                stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _handle_payload(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        
+        if message.get("m") != "qsd":
+            return
+        
+        quote = message["p"][1]
+        symbol = self.tv_symbols.get(quote.get("n"))
+        price = quote.get("v", {}).get("lp")
+        if symbol and price is not None:
+            self.feed.on_tick(symbol, float(price), 0.0, quote["v"].get("lp_time"))
+
+
+live_feed = None
+
+
+def get_live_feed():
+    """Feed proses ini dengan subscriber untuk semua simbol yang didukung (dibuat sekali, belum dijalankan)"""
+    global live_feed
+    
+    if live_feed is None:
+        live_feed = LiveMarketFeed()
+        live_feed.add_source(KucoinTickSource(SUPPORTED_COINS.keys()))
+        live_feed.add_source(TradingViewQuoteSource(FOREX_PAIRS.keys()))
+        store = get_store()
+        if store.shared:
+            live_feed.store = store
+    return live_feed
+
+
+def start_live_feed():
+    """Menjalankan subscriber streaming (di leader pada deployment multi-worker)"""
+    feed = get_live_feed()
+    feed.start()
+    return feed
+
+
+def stop_live_feed():
+    if live_feed:
+        live_feed.stop()
+
+
+def get_live_price(symbol, max_age=None):
+    """Harga live dari feed proses ini, atau dari harga yang dipublikasikan leader di store bersama"""
+    max_age = LIVE_PRICE_MAX_AGE if max_age is None else max_age
+    if live_feed:
+        price = live_feed.get_price(symbol, max_age)
+        if price:
+            return price
+    
+    if not LIVE_FEED_ENABLED:
+        return None
+    store = get_store()
+    if not store.shared:
+        return None
+    entry = store.get(f"live_price:{symbol}")
+    if entry and time.time() - entry[1] <= max_age:
+        return entry[0]
+    return None
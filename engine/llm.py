@@ -0,0 +1,298 @@
+"""Analisa chart dengan Gemini Vision"""
+
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.lazy import requests
+from engine.analysis import ANALYSIS_SCHEMA, parse_analysis_json
+from engine.console import get_logger, log_analysis, log_success
+from engine.config import (
+    GEMINI_API_KEY, GEMINI_API_URL, GEMINI_CACHE_TTL, GEMINI_CONTEXT_CACHE, GEMINI_MODEL, INTERVAL_MAP,
+)
+from engine.imaging import load_chart_for_gemini
+from engine.prompts import ANALYSIS_PROMPTS, MTF_PROMPTS, render_analysis_prompt, render_mtf_prompt
+from engine.store import get_store
+
+logger = get_logger(__name__)
+
+# Prefix yang ditolak untuk di-cache (mis. di bawah minimum token model) tidak dicoba lagi selama ini (detik);
+# penolakan disimpan di SHARED_STORE agar worker lain dan proses yang baru start juga tidak mencobanya
+CACHE_RETRY_AFTER = 3600
+# Lease pembuatan cache: hanya satu worker yang memanggil cachedContents untuk template yang sama
+CACHE_CREATE_LEASE = 60
+
+_cache_owner = f"{socket.gethostname()}:{os.getpid()}"
+_cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gemini-cache")
+_cache_pending = set()
+_cache_pending_lock = threading.Lock()
+
+
+def context_cache_key(template):
+    return f"gemini_cache:{GEMINI_MODEL}:{template.key}:{template.digest}"
+
+
+def context_cache_unavailable_key(template):
+    return f"{context_cache_key(template)}:unavailable"
+
+
+def context_cache_enabled():
+    return GEMINI_CONTEXT_CACHE and bool(GEMINI_API_KEY)
+
+
+def create_context_cache(template):
+    """Buat cachedContents Gemini berisi prefix statis template; mengembalikan nama cache atau None"""
+    url = f"{GEMINI_API_URL}/v1beta/cachedContents?key={GEMINI_API_KEY}"
+    payload = {
+        "model": f"models/{GEMINI_MODEL}",
+        "displayName": template.key,
+        "systemInstruction": {"parts": [{"text": template.system}]},
+        "ttl": f"{GEMINI_CACHE_TTL}s",
+    }
+    try:
+        response = requests.post(url, headers={"Content-Type": "application/json"}, data=json.dumps(payload), timeout=30)
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning("Cache konteks Gemini %s gagal dibuat: %s", template.key, e)
+        return None
+
+    if response.status_code != 200 or "name" not in data:
+        message = data.get("error", {}).get("message", "") if isinstance(data, dict) else ""
+        logger.warning(
+            "Cache konteks Gemini tidak tersedia untuk %s (status %s): %s; prefix dikirim sebagai systemInstruction",
+            template.key, response.status_code, message[:200]
+        )
+        return None
+
+    tokens = data.get("usageMetadata", {}).get("totalTokenCount", "?")
+    logger.info(
+        "Cache konteks Gemini %s dibuat: %s (%s token, TTL %ss)",
+        template.key, data['name'], tokens, GEMINI_CACHE_TTL
+    )
+    return data["name"]
+
+
+def ensure_context_cache(template):
+    """
+    Buat cache konteks template jika belum ada di SHARED_STORE (sinkron, dijalankan di thread latar).
+    Nama cache atau penolakannya disimpan di store; worker yang tidak mendapat lease tidak membuat apa-apa.
+    """
+    key = context_cache_key(template)
+    unavailable_key = context_cache_unavailable_key(template)
+    store = get_store()
+    name = store.get(key)
+    if name or store.get(unavailable_key):
+        return name
+    lease = f"create:{key}"
+    if not store.acquire_lease(lease, _cache_owner, CACHE_CREATE_LEASE):
+        return None
+    try:
+        # Cek ulang: worker lain mungkin baru selesai membuatnya sebelum lease ini didapat
+        name = store.get(key)
+        if name or store.get(unavailable_key):
+            return name
+        name = create_context_cache(template)
+        if name:
+            # Kunci store habis lebih dulu dari cache di Gemini, jadi request tidak merujuk cache yang sudah dihapus
+            store.set(key, name, ttl=GEMINI_CACHE_TTL * 0.9)
+        else:
+            store.set(unavailable_key, "1", ttl=CACHE_RETRY_AFTER)
+        return name
+    finally:
+        store.release_lease(lease, _cache_owner)
+
+
+def _ensure_context_cache_job(template):
+    try:
+        ensure_context_cache(template)
+    except Exception as e:
+        logger.warning("Cache konteks Gemini %s gagal disiapkan: %s", template.key, e)
+    finally:
+        with _cache_pending_lock:
+            _cache_pending.discard(context_cache_key(template))
+
+
+def schedule_context_cache(template):
+    """Antrekan pembuatan cache konteks di thread latar (sekali per template selama masih antre)"""
+    key = context_cache_key(template)
+    with _cache_pending_lock:
+        if key in _cache_pending:
+            return
+        _cache_pending.add(key)
+    _cache_executor.submit(_ensure_context_cache_job, template)
+
+
+def prewarm_context_caches():
+    """Siapkan cache konteks semua template di latar saat startup, bukan saat analisa pertama"""
+    if not context_cache_enabled():
+        return
+    for template in [*ANALYSIS_PROMPTS.values(), *MTF_PROMPTS.values()]:
+        schedule_context_cache(template)
+
+
+def get_context_cache(template):
+    """
+    Nama cache konteks untuk prefix statis template (dibagi antar worker lewat SHARED_STORE); None jika tidak tersedia.
+    Tidak pernah memanggil cachedContents di jalur request: cache yang belum ada dibuat di latar dan
+    request ini mengirim prefix sebagai systemInstruction.
+    """
+    if not context_cache_enabled():
+        return None
+    store = get_store()
+    name = store.get(context_cache_key(template))
+    if name or store.get(context_cache_unavailable_key(template)):
+        return name
+    schedule_context_cache(template)
+    return None
+
+
+def invalidate_context_cache(template):
+    get_store().delete(context_cache_key(template))
+
+
+def log_gemini_call(symbol, body_bytes, image_stats, latency_ms, usage, cache_name):
+    """Satu baris log per panggilan: ukuran upload, gambar, token input (dan yang dari cache), latency"""
+    parts = [f"upload {body_bytes / 1024:.0f} KB"]
+    if image_stats:
+        parts.append(
+            f"gambar {image_stats['format']} {image_stats['bytes'] / 1024:.0f} KB "
+            f"(asli {image_stats['original_bytes'] / 1024:.0f} KB, optimasi {image_stats['ms']:.0f} ms)"
+        )
+    if usage:
+        cached = usage.get("cachedContentTokenCount", 0)
+        parts.append(f"token input {usage.get('promptTokenCount', '?')} (cache {cached})")
+    parts.append("prefix dari cache" if cache_name else "prefix inline")
+    logger.info("Gemini %s: %s, latency %.0f ms", symbol, ', '.join(parts), latency_ms)
+
+
+def analyze_with_gemini(image_path, symbol, market_type="crypto", interval="1hour", confluence=None):
+    """Analisa chart menggunakan Gemini Vision API dengan konteks timeframe dan confluence score"""
+    if not GEMINI_API_KEY:
+        return "GEMINI_API_KEY tidak ditemukan. Silakan set environment variable terlebih dahulu."
+    
+    if interval not in INTERVAL_MAP:
+        logger.warning("Interval tidak valid: %s, menggunakan default 1hour", interval)
+        interval = "1hour"
+    
+    try:
+        img_b64, mime_type, image_stats = load_chart_for_gemini(image_path)
+    except FileNotFoundError:
+        return f"File tidak ditemukan: {image_path}"
+    except Exception as e:
+        return f"Error membaca file: {e}"
+
+    template, prompt = render_analysis_prompt(symbol, market_type, interval, confluence)
+    return call_gemini_api(prompt, img_b64, symbol, mime_type, image_stats, template.json_mode, template)
+
+
+def call_gemini_api(prompt, img_b64, symbol, mime_type="image/png", image_stats=None, json_mode=False, template=None):
+    """
+    Mengirim prompt + gambar chart ke Gemini Vision dan mengembalikan teks analisa (atau pesan error).
+    json_mode: respons dibatasi ANALYSIS_SCHEMA dan dikembalikan sebagai AnalysisResult
+    (teks mentah jika respons tidak sesuai schema).
+    template: CompiledPrompt; prefix statisnya dirujuk lewat cache konteks jika tersedia,
+    jika tidak dikirim sebagai systemInstruction.
+    """
+    url = f"{GEMINI_API_URL}/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+    
+    payload = {
+        "contents": [{
+            "role": "user",
+            "parts": [
+                {"text": prompt},
+                {"inline_data": {"mime_type": mime_type, "data": img_b64}}
+            ]
+        }],
+        "generationConfig": {
+            "temperature": 0.2,
+            "topP": 0.85,
+            "maxOutputTokens": 2048
+        }
+    }
+    if json_mode:
+        payload["generationConfig"].update({
+            "responseMimeType": "application/json",
+            "responseSchema": ANALYSIS_SCHEMA,
+            "maxOutputTokens": 1536,
+        })
+    cache_name = get_context_cache(template) if template else None
+    if cache_name:
+        payload["cachedContent"] = cache_name
+    elif template:
+        payload["systemInstruction"] = {"parts": [{"text": template.system}]}
+    
+    headers = {"Content-Type": "application/json"}
+    
+    try:
+        log_analysis("Menganalisa %s dengan AI (Enhanced)...", symbol)
+        body = json.dumps(payload)
+        started = time.perf_counter()
+        response = requests.post(url, headers=headers, data=body, timeout=90)
+        if cache_name and response.status_code in (400, 403, 404):
+            # Cache sudah kedaluwarsa/dihapus di sisi Gemini: buang dan kirim ulang dengan prefix inline
+            logger.warning(
+                "Cache konteks %s ditolak (status %s), kirim ulang tanpa cache",
+                cache_name, response.status_code
+            )
+            invalidate_context_cache(template)
+            del payload["cachedContent"]
+            cache_name = None
+            payload["systemInstruction"] = {"parts": [{"text": template.system}]}
+            body = json.dumps(payload)
+            response = requests.post(url, headers=headers, data=body, timeout=90)
+        latency_ms = (time.perf_counter() - started) * 1000
+        
+        result = response.json() if response.status_code == 200 else {}
+        log_gemini_call(symbol, len(body), image_stats, latency_ms, result.get("usageMetadata"), cache_name)
+        
+        if response.status_code == 200:
+            if "candidates" in result and len(result["candidates"]) > 0:
+                candidate = result["candidates"][0]
+                if "content" in candidate and "parts" in candidate["content"]:
+                    text = candidate["content"]["parts"][0].get("text", "")
+                    if text:
+                        log_success("Analisa %s selesai (Enhanced)", symbol)
+                        if json_mode:
+                            return parse_analysis_json(text, symbol) or text
+                        return text
+            
+            return "Format respons Gemini tidak sesuai. Coba lagi."
+            
+        elif response.status_code == 400:
+            error_detail = response.json()
+            return f"Error: Request tidak valid - {error_detail.get('error', {}).get('message', 'Tidak diketahui')}"
+            
+        elif response.status_code == 403:
+            return "Error: API key tidak valid atau tidak memiliki akses"
+            
+        elif response.status_code == 429:
+            return "Error: Batas permintaan tercapai. Tunggu beberapa saat dan coba lagi."
+            
+        else:
+            return f"Error dari Gemini API (status: {response.status_code})"
+            
+    except requests.exceptions.Timeout:
+        return "Timeout saat menghubungi Gemini API. Coba lagi."
+    except requests.exceptions.RequestException as e:
+        return f"Error koneksi: {e}"
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def analyze_mtf_with_gemini(image_path, symbol, mtf_results, market_type="crypto"):
+    """Analisa multi-timeframe dalam satu panggilan Gemini berdasarkan matriks keselarasan dan chart gabungan"""
+    if not GEMINI_API_KEY:
+        return "GEMINI_API_KEY tidak ditemukan. Silakan set environment variable terlebih dahulu."
+    
+    try:
+        img_b64, mime_type, image_stats = load_chart_for_gemini(image_path)
+    except FileNotFoundError:
+        return f"File tidak ditemukan: {image_path}"
+    except Exception as e:
+        return f"Error membaca file: {e}"
+    
+    template, prompt = render_mtf_prompt(symbol, market_type, mtf_results)
+    return call_gemini_api(prompt, img_b64, symbol, mime_type, image_stats, template.json_mode, template)
@@ -0,0 +1,55 @@
+"""Konfluensi multi-timeframe"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from engine.console import get_logger
+from engine.config import MTF_INTERVALS
+from engine.data import fetch_market_data, prefetch_market_data
+from engine.indicators import build_ohlc_dataframe, calculate_confluence_score
+
+logger = get_logger(__name__)
+
+
+def analyze_timeframe_confluence(symbol, interval, market_type="crypto"):
+    """Mengambil candle satu timeframe dan menghitung confluence score-nya"""
+    data = fetch_market_data(symbol, interval, market_type)
+    if not data or len(data) < 20:
+        return None
+    
+    try:
+        df = build_ohlc_dataframe(data)
+        return {"data": data, "df": df, "confluence": calculate_confluence_score(df, market_type)}
+    except Exception as e:
+        logger.warning("Gagal menghitung konfluensi %s (%s): %s", symbol, interval, e)
+        return None
+
+
+def calculate_mtf_confluence(symbol, market_type="crypto"):
+    """Menghitung confluence score semua timeframe secara paralel (fetch + kalkulasi per timeframe)"""
+    intervals = [i for i in MTF_INTERVALS if market_type == "crypto" or i != "1week"]
+    # Seri dasar semua timeframe diambil dalam satu batch TradingView; fetch per timeframe membaca cache
+    prefetch_market_data([symbol], intervals)
+    
+    with ThreadPoolExecutor(max_workers=len(intervals)) as executor:
+        results = executor.map(lambda i: analyze_timeframe_confluence(symbol, i, market_type), intervals)
+        return {interval: result for interval, result in zip(intervals, results) if result}
+
+
+def summarize_mtf_alignment(mtf_results):
+    """Merangkum keselarasan sinyal antar timeframe"""
+    bullish = [i for i, r in mtf_results.items() if r["confluence"]["signal"] in ("BUY", "STRONG_BUY")]
+    bearish = [i for i, r in mtf_results.items() if r["confluence"]["signal"] in ("SELL", "STRONG_SELL")]
+    total = len(mtf_results)
+    
+    if total and len(bullish) / total >= 0.7:
+        bias = "SELARAS BULLISH"
+    elif total and len(bearish) / total >= 0.7:
+        bias = "SELARAS BEARISH"
+    elif len(bullish) > len(bearish):
+        bias = "CONDONG BULLISH"
+    elif len(bearish) > len(bullish):
+        bias = "CONDONG BEARISH"
+    else:
+        bias = "CAMPURAN"
+    
+    return {"bias": bias, "bullish": bullish, "bearish": bearish, "total": total}
@@ -0,0 +1,384 @@
+"""
+Prompt compiler untuk analisa Gemini
+
+Instruksi statis (peran, konteks timeframe, legenda chart, metodologi, aturan, format output) dikompilasi
+sekali per (market_type, interval) menjadi CompiledPrompt. Per request hanya bagian dinamis (nama aset dan
+blok data konfluensi) yang dirender; prefix statis dikirim sebagai systemInstruction atau dirujuk lewat
+cache konteks Gemini (cachedContents) sehingga tidak diunggah ulang di setiap request.
+"""
+
+import hashlib
+
+from engine.config import FOREX_PAIRS, GEMINI_OUTPUT_MODE, SUPPORTED_COINS
+from engine.mtf import summarize_mtf_alignment
+
+
+TIMEFRAME_CONTEXT = {
+    "1min": {
+        "name": "1 Menit",
+        "type": "Scalping",
+        "tp_range": "0.1% - 0.3%",
+        "sl_range": "0.05% - 0.15%",
+        "hold_time": "1-15 menit",
+        "volatility": "sangat tinggi",
+        "reliability": "rendah (noise tinggi)",
+        "rr_ratio": "1:1 hingga 1:2",
+        "next_candle": "1 menit ke depan",
+        "prediction_horizon": "1-5 menit"
+    },
+    "5min": {
+        "name": "5 Menit",
+        "type": "Scalping",
+        "tp_range": "0.2% - 0.5%",
+        "sl_range": "0.1% - 0.25%",
+        "hold_time": "5-30 menit",
+        "volatility": "tinggi",
+        "reliability": "rendah-sedang",
+        "rr_ratio": "1:1.5 hingga 1:2",
+        "next_candle": "5 menit ke depan",
+        "prediction_horizon": "5-15 menit"
+    },
+    "15min": {
+        "name": "15 Menit",
+        "type": "Intraday",
+        "tp_range": "0.3% - 0.8%",
+        "sl_range": "0.15% - 0.4%",
+        "hold_time": "15 menit - 2 jam",
+        "volatility": "sedang-tinggi",
+        "reliability": "sedang",
+        "rr_ratio": "1:1.5 hingga 1:2.5",
+        "next_candle": "15 menit ke depan",
+        "prediction_horizon": "15-45 menit"
+    },
+    "30min": {
+        "name": "30 Menit",
+        "type": "Intraday",
+        "tp_range": "0.5% - 1.2%",
+        "sl_range": "0.25% - 0.6%",
+        "hold_time": "30 menit - 4 jam",
+        "volatility": "sedang",
+        "reliability": "sedang-baik",
+        "rr_ratio": "1:2 hingga 1:3",
+        "next_candle": "30 menit ke depan",
+        "prediction_horizon": "30-90 menit"
+    },
+    "1hour": {
+        "name": "1 Jam",
+        "type": "Swing Trading",
+        "tp_range": "1% - 2.5%",
+        "sl_range": "0.5% - 1.2%",
+        "hold_time": "2-24 jam",
+        "volatility": "sedang",
+        "reliability": "baik",
+        "rr_ratio": "1:2 hingga 1:3",
+        "next_candle": "1 jam ke depan",
+        "prediction_horizon": "1-4 jam"
+    },
+    "4hour": {
+        "name": "4 Jam",
+        "type": "Swing Trading",
+        "tp_range": "2% - 5%",
+        "sl_range": "1% - 2.5%",
+        "hold_time": "1-7 hari",
+        "volatility": "sedang-rendah",
+        "reliability": "baik-sangat baik",
+        "rr_ratio": "1:2 hingga 1:4",
+        "next_candle": "4 jam ke depan",
+        "prediction_horizon": "4-12 jam"
+    },
+    "1day": {
+        "name": "Harian",
+        "type": "Position Trading",
+        "tp_range": "3% - 10%",
+        "sl_range": "1.5% - 5%",
+        "hold_time": "3-30 hari",
+        "volatility": "rendah",
+        "reliability": "sangat baik",
+        "rr_ratio": "1:2 hingga 1:5",
+        "next_candle": "1 hari ke depan",
+        "prediction_horizon": "1-3 hari"
+    },
+    "1week": {
+        "name": "Mingguan",
+        "type": "Position/Investment",
+        "tp_range": "5% - 20%",
+        "sl_range": "3% - 10%",
+        "hold_time": "2-12 minggu",
+        "volatility": "sangat rendah",
+        "reliability": "sangat baik (tren utama)",
+        "rr_ratio": "1:2 hingga 1:5",
+        "next_candle": "1 minggu ke depan",
+        "prediction_horizon": "1-4 minggu"
+    }
+}
+
+MARKET_NOTES = {
+    "crypto": "Aset adalah crypto dengan harga dalam USDT; tulis harga dengan presisi sesuai skala harga pada chart.",
+    "forex": "Aset adalah pair forex atau komoditas; tulis harga forex dengan 5 desimal dan komoditas dengan 2 desimal.",
+}
+
+
+def get_timeframe_context(interval):
+    """Mendapatkan konteks berdasarkan timeframe untuk analisa yang lebih akurat"""
+    return TIMEFRAME_CONTEXT.get(interval, TIMEFRAME_CONTEXT["1hour"])
+
+
+def text_output_format(tf_context):
+    """Instruksi format teks bebas (mode text); hasilnya diparse dengan regex di engine.formatting"""
+    return f"""Berikan analisa dalam format LENGKAP berikut (Bahasa Indonesia):
+
+PREDIKSI {tf_context['next_candle'].upper()}: [NAIK/TURUN/SIDEWAYS] - Keyakinan [Tinggi/Sedang/Rendah] - [Alasan spesifik berdasarkan 2-3 indikator utama]
+
+PERKIRAAN PERGERAKAN: Dalam {tf_context['prediction_horizon']}, harga diperkirakan [naik/turun/sideways] dari [harga saat ini] menuju [target spesifik] dengan probabilitas [persentase berdasarkan konfluensi]
+
+SINYAL: [STRONG BUY/BUY/HOLD/SELL/STRONG SELL] - [Penjelasan mengapa, sebutkan minimal 3 indikator pendukung]
+
+KEKUATAN SINYAL: [X dari 8 indikator mendukung] - [daftar indikator yang setuju]
+
+HARGA SAAT INI: [Harga terakhir dari chart - HARUS AKURAT]
+HARGA MASUK IDEAL: [Harga entry optimal - bisa sama dengan harga saat ini atau tunggu pullback]
+
+TARGET PROFIT 1: [TP1 dengan persentase dari entry - target konservatif]
+TARGET PROFIT 2: [TP2 dengan persentase dari entry - target moderat]  
+TARGET PROFIT 3: [TP3 dengan persentase dari entry - target ambisius jika tren kuat]
+
+STOP LOSS: [Harga SL berdasarkan ATR dan support/resistance - WAJIB dengan jarak yang jelas]
+RASIO RR: [Risk:Reward ratio yang tepat, minimal 1:2]
+POTENSI PROFIT: [Persentase potensi profit jika TP1 tercapai]
+POTENSI LOSS: [Persentase potensi loss jika SL terkena]
+
+WAKTU HOLD: {tf_context['hold_time']}
+
+ANALISA TEKNIKAL DETAIL:
+POLA CANDLESTICK: [Pola yang teridentifikasi dan implikasinya]
+TREN EMA: [Posisi EMA20 vs EMA50 vs EMA200 dan maknanya]
+KONDISI RSI: [Nilai RSI, kondisi, dan apakah ada divergence]
+KONDISI STOCH RSI: [Nilai K/D, cross, dan kondisi overbought/oversold]
+KONDISI MACD: [Posisi MACD vs Signal, histogram, dan momentum]
+POSISI BOLLINGER: [Dimana harga relatif terhadap BB dan apakah ada squeeze]
+LEVEL FIBONACCI: [Level Fib aktif saat ini dan target berikutnya]
+
+SUPPORT KUNCI:
+- S1: [Level support pertama - terdekat]
+- S2: [Level support kedua]
+- S3: [Level support kuat jika breakdown]
+
+RESISTANCE KUNCI:
+- R1: [Level resistance pertama - terdekat]
+- R2: [Level resistance kedua]
+- R3: [Level resistance kuat jika breakout]
+
+PERINGATAN RISIKO: [Sebutkan skenario yang bisa membatalkan analisa ini]
+
+KESIMPULAN: Dalam {tf_context['next_candle']}, harga aset ini diprediksi [NAIK/TURUN/SIDEWAYS] dengan keyakinan [tinggi/sedang/rendah] karena [alasan utama 2-3 kalimat yang jelas dan spesifik berdasarkan konfluensi indikator]."""
+
+
+def json_output_format(tf_context):
+    """Instruksi pengisian field JSON (mode json); struktur dijaga responseSchema, jadi cukup arti tiap field"""
+    return f"""Jawab HANYA dengan objek JSON sesuai schema (teks dalam Bahasa Indonesia, harga berupa angka tanpa simbol):
+- signal: STRONG_BUY/BUY/HOLD/SELL/STRONG_SELL; signal_reason: alasan dengan minimal 3 indikator pendukung
+- signal_strength: "X dari 8 indikator mendukung" + daftar indikator yang setuju
+- prediction/confidence/prediction_reason: arah {tf_context['next_candle']}, keyakinan, dan alasan dari 2-3 indikator utama
+- movement: perkiraan pergerakan dalam {tf_context['prediction_horizon']} (dari harga saat ini menuju target, dengan probabilitas)
+- current_price: harga terakhir dari chart (HARUS AKURAT); entry: harga masuk ideal
+- tp1/tp2/tp3: target konservatif/moderat/ambisius (tp3 null jika tren lemah); stop_loss: berdasarkan ATR dan support/resistance
+- supports/resistances: 3 level terdekat masing-masing
+- indicators: kondisi candlestick, ema (EMA20/50/200), rsi, stoch_rsi, macd, bollinger, fibonacci (masing-masing 1 kalimat)
+- risk_warning: skenario yang membatalkan analisa
+- narrative: kesimpulan 2-3 kalimat tentang arah harga dalam {tf_context['next_candle']} dan alasannya
+Persentase TP/SL dan rasio RR dihitung sistem dari angka, tidak perlu ditulis."""
+
+
+MTF_TEXT_OUTPUT_FORMAT = """Berikan analisa dalam format berikut (Bahasa Indonesia):
+
+SINYAL: [STRONG BUY/BUY/HOLD/SELL/STRONG SELL] - [Alasan berdasarkan keselarasan timeframe]
+TREN UTAMA: [Arah tren dari timeframe besar]
+TIMEFRAME TERBAIK: [Timeframe paling ideal untuk entry dan alasannya]
+HARGA MASUK IDEAL: [Harga entry]
+TARGET PROFIT 1: [TP1]
+TARGET PROFIT 2: [TP2]
+STOP LOSS: [SL berdasarkan ATR timeframe entry]
+PERINGATAN RISIKO: [Konflik antar timeframe yang perlu diwaspadai]
+KESIMPULAN: [2-3 kalimat ringkas]"""
+
+MTF_JSON_OUTPUT_FORMAT = """Jawab HANYA dengan objek JSON sesuai schema (teks dalam Bahasa Indonesia, harga berupa angka tanpa simbol):
+- signal: STRONG_BUY/BUY/HOLD/SELL/STRONG_SELL; signal_reason: alasan berdasarkan keselarasan timeframe
+- main_trend: arah tren dari timeframe besar; best_timeframe: timeframe paling ideal untuk entry dan alasannya
+- entry, tp1, tp2, stop_loss (berdasarkan ATR timeframe entry); tp3 null
+- risk_warning: konflik antar timeframe yang perlu diwaspadai
+- narrative: kesimpulan 2-3 kalimat ringkas"""
+
+
+class CompiledPrompt:
+    """Prefix statis satu template; digest ikut berubah jika teks instruksi berubah (kunci cache konteks)"""
+
+    def __init__(self, key, system, json_mode):
+        self.key = key
+        self.system = system
+        self.json_mode = json_mode
+        self.digest = hashlib.sha1(system.encode("utf-8")).hexdigest()[:12]
+
+    def __repr__(self):
+        return f"CompiledPrompt({self.key}, {len(self.system)} karakter, {self.digest})"
+
+
+def compile_analysis_prompt(market_type, interval, json_mode):
+    """Instruksi statis analisa satu timeframe untuk satu jenis pasar"""
+    tf_context = get_timeframe_context(interval)
+    output_format = json_output_format(tf_context) if json_mode else text_output_format(tf_context)
+    system = f"""Kamu adalah analis teknikal profesional dengan pengalaman 15+ tahun. Analisa chart candlestick yang diberikan pada timeframe {tf_context['name']} dengan SANGAT TELITI. {MARKET_NOTES[market_type]}
+
+KONTEKS TIMEFRAME {tf_context['name'].upper()}:
+- Tipe Trading: {tf_context['type']}
+- Target Profit Wajar: {tf_context['tp_range']} dari harga entry
+- Stop Loss Wajar: {tf_context['sl_range']} dari harga entry (Gunakan 1.5-2x ATR untuk presisi)
+- Estimasi Waktu Hold: {tf_context['hold_time']}
+- Volatilitas: {tf_context['volatility']}
+- Keandalan Sinyal: {tf_context['reliability']}
+- Rasio Risk:Reward Minimal: {tf_context['rr_ratio']}
+- Horizon Prediksi: {tf_context['next_candle']} ({tf_context['prediction_horizon']})
+
+INDIKATOR PADA CHART (5 Panel):
+1. Panel Utama - Price Action:
+   - EMA 20 (biru) - tren jangka pendek
+   - EMA 50 (orange) - tren jangka menengah  
+   - EMA 200 (merah tebal) - tren jangka panjang PENTING
+   - Bollinger Bands (ungu putus-putus) - volatilitas dan overbought/oversold
+   - Fibonacci Retracement (kuning-orange) - level support/resistance kunci
+
+2. Panel RSI (14):
+   - Level 70 = Overbought (potensi koreksi turun)
+   - Level 30 = Oversold (potensi bounce naik)
+   - Level 50 = Garis tengah (konfirmasi tren)
+
+3. Panel Stochastic RSI:
+   - Garis K (biru) dan D (orange)
+   - Level 80 = Overbought ekstrem
+   - Level 20 = Oversold ekstrem
+   - Cross bullish/bearish = sinyal entry
+
+4. Panel MACD:
+   - MACD line (biru) vs Signal line (merah)
+   - Histogram hijau = momentum bullish
+   - Histogram merah = momentum bearish
+   - Crossover = sinyal penting
+
+METODOLOGI ANALISA MULTI-KONFLUENSI:
+1. TREN PRIMER: Tentukan arah tren dari EMA20/50/200 dan posisi harga relatif
+2. MOMENTUM: Konfirmasi dengan RSI, Stochastic RSI, dan MACD
+3. DIVERGENCE: Perhatikan RSI/MACD divergence untuk sinyal reversal
+4. VOLATILITAS: Gunakan Bollinger Bands dan ATR untuk placement SL/TP
+5. SUPPORT/RESISTANCE: Kombinasikan Fibonacci dengan high/low sebelumnya
+6. KONFIRMASI: Minimal 3 dari 5 indikator harus setuju untuk sinyal kuat
+
+ATURAN KETAT:
+- Jika ADX < 20: Pasar ranging, JANGAN trade melawan batas range
+- Jika RSI > 70 DAN Stoch RSI > 80: SANGAT OVERBOUGHT, risiko koreksi tinggi
+- Jika RSI < 30 DAN Stoch RSI < 20: SANGAT OVERSOLD, potensi bounce
+- Jika ada Divergence: Prioritaskan sinyal divergence di atas indikator lain
+- Jika harga di bawah EMA200: Tren primer bearish, hati-hati long
+- Jika harga di atas EMA200: Tren primer bullish, hati-hati short
+- Pastikan RR minimal 1:2 untuk setiap trade
+
+{output_format}
+
+CATATAN: Berikan angka SPESIFIK dan PRESISI berdasarkan chart. JANGAN menebak - baca nilai dari chart dengan teliti. Target dan SL harus REALISTIS sesuai timeframe {tf_context['name']}."""
+    return CompiledPrompt(f"analysis:{market_type}:{interval}", system, json_mode)
+
+
+def compile_mtf_prompt(market_type, json_mode):
+    """Instruksi statis analisa multi-timeframe untuk satu jenis pasar"""
+    output_format = MTF_JSON_OUTPUT_FORMAT if json_mode else MTF_TEXT_OUTPUT_FORMAT
+    system = f"""Kamu adalah analis teknikal profesional. Analisa aset yang diberikan secara MULTI-TIMEFRAME. {MARKET_NOTES[market_type]}
+
+Chart berisi harga penutupan + EMA20 (biru) + EMA50 (orange) untuk setiap timeframe.
+
+ATURAN:
+- Timeframe besar (4 jam ke atas) menentukan arah tren utama
+- Timeframe kecil hanya untuk timing entry searah tren utama
+- Jika timeframe besar dan kecil bertentangan, utamakan HOLD atau tunggu konfirmasi
+
+{output_format}"""
+    return CompiledPrompt(f"mtf:{market_type}", system, json_mode)
+
+
+ANALYSIS_PROMPTS = {
+    (market_type, interval): compile_analysis_prompt(market_type, interval, GEMINI_OUTPUT_MODE == "json")
+    for market_type in MARKET_NOTES
+    for interval in TIMEFRAME_CONTEXT
+}
+MTF_PROMPTS = {market_type: compile_mtf_prompt(market_type, GEMINI_OUTPUT_MODE == "json") for market_type in MARKET_NOTES}
+
+
+def asset_display_name(symbol, market_type):
+    if market_type == "crypto":
+        return f"{symbol}/USDT ({SUPPORTED_COINS.get(symbol, {}).get('name', symbol)})"
+    return f"{symbol} ({FOREX_PAIRS.get(symbol, {}).get('name', symbol)})"
+
+
+def render_confluence(confluence):
+    """Blok data konfluensi (satu-satunya bagian prompt analisa yang berubah per candle)"""
+    if not confluence:
+        return ""
+
+    bullish_details = "\n  - ".join(confluence['signal_details']['bullish'][:5]) if confluence['signal_details']['bullish'] else "Tidak ada"
+    bearish_details = "\n  - ".join(confluence['signal_details']['bearish'][:5]) if confluence['signal_details']['bearish'] else "Tidak ada"
+
+    ema200_str = f"{confluence['ema200']:.4f}" if confluence['ema200'] else "N/A"
+    adx_status = "(Tren Kuat)" if confluence['adx'] > 25 else "(Tren Lemah)"
+    rsi_status = "(Overbought - Potensi Turun)" if confluence['rsi'] > 70 else "(Oversold - Potensi Naik)" if confluence['rsi'] < 30 else "(Netral)"
+    stoch_status = "(Overbought)" if confluence['stoch_rsi'] > 80 else "(Oversold)" if confluence['stoch_rsi'] < 20 else "(Netral)"
+    rsi_div_status = "(Sinyal Reversal Kuat!)" if confluence['rsi_divergence'] != 'none' else ""
+    macd_div_status = "(Sinyal Reversal Kuat!)" if confluence['macd_divergence'] != 'none' else ""
+
+    return f"""DATA ANALISA KUANTITATIF (SUDAH DIHITUNG):
+- Sinyal Sistem: {confluence['signal']} (Keyakinan: {confluence['confidence']})
+- Skor Bullish: {confluence['bullish_pct']:.1f}% | Skor Bearish: {confluence['bearish_pct']:.1f}%
+- Arah Tren: {confluence['trend_direction']} | Kekuatan Tren: {confluence['trend_strength']}
+- ADX (Kekuatan Tren): {confluence['adx']:.1f} {adx_status}
+- RSI: {confluence['rsi']:.1f} {rsi_status}
+- Stochastic RSI: {confluence['stoch_rsi']:.1f} {stoch_status}
+- ATR (Volatilitas): {confluence['atr']:.4f} ({confluence['atr_pct']:.2f}% dari harga)
+- RSI Divergence: {confluence['rsi_divergence'].upper()} {rsi_div_status}
+- MACD Divergence: {confluence['macd_divergence'].upper()} {macd_div_status}
+- EMA20: {confluence['ema20']:.4f} | EMA50: {confluence['ema50']:.4f} | EMA200: {ema200_str}
+- Bollinger Upper: {confluence['bb_upper']:.4f} | Middle: {confluence['bb_middle']:.4f} | Lower: {confluence['bb_lower']:.4f}
+- MACD: {confluence['macd']:.6f} | Signal: {confluence['macd_signal']:.6f} | Histogram: {confluence['macd_hist']:.6f}
+
+SINYAL BULLISH TERDETEKSI:
+  - {bullish_details}
+
+SINYAL BEARISH TERDETEKSI:
+  - {bearish_details}"""
+
+
+def render_analysis_prompt(symbol, market_type, interval, confluence=None):
+    """(CompiledPrompt, teks dinamis) untuk analisa satu timeframe"""
+    market_type = market_type if market_type in MARKET_NOTES else "forex"
+    template = ANALYSIS_PROMPTS[(market_type, interval if interval in TIMEFRAME_CONTEXT else "1hour")]
+    text = f"Analisa chart candlestick {asset_display_name(symbol, market_type)} pada timeframe {get_timeframe_context(interval)['name']}."
+    block = render_confluence(confluence)
+    return template, f"{text}\n\n{block}" if block else text
+
+
+def render_mtf_prompt(symbol, market_type, mtf_results):
+    """(CompiledPrompt, teks dinamis) untuk analisa multi-timeframe: matriks konfluensi + keselarasan"""
+    market_type = market_type if market_type in MARKET_NOTES else "forex"
+    alignment = summarize_mtf_alignment(mtf_results)
+    rows = []
+    for interval, result in mtf_results.items():
+        c = result["confluence"]
+        rows.append(
+            f"- {get_timeframe_context(interval)['name']}: {c['signal']} (bullish {c['bullish_pct']:.0f}% / bearish {c['bearish_pct']:.0f}%), "
+            f"tren {c['trend_direction']} {c['trend_strength']}, RSI {c['rsi']:.1f}, ADX {c['adx']:.1f}, "
+            f"ATR {c['atr']:.4f}, EMA20 {c['ema20']:.4f}, EMA50 {c['ema50']:.4f}"
+        )
+    matrix = "\n".join(rows)
+
+    text = f"""Analisa {asset_display_name(symbol, market_type)} secara MULTI-TIMEFRAME.
+
+DATA KONFLUENSI PER TIMEFRAME (SUDAH DIHITUNG):
+{matrix}
+
+Keselarasan sistem: {alignment['bias']} ({len(alignment['bullish'])} bullish, {len(alignment['bearish'])} bearish dari {alignment['total']} timeframe)"""
+    return MTF_PROMPTS[market_type], text
@@ -0,0 +1,662 @@
+"""
+Store key-value bersama untuk deployment multi-worker
+
+Backend dipilih lewat SHARED_STORE:
+- memory (default): dict di proses ini, tanpa serialisasi - untuk satu proses
+- sqlite:///path/ke/store.db: file SQLite (WAL) yang dibagi semua worker di satu host
+- redis://host:port/db: server Redis atau stand-in lokal (`python -m engine.store --serve`)
+
+Store dipakai sebagai cache (candle, hasil analisa, state chat): kegagalan backend dicatat
+dan diperlakukan sebagai cache miss, bukan error yang menggagalkan analisa.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from engine.config import SHARED_STORE
+from engine.console import get_logger
+
+
+logger = get_logger(__name__)
+
+# Entri kedaluwarsa dibersihkan setiap N kali set
+PRUNE_EVERY = 256
+# Jeda minimum antar peringatan kegagalan backend, dan jeda sebelum koneksi ulang ke server yang mati
+WARNING_INTERVAL = 30
+RECONNECT_DELAY = 5
+
+
+class StoreError(Exception):
+    """Balasan error dari backend store (mis. '-ERR' dari server Redis)"""
+
+
+class Store:
+    """Antarmuka store: get/set/delete dengan TTL opsional (detik)"""
+
+    name = "store"
+    shared = True
+    _last_warning = 0.0
+
+    def warn(self, message):
+        """Peringatan kegagalan backend, paling sering sekali per WARNING_INTERVAL detik"""
+        now = time.monotonic()
+        if now - self._last_warning >= WARNING_INTERVAL:
+            self._last_warning = now
+            logger.warning("Store %s: %s", self.name, message)
+
+    def get(self, key, default=None):
+        try:
+            value = self._get(key)
+        except (OSError, sqlite3.Error, StoreError, ValueError) as e:
+            self.warn(f"gagal membaca {key}: {e}")
+            return default
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        try:
+            self._set(key, value, ttl)
+        except (OSError, sqlite3.Error, StoreError, TypeError, ValueError) as e:
+            self.warn(f"gagal menyimpan {key}: {e}")
+
+    def delete(self, key):
+        try:
+            self._delete(key)
+        except (OSError, sqlite3.Error, StoreError) as e:
+            self.warn(f"gagal menghapus {key}: {e}")
+
+    def keys(self, prefix):
+        """Semua key (belum kedaluwarsa) yang diawali prefix"""
+        try:
+            return sorted(self._keys(prefix))
+        except (OSError, sqlite3.Error, StoreError) as e:
+            self.warn(f"gagal membaca daftar {prefix}*: {e}")
+            return []
+
+    def incr(self, key, ttl):
+        """
+        Tambah counter secara atomik dan kembalikan nilai barunya (key baru mulai dari 1); ttl diperbarui
+        setiap penambahan. Kegagalan backend menghasilkan None agar pemanggil bisa memakai batas lokal.
+        """
+        try:
+            return int(self._incr(key, ttl))
+        except (OSError, sqlite3.Error, StoreError, TypeError, ValueError) as e:
+            self.warn(f"gagal menambah {key}: {e}")
+            return None
+
+    def acquire_lease(self, name, owner, ttl):
+        """
+        Ambil atau perpanjang lease secara atomik: berhasil jika lease kosong, kedaluwarsa,
+        atau sudah dipegang owner yang sama. Kegagalan backend berarti lease tidak didapat.
+        """
+        try:
+            return bool(self._acquire_lease(f"lease:{name}", owner, ttl))
+        except (OSError, sqlite3.Error, StoreError) as e:
+            self.warn(f"gagal mengambil lease {name}: {e}")
+            return False
+
+    def release_lease(self, name, owner):
+        """Lepas lease hanya jika masih dipegang owner ini"""
+        try:
+            self._release_lease(f"lease:{name}", owner)
+        except (OSError, sqlite3.Error, StoreError) as e:
+            self.warn(f"gagal melepas lease {name}: {e}")
+
+    def close(self):
+        pass
+
+
+class MemoryStore(Store):
+    """Store di memori proses; nilai disimpan apa adanya, jadi jangan diubah setelah set/get"""
+
+    name = "memory"
+    shared = False
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (value, now + ttl if ttl else None)
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                for expired in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                    del self._data[expired]
+
+    def _delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _keys(self, prefix):
+        now = time.time()
+        with self._lock:
+            return [k for k, (_, exp) in self._data.items() if k.startswith(prefix) and (exp is None or exp > now)]
+
+    def _incr(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            value = entry[0] + 1 if entry and (entry[1] is None or entry[1] > now) else 1
+            self._data[key] = (value, now + ttl)
+            return value
+
+    def _acquire_lease(self, key, owner, ttl):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[1] > now and entry[0] != owner:
+                return False
+            self._data[key] = (owner, now + ttl)
+            return True
+
+    def _release_lease(self, key, owner):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] == owner:
+                del self._data[key]
+
+
+class SQLiteStore(Store):
+    """Store di file SQLite (mode WAL) - dibagi antar proses di host yang sama, satu koneksi per thread"""
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._connection()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _get(self, key):
+        row = self._connection().execute("SELECT value, expires_at FROM store WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO store (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, separators=(",", ":")), now + ttl if ttl else None)
+        )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            connection.execute("DELETE FROM store WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def _delete(self, key):
+        self._connection().execute("DELETE FROM store WHERE key = ?", (key,))
+
+    def _keys(self, prefix):
+        # Rentang [prefix, prefix + U+FFFF) memakai index primary key, tidak seperti LIKE
+        rows = self._connection().execute(
+            "SELECT key FROM store WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+            (prefix, prefix + "\uffff", time.time())
+        )
+        return [row[0] for row in rows]
+
+    def _incr(self, key, ttl):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = connection.execute("SELECT value, expires_at FROM store WHERE key = ?", (key,)).fetchone()
+            value = json.loads(row[0]) + 1 if row and (row[1] is None or row[1] > now) else 1
+            connection.execute(
+                "INSERT OR REPLACE INTO store (key, value, expires_at) VALUES (?, ?, ?)", (key, json.dumps(value), now + ttl)
+            )
+            connection.execute("COMMIT")
+            return value
+        except (sqlite3.Error, TypeError, ValueError):
+            connection.execute("ROLLBACK")
+            raise
+
+    def _acquire_lease(self, key, owner, ttl):
+        connection = self._connection()
+        # BEGIN IMMEDIATE mengambil write lock database, jadi baca-lalu-tulis di bawah ini atomik antar proses
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = connection.execute("SELECT value, expires_at FROM store WHERE key = ?", (key,)).fetchone()
+            if row and row[1] is not None and row[1] > now and json.loads(row[0]) != owner:
+                connection.execute("COMMIT")
+                return False
+            connection.execute(
+                "INSERT OR REPLACE INTO store (key, value, expires_at) VALUES (?, ?, ?)", (key, json.dumps(owner), now + ttl)
+            )
+            connection.execute("COMMIT")
+            return True
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _release_lease(self, key, owner):
+        self._connection().execute("DELETE FROM store WHERE key = ? AND value = ?", (key, json.dumps(owner)))
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def encode_command(*args):
+    """Encode perintah sebagai array bulk string RESP"""
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+
+def read_reply(reader):
+    """Baca satu balasan RESP2 dari file-like socket"""
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("koneksi store ditutup")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise StoreError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(body)
+        return None if length < 0 else [read_reply(reader) for _ in range(length)]
+    raise StoreError(f"balasan RESP tidak dikenal: {line!r}")
+
+
+class RedisStore(Store):
+    """Client RESP minimal (GET/SET PX/DEL/INCR) dengan satu koneksi per thread; nilai disimpan sebagai JSON"""
+
+    name = "redis"
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=5.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connect(self):
+        if time.monotonic() < self._down_until:
+            raise ConnectionError("server store tidak tersedia")
+        try:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+        except OSError:
+            self._down_until = time.monotonic() + RECONNECT_DELAY
+            raise
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", self.db)
+
+    def _roundtrip(self, *args):
+        self._local.sock.sendall(encode_command(*args))
+        return read_reply(self._local.reader)
+
+    def execute(self, *args):
+        """Kirim satu perintah; koneksi yang putus dibuka ulang sekali sebelum menyerah"""
+        for attempt in (1, 2):
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            try:
+                return self._roundtrip(*args)
+            except (OSError, ConnectionError):
+                self._drop()
+                if attempt == 2:
+                    raise
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _get(self, key):
+        data = self.execute("GET", key)
+        return None if data is None else json.loads(data)
+
+    def _set(self, key, value, ttl):
+        data = json.dumps(value, separators=(",", ":"))
+        if ttl:
+            self.execute("SET", key, data, "PX", max(1, int(ttl * 1000)))
+        else:
+            self.execute("SET", key, data)
+
+    def _delete(self, key):
+        self.execute("DEL", key)
+
+    def _keys(self, prefix):
+        pattern = "".join("\\" + c if c in "*?[]\\" else c for c in prefix) + "*"
+        keys, cursor = [], "0"
+        while True:
+            cursor, batch = self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            keys.extend(k.decode() for k in batch)
+            cursor = cursor.decode() if isinstance(cursor, bytes) else str(cursor)
+            if cursor == "0":
+                return keys
+
+    def _incr(self, key, ttl):
+        # Counter disimpan sebagai angka biasa, jadi tetap terbaca JSON oleh get()
+        self.execute("MULTI")
+        self.execute("INCR", key)
+        self.execute("PEXPIRE", key, max(1, int(ttl * 1000)))
+        return self.execute("EXEC")[0]
+
+    def _acquire_lease(self, key, owner, ttl):
+        data = json.dumps(owner)
+        ttl_ms = max(1, int(ttl * 1000))
+        if self.execute("SET", key, data, "NX", "PX", ttl_ms) == "OK":
+            return True
+        # Perpanjang hanya jika masih milik owner ini: WATCH membatalkan EXEC jika key berubah di antaranya
+        self.execute("WATCH", key)
+        if self.execute("GET", key) != data.encode():
+            self.execute("UNWATCH")
+            return False
+        self.execute("MULTI")
+        self.execute("SET", key, data, "PX", ttl_ms)
+        return self.execute("EXEC") is not None
+
+    def _release_lease(self, key, owner):
+        data = json.dumps(owner).encode()
+        self.execute("WATCH", key)
+        if self.execute("GET", key) != data:
+            self.execute("UNWATCH")
+            return
+        self.execute("MULTI")
+        self.execute("DEL", key)
+        self.execute("EXEC")
+
+    def close(self):
+        self._drop()
+
+
+def open_store(url):
+    """Buat store dari URL: memory, sqlite:///path, redis://[:password@]host:port/db"""
+    if not url or url == "memory":
+        return MemoryStore()
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        # sqlite:///relatif.db atau sqlite:////path/absolut.db
+        path = url.split("://", 1)[1]
+        return SQLiteStore(path[1:] if path.startswith("/") else path or "store.db")
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisStore(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, parsed.password)
+    raise ValueError(f"SHARED_STORE tidak dikenal: {url}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Store bersama proses ini (dibuat sekali dari SHARED_STORE)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_store(SHARED_STORE)
+    return _store
+
+
+class RespStandInHandler(socketserver.StreamRequestHandler):
+    """Satu koneksi client RESP ke stand-in lokal (termasuk state WATCH/MULTI koneksi ini)"""
+
+    def handle(self):
+        self.watched = {}
+        self.queued = None
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError, StoreError):
+                return
+            if not isinstance(command, list) or not command:
+                return
+            name = command[0].decode().upper()
+            args = [a if isinstance(a, bytes) else str(a).encode() for a in command[1:]]
+            try:
+                reply = self.transaction(name, args)
+            except StoreError as e:
+                self.wfile.write(f"-{e}\r\n".encode())
+                continue
+            self.wfile.write(self.encode_reply(reply))
+            if name == "QUIT":
+                return
+
+    def transaction(self, name, args):
+        server = self.server
+        if name == "WATCH":
+            with server.lock:
+                for key in args:
+                    self.watched[key] = server.version(key)
+            return True
+        if name == "UNWATCH":
+            self.watched = {}
+            return True
+        if name == "MULTI":
+            self.queued = []
+            return True
+        if name == "DISCARD":
+            self.queued, self.watched = None, {}
+            return True
+        if name == "EXEC":
+            queued, watched = self.queued or [], self.watched
+            self.queued, self.watched = None, {}
+            with server.lock:
+                if any(server.version(key) != version for key, version in watched.items()):
+                    return NULL_ARRAY
+                return [server.execute(n, a) for n, a in queued]
+        if self.queued is not None:
+            self.queued.append((name, args))
+            return "QUEUED"
+        with server.lock:
+            return server.execute(name, args)
+
+    @classmethod
+    def encode_reply(cls, reply):
+        if reply is NULL_ARRAY:
+            return b"*-1\r\n"
+        if reply is True:
+            return b"+OK\r\n"
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, int):
+            return f":{reply}\r\n".encode()
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        if isinstance(reply, list):
+            return f"*{len(reply)}\r\n".encode() + b"".join(cls.encode_reply(item) for item in reply)
+        return f"${len(reply)}\r\n".encode() + reply + b"\r\n"
+
+
+def glob_to_regex(pattern):
+    """Pola glob Redis (*, ?, [..], escape backslash) ke regex"""
+    parts, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif c == "*":
+            parts.append(".*")
+        elif c == "?":
+            parts.append(".")
+        elif c == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            parts.append("[" + pattern[i + 1:end] + "]")
+            i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return re.compile("".join(parts), re.DOTALL)
+
+
+# Balasan EXEC yang dibatalkan WATCH (array null, beda dari bulk string null)
+NULL_ARRAY = object()
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """
+    Stand-in lokal untuk protokol Redis, subset yang dipakai RedisStore:
+    PING, GET, SET EX/PX/NX/XX, DEL, EXISTS, INCR, PEXPIRE, SCAN MATCH, WATCH/MULTI/EXEC, SELECT, AUTH, QUIT.
+    Cukup untuk development atau load test multi-worker tanpa server Redis.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        super().__init__((host, port), RespStandInHandler)
+        self.data = {}
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def version(self, key):
+        self.live_value(key)
+        return self.versions.get(key, 0)
+
+    def touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def live_value(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.time():
+            del self.data[key]
+            self.touch(key)
+            return None
+        return entry
+
+    def execute(self, name, args):
+        """Jalankan satu perintah (dipanggil dengan self.lock dipegang)"""
+        if name == "PING":
+            return "PONG"
+        if name in ("SELECT", "AUTH", "QUIT"):
+            return True
+        if name == "GET":
+            entry = self.live_value(args[0])
+            return entry[0] if entry else None
+        if name == "SET":
+            return self.command_set(args)
+        if name == "DEL":
+            deleted = 0
+            for key in args:
+                if self.live_value(key) is not None:
+                    del self.data[key]
+                    self.touch(key)
+                    deleted += 1
+            return deleted
+        if name == "EXISTS":
+            return sum(self.live_value(key) is not None for key in args)
+        if name == "INCR":
+            entry = self.live_value(args[0])
+            try:
+                value = int(entry[0]) + 1 if entry else 1
+            except ValueError:
+                raise StoreError("ERR value is not an integer or out of range")
+            self.data[args[0]] = (str(value).encode(), entry[1] if entry else None)
+            self.touch(args[0])
+            return value
+        if name == "PEXPIRE":
+            entry = self.live_value(args[0])
+            if entry is None:
+                return 0
+            self.data[args[0]] = (entry[0], time.time() + int(args[1]) / 1000)
+            self.touch(args[0])
+            return 1
+        if name == "SCAN":
+            options = [a.decode() for a in args[1:]]
+            pattern = options[options.index("MATCH") + 1] if "MATCH" in options else "*"
+            matcher = glob_to_regex(pattern)
+            keys = [k for k in list(self.data) if self.live_value(k) is not None and matcher.fullmatch(k.decode())]
+            return [b"0", keys]
+        raise StoreError(f"ERR unknown command '{name}'")
+
+    def command_set(self, args):
+        key, value, options = args[0], args[1], [a.decode().upper() for a in args[2:]]
+        expires_at = None
+        if "EX" in options:
+            expires_at = time.time() + int(options[options.index("EX") + 1])
+        if "PX" in options:
+            expires_at = time.time() + int(options[options.index("PX") + 1]) / 1000
+        exists = self.live_value(key) is not None
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return None
+        self.data[key] = (value, expires_at)
+        self.touch(key)
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in lokal protokol Redis untuk SHARED_STORE=redis://")
+    parser.add_argument("--serve", action="store_true", help="Jalankan stand-in RESP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("STORE_STANDIN_PORT", "6379")))
+    args = parser.parse_args()
+    if not args.serve:
+        parser.print_help()
+        return
+
+    server = RespStandIn(args.host, args.port)
+    logger.info(
+        "Stand-in RESP mendengarkan di %s:%s (SHARED_STORE=redis://%s:%s/0)",
+        args.host, args.port, args.host, args.port
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Sesi chart TradingView yang tetap terhubung, dipinjamkan lewat pool
+
+xnoxs_fetcher membuka WebSocket baru (plus auth dan chart_create_session) di setiap fetch dan satu
+instance tidak aman dipakai bersamaan, sehingga semua fetch TradingView antre di satu lock.
+TradingViewPool menyimpan TV_POOL_SIZE sesi hangat: thread meminjam satu sesi (checkout), memakai
+chart session yang sudah ada untuk resolve_symbol + create_series, lalu mengembalikannya (checkin).
+Satu sesi hanya dipakai satu thread pada satu waktu. Thread pemelihara membalas heartbeat sesi yang
+menganggur dan menyambung ulang sesi yang putus, jadi fetch tidak menanggung handshake.
+fetch_many memultipleks banyak simbol x timeframe dalam satu sesi, jadi refresh seluruh pasar
+cukup satu round trip, bukan satu siklus request per series.
+"""
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+from engine.lazy import websocket
+from engine.console import get_logger
+from engine.config import TRADINGVIEW_WS_URL
+
+
+logger = get_logger(__name__)
+
+TV_POOL_SIZE = int(os.environ.get("TV_POOL_SIZE", "3"))
+# Batas waktu satu fetch (sampai series_completed) dan menunggu sesi bebas dari pool (detik)
+TV_FETCH_TIMEOUT = float(os.environ.get("TV_FETCH_TIMEOUT", "15"))
+TV_CHECKOUT_TIMEOUT = float(os.environ.get("TV_CHECKOUT_TIMEOUT", "30"))
+# Fetch multipleks: deadline seluruh batch dan jumlah series yang diminta bersamaan dalam satu sesi
+TV_BATCH_TIMEOUT = float(os.environ.get("TV_BATCH_TIMEOUT", "30"))
+TV_MAX_PENDING_SERIES = int(os.environ.get("TV_MAX_PENDING_SERIES", "40"))
+# Sesi yang menganggur selama ini dicek oleh thread pemelihara (heartbeat dibalas, koneksi putus diganti)
+TV_HEALTH_INTERVAL = float(os.environ.get("TV_HEALTH_INTERVAL", "20"))
+
+TV_ORIGIN = "https://data.tradingview.com"
+
+# Resolusi chart TradingView per interval bot
+TV_RESOLUTIONS = {
+    "1min": "1",
+    "5min": "5",
+    "15min": "15",
+    "30min": "30",
+    "1hour": "60",
+    "4hour": "240",
+    "1day": "1D",
+    "1week": "1W",
+}
+
+# Bar per create_series/request_more_data; n_bars lebih besar diambil bertahap dengan request_more_data
+TV_MAX_BARS_PER_REQUEST = 5000
+
+MESSAGE_SEPARATOR = re.compile(r"~m~\d+~m~")
+
+
+class TradingViewError(Exception):
+    """Sesi tidak bisa dipakai (koneksi putus, timeout, critical_error) atau pool tidak punya sesi bebas"""
+
+
+class TradingViewTimeout(TradingViewError):
+    """Series belum selesai sebelum deadline, tetapi sesinya sehat dan boleh dipakai lagi"""
+
+
+def encode_message(func_name, params):
+    message = json.dumps({"m": func_name, "p": params}, separators=(",", ":"))
+    return f"~m~{len(message)}~m~{message}"
+
+
+def bar_to_candle(values):
+    """Bar TradingView [time, open, high, low, close, volume] -> [timestamp, open, close, high, low, volume]"""
+    volume = float(values[5]) if len(values) > 5 and values[5] is not None else 0.0
+    return [int(values[0]), float(values[1]), float(values[4]), float(values[2]), float(values[3]), volume]
+
+
+class TradingViewSession:
+    """Satu WebSocket + chart session TradingView; hanya dipakai thread yang sedang meminjamnya"""
+
+    def __init__(self, url=None):
+        self.url = url or TRADINGVIEW_WS_URL
+        self.ws = None
+        self.chart_session = None
+        self.last_used = 0.0
+        self.fetches = 0
+        self._series_count = 0
+
+    @property
+    def alive(self):
+        return self.ws is not None and self.ws.connected
+
+    def connect(self):
+        self.close()
+        self.ws = websocket.create_connection(self.url, header={"Origin": TV_ORIGIN}, timeout=TV_FETCH_TIMEOUT)
+        self.chart_session = f"cs_{secrets.token_hex(6)}"
+        self._send("set_auth_token", ["unauthorized_user_token"])
+        self._send("chart_create_session", [self.chart_session, ""])
+        self._send("switch_timezone", [self.chart_session, "Etc/UTC"])
+        self.last_used = time.monotonic()
+        self.fetches = 0
+
+    def close(self):
+        if self.ws is not None:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+        self.ws = None
+
+    def _send(self, func_name, params):
+        self.ws.send(encode_message(func_name, params))
+
+    def _receive(self, timeout):
+        """Pesan JSON dari satu frame; heartbeat ~h~ langsung dibalas"""
+        self.ws.settimeout(timeout)
+        messages = []
+        for payload in MESSAGE_SEPARATOR.split(self.ws.recv()):
+            if not payload:
+                continue
+            if payload.startswith("~h~"):
+                self.ws.send(f"~m~{len(payload)}~m~{payload}")
+                continue
+            try:
+                messages.append(json.loads(payload))
+            except ValueError:
+                continue
+        return messages
+
+    def _remove_series(self, series_id):
+        # Series berhenti streaming; fetch berikutnya memakai id baru di chart session yang sama
+        self._send("remove_series", [self.chart_session, series_id])
+
+    def fetch_many(self, requests, timeout=None):
+        """
+        Banyak series sekaligus di chart session ini. resolve_symbol + create_series dikirim tanpa menunggu
+        respons (maks. TV_MAX_PENDING_SERIES berjalan bersamaan, satu resolve per simbol), lalu update dibaca
+        sampai semua series selesai atau deadline lewat. n_bars di atas TV_MAX_BARS_PER_REQUEST dilanjutkan
+        dengan request_more_data sampai cukup atau histori habis.
+        requests: iterable (EXCHANGE:SYMBOL, interval, n_bars). Mengembalikan {request: candles, atau None
+        jika ditolak}. Series yang belum selesai saat deadline tidak disertakan; TradingViewTimeout jika
+        tidak ada respons sama sekali, TradingViewError jika sesi rusak.
+        """
+        waiting = list(dict.fromkeys(requests))
+        deadline = time.monotonic() + (timeout or TV_BATCH_TIMEOUT)
+        symbol_ids = {}
+        pending = {}
+        results = {}
+        responded = False
+
+        def create_series(request):
+            tv_symbol, interval, n_bars = request
+            symbol_id = symbol_ids.get(tv_symbol)
+            if symbol_id is None:
+                symbol_id = symbol_ids[tv_symbol] = f"sds_sym_{len(symbol_ids) + 1}_{self._series_count}"
+                resolve = {"symbol": tv_symbol, "adjustment": "splits", "session": "regular"}
+                self._send("resolve_symbol", [
+                    self.chart_session, symbol_id, "=" + json.dumps(resolve, separators=(",", ":"))
+                ])
+            self._series_count += 1
+            series_id = f"sds_{self._series_count}"
+            self._send("create_series", [
+                self.chart_session, series_id, f"s{self._series_count}", symbol_id, TV_RESOLUTIONS[interval],
+                min(n_bars, TV_MAX_BARS_PER_REQUEST), ""
+            ])
+            pending[series_id] = {
+                "request": request, "symbol_id": symbol_id, "bars": {}, "requested": min(n_bars, TV_MAX_BARS_PER_REQUEST)
+            }
+
+        def completed(series_id):
+            """Halaman selesai: minta histori lebih lama jika masih kurang dan halaman terakhir terisi penuh"""
+            state = pending[series_id]
+            wanted, have = state["request"][2], len(state["bars"])
+            if state["requested"] <= have < wanted:
+                more = min(wanted - have, TV_MAX_BARS_PER_REQUEST)
+                state["requested"] += more
+                self._send("request_more_data", [self.chart_session, series_id, more])
+                return
+            bars = state["bars"]
+            finish(series_id, [bars[ts] for ts in sorted(bars)][-wanted:])
+
+        def finish(series_id, candles):
+            state = pending.pop(series_id)
+            results[state["request"]] = candles
+            self._remove_series(series_id)
+
+        try:
+            while waiting or pending:
+                while waiting and len(pending) < TV_MAX_PENDING_SERIES:
+                    create_series(waiting.pop(0))
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    messages = self._receive(remaining)
+                except websocket.WebSocketTimeoutException:
+                    break
+                responded = True
+
+                for message in messages:
+                    method, params = message.get("m"), message.get("p") or []
+                    if method in ("timescale_update", "du") and len(params) > 1 and isinstance(params[1], dict):
+                        for series_id, update in params[1].items():
+                            state = pending.get(series_id)
+                            if state is None or not isinstance(update, dict):
+                                continue
+                            for bar in update.get("s", []):
+                                candle = bar_to_candle(bar["v"])
+                                state["bars"][candle[0]] = candle
+                    elif method == "series_completed" and len(params) > 1 and params[1] in pending:
+                        completed(params[1])
+                    elif method == "series_error" and len(params) > 1 and params[1] in pending:
+                        finish(params[1], None)
+                    elif method == "symbol_error" and len(params) > 1:
+                        for series_id in [sid for sid, state in pending.items() if state["symbol_id"] == params[1]]:
+                            finish(series_id, None)
+                    elif method in ("critical_error", "protocol_error"):
+                        raise TradingViewError(f"{method}: {params}")
+
+            for series_id in pending:
+                self._remove_series(series_id)
+        except (websocket.WebSocketException, OSError) as e:
+            raise TradingViewError(f"koneksi TradingView putus: {e}") from e
+        finally:
+            self.last_used = time.monotonic()
+            self.fetches += 1
+
+        if pending or waiting:
+            if not responded:
+                # Socket tidak error, hanya belum ada jawaban: koneksi putus terdeteksi sebagai WebSocketException
+                raise TradingViewTimeout("tidak ada respons TradingView sebelum deadline")
+            logger.warning("%s series TradingView belum selesai sebelum deadline", len(pending) + len(waiting))
+        return results
+
+    def fetch(self, tv_symbol, interval, n_bars, timeout=None):
+        """
+        Candle [timestamp, open, close, high, low, volume] satu simbol (EXCHANGE:SYMBOL).
+        None jika simbol/series ditolak TradingView (sesi tetap sehat); TradingViewError jika sesi rusak.
+        """
+        request = (tv_symbol, interval, n_bars)
+        results = self.fetch_many([request], timeout or TV_FETCH_TIMEOUT)
+        if request not in results:
+            raise TradingViewTimeout(f"timeout menunggu {tv_symbol} {interval}")
+        return results[request]
+
+    def keepalive(self, wait=0.2, max_frames=100):
+        """Baca frame yang menumpuk selama menganggur (heartbeat dibalas); TradingViewError jika koneksi putus"""
+        try:
+            for _ in range(max_frames):
+                self._receive(wait)
+        except websocket.WebSocketTimeoutException:
+            pass
+        except (websocket.WebSocketException, OSError) as e:
+            raise TradingViewError(f"koneksi TradingView putus: {e}") from e
+        self.last_used = time.monotonic()
+
+
+class TradingViewPool:
+    """
+    Pool sesi TradingView dengan checkout/checkin. Sesi yang baru dipakai dipinjamkan lebih dulu (LIFO);
+    sesi rusak ditutup lalu disambung ulang oleh thread pemelihara atau saat dipinjam berikutnya.
+    Pemeliharaan mengambil satu sesi basi pada satu waktu, jadi sesi sehat tetap bisa dipinjam.
+    """
+
+    def __init__(self, size=None, url=None):
+        self.size = max(1, size or TV_POOL_SIZE)
+        self.url = url
+        self.stats = {"checkouts": 0, "waits": 0, "connects": 0, "failures": 0}
+        self._idle = []
+        self._available = threading.Condition()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._maintain, name="tradingview-pool", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for session in self._drain():
+            session.close()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _new_session(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        return TradingViewSession(self.url)
+
+    def _drain(self):
+        with self._available:
+            sessions, self._idle = self._idle, []
+        return sessions
+
+    def _take_stale(self, skip):
+        """Keluarkan satu sesi menganggur yang putus atau lama tidak dipakai (selain yang ada di skip)"""
+        now = time.monotonic()
+        with self._available:
+            for session in self._idle:
+                if id(session) in skip:
+                    continue
+                if not session.alive or now - session.last_used >= TV_HEALTH_INTERVAL:
+                    self._idle.remove(session)
+                    return session
+        return None
+
+    def _connect(self, session):
+        try:
+            session.connect()
+        except Exception as e:
+            session.close()
+            self._count("failures")
+            raise TradingViewError(f"gagal terhubung ke TradingView: {e}") from e
+        self._count("connects")
+
+    def checkout(self, timeout=None):
+        """Pinjam sesi yang terhubung; TradingViewError jika tidak ada yang bebas atau koneksi gagal"""
+        deadline = time.monotonic() + (timeout or TV_CHECKOUT_TIMEOUT)
+        waited = False
+        with self._available:
+            while True:
+                if self._idle:
+                    session = self._idle.pop()
+                    break
+                session = self._new_session()
+                if session is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TradingViewError("semua sesi TradingView sedang dipakai")
+                if not waited:
+                    waited = True
+                    self._count("waits")
+                self._available.wait(remaining)
+        self._count("checkouts")
+
+        if not session.alive:
+            try:
+                self._connect(session)
+            except TradingViewError:
+                self.checkin(session)
+                raise
+        return session
+
+    def checkin(self, session):
+        with self._available:
+            self._idle.append(session)
+            self._available.notify()
+
+    def _with_session(self, call):
+        """
+        Jalankan call(session) dengan sesi pinjaman; sesi yang ternyata sudah diputus server diganti sekali.
+        Timeout biasa tidak diulang dan sesinya dikembalikan ke pool tanpa ditutup.
+        """
+        for attempt in (1, 2):
+            session = self.checkout()
+            try:
+                return call(session)
+            except TradingViewTimeout:
+                raise
+            except TradingViewError as e:
+                session.close()
+                if attempt == 2:
+                    raise
+                logger.debug("Sesi TradingView rusak (%s), ulangi dengan koneksi baru", e)
+            finally:
+                self.checkin(session)
+
+    def fetch(self, tv_symbol, interval, n_bars, timeout=None):
+        return self._with_session(lambda session: session.fetch(tv_symbol, interval, n_bars, timeout))
+
+    def fetch_many(self, requests, timeout=None):
+        """Semua request dalam satu sesi multipleks (satu round trip), lihat TradingViewSession.fetch_many"""
+        requests = list(requests)
+        return self._with_session(lambda session: session.fetch_many(requests, timeout))
+
+    def _maintain(self):
+        """Isi pool sampai TV_POOL_SIZE sesi, lalu berkala cek sesi menganggur dan sambung ulang yang putus"""
+        backoff = 1
+        while not self._stop.is_set():
+            while (session := self._new_session()) is not None:
+                self.checkin(session)
+
+            failed = False
+            checked = set()
+            while (session := self._take_stale(checked)) is not None:
+                checked.add(id(session))
+                try:
+                    if session.alive:
+                        session.keepalive()
+                    else:
+                        self._connect(session)
+                except TradingViewError as e:
+                    session.close()
+                    failed = True
+                    logger.warning("Sesi TradingView tidak sehat: %s", e)
+                finally:
+                    self.checkin(session)
+
+            backoff = min(backoff * 2, 60) if failed else 1
+            self._stop.wait(backoff if failed else TV_HEALTH_INTERVAL / 2)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_tv_pool():
+    """Pool sesi TradingView per proses; dibuat (dan mulai menghangatkan sesi) saat pertama dipakai"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TradingViewPool().start()
+    return _pool
@@ -0,0 +1,164 @@
+"""
+Mode multi-worker untuk webhook: satu supervisor, beberapa proses bot
+
+Supervisor menerima POST webhook dari Telegram dan meneruskannya ke worker berdasarkan chat id,
+sehingga semua update satu chat selalu ditangani worker yang sama (urutan, antrean analisa per user,
+alert, dan langganan tetap konsisten) sementara chat yang berbeda dirender paralel di banyak core.
+Cache candle, cache hasil analisa, dan state chat dibagi lewat SHARED_STORE.
+"""
+
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from engine.console import get_logger
+
+
+logger = get_logger(__name__)
+
+# Jeda sebelum worker yang mati dijalankan ulang (dilipatgandakan sampai batas jika terus crash)
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 30.0
+
+
+def update_route_key(update):
+    """Chat id dari Update JSON (message, callback_query, dst.); fallback ke id user lalu update_id"""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat and "id" in chat:
+            return int(chat["id"])
+        sender = value.get("from")
+        if sender and "id" in sender:
+            return int(sender["id"])
+    return int(update.get("update_id", 0))
+
+
+class WebhookRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.path.split("?")[0] != self.server.path:
+            self.reply(404)
+            return
+        try:
+            key = update_route_key(json.loads(body))
+        except (ValueError, TypeError, AttributeError):
+            self.reply(400)
+            return
+
+        port = self.server.worker_ports[key % len(self.server.worker_ports)]
+        headers = {"Content-Type": "application/json"}
+        secret = self.headers.get("X-Telegram-Bot-Api-Secret-Token")
+        if secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+        status = self.server.forward(port, body, headers)
+        # 502/503 membuat Telegram mengirim ulang update nanti (mis. saat worker sedang restart)
+        self.reply(status)
+
+    def reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class WebhookRouter(ThreadingHTTPServer):
+    """Endpoint webhook publik yang membagi update ke port lokal worker (sticky per chat)"""
+
+    daemon_threads = True
+
+    def __init__(self, listen, port, path, worker_ports, timeout=30):
+        super().__init__((listen, port), WebhookRouterHandler)
+        self.path = "/" + path.lstrip("/")
+        self.worker_ports = list(worker_ports)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def forward(self, port, body, headers):
+        """POST ke worker lewat koneksi keep-alive per thread; satu kali coba ulang dengan koneksi baru"""
+        connections = self._local.__dict__.setdefault("connections", {})
+        for attempt in (1, 2):
+            connection = connections.get(port)
+            if connection is None:
+                connection = connections[port] = http.client.HTTPConnection("127.0.0.1", port, timeout=self.timeout)
+            try:
+                connection.request("POST", self.path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connections.pop(port, None)
+        return 503
+
+
+class WorkerSupervisor:
+    """Menjalankan N proses worker (script yang sama) dan menjalankan ulang worker yang berhenti tak terduga"""
+
+    def __init__(self, script, count, base_port, env=None):
+        self.script = script
+        self.count = count
+        self.ports = [base_port + i for i in range(count)]
+        self.env = dict(os.environ, **(env or {}))
+        self.processes = [None] * count
+        self.started_at = [0.0] * count
+        self._stopping = threading.Event()
+
+    def spawn(self, index, first_start=False):
+        env = dict(
+            self.env,
+            BOT_WORKER_INDEX=str(index),
+            BOT_WORKER_PORT=str(self.ports[index]),
+            # Hanya start pertama worker 0 yang membuang update tertunda
+            BOT_WORKER_DROP_PENDING="1" if first_start and index == 0 else "0",
+        )
+        self.processes[index] = subprocess.Popen([sys.executable, self.script], env=env)
+        self.started_at[index] = time.monotonic()
+        logger.info("Worker %s berjalan (pid %s, port %s)", index, self.processes[index].pid, self.ports[index])
+
+    def start(self):
+        for index in range(self.count):
+            self.spawn(index, first_start=True)
+        threading.Thread(target=self._watch, name="worker-supervisor", daemon=True).start()
+
+    def _watch(self):
+        backoff = [RESTART_BACKOFF] * self.count
+        while not self._stopping.wait(1.0):
+            for index, process in enumerate(self.processes):
+                if process is None or process.poll() is None:
+                    continue
+                if time.monotonic() - self.started_at[index] > 60:
+                    backoff[index] = RESTART_BACKOFF
+                logger.warning(
+                    "Worker %s berhenti (exit %s), start ulang dalam %.0fs",
+                    index, process.returncode, backoff[index]
+                )
+                if self._stopping.wait(backoff[index]):
+                    return
+                backoff[index] = min(backoff[index] * 2, MAX_RESTART_BACKOFF)
+                self.spawn(index)
+
+    def stop(self, timeout=20):
+        self._stopping.set()
+        running = [p for p in self.processes if p is not None and p.poll() is None]
+        for process in running:
+            process.send_signal(signal.SIGINT)
+        deadline = time.monotonic() + timeout
+        for process in running:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
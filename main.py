@@ -5,1773 +5,1320 @@ Tool CLI untuk analisa teknikal menggunakan Telegram Bot dan Gemini AI Vision
 Mendukung: Cryptocurrency (14 koin) dan Forex/Komoditas (16 pasangan)
 """
 
-import logging
-import base64
-import json
+import importlib
 import re
 import os
+import signal
 import sys
-import requests
-import mplfinance as mpf
-import pandas as pd
-from datetime import datetime, timezone
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
+from datetime import datetime
+from telegram import Update
+from telegram.error import Forbidden, RetryAfter
+from telegram.ext import Application, BaseUpdateProcessor, CommandHandler, CallbackQueryHandler, ContextTypes
 from pytz import timezone as tz
 import asyncio
-from dotenv import load_dotenv
+import bisect
+from collections import deque
+import threading
+import time
+import uuid
+
+from engine import live
+from engine.lazy import yf
+from engine.console import Colors, get_logger, log_error, log_info, log_success, log_warning
+from engine.config import (
+    CANDLE_SYNC_BUFFER, FOREX_PAIRS, GEMINI_API_KEY, INTERVAL_MAP, SIGNAL_EMOJI,
+    SUPPORTED_COINS, TIMEFRAME_SECONDS,
+)
+from engine.candles import get_candle_bucket_start, get_next_candle_close
+from engine.data import TV_AVAILABLE, fetch_market_data, get_crypto_price, get_forex_price, prefetch_market_data
+from engine.indicators import (
+    build_ohlc_dataframe, calculate_adx, calculate_confluence_score, calculate_ema,
+    calculate_macd, calculate_rsi, calculate_stochastic_rsi,
+)
+from engine.mtf import calculate_mtf_confluence, summarize_mtf_alignment
+from engine.charting import generate_chart_with_confluence, generate_mtf_chart
+from engine.llm import analyze_mtf_with_gemini, analyze_with_gemini, prewarm_context_caches
+from engine.formatting import (
+    extract_signal_from_analysis, format_analysis_reply, format_mtf_matrix, format_symbol_price,
+)
+from engine.keyboards import (
+    get_after_analysis_keyboard, get_crypto_keyboard, get_forex_keyboard, get_main_menu_keyboard,
+    get_timeframe_keyboard,
+)
+from engine.tradingview import get_tv_pool
+from engine.store import get_store
+from engine.leader import LeaderElection, leader_only
+
+logger = get_logger(__name__)
 
-load_dotenv()
+def print_banner():
+    banner = f"""
+{Colors.CYAN}{Colors.BOLD}╔══════════════════════════════════════════════════════════╗
+║                                                          ║
+║   {Colors.YELLOW}📊 BOT ANALISA TEKNIKAL TRADING{Colors.CYAN}                        ║
+║   {Colors.WHITE}Crypto & Forex Analysis with AI{Colors.CYAN}                        ║
+║                                                          ║
+╚══════════════════════════════════════════════════════════╝{Colors.RESET}
+"""
+    print(banner)
 
 
-class Colors:
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
-    DIM = '\033[2m'
-    
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    
-    BG_RED = '\033[41m'
-    BG_GREEN = '\033[42m'
-    BG_BLUE = '\033[44m'
+TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+# Bot API server alternatif (local Bot API server atau stub load test)
+TELEGRAM_API_BASE_URL = os.environ.get("TELEGRAM_API_BASE_URL", "").rstrip("/")
+
+
+# Batas kirim Telegram: ~30 pesan/detik global, 1 pesan/detik per chat, 20 pesan/menit per grup
+TELEGRAM_GLOBAL_RATE = float(os.environ.get("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_CHAT_RATE = float(os.environ.get("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_GROUP_RATE = float(os.environ.get("TELEGRAM_GROUP_RATE", str(20 / 60)))
+TELEGRAM_SEND_RETRIES = 3
+# Jendela minimum (detik) batas kirim global bersama; di setiap jendela paling banyak rate x jendela pesan
+SEND_RATE_WINDOW = 0.2
+
+# Mode webhook multi-worker: jumlah proses worker yang berbagi batas kirim global
+BOT_WORKERS = max(1, int(os.environ.get("BOT_WORKERS", "1")))
+
+
+class TokenBucket:
+    """Token bucket dengan reservasi: setiap pemanggil langsung tahu berapa lama harus menunggu"""
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens=1.0, max_wait=None):
+        """
+        Ambil token (boleh berhutang) dan kembalikan detik tunggu sampai token benar-benar tersedia.
+        Jika tunggu melebihi max_wait, tidak ada token yang diambil dan hasilnya None.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (tokens - self.tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= tokens
+            return wait
+
+    def try_acquire(self, tokens=1.0):
+        """Ambil token hanya jika tersedia sekarang"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def refund(self, tokens=1.0):
+        """Kembalikan token yang diambil untuk pekerjaan yang akhirnya tidak dijalankan"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def penalize(self, seconds):
+        """Tahan bucket selama beberapa detik (mis. setelah RetryAfter dari Telegram)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def idle(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens >= self.capacity
+
+
+class SharedSendRate:
+    """
+    Batas kirim global Telegram untuk semua worker: setiap pesan mengambil slot di jendela waktu berikutnya
+    yang belum penuh lewat counter di store bersama. Dengan store per proses (memory) dipakai token bucket
+    lokal; jika store bersama gagal, bucket lokal dengan rate / BOT_WORKERS agar total tetap di bawah batas.
+    Blocking (round trip store) - panggil lewat asyncio.to_thread.
+    """
+
+    def __init__(self, rate, workers=BOT_WORKERS):
+        self.window = max(SEND_RATE_WINDOW, 1 / rate)
+        self.per_window = max(1, round(rate * self.window))
+        self.local = TokenBucket(rate, capacity=rate)
+        self.fallback = TokenBucket(rate / workers, capacity=rate / workers)
+        # Jendela pertama yang mungkin belum penuh, supaya broadcast panjang tidak mengulang jendela penuh
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Ambil satu slot kirim dan kembalikan detik tunggu sampai slot itu tiba"""
+        store = get_store()
+        if not store.shared:
+            return self.local.reserve()
+        now = time.time()
+        start = max(now, store.get("send_rate:hold", 0.0))
+        with self._lock:
+            slot = max(int(start / self.window), self._next_slot)
+        while True:
+            # Counter per jendela hidup sampai jendelanya lewat
+            count = store.incr(f"send_rate:{slot}", ttl=max(1.0, (slot + 2) * self.window - now))
+            if count is None:
+                return self.fallback.reserve()
+            if count <= self.per_window:
+                break
+            slot += 1
+        with self._lock:
+            self._next_slot = max(self._next_slot, slot if count < self.per_window else slot + 1)
+        return max(0.0, slot * self.window - now)
+
+    def penalize(self, seconds):
+        """Tahan pengiriman semua worker selama beberapa detik (RetryAfter berlaku untuk bot, bukan proses)"""
+        self.local.penalize(seconds)
+        self.fallback.penalize(seconds)
+        store = get_store()
+        if store.shared:
+            store.set("send_rate:hold", time.time() + seconds, ttl=seconds)
+
+
+class TelegramSendScheduler:
+    """Penjadwal kirim pesan yang mematuhi batas global dan per-chat Telegram, dengan retry RetryAfter"""
+
+    def __init__(self, global_rate=TELEGRAM_GLOBAL_RATE, chat_rate=TELEGRAM_CHAT_RATE, group_rate=TELEGRAM_GROUP_RATE):
+        self.global_rate = SharedSendRate(global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self._chat_buckets = {}
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.idle()}
+            # Chat grup/channel memiliki id negatif dan batas yang jauh lebih ketat
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate)
+        return bucket
+
+    async def send(self, chat_id, send_call):
+        """
+        Jalankan send_call() (coroutine factory, mis. lambda: bot.send_message(...)) setelah token
+        per-chat dan global tersedia. Mengembalikan hasil kiriman atau None jika gagal.
+        """
+        for attempt in range(TELEGRAM_SEND_RETRIES + 1):
+            await asyncio.sleep(self._chat_bucket(chat_id).reserve())
+            await asyncio.sleep(await asyncio.to_thread(self.global_rate.reserve))
+            try:
+                return await send_call()
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+                logger.warning("Telegram RetryAfter %.0fs (chat %s, percobaan %s)", delay, chat_id, attempt + 1)
+                await asyncio.to_thread(self.global_rate.penalize, delay)
+                self._chat_bucket(chat_id).penalize(delay)
+            except Forbidden:
+                raise
+            except Exception as e:
+                logger.warning("Gagal mengirim ke chat %s: %s", chat_id, e)
+                return None
+        return None
 
+    async def broadcast_photo(self, bot, chat_ids, photo_path, caption, **kwargs):
+        """
+        Kirim satu foto ke banyak chat: upload sekali, lalu gunakan ulang file_id untuk penerima lain.
+        Mengembalikan daftar chat yang memblokir bot.
+        """
+        blocked = []
+        remaining = list(chat_ids)
+        file_id = None
+        
+        while remaining and file_id is None:
+            chat_id = remaining.pop(0)
+            
+            async def upload():
+                with open(photo_path, "rb") as photo:
+                    return await bot.send_photo(chat_id=chat_id, photo=photo, caption=caption, **kwargs)
+            
+            try:
+                message = await self.send(chat_id, upload)
+            except Forbidden:
+                blocked.append(chat_id)
+                continue
+            if message and message.photo:
+                file_id = message.photo[-1].file_id
+        
+        if not file_id:
+            return blocked
+        
+        async def send_one(chat_id):
+            try:
+                await self.send(chat_id, lambda: bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption, **kwargs))
+            except Forbidden:
+                blocked.append(chat_id)
+        
+        await asyncio.gather(*(send_one(chat_id) for chat_id in remaining))
+        return blocked
+
+
+send_scheduler = TelegramSendScheduler()
+
+
+# Dispatch update: chat berbeda diproses bersamaan, update dalam satu chat tetap berurutan
+UPDATE_CONCURRENCY = int(os.environ.get("UPDATE_CONCURRENCY", "64"))
+UPDATE_QUEUE_WARN_DEPTH = int(os.environ.get("UPDATE_QUEUE_WARN_DEPTH", "5"))
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Satu jalur per chat: update pertama sebuah chat memproses antrean chat itu secara berurutan, update
+    berikutnya dari chat yang sama hanya ditambahkan ke antrean lalu langsung kembali. Satu chat memakai
+    paling banyak satu slot max_concurrent_updates, jadi chat yang ramai tidak menahan chat lain.
+    Update tanpa chat/user (mis. poll) diproses langsung tanpa jalur.
+    """
+
+    def __init__(self, max_concurrent_updates=UPDATE_CONCURRENCY, warn_depth=UPDATE_QUEUE_WARN_DEPTH):
+        super().__init__(max_concurrent_updates)
+        self.warn_depth = warn_depth
+        self._lanes = {}
+        # chat_id -> processed, depth (antre di belakang update yang berjalan), max_depth, wait_total (detik)
+        self.chat_stats = {}
+
+    @staticmethod
+    def chat_key(update):
+        chat = getattr(update, "effective_chat", None)
+        if chat:
+            return chat.id
+        user = getattr(update, "effective_user", None)
+        return user.id if user else None
+
+    def _chat_stats(self, chat_id):
+        stats = self.chat_stats.get(chat_id)
+        if stats is None:
+            if len(self.chat_stats) > 10000:
+                self.chat_stats = {k: v for k, v in self.chat_stats.items() if k in self._lanes}
+            stats = self.chat_stats[chat_id] = {"processed": 0, "depth": 0, "max_depth": 0, "wait_total": 0.0}
+        return stats
+
+    def summary(self):
+        """Ringkasan metrik antrean: chat aktif, update yang mengantre, dan chat dengan antrean terdalam"""
+        deepest = max(self.chat_stats.items(), key=lambda item: item[1]["max_depth"], default=(None, None))
+        return {
+            "active_chats": len(self._lanes),
+            "queued": sum(len(lane) for lane in self._lanes.values()),
+            "processed": sum(stats["processed"] for stats in self.chat_stats.values()),
+            "max_depth": deepest[1]["max_depth"] if deepest[1] else 0,
+            "deepest_chat": deepest[0],
+        }
 
-class ColoredFormatter(logging.Formatter):
-    FORMATS = {
-        logging.DEBUG: f"{Colors.DIM}%(message)s{Colors.RESET}",
-        logging.INFO: f"{Colors.CYAN}%(message)s{Colors.RESET}",
-        logging.WARNING: f"{Colors.YELLOW}%(message)s{Colors.RESET}",
-        logging.ERROR: f"{Colors.RED}{Colors.BOLD}%(message)s{Colors.RESET}",
-        logging.CRITICAL: f"{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}%(message)s{Colors.RESET}",
-    }
+    async def do_process_update(self, update, coroutine):
+        chat_id = self.chat_key(update)
+        if chat_id is None:
+            await coroutine
+            return
+        
+        stats = self._chat_stats(chat_id)
+        lane = self._lanes.get(chat_id)
+        if lane is not None:
+            lane.append((time.monotonic(), coroutine))
+            stats["depth"] = len(lane)
+            stats["max_depth"] = max(stats["max_depth"], len(lane))
+            if len(lane) == self.warn_depth:
+                logger.warning("Antrean update chat %s mencapai %s", chat_id, len(lane))
+            return
+        
+        lane = self._lanes[chat_id] = deque([(time.monotonic(), coroutine)])
+        try:
+            while lane:
+                queued_at, current = lane.popleft()
+                stats["depth"] = len(lane)
+                stats["wait_total"] += time.monotonic() - queued_at
+                try:
+                    await current
+                except Exception as e:
+                    logger.error("Update chat %s gagal: %s", chat_id, e)
+                stats["processed"] += 1
+        finally:
+            del self._lanes[chat_id]
+            # Dibatalkan (shutdown): coroutine yang belum jalan ditutup agar tidak bocor
+            for _, pending in lane:
+                pending.close()
+            stats["depth"] = 0
+
+    async def initialize(self):
+        pass
 
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, "%(message)s")
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+    async def shutdown(self):
+        summary = self.summary()
+        if summary["processed"]:
+            logger.info(
+                "Update diproses: %s, antrean chat terdalam %s (chat %s)",
+                summary['processed'], summary['max_depth'], summary['deepest_chat']
+            )
 
 
-class QuietFilter(logging.Filter):
-    def filter(self, record):
-        noisy_messages = [
-            'HTTP Request',
-            'httpx',
-            'httpcore',
-            'urllib3',
-            'Retrying',
-            'Starting new HTTP',
-        ]
-        return not any(msg in record.getMessage() for msg in noisy_messages)
+MAX_ALERTS_PER_CHAT = int(os.environ.get("MAX_ALERTS_PER_CHAT", "20"))
+ALERT_POLL_INTERVAL = int(os.environ.get("ALERT_POLL_INTERVAL", "30"))
 
 
-logging.getLogger('httpx').setLevel(logging.WARNING)
-logging.getLogger('httpcore').setLevel(logging.WARNING)
-logging.getLogger('urllib3').setLevel(logging.WARNING)
-logging.getLogger('telegram').setLevel(logging.WARNING)
-logging.getLogger('yfinance').setLevel(logging.WARNING)
+# Alert dan langganan digest ada di store lease leader (SHARED_STORE, atau file SQLite jika SHARED_STORE=memory),
+# satu key per entri ("<prefix><chat_id>:<id>"), sehingga selamat saat worker di-restart dan terlihat oleh semua
+# worker. Hanya leader yang mengevaluasi (job alert, indikator, digest); indeks memori (bisect/grup) dibangun ulang
+# dari store setiap kali versi buku berubah.
+ALERT_SYNC_INTERVAL = 2
+ALERT_KEY_PREFIXES = ("alert:price:", "alert:indicator:")
 
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(ColoredFormatter())
-console_handler.addFilter(QuietFilter())
+alert_leader = LeaderElection("bot_alerts")
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.handlers = []
-logger.addHandler(console_handler)
-logger.propagate = False
 
+def get_alert_store():
+    return alert_leader.store
 
-def print_banner():
-    banner = f"""
-{Colors.CYAN}{Colors.BOLD}╔══════════════════════════════════════════════════════════╗
-║                                                          ║
-║   {Colors.YELLOW}📊 BOT ANALISA TEKNIKAL TRADING{Colors.CYAN}                        ║
-║   {Colors.WHITE}Crypto & Forex Analysis with AI{Colors.CYAN}                        ║
-║                                                          ║
-╚══════════════════════════════════════════════════════════╝{Colors.RESET}
-"""
-    print(banner)
+
+def next_alert_id(chat_id):
+    """Id alert berikutnya untuk chat ini (urutan per chat, dipakai bersama alert harga dan indikator)"""
+    store = get_alert_store()
+    alert_id = store.get(f"alert_seq:{chat_id}", 0) + 1
+    # Update satu chat selalu diproses berurutan oleh satu worker, jadi baca-lalu-tulis ini tidak balapan
+    store.set(f"alert_seq:{chat_id}", alert_id)
+    return alert_id
 
 
-def log_success(message):
-    print(f"{Colors.GREEN}  ✓ {message}{Colors.RESET}")
+class SharedBook:
+    """Dasar buku alert/langganan di store bersama dengan indeks memori yang disinkronkan dari store"""
 
+    prefix = ""
+    version_key = ""
 
-def log_warning(message):
-    print(f"{Colors.YELLOW}  ⚠ {message}{Colors.RESET}")
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._synced_at = 0.0
+        # Jumlah entri pada sync terakhir
+        self.size = 0
 
+    @property
+    def store(self):
+        return get_alert_store()
 
-def log_error(message):
-    print(f"{Colors.RED}  ✗ {message}{Colors.RESET}")
+    def _key(self, chat_id, entry_id):
+        return f"{self.prefix}{chat_id}:{entry_id}"
 
+    def _records(self, prefix):
+        store = self.store
+        return [record for record in (store.get(key) for key in store.keys(prefix)) if record]
+
+    def _changed(self):
+        """Tandai buku berubah; setiap indeks memori (termasuk milik proses ini) dibangun ulang saat sync"""
+        self.store.set(self.version_key, uuid.uuid4().hex)
+
+    def sync(self, max_age=0):
+        """
+        Bangun ulang indeks memori dari store jika versi buku berubah sejak sync terakhir.
+        max_age: lewati pengecekan jika sync terakhir lebih baru dari ini (detik), untuk jalur per tick.
+        """
+        now = time.monotonic()
+        if max_age and now - self._synced_at < max_age:
+            return
+        self._synced_at = now
+        # Versi dibaca sebelum entri: perubahan di antaranya membuat sync berikutnya membangun ulang lagi
+        version = self.store.get(self.version_key, "")
+        if self._version == version:
+            return
+        records = self._records(self.prefix)
+        with self._lock:
+            self._rebuild(records)
+            self._version = version
+            self.size = len(records)
+
+    def _rebuild(self, records):
+        raise NotImplementedError
+
+
+class PriceAlertIndex:
+    """Indeks threshold satu simbol: dua array terurut (bisect) untuk alert di atas dan di bawah harga"""
+
+    def __init__(self):
+        # Alert "above" disimpan dengan kunci -threshold agar yang terpicu selalu berada di ekor array
+        self.above_keys = []
+        self.above_ids = []
+        self.below_keys = []
+        self.below_ids = []
+
+    def __len__(self):
+        return len(self.above_ids) + len(self.below_ids)
+
+    def _arrays(self, direction, threshold):
+        if direction == "above":
+            return self.above_keys, self.above_ids, -threshold
+        return self.below_keys, self.below_ids, threshold
+
+    def add(self, alert_id, threshold, direction):
+        keys, ids, key = self._arrays(direction, threshold)
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        ids.insert(position, alert_id)
+
+    def remove(self, alert_id, threshold, direction):
+        keys, ids, key = self._arrays(direction, threshold)
+        for position in range(bisect.bisect_left(keys, key), bisect.bisect_right(keys, key)):
+            if ids[position] == alert_id:
+                del keys[position]
+                del ids[position]
+                return True
+        return False
+
+    def pop_triggered(self, price):
+        """Mengambil dan menghapus semua alert yang terpicu oleh harga ini - O(log n + k)"""
+        above_start = bisect.bisect_left(self.above_keys, -price)
+        below_start = bisect.bisect_left(self.below_keys, price)
+        
+        triggered = self.above_ids[above_start:] + self.below_ids[below_start:]
+        if triggered:
+            del self.above_keys[above_start:]
+            del self.above_ids[above_start:]
+            del self.below_keys[below_start:]
+            del self.below_ids[below_start:]
+        return triggered
+
+
+class PriceAlertBook(SharedBook):
+    """Alert harga di store bersama dengan indeks threshold per simbol; kunci indeks (chat_id, id)"""
+
+    prefix = "alert:price:"
+    version_key = "alert_version:price"
+
+    def __init__(self):
+        super().__init__()
+        self._alerts = {}
+        self._indexes = {}
+
+    def _rebuild(self, records):
+        self._alerts = {}
+        self._indexes = {}
+        for alert in records:
+            ref = (alert["chat_id"], alert["id"])
+            self._alerts[ref] = alert
+            self._indexes.setdefault(alert["symbol"], PriceAlertIndex()).add(ref, alert["threshold"], alert["direction"])
+
+    def add(self, chat_id, symbol, market_type, threshold, current_price):
+        """Menambah alert - arah ditentukan dari posisi threshold terhadap harga saat ini"""
+        alert = {
+            "id": next_alert_id(chat_id),
+            "chat_id": chat_id,
+            "symbol": symbol,
+            "market_type": market_type,
+            "threshold": threshold,
+            "direction": "above" if threshold > current_price else "below",
+            "created_price": current_price,
+            "created_at": time.time(),
+        }
+        self.store.set(self._key(chat_id, alert["id"]), alert)
+        self._changed()
+        return alert
+
+    def remove(self, chat_id, alert_id):
+        key = self._key(chat_id, alert_id)
+        if not self.store.get(key):
+            return False
+        self.store.delete(key)
+        self._changed()
+        return True
+
+    def list_for_chat(self, chat_id):
+        return sorted(self._records(f"{self.prefix}{chat_id}:"), key=lambda alert: alert["id"])
+
+    def count_for_chat(self, chat_id):
+        return len(self.store.keys(f"{self.prefix}{chat_id}:"))
+
+    def symbols(self):
+        """Simbol yang masih memiliki alert aktif (indeks hasil sync terakhir)"""
+        with self._lock:
+            return [symbol for symbol, index in self._indexes.items() if len(index)]
+
+    def check(self, symbol, price):
+        """Evaluasi satu tick harga, mengembalikan alert yang terpicu (dan menghapusnya dari indeks dan store)"""
+        index = self._indexes.get(symbol)
+        if not index:
+            return []
+        
+        with self._lock:
+            candidates = [self._alerts.pop(ref) for ref in index.pop_triggered(price)]
+        if not candidates:
+            return []
+        
+        # Alert yang dihapus user di worker lain sejak sync terakhir tidak ikut dikirim
+        triggered = []
+        for alert in candidates:
+            key = self._key(alert["chat_id"], alert["id"])
+            if self.store.get(key) == alert:
+                self.store.delete(key)
+                triggered.append(alert)
+        return triggered
 
-def log_info(message):
-    print(f"{Colors.CYAN}  ℹ {message}{Colors.RESET}")
 
+price_alerts = PriceAlertBook()
 
-def log_data(message):
-    print(f"{Colors.MAGENTA}  📡 {message}{Colors.RESET}")
+# Event loop dan bot Telegram, diisi saat aplikasi mulai agar thread live feed bisa mengirim pesan
+runtime = {"loop": None, "bot": None}
 
 
-def log_analysis(message):
-    print(f"{Colors.BLUE}  🤖 {message}{Colors.RESET}")
+async def send_price_alert_notifications(bot, triggered, price):
+    """Mengirim notifikasi untuk alert harga yang terpicu (lewat penjadwal kirim)"""
+    async def notify(alert):
+        symbol = alert["symbol"]
+        info = SUPPORTED_COINS.get(symbol) or FOREX_PAIRS.get(symbol, {"emoji": "📊"})
+        movement = "naik menembus" if alert["direction"] == "above" else "turun menembus"
+        try:
+            await send_scheduler.send(alert["chat_id"], lambda: bot.send_message(
+                chat_id=alert["chat_id"],
+                text=f"🔔 *Alert Harga {symbol}*\n\n"
+                     f"{info['emoji']} Harga {movement} {format_symbol_price(symbol, alert['threshold'])}\n"
+                     f"💵 Harga saat ini: *{format_symbol_price(symbol, price)}*",
+                parse_mode='Markdown',
+                reply_markup=get_timeframe_keyboard(symbol, alert["market_type"])
+            ))
+        except Exception as e:
+            logger.warning("Gagal mengirim alert #%s: %s", alert['id'], e)
+    
+    await asyncio.gather(*(notify(alert) for alert in triggered))
 
 
-try:
-    from xnoxs_fetcher import XnoxsFetcher, TimeFrame
-    fetcher = XnoxsFetcher()
-    TV_AVAILABLE = True
-    TV_INTERVAL_MAP = {
-        "1min": TimeFrame.MINUTE_1,
-        "5min": TimeFrame.MINUTE_5,
-        "15min": TimeFrame.MINUTE_15,
-        "30min": TimeFrame.MINUTE_30,
-        "1hour": TimeFrame.HOUR_1,
-        "4hour": TimeFrame.HOUR_4,
-        "1day": TimeFrame.DAILY,
-        "1week": TimeFrame.WEEKLY,
-    }
-except ImportError:
-    TV_AVAILABLE = False
-    fetcher = None
-    TV_INTERVAL_MAP = {
-        "1min": None,
-        "5min": None,
-        "15min": None,
-        "30min": None,
-        "1hour": None,
-        "4hour": None,
-        "1day": None,
-        "1week": None,
-    }
+def check_price_alerts_on_tick(symbol, price, timestamp):
+    """Listener live feed: evaluasi alert untuk setiap tick dan kirim notifikasi ke event loop bot"""
+    if not alert_leader.is_leader:
+        return
+    price_alerts.sync(max_age=ALERT_SYNC_INTERVAL)
+    triggered = price_alerts.check(symbol, price)
+    if triggered and runtime["loop"]:
+        asyncio.run_coroutine_threadsafe(
+            send_price_alert_notifications(runtime["bot"], triggered, price),
+            runtime["loop"]
+        )
 
-try:
-    import yfinance as yf
-except ImportError:
-    yf = None
 
-TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-
-SUPPORTED_COINS = {
-    "BTC": {"name": "Bitcoin", "emoji": "₿", "color": "#F7931A", "yf_symbol": "BTC-USD", "tv_symbol": "BTCUSDT"},
-    "ETH": {"name": "Ethereum", "emoji": "Ξ", "color": "#627EEA", "yf_symbol": "ETH-USD", "tv_symbol": "ETHUSDT"},
-    "SOL": {"name": "Solana", "emoji": "◎", "color": "#00FFA3", "yf_symbol": "SOL-USD", "tv_symbol": "SOLUSDT"},
-    "BNB": {"name": "BNB", "emoji": "🔶", "color": "#F3BA2F", "yf_symbol": "BNB-USD", "tv_symbol": "BNBUSDT"},
-    "XRP": {"name": "Ripple", "emoji": "✕", "color": "#23292F", "yf_symbol": "XRP-USD", "tv_symbol": "XRPUSDT"},
-    "ADA": {"name": "Cardano", "emoji": "₳", "color": "#0033AD", "yf_symbol": "ADA-USD", "tv_symbol": "ADAUSDT"},
-    "DOGE": {"name": "Dogecoin", "emoji": "🐕", "color": "#C2A633", "yf_symbol": "DOGE-USD", "tv_symbol": "DOGEUSDT"},
-    "AVAX": {"name": "Avalanche", "emoji": "🔺", "color": "#E84142", "yf_symbol": "AVAX-USD", "tv_symbol": "AVAXUSDT"},
-    "MATIC": {"name": "Polygon", "emoji": "⬡", "color": "#8247E5", "yf_symbol": "MATIC-USD", "tv_symbol": "MATICUSDT"},
-    "LINK": {"name": "Chainlink", "emoji": "⬡", "color": "#2A5ADA", "yf_symbol": "LINK-USD", "tv_symbol": "LINKUSDT"},
-    "DOT": {"name": "Polkadot", "emoji": "●", "color": "#E6007A", "yf_symbol": "DOT-USD", "tv_symbol": "DOTUSDT"},
-    "ATOM": {"name": "Cosmos", "emoji": "⚛", "color": "#2E3148", "yf_symbol": "ATOM-USD", "tv_symbol": "ATOMUSDT"},
-    "UNI": {"name": "Uniswap", "emoji": "🦄", "color": "#FF007A", "yf_symbol": "UNI-USD", "tv_symbol": "UNIUSDT"},
-    "LTC": {"name": "Litecoin", "emoji": "Ł", "color": "#345D9D", "yf_symbol": "LTC-USD", "tv_symbol": "LTCUSDT"},
-}
+def run_live_feed_on_leader(is_leader):
+    """Listener alert_leader: WebSocket live feed hanya dibuka leader, worker lain membaca harganya dari store"""
+    if is_leader:
+        live.start_live_feed()
+    else:
+        live.stop_live_feed()
 
-FOREX_PAIRS = {
-    "XAUUSD": {"name": "Emas", "emoji": "🥇", "yf_symbol": "GC=F", "category": "commodity"},
-    "XAGUSD": {"name": "Perak", "emoji": "🥈", "yf_symbol": "SI=F", "category": "commodity"},
-    "EURUSD": {"name": "EUR/USD", "emoji": "💶", "yf_symbol": "EURUSD=X", "category": "major"},
-    "GBPUSD": {"name": "GBP/USD", "emoji": "💷", "yf_symbol": "GBPUSD=X", "category": "major"},
-    "USDJPY": {"name": "USD/JPY", "emoji": "💴", "yf_symbol": "USDJPY=X", "category": "major"},
-    "USDCHF": {"name": "USD/CHF", "emoji": "🇨🇭", "yf_symbol": "USDCHF=X", "category": "major"},
-    "AUDUSD": {"name": "AUD/USD", "emoji": "🇦🇺", "yf_symbol": "AUDUSD=X", "category": "major"},
-    "USDCAD": {"name": "USD/CAD", "emoji": "🇨🇦", "yf_symbol": "USDCAD=X", "category": "major"},
-    "NZDUSD": {"name": "NZD/USD", "emoji": "🇳🇿", "yf_symbol": "NZDUSD=X", "category": "major"},
-    "EURGBP": {"name": "EUR/GBP", "emoji": "🇪🇺", "yf_symbol": "EURGBP=X", "category": "cross"},
-    "EURJPY": {"name": "EUR/JPY", "emoji": "🇪🇺", "yf_symbol": "EURJPY=X", "category": "cross"},
-    "GBPJPY": {"name": "GBP/JPY", "emoji": "🇬🇧", "yf_symbol": "GBPJPY=X", "category": "cross"},
-    "AUDJPY": {"name": "AUD/JPY", "emoji": "🇦🇺", "yf_symbol": "AUDJPY=X", "category": "cross"},
-    "EURAUD": {"name": "EUR/AUD", "emoji": "🇪🇺", "yf_symbol": "EURAUD=X", "category": "cross"},
-    "EURCHF": {"name": "EUR/CHF", "emoji": "🇪🇺", "yf_symbol": "EURCHF=X", "category": "cross"},
-    "USOIL": {"name": "Minyak Mentah", "emoji": "🛢️", "yf_symbol": "CL=F", "category": "commodity"},
-}
 
-INTERVAL_MAP = {
-    "1min": "1m", "5min": "5m", "15min": "15m",
-    "30min": "30m", "1hour": "1h", "4hour": "4h",
-    "1day": "1d", "1week": "1wk"
+@leader_only(alert_leader)
+async def check_price_alerts_job(context: ContextTypes.DEFAULT_TYPE):
+    """Job cadangan: cek alert lewat request harga untuk simbol yang tidak punya tick live"""
+    await asyncio.to_thread(price_alerts.sync)
+    for symbol in price_alerts.symbols():
+        if live.live_feed and live.live_feed.get_price(symbol):
+            continue
+        
+        get_price = get_crypto_price if symbol in SUPPORTED_COINS else get_forex_price
+        price = await asyncio.to_thread(get_price, symbol)
+        if not price:
+            continue
+        
+        triggered = await asyncio.to_thread(price_alerts.check, symbol, price)
+        if triggered:
+            await send_price_alert_notifications(context.bot, triggered, price)
+
+
+# Alert kondisi indikator - dievaluasi sekali per candle close per (simbol, timeframe)
+INDICATOR_CALCULATORS = {
+    "rsi": lambda df: calculate_rsi(df['Close'], 14),
+    "stoch_rsi": lambda df: calculate_stochastic_rsi(df['Close'])[0],
+    "adx": lambda df: calculate_adx(df)[0],
+    "ema20": lambda df: calculate_ema(df['Close'], 20),
+    "ema50": lambda df: calculate_ema(df['Close'], 50),
+    "macd": lambda df: calculate_macd(df['Close']),
+    "confluence": lambda df: calculate_confluence_score(df),
 }
 
-KUCOIN_INTERVAL_MAP = {
-    "1min": 60, "3min": 180, "5min": 300, "15min": 900,
-    "30min": 1800, "1hour": 3600, "2hour": 7200,
-    "4hour": 14400, "6hour": 21600, "8hour": 28800,
-    "12hour": 43200, "1day": 86400, "1week": 604800
+THRESHOLD_INDICATORS = {"RSI": "rsi", "STOCHRSI": "stoch_rsi", "ADX": "adx"}
+
+
+def crossed_above(fast, slow):
+    """True jika seri fast baru saja memotong ke atas seri slow pada candle terakhir"""
+    return fast.iloc[-1] > slow.iloc[-1] and fast.iloc[-2] <= slow.iloc[-2]
+
+
+NAMED_CONDITIONS = {
+    "GOLDEN_CROSS": {
+        "label": "Golden Cross EMA20/EMA50",
+        "deps": ("ema20", "ema50"),
+        "evaluate": lambda v: crossed_above(v["ema20"], v["ema50"]),
+    },
+    "DEATH_CROSS": {
+        "label": "Death Cross EMA20/EMA50",
+        "deps": ("ema20", "ema50"),
+        "evaluate": lambda v: crossed_above(v["ema50"], v["ema20"]),
+    },
+    "MACD_CROSS_UP": {
+        "label": "MACD Cross Up",
+        "deps": ("macd",),
+        "evaluate": lambda v: crossed_above(v["macd"][0], v["macd"][1]),
+    },
+    "MACD_CROSS_DOWN": {
+        "label": "MACD Cross Down",
+        "deps": ("macd",),
+        "evaluate": lambda v: crossed_above(v["macd"][1], v["macd"][0]),
+    },
 }
 
+for _signal in ("STRONG_BUY", "BUY", "HOLD", "SELL", "STRONG_SELL"):
+    NAMED_CONDITIONS[_signal] = {
+        "label": f"Sinyal {_signal.replace('_', ' ')}",
+        "deps": ("confluence",),
+        "evaluate": lambda v, signal=_signal: v["confluence"]["signal"] == signal,
+    }
+
 
-def fetch_crypto_from_tradingview(symbol="BTC", interval="1hour", n_bars=200):
-    """Mengambil data candlestick Crypto dari TradingView"""
-    
-    if not TV_AVAILABLE:
-        return None
+def parse_indicator_condition(text):
+    """Mengubah teks kondisi (RSI<30, ADX>25, GOLDEN_CROSS, STRONG_BUY, ...) menjadi kondisi alert"""
+    normalized = text.upper().replace(" ", "").replace("-", "_")
     
-    if interval not in TV_INTERVAL_MAP:
-        return None
+    if normalized in NAMED_CONDITIONS:
+        return {"key": normalized, **NAMED_CONDITIONS[normalized]}
     
-    if symbol not in SUPPORTED_COINS:
+    match = re.fullmatch(r'(RSI|STOCHRSI|ADX)([<>])(\d+(?:\.\d+)?)', normalized)
+    if not match:
         return None
     
-    tv_interval = TV_INTERVAL_MAP[interval]
-    tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-    
-    exchanges = ['BINANCE', 'BYBIT', 'COINBASE', 'KRAKEN', 'BITSTAMP']
+    name, operator, value = match.group(1), match.group(2), float(match.group(3))
+    dep = THRESHOLD_INDICATORS[name]
     
-    for exchange in exchanges:
-        try:
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange=exchange,
-                timeframe=tv_interval,
-                bars=n_bars
-            )
-            
-            if df is not None and not df.empty:
-                df = df.dropna()
-                if df.empty:
-                    continue
-                
-                candles = []
-                for timestamp, row in df.iterrows():
-                    candles.append([
-                        int(timestamp.timestamp()),
-                        float(row["open"]),
-                        float(row["close"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["volume"]) if "volume" in row else 0
-                    ])
-                
-                log_data(f"{symbol} ({interval}): {len(candles)} candle dari TradingView")
-                return candles
-                
-        except Exception:
-            continue
+    def evaluate(values):
+        current = values[dep].iloc[-1]
+        return current < value if operator == "<" else current > value
     
-    return None
+    return {
+        "key": f"{name}{operator}{value:g}",
+        "label": f"{name} {operator} {value:g}",
+        "deps": (dep,),
+        "evaluate": evaluate,
+    }
 
 
-def fetch_crypto_from_yfinance(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto dari Yahoo Finance (cadangan)"""
-    
-    if not yf:
-        return None
-    
-    if interval not in INTERVAL_MAP:
-        return None
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
+class IndicatorAlertBook(SharedBook):
+    """
+    Alert indikator di store bersama, dikelompokkan per (simbol, timeframe) lalu per kondisi unik.
+    Status terpenuhi terakhir per kondisi juga di store, jadi leader baru tidak mengirim ulang kondisi yang sama.
+    """
 
-    try:
-        yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-        yf_interval = INTERVAL_MAP[interval]
-        ticker = yf.Ticker(yf_symbol)
-        
-        if interval in ["1min", "5min", "15min", "30min"]:
-            period = "3d"
-        else:
-            period = "1y"
-        
-        df = ticker.history(period=period, interval=yf_interval)
-        
-        if df.empty:
-            return None
-        
-        df = df.dropna()
-        if df.empty:
-            return None
-        
-        candles = []
-        for timestamp, row in df.iterrows():
-            volume = float(row["Volume"]) if "Volume" in row and pd.notna(row["Volume"]) else 0
-            candles.append([
-                int(timestamp.timestamp()),
-                float(row["Open"]),
-                float(row["Close"]),
-                float(row["High"]),
-                float(row["Low"]),
-                volume
-            ])
-        
-        log_data(f"{symbol} ({interval}): {len(candles)} candle dari Yahoo Finance")
-        return candles[-200:] if len(candles) > 200 else candles
-        
-    except Exception:
-        return None
+    prefix = "alert:indicator:"
+    version_key = "alert_version:indicator"
 
+    def __init__(self):
+        super().__init__()
+        self._groups = {}
 
-def fetch_crypto_kucoin(symbol="BTC", interval="15min", candle_limit=200):
-    """Mengambil data candlestick dari KuCoin API (cadangan)"""
-    pair = f"{symbol}-USDT"
-    
-    if interval not in KUCOIN_INTERVAL_MAP:
-        return None
-    
-    end_at = int(datetime.now(timezone.utc).timestamp())
-    start_at = end_at - KUCOIN_INTERVAL_MAP[interval] * candle_limit
-
-    try:
-        response = requests.get(
-            "https://api.kucoin.com/api/v1/market/candles",
-            params={
-                "symbol": pair,
-                "type": interval,
-                "startAt": start_at,
-                "endAt": end_at
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
+    def _rebuild(self, records):
+        self._groups = {}
+        for alert in records:
+            condition = parse_indicator_condition(alert["condition"])
+            if not condition:
+                continue
+            group = self._groups.setdefault((alert["symbol"], alert["interval"]), {})
+            entry = group.setdefault(condition["key"], {"condition": condition, "subscribers": []})
+            entry["subscribers"].append(alert)
+
+    def add(self, chat_id, symbol, market_type, interval, condition):
+        alert = {
+            "id": next_alert_id(chat_id),
+            "chat_id": chat_id,
+            "symbol": symbol,
+            "market_type": market_type,
+            "interval": interval,
+            "condition": condition["key"],
+            "label": condition["label"],
+            "created_at": time.time(),
+        }
+        self.store.set(self._key(chat_id, alert["id"]), alert)
+        self._changed()
+        return alert
+
+    def remove(self, chat_id, alert_id):
+        key = self._key(chat_id, alert_id)
+        if not self.store.get(key):
+            return False
+        self.store.delete(key)
+        self._changed()
+        return True
+
+    def list_for_chat(self, chat_id):
+        return sorted(self._records(f"{self.prefix}{chat_id}:"), key=lambda alert: alert["id"])
+
+    def count_for_chat(self, chat_id):
+        return len(self.store.keys(f"{self.prefix}{chat_id}:"))
+
+    def symbols_for_interval(self, interval):
+        """Simbol yang memiliki langganan pada timeframe ini (indeks hasil sync terakhir)"""
+        with self._lock:
+            return [symbol for symbol, tf in self._groups if tf == interval]
+
+    def evaluate(self, symbol, interval, df):
+        """
+        Hitung setiap indikator yang dibutuhkan grup ini tepat sekali, evaluasi setiap kondisi unik
+        sekali, lalu kembalikan alert semua pelanggan kondisi yang baru saja terpenuhi
+        """
+        with self._lock:
+            entries = list(self._groups.get((symbol, interval), {}).values())
+        if not entries:
+            return []
         
-        if data.get("code") != "200000":
-            return None
+        deps = set()
+        for entry in entries:
+            deps.update(entry["condition"]["deps"])
+        values = {dep: INDICATOR_CALCULATORS[dep](df) for dep in deps}
         
-        candles = data.get("data", [])
-        if not candles:
-            return None
+        state_key = f"alert_state:{symbol}:{interval}"
+        previous = self.store.get(state_key, {})
+        states = {}
+        candidates = []
+        for entry in entries:
+            key = entry["condition"]["key"]
+            try:
+                states[key] = bool(entry["condition"]["evaluate"](values))
+            except Exception as e:
+                logger.warning("Gagal evaluasi kondisi %s %s %s: %s", key, symbol, interval, e)
+                states[key] = previous.get(key, False)
+                continue
             
-        sorted_candles = sorted(candles, key=lambda x: int(x[0]))
-        log_data(f"{symbol} ({interval}): {len(sorted_candles)} candle dari KuCoin")
-        return sorted_candles
+            # Edge-triggered: kirim hanya saat kondisi berubah dari tidak terpenuhi menjadi terpenuhi
+            if states[key] and not previous.get(key):
+                candidates.extend(sorted(entry["subscribers"], key=lambda alert: alert["id"]))
+        self.store.set(state_key, states, ttl=TIMEFRAME_SECONDS[interval] * 3)
         
-    except Exception:
-        return None
+        # Alert yang dihapus user di worker lain sejak sync terakhir tidak ikut dikirim
+        return [alert for alert in candidates if self.store.get(self._key(alert["chat_id"], alert["id"])) == alert]
 
 
-def fetch_crypto_data(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto - prioritas TradingView, cadangan Yahoo Finance, lalu KuCoin"""
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-    
-    data = fetch_crypto_from_tradingview(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_crypto_from_yfinance(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_crypto_kucoin(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    log_error(f"Gagal mengambil data {symbol}")
-    return None
+indicator_alerts = IndicatorAlertBook()
 
 
-def fetch_forex_from_tradingview(symbol="XAUUSD", interval="1hour", n_bars=200):
-    """Mengambil data candlestick Forex dari TradingView"""
-    
-    if not TV_AVAILABLE:
-        return None
-    
-    if interval not in TV_INTERVAL_MAP or interval == "1week":
-        return None
-    
-    if symbol not in FOREX_PAIRS:
-        return None
+def schedule_candle_close_jobs(job_queue, callback, name):
+    """Jadwalkan callback berulang tepat setelah setiap candle close, satu job per timeframe (data=interval)"""
+    for interval, seconds in TIMEFRAME_SECONDS.items():
+        first = get_next_candle_close(interval) - time.time() + CANDLE_SYNC_BUFFER
+        job_queue.run_repeating(callback, interval=seconds, first=first, data=interval, name=f"{name}_{interval}")
+
+
+def evaluate_indicator_alerts(symbol, interval, close_time):
+    """Ambil candle yang sudah close (data segar setelah close_time) lalu evaluasi semua kondisi simbol ini"""
+    market_type = "crypto" if symbol in SUPPORTED_COINS else "forex"
+    data = fetch_market_data(symbol, interval, market_type, fetched_after=close_time)
+    if not data:
+        return []
     
-    tv_interval = TV_INTERVAL_MAP[interval]
+    closed = [candle for candle in data if int(candle[0]) < close_time]
+    # Tidak ada candle baru yang close (mis. pasar forex libur) - tidak ada yang perlu dievaluasi
+    if len(closed) < 2 or int(closed[-1][0]) != close_time - TIMEFRAME_SECONDS[interval]:
+        return []
     
-    exchanges = ['OANDA', 'FXCM', 'FX_IDC', 'FOREXCOM', 'CAPITALCOM']
+    return indicator_alerts.evaluate(symbol, interval, build_ohlc_dataframe(closed))
+
+
+async def send_indicator_alert_notifications(bot, triggered, close_time):
+    """Mengirim notifikasi untuk alert indikator yang terpicu"""
+    close_wib = datetime.fromtimestamp(close_time, tz=tz("Asia/Jakarta")).strftime("%d/%m %H:%M WIB")
     
-    for exchange in exchanges:
+    async def notify(alert):
+        symbol = alert["symbol"]
+        info = SUPPORTED_COINS.get(symbol) or FOREX_PAIRS.get(symbol, {"emoji": "📊"})
         try:
-            df = fetcher.get_historical_data(
-                symbol=symbol,
-                exchange=exchange,
-                timeframe=tv_interval,
-                bars=n_bars
-            )
-            
-            if df is not None and not df.empty:
-                df = df.dropna()
-                if df.empty:
-                    continue
-                
-                candles = []
-                for timestamp, row in df.iterrows():
-                    candles.append([
-                        int(timestamp.timestamp()),
-                        float(row["open"]),
-                        float(row["close"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["volume"]) if "volume" in row else 0
-                    ])
-                
-                log_data(f"{symbol} ({interval}): {len(candles)} candle dari TradingView")
-                return candles
-                
-        except Exception:
-            continue
+            await send_scheduler.send(alert["chat_id"], lambda: bot.send_message(
+                chat_id=alert["chat_id"],
+                text=f"🔔 *Alert Indikator {symbol} ({alert['interval']})*\n\n"
+                     f"{info['emoji']} Kondisi *{alert['label']}* terpenuhi\n"
+                     f"🕐 Candle close: {close_wib}",
+                parse_mode='Markdown',
+                reply_markup=get_timeframe_keyboard(symbol, alert["market_type"])
+            ))
+        except Exception as e:
+            logger.warning("Gagal mengirim alert #%s: %s", alert['id'], e)
     
-    return None
+    await asyncio.gather(*(notify(alert) for alert in triggered))
 
 
-def fetch_forex_from_yfinance(symbol="XAUUSD", interval="1hour"):
-    """Mengambil data candlestick Forex dari Yahoo Finance (cadangan)"""
-    
-    if not yf:
-        return None
-    
-    forex_interval_map = {k: v for k, v in INTERVAL_MAP.items() if k != "1week"}
+@leader_only(alert_leader)
+async def indicator_alerts_close_job(context: ContextTypes.DEFAULT_TYPE):
+    """Job candle close: evaluasi alert indikator semua simbol pada timeframe ini secara paralel"""
+    interval = context.job.data
+    await asyncio.to_thread(indicator_alerts.sync)
+    symbols = indicator_alerts.symbols_for_interval(interval)
+    if not symbols:
+        return
     
-    if interval not in forex_interval_map:
-        return None
+    close_time = get_candle_bucket_start(int(time.time()), interval)
+    # Semua simbol diambil dalam satu batch (TradingView multipleks, cadangan bulk Yahoo); evaluasi per simbol membaca cache
+    await asyncio.to_thread(prefetch_market_data, symbols, interval, close_time)
+    results = await asyncio.gather(
+        *(asyncio.to_thread(evaluate_indicator_alerts, symbol, interval, close_time) for symbol in symbols),
+        return_exceptions=True
+    )
     
-    if symbol not in FOREX_PAIRS:
-        return None
+    for symbol, triggered in zip(symbols, results):
+        if isinstance(triggered, Exception):
+            logger.warning("Evaluasi alert indikator %s %s gagal: %s", symbol, interval, triggered)
+            continue
+        if triggered:
+            await send_indicator_alert_notifications(context.bot, triggered, close_time)
 
-    try:
-        yf_symbol = FOREX_PAIRS[symbol]["yf_symbol"]
-        yf_interval = forex_interval_map[interval]
-        ticker = yf.Ticker(yf_symbol)
-        
-        if interval in ["1min", "5min", "15min", "30min"]:
-            period = "3d"
-        else:
-            period = "1y"
-        
-        df = ticker.history(period=period, interval=yf_interval)
-        
-        if df.empty:
-            return None
-        
-        df = df.dropna()
-        if df.empty:
-            return None
-        
-        candles = []
-        for timestamp, row in df.iterrows():
-            volume = float(row["Volume"]) if "Volume" in row and pd.notna(row["Volume"]) else 0
-            candles.append([
-                int(timestamp.timestamp()),
-                float(row["Open"]),
-                float(row["Close"]),
-                float(row["High"]),
-                float(row["Low"]),
-                volume
-            ])
-        
-        log_data(f"{symbol} ({interval}): {len(candles)} candle dari Yahoo Finance")
-        return candles[-200:] if len(candles) > 200 else candles
-        
-    except Exception:
-        return None
 
+# Langganan digest: ringkasan konfluensi dihitung sekali per candle close lalu disebar ke semua pelanggan
+MAX_SUBSCRIPTIONS_PER_CHAT = int(os.environ.get("MAX_SUBSCRIPTIONS_PER_CHAT", "10"))
+DEFAULT_DIGEST_INTERVAL = "4hour"
 
-def fetch_forex_data(symbol="XAUUSD", interval="1hour"):
-    """Mengambil data candlestick Forex - prioritas TradingView, cadangan Yahoo Finance"""
-    
-    forex_interval_map = {k: v for k, v in INTERVAL_MAP.items() if k != "1week"}
-    
-    if interval not in forex_interval_map:
+
+class DigestSubscriptions(SharedBook):
+    """Langganan digest di store bersama ("digest:<chat_id>:<simbol>:<timeframe>"), diindeks per (simbol, timeframe)"""
+
+    prefix = "digest:"
+    version_key = "alert_version:digest"
+
+    def __init__(self):
+        super().__init__()
+        self._subscribers = {}
+
+    def _rebuild(self, records):
+        self._subscribers = {}
+        for record in records:
+            self._subscribers.setdefault((record["symbol"], record["interval"]), set()).add(record["chat_id"])
+
+    def subscribe(self, chat_id, symbol, interval):
+        self.store.set(
+            self._key(chat_id, f"{symbol}:{interval}"), {"chat_id": chat_id, "symbol": symbol, "interval": interval}
+        )
+        self._changed()
+
+    def unsubscribe(self, chat_id, symbol=None, interval=None):
+        """Hapus langganan; symbol/interval None berarti semua. Mengembalikan jumlah yang dihapus"""
+        removed = 0
+        for record in self._records(f"{self.prefix}{chat_id}:"):
+            if (symbol and record["symbol"] != symbol) or (interval and record["interval"] != interval):
+                continue
+            self.store.delete(self._key(chat_id, f"{record['symbol']}:{record['interval']}"))
+            removed += 1
+        if removed:
+            self._changed()
+        return removed
+
+    def list_for_chat(self, chat_id):
+        return sorted((record["symbol"], record["interval"]) for record in self._records(f"{self.prefix}{chat_id}:"))
+
+    def subscribers(self, symbol, interval):
+        with self._lock:
+            return sorted(self._subscribers.get((symbol, interval), ()))
+
+    def symbols_for_interval(self, interval):
+        with self._lock:
+            return [symbol for symbol, tf in self._subscribers if tf == interval]
+
+
+digest_subscriptions = DigestSubscriptions()
+
+
+def build_signal_digest(symbol, interval, close_time):
+    """Hitung digest satu simbol dari candle yang sudah close: chart + caption ringkasan konfluensi"""
+    market_type = "crypto" if symbol in SUPPORTED_COINS else "forex"
+    data = fetch_market_data(symbol, interval, market_type, fetched_after=close_time)
+    closed = [candle for candle in data or [] if int(candle[0]) < close_time]
+    if len(closed) < 50 or int(closed[-1][0]) != close_time - TIMEFRAME_SECONDS[interval]:
         return None
     
-    if symbol not in FOREX_PAIRS:
+    filename = f"digest_{symbol}_{interval}_{close_time}.png"
+    chart_path, confluence = generate_chart_with_confluence(closed, filename, symbol, interval, market_type)
+    if not chart_path or not confluence:
         return None
     
-    data = fetch_forex_from_tradingview(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_forex_from_yfinance(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    log_error(f"Gagal mengambil data {symbol}")
-    return None
+    info = SUPPORTED_COINS.get(symbol) or FOREX_PAIRS[symbol]
+    close_wib = datetime.fromtimestamp(close_time, tz=tz("Asia/Jakarta")).strftime("%d/%m %H:%M WIB")
+    caption = (
+        f"📬 Digest {info['emoji']} {symbol} {interval} - close {close_wib}\n\n"
+        f"{SIGNAL_EMOJI.get(confluence['signal'], '⚪')} Sinyal: {confluence['signal'].replace('_', ' ')} "
+        f"(keyakinan {confluence['confidence']})\n"
+        f"📈 Tren: {confluence['trend_direction']} (ADX {confluence['adx']:.1f})\n"
+        f"📊 RSI: {confluence['rsi']:.1f} | Bullish {confluence['bullish_pct']:.0f}% / Bearish {confluence['bearish_pct']:.0f}%\n"
+        f"💵 Close: {format_symbol_price(symbol, float(closed[-1][2]))}\n\n"
+        f"⚠️ Bukan saran keuangan. /unsubscribe untuk berhenti."
+    )
+    return {"chart_path": chart_path, "caption": caption, "market_type": market_type}
 
 
-def get_crypto_price(symbol="BTC"):
-    """Mengambil harga crypto terkini"""
+@leader_only(alert_leader)
+async def broadcast_digest_job(context: ContextTypes.DEFAULT_TYPE):
+    """Job candle close: digest setiap simbol dihitung sekali lalu dikirim ke semua pelanggannya"""
+    interval = context.job.data
+    await asyncio.to_thread(digest_subscriptions.sync)
+    symbols = digest_subscriptions.symbols_for_interval(interval)
+    if not symbols:
+        return
     
-    if symbol not in SUPPORTED_COINS:
-        return None
+    close_time = get_candle_bucket_start(int(time.time()), interval)
+    await asyncio.to_thread(prefetch_market_data, symbols, interval, close_time)
+    digests = await asyncio.gather(
+        *(asyncio.to_thread(build_signal_digest, symbol, interval, close_time) for symbol in symbols),
+        return_exceptions=True
+    )
     
-    if TV_AVAILABLE:
+    for symbol, digest in zip(symbols, digests):
+        if isinstance(digest, Exception) or not digest:
+            if digest:
+                logger.warning("Digest %s %s gagal: %s", symbol, interval, digest)
+            continue
+        
+        chat_ids = digest_subscriptions.subscribers(symbol, interval)
         try:
-            tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange='BINANCE',
-                timeframe=TimeFrame.MINUTE_1,
-                bars=1
+            blocked = await send_scheduler.broadcast_photo(
+                context.bot, chat_ids, digest["chart_path"], digest["caption"],
+                reply_markup=get_timeframe_keyboard(symbol, digest["market_type"])
             )
-            if df is not None and not df.empty:
-                return float(df.iloc[-1]["close"])
-        except Exception:
-            pass
-    
-    if yf:
-        try:
-            yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return float(data.iloc[-1]["Close"])
-        except Exception:
-            pass
-    
-    pair = f"{symbol}-USDT"
-    try:
-        response = requests.get(
-            f"https://api.kucoin.com/api/v1/market/orderbook/level1",
-            params={"symbol": pair},
-            timeout=10
-        )
-        data = response.json()
-        if data.get("code") == "200000" and data.get("data"):
-            return float(data["data"].get("price", 0))
-    except Exception:
-        pass
-    
-    return None
+        finally:
+            try:
+                os.remove(digest["chart_path"])
+            except OSError:
+                pass
+        
+        for chat_id in blocked:
+            await asyncio.to_thread(digest_subscriptions.unsubscribe, chat_id)
+        logger.info("Digest %s %s dikirim ke %s chat", symbol, interval, len(chat_ids) - len(blocked))
+
+
+# Antrean kerja pipeline analisa (fetch -> render -> Gemini)
+MAX_CONCURRENT_PIPELINES = int(os.environ.get("MAX_CONCURRENT_PIPELINES", "4"))
+MAX_QUEUED_PIPELINES = int(os.environ.get("MAX_QUEUED_PIPELINES", "32"))
+BUSY_MESSAGE = "⏳ Server sedang sibuk memproses banyak analisa. Coba lagi sebentar lagi."
+
+
+class UserWorkQueue:
+    """
+    Satu pipeline aktif per user: request baru membatalkan pipeline user yang sama yang masih berjalan
+    atau mengantre. Pipeline lintas user dibatasi semaphore global (admission limit).
+    
+    Pembatalan terjadi di batas tahap: tahap yang sedang berjalan di thread (fetch/render/Gemini)
+    tidak bisa dihentikan paksa, tetapi hasilnya dibuang dan tahap berikutnya tidak dijalankan.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_PIPELINES, max_queued=MAX_QUEUED_PIPELINES):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self._slots = None
+        self._waiting = 0
+        self._active = {}
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    def submit(self, user_id, pipeline, delay=0, on_cancel=None):
+        """
+        Jadwalkan pipeline() untuk user ini (setelah delay detik). False jika antrean global penuh.
+        on_cancel() dipanggil jika pipeline dibatalkan sebelum selesai (digantikan request baru atau cache).
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        
+        previous = self._active.get(user_id)
+        if previous and not previous.done():
+            previous.cancel()
+        elif self._waiting >= self.max_queued:
+            return False
+        
+        self._active[user_id] = asyncio.create_task(self._run(user_id, pipeline, previous, delay, on_cancel))
+        return True
 
+    def cancel(self, user_id):
+        """Batalkan pipeline user ini (mis. karena permintaannya sudah dilayani dari cache)"""
+        task = self._active.get(user_id)
+        if task and not task.done():
+            task.cancel()
 
-def get_forex_price(symbol="XAUUSD"):
-    """Mengambil harga forex/komoditas terkini"""
-    
-    if symbol not in FOREX_PAIRS:
-        return None
-    
-    if TV_AVAILABLE:
+    async def _run(self, user_id, pipeline, previous, delay, on_cancel):
+        current = asyncio.current_task()
         try:
-            df = fetcher.get_historical_data(
-                symbol=symbol,
-                exchange='OANDA',
-                timeframe=TimeFrame.MINUTE_1,
-                bars=1
-            )
-            if df is not None and not df.empty:
-                return float(df.iloc[-1]["close"])
-        except Exception:
-            pass
-    
-    if yf:
+            if previous and not previous.done():
+                # Beri kesempatan pipeline lama membersihkan diri sebelum pipeline baru mulai
+                await asyncio.wait({previous}, timeout=2)
+            
+            self._waiting += 1
+            try:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            
+            try:
+                await pipeline()
+            finally:
+                self._slots.release()
+        except asyncio.CancelledError:
+            logger.info("Pipeline user %s dibatalkan (digantikan request baru)", user_id)
+            if on_cancel:
+                on_cancel()
+        except Exception as e:
+            logger.error("Pipeline user %s gagal: %s", user_id, e)
+        finally:
+            if self._active.get(user_id) is current:
+                del self._active[user_id]
+
+
+analysis_queue = UserWorkQueue()
+
+
+# Fair-share admission: budget per user (token bucket berbobot), batas per tahap, jalur prioritas cache
+USER_ANALYSIS_RATE = float(os.environ.get("USER_ANALYSIS_RATE", "4")) / 60
+USER_ANALYSIS_BURST = float(os.environ.get("USER_ANALYSIS_BURST", "3"))
+USER_MAX_QUEUE_WAIT = int(os.environ.get("USER_MAX_QUEUE_WAIT", "120"))
+STAGE_LIMITS = {
+    "fetch": int(os.environ.get("FETCH_CONCURRENCY", "8")),
+    "render": int(os.environ.get("RENDER_CONCURRENCY", "2")),
+    "gemini": int(os.environ.get("GEMINI_CONCURRENCY", "3")),
+}
+ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", "300"))
+ANALYSIS_CACHE_MAX_AGE = int(os.environ.get("ANALYSIS_CACHE_MAX_AGE", "3600"))
+
+
+def parse_user_weights(value):
+    """Format USER_WEIGHTS: '12345:3,67890:2' - bobot mengalikan laju dan burst budget user"""
+    weights = {}
+    for item in value.split(","):
+        user_id, _, weight = item.strip().partition(":")
         try:
-            yf_symbol = FOREX_PAIRS[symbol]["yf_symbol"]
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return float(data.iloc[-1]["Close"])
-        except Exception:
-            pass
-    
-    return None
-
-
-def calculate_rsi(series, period=14):
-    """Menghitung RSI (Relative Strength Index)"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    """Menghitung MACD (Moving Average Convergence Divergence)"""
-    ema_fast = series.ewm(span=fast, adjust=False).mean()
-    ema_slow = series.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-
-def calculate_bollinger_bands(series, period=20, std_dev=2):
-    """Menghitung Bollinger Bands"""
-    sma = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    return upper_band, sma, lower_band
-
-
-def calculate_fibonacci_levels(df):
-    """Menghitung level Fibonacci retracement"""
-    high = df['High'].max()
-    low = df['Low'].min()
-    diff = high - low
-    
-    levels = {
-        '0.0%': high,
-        '23.6%': high - (diff * 0.236),
-        '38.2%': high - (diff * 0.382),
-        '50.0%': high - (diff * 0.5),
-        '61.8%': high - (diff * 0.618),
-        '78.6%': high - (diff * 0.786),
-        '100.0%': low
-    }
-    return levels
+            weights[int(user_id)] = float(weight)
+        except ValueError:
+            continue
+    return weights
 
 
-def calculate_atr(df, period=14):
-    """Menghitung ATR (Average True Range) - untuk volatilitas dan penentuan SL/TP"""
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    return atr
+USER_WEIGHTS = parse_user_weights(os.environ.get("USER_WEIGHTS", ""))
+user_budgets = {}
+stage_semaphores = {}
 
 
-def calculate_stochastic_rsi(series, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3):
-    """Menghitung Stochastic RSI - lebih sensitif dari RSI biasa"""
-    rsi = calculate_rsi(series, rsi_period)
-    
-    rsi_min = rsi.rolling(window=stoch_period).min()
-    rsi_max = rsi.rolling(window=stoch_period).max()
-    
-    stoch_rsi = ((rsi - rsi_min) / (rsi_max - rsi_min)) * 100
-    stoch_rsi = stoch_rsi.fillna(50)
-    
-    stoch_k = stoch_rsi.rolling(window=smooth_k).mean()
-    stoch_d = stoch_k.rolling(window=smooth_d).mean()
-    
-    return stoch_k, stoch_d
+def get_user_budget(user_id):
+    bucket = user_budgets.get(user_id)
+    if bucket is None:
+        weight = USER_WEIGHTS.get(user_id, 1.0)
+        bucket = user_budgets[user_id] = TokenBucket(USER_ANALYSIS_RATE * weight, USER_ANALYSIS_BURST * weight)
+    return bucket
 
 
-def calculate_adx(df, period=14):
-    """Menghitung ADX (Average Directional Index) - mengukur kekuatan tren"""
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-    
-    plus_dm = high.diff()
-    minus_dm = -low.diff()
-    
-    plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0)
-    minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0)
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=period).mean()
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(window=period).mean()
-    
-    return adx, plus_di, minus_di
+async def run_stage(stage, func, *args):
+    """Jalankan tahap pipeline di thread, dibatasi konkurensi global tahap tersebut"""
+    semaphore = stage_semaphores.get(stage)
+    if semaphore is None:
+        semaphore = stage_semaphores[stage] = asyncio.Semaphore(STAGE_LIMITS[stage])
+    async with semaphore:
+        return await asyncio.to_thread(func, *args)
 
 
-def calculate_vwap(df):
-    """Menghitung VWAP (Volume Weighted Average Price)"""
-    typical_price = (df['High'] + df['Low'] + df['Close']) / 3
-    vwap = (typical_price * df['Volume']).cumsum() / df['Volume'].cumsum()
-    return vwap
+# Hasil analisa terakhir per (market, simbol, timeframe): file_id chart + teks hasil, di store bersama
+def store_cached_analysis(market_type, symbol, interval, photo_file_id, caption, text, parse_mode=None):
+    get_store().set(f"analysis:{market_type}:{symbol}:{interval}", {
+        "photo": photo_file_id,
+        "caption": caption,
+        "text": text,
+        "parse_mode": parse_mode,
+        "symbol": symbol,
+        "market_type": market_type,
+        "bucket": get_candle_bucket_start(int(time.time()), interval),
+        "created_at": time.time(),
+    }, ttl=ANALYSIS_CACHE_MAX_AGE)
 
 
-def calculate_ema(series, period):
-    """Menghitung EMA dengan period tertentu"""
-    return series.ewm(span=period, adjust=False).mean()
+def get_cached_analysis(market_type, symbol, interval, max_age=ANALYSIS_CACHE_TTL):
+    """Analisa tersimpan yang masih dalam max_age; cache TTL pendek juga harus di candle yang sama"""
+    cached = get_store().get(f"analysis:{market_type}:{symbol}:{interval}")
+    if not cached or time.time() - cached["created_at"] > max_age:
+        return None
+    if max_age <= ANALYSIS_CACHE_TTL and cached["bucket"] != get_candle_bucket_start(int(time.time()), interval):
+        return None
+    return cached
 
 
-def detect_rsi_divergence(df, rsi, lookback=10):
-    """Mendeteksi RSI divergence (bullish/bearish)"""
-    close = df['Close']
-    divergence = []
-    
-    for i in range(lookback, len(df)):
-        price_window = close.iloc[i-lookback:i+1]
-        rsi_window = rsi.iloc[i-lookback:i+1]
-        
-        price_min_idx = price_window.idxmin()
-        price_max_idx = price_window.idxmax()
-        
-        current_price = close.iloc[i]
-        current_rsi = rsi.iloc[i]
-        
-        if current_price <= price_window.min() * 1.01:
-            rsi_at_prev_low = rsi.loc[price_min_idx] if price_min_idx in rsi.index else current_rsi
-            if current_rsi > rsi_at_prev_low:
-                divergence.append("bullish")
-                continue
-        
-        if current_price >= price_window.max() * 0.99:
-            rsi_at_prev_high = rsi.loc[price_max_idx] if price_max_idx in rsi.index else current_rsi
-            if current_rsi < rsi_at_prev_high:
-                divergence.append("bearish")
-                continue
-        
-        divergence.append("none")
-    
-    result = ['none'] * lookback + divergence
-    return result[-1] if result else "none"
+CHAT_STATE_TTL = 7 * 86400
 
 
-def detect_macd_divergence(df, macd_line, lookback=10):
-    """Mendeteksi MACD divergence (bullish/bearish)"""
-    close = df['Close']
-    
-    for i in range(lookback, len(df)):
-        price_window = close.iloc[i-lookback:i+1]
-        macd_window = macd_line.iloc[i-lookback:i+1]
-        
-        current_price = close.iloc[i]
-        current_macd = macd_line.iloc[i]
-        
-        if current_price <= price_window.min() * 1.01:
-            prev_macd_at_low = macd_window.min()
-            if current_macd > prev_macd_at_low:
-                return "bullish"
-        
-        if current_price >= price_window.max() * 0.99:
-            prev_macd_at_high = macd_window.max()
-            if current_macd < prev_macd_at_high:
-                return "bearish"
-    
-    return "none"
+class ChatState:
+    """
+    State per chat di store bersama (message id chart/hasil/tombol terakhir, simbol terpilih)
+    sehingga worker mana pun yang menerima update berikutnya bisa membersihkan pesan sebelumnya.
+    """
 
+    def __init__(self, ttl=CHAT_STATE_TTL):
+        self.ttl = ttl
 
-def calculate_confluence_score(df, market_type="crypto"):
-    """Menghitung skor konfluensi dari berbagai indikator untuk sinyal trading"""
-    close = df['Close']
-    current_price = close.iloc[-1]
-    
-    ema20 = calculate_ema(close, 20)
-    ema50 = calculate_ema(close, 50)
-    ema200 = calculate_ema(close, 200)
-    
-    rsi = calculate_rsi(close, 14)
-    current_rsi = rsi.iloc[-1]
-    
-    macd_line, signal_line, histogram = calculate_macd(close)
-    current_macd = macd_line.iloc[-1]
-    current_signal = signal_line.iloc[-1]
-    current_hist = histogram.iloc[-1]
-    prev_hist = histogram.iloc[-2] if len(histogram) > 1 else 0
-    
-    bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(close)
-    
-    stoch_k, stoch_d = calculate_stochastic_rsi(close)
-    current_stoch_k = stoch_k.iloc[-1]
-    current_stoch_d = stoch_d.iloc[-1]
-    
-    adx, plus_di, minus_di = calculate_adx(df)
-    current_adx = adx.iloc[-1] if not pd.isna(adx.iloc[-1]) else 20
-    current_plus_di = plus_di.iloc[-1] if not pd.isna(plus_di.iloc[-1]) else 25
-    current_minus_di = minus_di.iloc[-1] if not pd.isna(minus_di.iloc[-1]) else 25
-    
-    atr = calculate_atr(df)
-    current_atr = atr.iloc[-1] if not pd.isna(atr.iloc[-1]) else 0
-    
-    rsi_divergence = detect_rsi_divergence(df, rsi)
-    macd_divergence = detect_macd_divergence(df, macd_line)
-    
-    bullish_signals = 0
-    bearish_signals = 0
-    neutral_signals = 0
-    total_weight = 0
-    
-    signal_details = {
-        "bullish": [],
-        "bearish": [],
-        "neutral": []
-    }
-    
-    weight = 2
-    total_weight += weight
-    if current_price > ema20.iloc[-1] and current_price > ema50.iloc[-1]:
-        bullish_signals += weight
-        signal_details["bullish"].append("Harga di atas EMA20 & EMA50")
-    elif current_price < ema20.iloc[-1] and current_price < ema50.iloc[-1]:
-        bearish_signals += weight
-        signal_details["bearish"].append("Harga di bawah EMA20 & EMA50")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append("Harga di antara EMA20 & EMA50")
-    
-    if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]):
-        weight = 1.5
-        total_weight += weight
-        if current_price > ema200.iloc[-1]:
-            bullish_signals += weight
-            signal_details["bullish"].append("Harga di atas EMA200 (tren jangka panjang bullish)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("Harga di bawah EMA200 (tren jangka panjang bearish)")
-    
-    weight = 1.5
-    total_weight += weight
-    if ema20.iloc[-1] > ema50.iloc[-1]:
-        if ema20.iloc[-2] <= ema50.iloc[-2]:
-            bullish_signals += weight * 1.5
-            signal_details["bullish"].append("Golden Cross EMA20/EMA50 (sinyal kuat)")
-        else:
-            bullish_signals += weight
-            signal_details["bullish"].append("EMA20 di atas EMA50")
-    else:
-        if ema20.iloc[-2] >= ema50.iloc[-2]:
-            bearish_signals += weight * 1.5
-            signal_details["bearish"].append("Death Cross EMA20/EMA50 (sinyal kuat)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("EMA20 di bawah EMA50")
-    
-    weight = 2
-    total_weight += weight
-    if current_rsi < 30:
-        bullish_signals += weight
-        signal_details["bullish"].append(f"RSI oversold ({current_rsi:.1f})")
-    elif current_rsi > 70:
-        bearish_signals += weight
-        signal_details["bearish"].append(f"RSI overbought ({current_rsi:.1f})")
-    elif current_rsi > 50:
-        bullish_signals += weight * 0.5
-        signal_details["bullish"].append(f"RSI bullish zone ({current_rsi:.1f})")
-    else:
-        bearish_signals += weight * 0.5
-        signal_details["bearish"].append(f"RSI bearish zone ({current_rsi:.1f})")
-    
-    weight = 2
-    total_weight += weight
-    if current_macd > current_signal:
-        if macd_line.iloc[-2] <= signal_line.iloc[-2]:
-            bullish_signals += weight * 1.5
-            signal_details["bullish"].append("MACD Bullish Crossover (sinyal beli)")
-        else:
-            bullish_signals += weight
-            signal_details["bullish"].append("MACD di atas Signal Line")
-    else:
-        if macd_line.iloc[-2] >= signal_line.iloc[-2]:
-            bearish_signals += weight * 1.5
-            signal_details["bearish"].append("MACD Bearish Crossover (sinyal jual)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("MACD di bawah Signal Line")
-    
-    weight = 1
-    total_weight += weight
-    if current_hist > 0 and current_hist > prev_hist:
-        bullish_signals += weight
-        signal_details["bullish"].append("MACD histogram meningkat (momentum bullish)")
-    elif current_hist < 0 and current_hist < prev_hist:
-        bearish_signals += weight
-        signal_details["bearish"].append("MACD histogram menurun (momentum bearish)")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append("MACD histogram netral")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_price <= bb_lower.iloc[-1]:
-        bullish_signals += weight
-        signal_details["bullish"].append("Harga di bawah Lower Bollinger Band (oversold)")
-    elif current_price >= bb_upper.iloc[-1]:
-        bearish_signals += weight
-        signal_details["bearish"].append("Harga di atas Upper Bollinger Band (overbought)")
-    else:
-        bb_position = (current_price - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
-        if bb_position < 0.3:
-            bullish_signals += weight * 0.5
-            signal_details["bullish"].append("Harga mendekati Lower BB")
-        elif bb_position > 0.7:
-            bearish_signals += weight * 0.5
-            signal_details["bearish"].append("Harga mendekati Upper BB")
-        else:
-            neutral_signals += weight
-            signal_details["neutral"].append("Harga di tengah Bollinger Bands")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_stoch_k < 20:
-        bullish_signals += weight
-        signal_details["bullish"].append(f"Stochastic RSI oversold ({current_stoch_k:.1f})")
-    elif current_stoch_k > 80:
-        bearish_signals += weight
-        signal_details["bearish"].append(f"Stochastic RSI overbought ({current_stoch_k:.1f})")
-    elif current_stoch_k > current_stoch_d:
-        bullish_signals += weight * 0.5
-        signal_details["bullish"].append("Stochastic RSI bullish")
-    else:
-        bearish_signals += weight * 0.5
-        signal_details["bearish"].append("Stochastic RSI bearish")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_adx > 25:
-        if current_plus_di > current_minus_di:
-            bullish_signals += weight
-            signal_details["bullish"].append(f"ADX kuat ({current_adx:.1f}) dengan +DI dominan")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append(f"ADX kuat ({current_adx:.1f}) dengan -DI dominan")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append(f"ADX lemah ({current_adx:.1f}) - tren tidak jelas")
-    
-    weight = 2
-    if rsi_divergence == "bullish":
-        bullish_signals += weight
-        signal_details["bullish"].append("RSI Bullish Divergence terdeteksi (sinyal reversal)")
-    elif rsi_divergence == "bearish":
-        bearish_signals += weight
-        signal_details["bearish"].append("RSI Bearish Divergence terdeteksi (sinyal reversal)")
-    
-    if macd_divergence == "bullish":
-        bullish_signals += weight
-        signal_details["bullish"].append("MACD Bullish Divergence terdeteksi")
-    elif macd_divergence == "bearish":
-        bearish_signals += weight
-        signal_details["bearish"].append("MACD Bearish Divergence terdeteksi")
-    
-    total_signals = bullish_signals + bearish_signals + neutral_signals
-    
-    if total_signals > 0:
-        bullish_pct = (bullish_signals / total_signals) * 100
-        bearish_pct = (bearish_signals / total_signals) * 100
-    else:
-        bullish_pct = 50
-        bearish_pct = 50
-    
-    if bullish_signals > bearish_signals * 1.3:
-        if bullish_pct >= 70:
-            signal = "STRONG_BUY"
-            confidence = "TINGGI"
-        else:
-            signal = "BUY"
-            confidence = "SEDANG"
-    elif bearish_signals > bullish_signals * 1.3:
-        if bearish_pct >= 70:
-            signal = "STRONG_SELL"
-            confidence = "TINGGI"
-        else:
-            signal = "SELL"
-            confidence = "SEDANG"
-    else:
-        signal = "HOLD"
-        confidence = "RENDAH"
-    
-    trend_strength = "TIDAK JELAS"
-    if current_adx > 40:
-        trend_strength = "SANGAT KUAT"
-    elif current_adx > 25:
-        trend_strength = "KUAT"
-    elif current_adx > 20:
-        trend_strength = "SEDANG"
-    else:
-        trend_strength = "LEMAH"
-    
-    if current_price > ema20.iloc[-1] > ema50.iloc[-1]:
-        trend_direction = "UPTREND"
-    elif current_price < ema20.iloc[-1] < ema50.iloc[-1]:
-        trend_direction = "DOWNTREND"
-    else:
-        trend_direction = "SIDEWAYS"
-    
-    atr_pct = (current_atr / current_price) * 100 if current_price > 0 else 0
-    
-    return {
-        "signal": signal,
-        "confidence": confidence,
-        "bullish_score": bullish_signals,
-        "bearish_score": bearish_signals,
-        "neutral_score": neutral_signals,
-        "bullish_pct": bullish_pct,
-        "bearish_pct": bearish_pct,
-        "trend_direction": trend_direction,
-        "trend_strength": trend_strength,
-        "adx": current_adx,
-        "rsi": current_rsi,
-        "stoch_rsi": current_stoch_k,
-        "atr": current_atr,
-        "atr_pct": atr_pct,
-        "rsi_divergence": rsi_divergence,
-        "macd_divergence": macd_divergence,
-        "signal_details": signal_details,
-        "ema20": ema20.iloc[-1],
-        "ema50": ema50.iloc[-1],
-        "ema200": ema200.iloc[-1] if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]) else None,
-        "bb_upper": bb_upper.iloc[-1],
-        "bb_lower": bb_lower.iloc[-1],
-        "bb_middle": bb_middle.iloc[-1],
-        "macd": current_macd,
-        "macd_signal": current_signal,
-        "macd_hist": current_hist
-    }
+    def get(self, chat_id):
+        return get_store().get(f"chat:{chat_id}", {})
 
+    def update(self, chat_id, **fields):
+        state = dict(self.get(chat_id))
+        state.update(fields)
+        get_store().set(f"chat:{chat_id}", state, ttl=self.ttl)
 
-def generate_chart(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
-    """Generate chart candlestick dengan RSI, MACD, Bollinger Bands, Fibonacci, Stochastic RSI, dan EMA200"""
-    if not data:
-        return None
-    
-    try:
-        ohlc = []
-        for item in data:
-            ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
-            ohlc.append([
-                ts,
-                float(item[1]),
-                float(item[3]),
-                float(item[4]),
-                float(item[2]),
-                float(item[5])
-            ])
-        
-        df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
-        df.set_index("Date", inplace=True)
+    def pop(self, chat_id, *keys):
+        """Hapus field dan kembalikan nilai lamanya"""
+        state = dict(self.get(chat_id))
+        popped = {key: state.pop(key) for key in keys if key in state}
+        if popped:
+            get_store().set(f"chat:{chat_id}", state, ttl=self.ttl)
+        return popped
 
-        mc = mpf.make_marketcolors(
-            up='#00AA00', down='#FF0000',
-            wick={'up': '#00AA00', 'down': '#FF0000'},
-            volume={'up': '#00AA00', 'down': '#FF0000'}
-        )
-        style = mpf.make_mpf_style(
-            marketcolors=mc,
-            gridstyle=':',
-            gridcolor='#cccccc',
-            facecolor='#f5f5f5',
-            edgecolor='#666666'
-        )
 
-        ema20 = df['Close'].ewm(span=20, adjust=False).mean()
-        ema50 = df['Close'].ewm(span=50, adjust=False).mean()
-        ema200 = df['Close'].ewm(span=200, adjust=False).mean()
-        
-        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(df['Close'])
-        
-        rsi = calculate_rsi(df['Close'])
-        rsi_overbought = pd.Series([70] * len(df), index=df.index)
-        rsi_oversold = pd.Series([30] * len(df), index=df.index)
-        rsi_middle = pd.Series([50] * len(df), index=df.index)
-        
-        stoch_k, stoch_d = calculate_stochastic_rsi(df['Close'])
-        stoch_overbought = pd.Series([80] * len(df), index=df.index)
-        stoch_oversold = pd.Series([20] * len(df), index=df.index)
-        
-        macd_line, signal_line, macd_histogram = calculate_macd(df['Close'])
-        
-        fib_levels = calculate_fibonacci_levels(df)
-        fib_236 = pd.Series([fib_levels['23.6%']] * len(df), index=df.index)
-        fib_382 = pd.Series([fib_levels['38.2%']] * len(df), index=df.index)
-        fib_500 = pd.Series([fib_levels['50.0%']] * len(df), index=df.index)
-        fib_618 = pd.Series([fib_levels['61.8%']] * len(df), index=df.index)
-        
-        macd_colors = ['#00AA00' if val >= 0 else '#FF0000' for val in macd_histogram]
-        
-        addplots = [
-            mpf.make_addplot(ema20, color='blue', width=1.2),
-            mpf.make_addplot(ema50, color='orange', width=1.2),
-            mpf.make_addplot(ema200, color='red', width=1.5, linestyle='-'),
-            
-            mpf.make_addplot(bb_upper, color='purple', width=0.8, linestyle='--'),
-            mpf.make_addplot(bb_middle, color='purple', width=0.5, linestyle=':'),
-            mpf.make_addplot(bb_lower, color='purple', width=0.8, linestyle='--'),
-            
-            mpf.make_addplot(fib_236, color='#FFD700', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_382, color='#FFA500', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_500, color='#FF6347', width=0.7, linestyle='-.'),
-            mpf.make_addplot(fib_618, color='#FF4500', width=0.5, linestyle='-.'),
-            
-            mpf.make_addplot(rsi, panel=2, color='#9C27B0', width=1.2, ylabel='RSI'),
-            mpf.make_addplot(rsi_overbought, panel=2, color='red', width=0.5, linestyle='--'),
-            mpf.make_addplot(rsi_oversold, panel=2, color='green', width=0.5, linestyle='--'),
-            mpf.make_addplot(rsi_middle, panel=2, color='gray', width=0.3, linestyle=':'),
-            
-            mpf.make_addplot(stoch_k, panel=3, color='#2196F3', width=1.2, ylabel='Stoch RSI'),
-            mpf.make_addplot(stoch_d, panel=3, color='#FF9800', width=1),
-            mpf.make_addplot(stoch_overbought, panel=3, color='red', width=0.5, linestyle='--'),
-            mpf.make_addplot(stoch_oversold, panel=3, color='green', width=0.5, linestyle='--'),
-            
-            mpf.make_addplot(macd_line, panel=4, color='blue', width=1, ylabel='MACD'),
-            mpf.make_addplot(signal_line, panel=4, color='red', width=1),
-            mpf.make_addplot(macd_histogram, panel=4, type='bar', color=macd_colors, width=0.7),
-        ]
+chat_state = ChatState()
 
-        if market_type == "crypto":
-            ylabel = "Harga (USDT)"
-        else:
-            ylabel = "Harga"
-
-        mpf.plot(
-            df, type='candle', volume=True, style=style,
-            ylabel=ylabel,
-            ylabel_lower="Volume",
-            savefig=dict(fname=filename, dpi=150, bbox_inches='tight'),
-            figratio=(16, 14),
-            figscale=1.5,
-            tight_layout=True,
-            addplot=addplots,
-            warn_too_much_data=500,
-            panel_ratios=(6, 2, 1.5, 1.5, 1.5)
-        )
-        
-        log_success(f"Chart {symbol} ({tf}) dibuat")
-        return filename
-        
+
+async def delete_messages(context, chat_id, message_ids):
+    """Hapus beberapa pesan dengan satu panggilan deleteMessages; cadangan: deleteMessage bersamaan"""
+    message_ids = [message_id for message_id in dict.fromkeys(message_ids) if message_id]
+    if not message_ids:
+        return
+    try:
+        await context.bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+        return
     except Exception:
-        return None
+        pass
+    await asyncio.gather(
+        *(context.bot.delete_message(chat_id=chat_id, message_id=message_id) for message_id in message_ids),
+        return_exceptions=True
+    )
 
 
-def generate_chart_with_confluence(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
-    """Generate chart dan hitung confluence score"""
-    if not data:
-        return None, None
+async def delete_previous_analysis(context, chat_id, extra=(), keep=None):
+    """Hapus chart, hasil, dan tombol analisa sebelumnya di chat ini (plus pesan extra), kecuali pesan keep"""
+    previous = await asyncio.to_thread(
+        chat_state.pop, chat_id, 'last_chart_message_id', 'last_analysis_message_id', 'last_button_message_id'
+    )
+    message_ids = [message_id for message_id in (*previous.values(), *extra) if message_id != keep]
+    await delete_messages(context, chat_id, message_ids)
+
+
+async def claim_status_message(context, chat_id, message_id, text):
+    """
+    Jadikan pesan tombol yang ditekan sebagai pesan status (satu edit, bukan kirim baru lalu hapus),
+    bersamaan dengan menghapus analisa sebelumnya. Mengembalikan message id pesan status.
+    """
+    async def edit():
+        try:
+            await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+            return message_id
+        except Exception:
+            return None
     
+    status_message_id, _ = await asyncio.gather(edit(), delete_previous_analysis(context, chat_id, keep=message_id))
+    if status_message_id is None:
+        status_message, _ = await asyncio.gather(
+            context.bot.send_message(chat_id=chat_id, text=text), delete_messages(context, chat_id, [message_id])
+        )
+        status_message_id = status_message.message_id
+    # Dicatat sejak awal agar request pengganti bisa menghapus pesan status pipeline yang dibatalkan
+    await asyncio.to_thread(chat_state.update, chat_id, last_analysis_message_id=status_message_id)
+    return status_message_id
+
+
+async def edit_result_message(context, chat_id, message_id, text, reply_markup=None):
+    """Ubah pesan status menjadi hasil akhir (Markdown, teks polos jika Markdown ditolak Telegram)"""
     try:
-        ohlc = []
-        for item in data:
-            ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
-            ohlc.append([
-                ts,
-                float(item[1]),
-                float(item[3]),
-                float(item[4]),
-                float(item[2]),
-                float(item[5])
-            ])
-        
-        df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
-        df.set_index("Date", inplace=True)
-        
-        confluence = calculate_confluence_score(df, market_type)
-        
-        chart_path = generate_chart(data, filename, symbol, tf, market_type)
-        
-        return chart_path, confluence
-        
+        await context.bot.edit_message_text(
+            chat_id=chat_id, message_id=message_id, text=text, parse_mode='Markdown', reply_markup=reply_markup
+        )
     except Exception:
-        return None, None
-
-
-def get_timeframe_context(interval):
-    """Mendapatkan konteks berdasarkan timeframe untuk analisa yang lebih akurat"""
-    timeframe_configs = {
-        "1min": {
-            "name": "1 Menit",
-            "type": "Scalping",
-            "tp_range": "0.1% - 0.3%",
-            "sl_range": "0.05% - 0.15%",
-            "hold_time": "1-15 menit",
-            "volatility": "sangat tinggi",
-            "reliability": "rendah (noise tinggi)",
-            "rr_ratio": "1:1 hingga 1:2",
-            "next_candle": "1 menit ke depan",
-            "prediction_horizon": "1-5 menit"
-        },
-        "5min": {
-            "name": "5 Menit",
-            "type": "Scalping",
-            "tp_range": "0.2% - 0.5%",
-            "sl_range": "0.1% - 0.25%",
-            "hold_time": "5-30 menit",
-            "volatility": "tinggi",
-            "reliability": "rendah-sedang",
-            "rr_ratio": "1:1.5 hingga 1:2",
-            "next_candle": "5 menit ke depan",
-            "prediction_horizon": "5-15 menit"
-        },
-        "15min": {
-            "name": "15 Menit",
-            "type": "Intraday",
-            "tp_range": "0.3% - 0.8%",
-            "sl_range": "0.15% - 0.4%",
-            "hold_time": "15 menit - 2 jam",
-            "volatility": "sedang-tinggi",
-            "reliability": "sedang",
-            "rr_ratio": "1:1.5 hingga 1:2.5",
-            "next_candle": "15 menit ke depan",
-            "prediction_horizon": "15-45 menit"
-        },
-        "30min": {
-            "name": "30 Menit",
-            "type": "Intraday",
-            "tp_range": "0.5% - 1.2%",
-            "sl_range": "0.25% - 0.6%",
-            "hold_time": "30 menit - 4 jam",
-            "volatility": "sedang",
-            "reliability": "sedang-baik",
-            "rr_ratio": "1:2 hingga 1:3",
-            "next_candle": "30 menit ke depan",
-            "prediction_horizon": "30-90 menit"
-        },
-        "1hour": {
-            "name": "1 Jam",
-            "type": "Swing Trading",
-            "tp_range": "1% - 2.5%",
-            "sl_range": "0.5% - 1.2%",
-            "hold_time": "2-24 jam",
-            "volatility": "sedang",
-            "reliability": "baik",
-            "rr_ratio": "1:2 hingga 1:3",
-            "next_candle": "1 jam ke depan",
-            "prediction_horizon": "1-4 jam"
-        },
-        "4hour": {
-            "name": "4 Jam",
-            "type": "Swing Trading",
-            "tp_range": "2% - 5%",
-            "sl_range": "1% - 2.5%",
-            "hold_time": "1-7 hari",
-            "volatility": "sedang-rendah",
-            "reliability": "baik-sangat baik",
-            "rr_ratio": "1:2 hingga 1:4",
-            "next_candle": "4 jam ke depan",
-            "prediction_horizon": "4-12 jam"
-        },
-        "1day": {
-            "name": "Harian",
-            "type": "Position Trading",
-            "tp_range": "3% - 10%",
-            "sl_range": "1.5% - 5%",
-            "hold_time": "3-30 hari",
-            "volatility": "rendah",
-            "reliability": "sangat baik",
-            "rr_ratio": "1:2 hingga 1:5",
-            "next_candle": "1 hari ke depan",
-            "prediction_horizon": "1-3 hari"
-        },
-        "1week": {
-            "name": "Mingguan",
-            "type": "Position/Investment",
-            "tp_range": "5% - 20%",
-            "sl_range": "3% - 10%",
-            "hold_time": "2-12 minggu",
-            "volatility": "sangat rendah",
-            "reliability": "sangat baik (tren utama)",
-            "rr_ratio": "1:2 hingga 1:5",
-            "next_candle": "1 minggu ke depan",
-            "prediction_horizon": "1-4 minggu"
-        }
-    }
-    return timeframe_configs.get(interval, timeframe_configs["1hour"])
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text.replace('*', '').replace('_', '').replace('```', ''),
+            reply_markup=reply_markup
+        )
 
 
-def analyze_with_gemini(image_path, symbol, market_type="crypto", interval="1hour", confluence=None):
-    """Analisa chart menggunakan Gemini Vision API dengan konteks timeframe dan confluence score"""
-    if not GEMINI_API_KEY:
-        return "GEMINI_API_KEY tidak ditemukan. Silakan set environment variable terlebih dahulu."
-    
-    if interval not in INTERVAL_MAP:
-        logger.warning(f"Interval tidak valid: {interval}, menggunakan default 1hour")
-        interval = "1hour"
-    
+async def edit_caption_quietly(context, chat_id, message_id, caption):
     try:
-        with open(image_path, "rb") as f:
-            img_b64 = base64.b64encode(f.read()).decode("utf-8")
-    except FileNotFoundError:
-        return f"File tidak ditemukan: {image_path}"
+        await context.bot.edit_message_caption(chat_id=chat_id, message_id=message_id, caption=caption)
     except Exception as e:
-        return f"Error membaca file: {e}"
+        logger.warning("Gagal update caption chart: %s", e)
 
-    if market_type == "crypto":
-        coin_info = SUPPORTED_COINS.get(symbol, {"name": symbol})
-        asset_name = f"{symbol}/USDT ({coin_info.get('name', symbol)})"
-    else:
-        pair_info = FOREX_PAIRS.get(symbol, {"name": symbol})
-        asset_name = f"{symbol} ({pair_info.get('name', symbol)})"
-
-    tf_context = get_timeframe_context(interval)
-    
-    confluence_context = ""
-    if confluence:
-        bullish_details = "\n  - ".join(confluence['signal_details']['bullish'][:5]) if confluence['signal_details']['bullish'] else "Tidak ada"
-        bearish_details = "\n  - ".join(confluence['signal_details']['bearish'][:5]) if confluence['signal_details']['bearish'] else "Tidak ada"
-        
-        ema200_str = f"{confluence['ema200']:.4f}" if confluence['ema200'] else "N/A"
-        adx_status = "(Tren Kuat)" if confluence['adx'] > 25 else "(Tren Lemah)"
-        rsi_status = "(Overbought - Potensi Turun)" if confluence['rsi'] > 70 else "(Oversold - Potensi Naik)" if confluence['rsi'] < 30 else "(Netral)"
-        stoch_status = "(Overbought)" if confluence['stoch_rsi'] > 80 else "(Oversold)" if confluence['stoch_rsi'] < 20 else "(Netral)"
-        rsi_div_status = "(Sinyal Reversal Kuat!)" if confluence['rsi_divergence'] != 'none' else ""
-        macd_div_status = "(Sinyal Reversal Kuat!)" if confluence['macd_divergence'] != 'none' else ""
-        
-        confluence_context = f"""
-DATA ANALISA KUANTITATIF (SUDAH DIHITUNG):
-- Sinyal Sistem: {confluence['signal']} (Keyakinan: {confluence['confidence']})
-- Skor Bullish: {confluence['bullish_pct']:.1f}% | Skor Bearish: {confluence['bearish_pct']:.1f}%
-- Arah Tren: {confluence['trend_direction']} | Kekuatan Tren: {confluence['trend_strength']}
-- ADX (Kekuatan Tren): {confluence['adx']:.1f} {adx_status}
-- RSI: {confluence['rsi']:.1f} {rsi_status}
-- Stochastic RSI: {confluence['stoch_rsi']:.1f} {stoch_status}
-- ATR (Volatilitas): {confluence['atr']:.4f} ({confluence['atr_pct']:.2f}% dari harga)
-- RSI Divergence: {confluence['rsi_divergence'].upper()} {rsi_div_status}
-- MACD Divergence: {confluence['macd_divergence'].upper()} {macd_div_status}
-- EMA20: {confluence['ema20']:.4f} | EMA50: {confluence['ema50']:.4f} | EMA200: {ema200_str}
-- Bollinger Upper: {confluence['bb_upper']:.4f} | Middle: {confluence['bb_middle']:.4f} | Lower: {confluence['bb_lower']:.4f}
-- MACD: {confluence['macd']:.6f} | Signal: {confluence['macd_signal']:.6f} | Histogram: {confluence['macd_hist']:.6f}
-
-SINYAL BULLISH TERDETEKSI:
-  - {bullish_details}
-
-SINYAL BEARISH TERDETEKSI:
-  - {bearish_details}
-"""
 
-    prompt = f"""Kamu adalah analis teknikal profesional dengan pengalaman 15+ tahun. Analisa chart candlestick {asset_name} pada timeframe {tf_context['name']} dengan SANGAT TELITI.
-
-KONTEKS TIMEFRAME {tf_context['name'].upper()}:
-- Tipe Trading: {tf_context['type']}
-- Target Profit Wajar: {tf_context['tp_range']} dari harga entry
-- Stop Loss Wajar: {tf_context['sl_range']} dari harga entry (Gunakan 1.5-2x ATR untuk presisi)
-- Estimasi Waktu Hold: {tf_context['hold_time']}
-- Volatilitas: {tf_context['volatility']}
-- Keandalan Sinyal: {tf_context['reliability']}
-- Rasio Risk:Reward Minimal: {tf_context['rr_ratio']}
-- Horizon Prediksi: {tf_context['next_candle']} ({tf_context['prediction_horizon']})
-{confluence_context}
-INDIKATOR PADA CHART (5 Panel):
-1. Panel Utama - Price Action:
-   - EMA 20 (biru) - tren jangka pendek
-   - EMA 50 (orange) - tren jangka menengah  
-   - EMA 200 (merah tebal) - tren jangka panjang PENTING
-   - Bollinger Bands (ungu putus-putus) - volatilitas dan overbought/oversold
-   - Fibonacci Retracement (kuning-orange) - level support/resistance kunci
-
-2. Panel RSI (14):
-   - Level 70 = Overbought (potensi koreksi turun)
-   - Level 30 = Oversold (potensi bounce naik)
-   - Level 50 = Garis tengah (konfirmasi tren)
-
-3. Panel Stochastic RSI:
-   - Garis K (biru) dan D (orange)
-   - Level 80 = Overbought ekstrem
-   - Level 20 = Oversold ekstrem
-   - Cross bullish/bearish = sinyal entry
-
-4. Panel MACD:
-   - MACD line (biru) vs Signal line (merah)
-   - Histogram hijau = momentum bullish
-   - Histogram merah = momentum bearish
-   - Crossover = sinyal penting
-
-METODOLOGI ANALISA MULTI-KONFLUENSI:
-1. TREN PRIMER: Tentukan arah tren dari EMA20/50/200 dan posisi harga relatif
-2. MOMENTUM: Konfirmasi dengan RSI, Stochastic RSI, dan MACD
-3. DIVERGENCE: Perhatikan RSI/MACD divergence untuk sinyal reversal
-4. VOLATILITAS: Gunakan Bollinger Bands dan ATR untuk placement SL/TP
-5. SUPPORT/RESISTANCE: Kombinasikan Fibonacci dengan high/low sebelumnya
-6. KONFIRMASI: Minimal 3 dari 5 indikator harus setuju untuk sinyal kuat
-
-ATURAN KETAT:
-- Jika ADX < 20: Pasar ranging, JANGAN trade melawan batas range
-- Jika RSI > 70 DAN Stoch RSI > 80: SANGAT OVERBOUGHT, risiko koreksi tinggi
-- Jika RSI < 30 DAN Stoch RSI < 20: SANGAT OVERSOLD, potensi bounce
-- Jika ada Divergence: Prioritaskan sinyal divergence di atas indikator lain
-- Jika harga di bawah EMA200: Tren primer bearish, hati-hati long
-- Jika harga di atas EMA200: Tren primer bullish, hati-hati short
-- Pastikan RR minimal 1:2 untuk setiap trade
-
-Berikan analisa dalam format LENGKAP berikut (Bahasa Indonesia):
-
-PREDIKSI {tf_context['next_candle'].upper()}: [NAIK/TURUN/SIDEWAYS] - Keyakinan [Tinggi/Sedang/Rendah] - [Alasan spesifik berdasarkan 2-3 indikator utama]
-
-PERKIRAAN PERGERAKAN: Dalam {tf_context['prediction_horizon']}, harga diperkirakan [naik/turun/sideways] dari [harga saat ini] menuju [target spesifik] dengan probabilitas [persentase berdasarkan konfluensi]
-
-SINYAL: [STRONG BUY/BUY/HOLD/SELL/STRONG SELL] - [Penjelasan mengapa, sebutkan minimal 3 indikator pendukung]
-
-KEKUATAN SINYAL: [X dari 8 indikator mendukung] - [daftar indikator yang setuju]
-
-HARGA SAAT INI: [Harga terakhir dari chart - HARUS AKURAT]
-HARGA MASUK IDEAL: [Harga entry optimal - bisa sama dengan harga saat ini atau tunggu pullback]
-
-TARGET PROFIT 1: [TP1 dengan persentase dari entry - target konservatif]
-TARGET PROFIT 2: [TP2 dengan persentase dari entry - target moderat]  
-TARGET PROFIT 3: [TP3 dengan persentase dari entry - target ambisius jika tren kuat]
-
-STOP LOSS: [Harga SL berdasarkan ATR dan support/resistance - WAJIB dengan jarak yang jelas]
-RASIO RR: [Risk:Reward ratio yang tepat, minimal 1:2]
-POTENSI PROFIT: [Persentase potensi profit jika TP1 tercapai]
-POTENSI LOSS: [Persentase potensi loss jika SL terkena]
-
-WAKTU HOLD: {tf_context['hold_time']}
-
-ANALISA TEKNIKAL DETAIL:
-POLA CANDLESTICK: [Pola yang teridentifikasi dan implikasinya]
-TREN EMA: [Posisi EMA20 vs EMA50 vs EMA200 dan maknanya]
-KONDISI RSI: [Nilai RSI, kondisi, dan apakah ada divergence]
-KONDISI STOCH RSI: [Nilai K/D, cross, dan kondisi overbought/oversold]
-KONDISI MACD: [Posisi MACD vs Signal, histogram, dan momentum]
-POSISI BOLLINGER: [Dimana harga relatif terhadap BB dan apakah ada squeeze]
-LEVEL FIBONACCI: [Level Fib aktif saat ini dan target berikutnya]
-
-SUPPORT KUNCI:
-- S1: [Level support pertama - terdekat]
-- S2: [Level support kedua]
-- S3: [Level support kuat jika breakdown]
-
-RESISTANCE KUNCI:
-- R1: [Level resistance pertama - terdekat]
-- R2: [Level resistance kedua]
-- R3: [Level resistance kuat jika breakout]
-
-PERINGATAN RISIKO: [Sebutkan skenario yang bisa membatalkan analisa ini]
-
-KESIMPULAN: Dalam {tf_context['next_candle']}, harga {asset_name} diprediksi [NAIK/TURUN/SIDEWAYS] dengan keyakinan [tinggi/sedang/rendah] karena [alasan utama 2-3 kalimat yang jelas dan spesifik berdasarkan konfluensi indikator].
-
-CATATAN: Berikan angka SPESIFIK dan PRESISI berdasarkan chart. JANGAN menebak - baca nilai dari chart dengan teliti. Target dan SL harus REALISTIS sesuai timeframe {tf_context['name']}."""
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-    
-    payload = {
-        "contents": [{
-            "role": "user",
-            "parts": [
-                {"text": prompt},
-                {"inline_data": {"mime_type": "image/png", "data": img_b64}}
-            ]
-        }],
-        "generationConfig": {
-            "temperature": 0.2,
-            "topP": 0.85,
-            "maxOutputTokens": 2048
-        }
-    }
-    
-    headers = {"Content-Type": "application/json"}
+async def send_cached_analysis(context, chat_id, cached, note=None, cleanup_message_id=None):
+    """Kirim ulang analisa dari cache tanpa fetch, render, maupun Gemini"""
+    age_minutes = int((time.time() - cached["created_at"]) // 60)
+    caption = f"{cached['caption']}\n📦 Dari cache ({age_minutes} menit lalu)"
+    photo_message, _ = await asyncio.gather(
+        context.bot.send_photo(chat_id=chat_id, photo=cached["photo"], caption=caption),
+        delete_previous_analysis(context, chat_id, extra=(cleanup_message_id,))
+    )
     
+    text = f"{note}\n\n{cached['text']}" if note else cached["text"]
     try:
-        log_analysis(f"Menganalisa {symbol} dengan AI (Enhanced)...")
-        response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=90)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            if "candidates" in result and len(result["candidates"]) > 0:
-                candidate = result["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    text = candidate["content"]["parts"][0].get("text", "")
-                    if text:
-                        log_success(f"Analisa {symbol} selesai (Enhanced)")
-                        return text
-            
-            return "Format respons Gemini tidak sesuai. Coba lagi."
-            
-        elif response.status_code == 400:
-            error_detail = response.json()
-            return f"Error: Request tidak valid - {error_detail.get('error', {}).get('message', 'Tidak diketahui')}"
-            
-        elif response.status_code == 403:
-            return "Error: API key tidak valid atau tidak memiliki akses"
-            
-        elif response.status_code == 429:
-            return "Error: Batas permintaan tercapai. Tunggu beberapa saat dan coba lagi."
-            
-        else:
-            return f"Error dari Gemini API (status: {response.status_code})"
-            
-    except requests.exceptions.Timeout:
-        return "Timeout saat menghubungi Gemini API. Coba lagi."
-    except requests.exceptions.RequestException as e:
-        return f"Error koneksi: {e}"
-    except Exception as e:
-        return f"Error: {e}"
-
-
-def extract_signal_from_analysis(text):
-    """Mengekstrak sinyal trading dari hasil analisa Gemini"""
-    if not text or text.startswith("Error") or text.startswith("Timeout"):
-        return None, None
-    
-    text_upper = text.upper()
-    
-    signal_patterns = [
-        (r'SINYAL[:\s]*\[?(STRONG[\s_]?BUY)\]?', 'STRONG_BUY'),
-        (r'SINYAL[:\s]*\[?(STRONG[\s_]?SELL)\]?', 'STRONG_SELL'),
-        (r'SINYAL[:\s]*\[?(BUY)\]?', 'BUY'),
-        (r'SINYAL[:\s]*\[?(SELL)\]?', 'SELL'),
-        (r'SINYAL[:\s]*\[?(HOLD)\]?', 'HOLD'),
-        (r'SIGNAL[:\s]*\[?(STRONG[\s_]?BUY)\]?', 'STRONG_BUY'),
-        (r'SIGNAL[:\s]*\[?(STRONG[\s_]?SELL)\]?', 'STRONG_SELL'),
-        (r'SIGNAL[:\s]*\[?(BUY)\]?', 'BUY'),
-        (r'SIGNAL[:\s]*\[?(SELL)\]?', 'SELL'),
-        (r'SIGNAL[:\s]*\[?(HOLD)\]?', 'HOLD'),
-    ]
-    
-    for pattern, signal in signal_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            signal_emoji = {
-                "STRONG_BUY": "🟢🟢", 
-                "BUY": "🟢", 
-                "HOLD": "🟡", 
-                "SELL": "🔴", 
-                "STRONG_SELL": "🔴🔴"
-            }.get(signal, "⚪")
-            
-            signal_display = signal.replace("_", " ")
-            return signal, f"{signal_emoji} Sinyal AI: {signal_display}"
-    
-    return None, None
-
-
-def format_analysis_reply(text):
-    """Format hasil analisa menjadi lebih mudah dibaca"""
-    if not text or text.startswith("Error") or text.startswith("Timeout"):
-        return text
-    
-    text_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text_clean = re.sub(r'\*([^*]+)\*', r'\1', text_clean)
-    text_clean = re.sub(r'`([^`]+)`', r'\1', text_clean)
-    text_clean = re.sub(r'^\s*[-•]\s*', '', text_clean, flags=re.MULTILINE)
-    
-    section_keywords = [
-        {'keywords': ['prediksi 1 menit', 'prediksi 5 menit', 'prediksi 15 menit', 'prediksi 30 menit', 
-                      'prediksi 1 jam', 'prediksi 4 jam', 'prediksi 1 hari', 'prediksi 1 minggu',
-                      'prediksi arah', 'prediksi'], 'emoji': '🔮', 'group': 'prediction'},
-        {'keywords': ['perkiraan pergerakan', 'perkiraan'], 'emoji': '📍', 'group': 'prediction'},
-        {'keywords': ['sinyal', 'signal', 'kekuatan sinyal'], 'emoji': '📊', 'group': 'signal'},
-        {'keywords': ['harga saat ini', 'harga sekarang', 'current price'], 'emoji': '💵', 'group': 'trading'},
-        {'keywords': ['harga masuk ideal', 'harga masuk', 'entry', 'masuk'], 'emoji': '🎯', 'group': 'trading'},
-        {'keywords': ['target profit 1', 'tp1', 'tp 1'], 'emoji': '💰', 'group': 'trading'},
-        {'keywords': ['target profit 2', 'tp2', 'tp 2'], 'emoji': '💎', 'group': 'trading'},
-        {'keywords': ['target profit 3', 'tp3', 'tp 3'], 'emoji': '🏆', 'group': 'trading'},
-        {'keywords': ['target profit', 'take profit', 'target'], 'emoji': '💰', 'group': 'trading'},
-        {'keywords': ['stop loss', 'stoploss', 'sl'], 'emoji': '🛑', 'group': 'trading'},
-        {'keywords': ['rasio rr', 'rasio risk', 'risk reward', 'rr ratio'], 'emoji': '⚖️', 'group': 'trading'},
-        {'keywords': ['potensi profit', 'potensi keuntungan'], 'emoji': '📈', 'group': 'trading'},
-        {'keywords': ['potensi loss', 'potensi rugi'], 'emoji': '📉', 'group': 'trading'},
-        {'keywords': ['waktu hold', 'holding time', 'durasi'], 'emoji': '⏱️', 'group': 'trading'},
-        {'keywords': ['pola candlestick', 'pola', 'pattern', 'candlestick'], 'emoji': '🕯️', 'group': 'analysis'},
-        {'keywords': ['tren ema', 'tren', 'trend'], 'emoji': '📈', 'group': 'analysis'},
-        {'keywords': ['kondisi rsi', 'rsi'], 'emoji': '📉', 'group': 'indicators'},
-        {'keywords': ['kondisi stoch', 'stoch rsi', 'stochastic'], 'emoji': '📊', 'group': 'indicators'},
-        {'keywords': ['kondisi macd', 'macd'], 'emoji': '📊', 'group': 'indicators'},
-        {'keywords': ['posisi bollinger', 'bollinger', 'bb'], 'emoji': '〰️', 'group': 'indicators'},
-        {'keywords': ['level fibonacci', 'fibonacci', 'fib'], 'emoji': '🔢', 'group': 'indicators'},
-        {'keywords': ['support kunci', 'support', 's1', 's2', 's3'], 'emoji': '🔻', 'group': 'levels'},
-        {'keywords': ['resistance kunci', 'resistance', 'r1', 'r2', 'r3'], 'emoji': '🔺', 'group': 'levels'},
-        {'keywords': ['konfirmasi', 'confirmation'], 'emoji': '✅', 'group': 'confirmation'},
-        {'keywords': ['peringatan risiko', 'peringatan', 'risiko', 'warning'], 'emoji': '⚠️', 'group': 'warning'},
-        {'keywords': ['kesimpulan', 'conclusion', 'ringkasan'], 'emoji': '🧠', 'group': 'conclusion'},
-        {'keywords': ['analisa teknikal detail', 'analisa teknikal'], 'emoji': '📋', 'group': 'analysis'},
-    ]
-    
-    sections = {
-        'prediction': [],
-        'signal': [],
-        'trading': [],
-        'analysis': [],
-        'indicators': [],
-        'levels': [],
-        'confirmation': [],
-        'warning': [],
-        'conclusion': [],
-        'other': []
-    }
-    
-    lines = text_clean.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        if ':' in line:
-            parts = line.split(':', 1)
-            key = parts[0].strip().lower()
-            value = parts[1].strip() if len(parts) > 1 else ''
-            
-            if not value:
-                continue
-            
-            matched = False
-            for config in section_keywords:
-                for keyword in config['keywords']:
-                    if keyword in key:
-                        sections[config['group']].append(f"{config['emoji']} *{parts[0].strip().upper()}:*\n{value}")
-                        matched = True
-                        break
-                if matched:
-                    break
-            
-            if not matched and value and len(value) > 3:
-                sections['other'].append(f"• {parts[0].strip()}: {value}")
-    
-    result_parts = []
-    if sections['prediction']:
-        result_parts.append('─── Prediksi Harga ───')
-        result_parts.append('\n\n'.join(sections['prediction']))
-    if sections['signal']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('\n\n'.join(sections['signal']))
-    if sections['trading']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Setup Trading ───')
-        result_parts.append('\n\n'.join(sections['trading']))
-    if sections['levels']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Support & Resistance ───')
-        result_parts.append('\n\n'.join(sections['levels']))
-    if sections['analysis']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Analisa Teknikal ───')
-        result_parts.append('\n\n'.join(sections['analysis']))
-    if sections['indicators']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Indikator ───')
-        result_parts.append('\n\n'.join(sections['indicators']))
-    if sections['confirmation']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Konfirmasi Sinyal ───')
-        result_parts.append('\n\n'.join(sections['confirmation']))
-    if sections['warning']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Peringatan ───')
-        result_parts.append('\n\n'.join(sections['warning']))
-    if sections['conclusion']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Kesimpulan ───')
-        result_parts.append('\n\n'.join(sections['conclusion']))
-    
-    return '\n'.join(result_parts) if result_parts else text
-
-
-def get_main_menu_keyboard():
-    """Generate keyboard untuk menu utama"""
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("💰 Cryptocurrency", callback_data='market_crypto')],
-        [InlineKeyboardButton("💱 Forex & Komoditas", callback_data='market_forex')],
-    ])
-
-
-def get_crypto_keyboard():
-    """Generate keyboard untuk pilihan cryptocurrency"""
-    buttons = []
-    row = []
-    for symbol, info in SUPPORTED_COINS.items():
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'crypto_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
-    return InlineKeyboardMarkup(buttons)
-
-
-def get_forex_keyboard():
-    """Generate keyboard untuk pilihan forex"""
-    commodities = [s for s, info in FOREX_PAIRS.items() if info["category"] == "commodity"]
-    majors = [s for s, info in FOREX_PAIRS.items() if info["category"] == "major"]
-    crosses = [s for s, info in FOREX_PAIRS.items() if info["category"] == "cross"]
-    
-    buttons = []
-    
-    buttons.append([InlineKeyboardButton("─── Komoditas ───", callback_data='ignore')])
-    row = []
-    for symbol in commodities:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("─── Pasangan Utama ───", callback_data='ignore')])
-    row = []
-    for symbol in majors:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("─── Pasangan Silang ───", callback_data='ignore')])
-    row = []
-    for symbol in crosses:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
+        result_message = await context.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=cached["parse_mode"],
+            reply_markup=get_after_analysis_keyboard(cached["symbol"], cached["market_type"])
+        )
+    except Exception:
+        result_message = await context.bot.send_message(
+            chat_id=chat_id,
+            text=text.replace('*', '').replace('_', ''),
+            reply_markup=get_after_analysis_keyboard(cached["symbol"], cached["market_type"])
+        )
     
-    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
-    return InlineKeyboardMarkup(buttons)
+    await asyncio.to_thread(
+        chat_state.update,
+        chat_id, last_chart_message_id=photo_message.message_id, last_analysis_message_id=result_message.message_id
+    )
 
 
-def get_timeframe_keyboard(symbol, market_type):
-    """Generate keyboard untuk pilihan timeframe"""
-    if market_type == "crypto":
-        return InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("1m", callback_data=f'tf_crypto_{symbol}_1min'),
-                InlineKeyboardButton("5m", callback_data=f'tf_crypto_{symbol}_5min'),
-                InlineKeyboardButton("15m", callback_data=f'tf_crypto_{symbol}_15min'),
-                InlineKeyboardButton("30m", callback_data=f'tf_crypto_{symbol}_30min'),
-            ],
-            [
-                InlineKeyboardButton("1j", callback_data=f'tf_crypto_{symbol}_1hour'),
-                InlineKeyboardButton("4j", callback_data=f'tf_crypto_{symbol}_4hour'),
-                InlineKeyboardButton("1h", callback_data=f'tf_crypto_{symbol}_1day'),
-                InlineKeyboardButton("1mg", callback_data=f'tf_crypto_{symbol}_1week'),
-            ],
-            [
-                InlineKeyboardButton("⬅️ Kembali ke Daftar Koin", callback_data='market_crypto'),
-            ],
-        ])
-    else:
-        return InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("1m", callback_data=f'tf_forex_{symbol}_1min'),
-                InlineKeyboardButton("5m", callback_data=f'tf_forex_{symbol}_5min'),
-                InlineKeyboardButton("15m", callback_data=f'tf_forex_{symbol}_15min'),
-                InlineKeyboardButton("30m", callback_data=f'tf_forex_{symbol}_30min'),
-            ],
-            [
-                InlineKeyboardButton("1j", callback_data=f'tf_forex_{symbol}_1hour'),
-                InlineKeyboardButton("4j", callback_data=f'tf_forex_{symbol}_4hour'),
-                InlineKeyboardButton("1h", callback_data=f'tf_forex_{symbol}_1day'),
-            ],
-            [
-                InlineKeyboardButton("⬅️ Kembali ke Daftar Pair", callback_data='market_forex'),
-            ],
-        ])
-
-
-def get_after_analysis_keyboard(symbol, market_type):
-    """Generate keyboard setelah analisa"""
-    if market_type == "crypto":
-        return InlineKeyboardMarkup([
-            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'crypto_{symbol}')],
-            [InlineKeyboardButton("💰 Pilih Koin Lain", callback_data='market_crypto')],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
-        ])
+async def dispatch_analysis(context, chat_id, user_id, pipeline, cache_key=None, cleanup_message_id=None):
+    """
+    Admission fair-share untuk satu request analisa:
+    cache segar -> jalur prioritas (langsung dikirim, tanpa memakai budget);
+    dalam budget -> pipeline penuh; lewat budget -> cache lama jika ada, selain itu antre dengan posisi.
+    Token budget dikembalikan jika pipeline tidak pernah selesai (antrean penuh atau digantikan request baru),
+    jadi user yang menekan tombol ulang hanya dibebani sekali untuk satu hasil.
+    """
+    cached = await asyncio.to_thread(get_cached_analysis, *cache_key) if cache_key else None
+    if cached:
+        analysis_queue.cancel(user_id)
+        await send_cached_analysis(context, chat_id, cached, cleanup_message_id=cleanup_message_id)
+        return
+    
+    budget = get_user_budget(user_id)
+    if budget.try_acquire():
+        delay = 0
     else:
-        return InlineKeyboardMarkup([
-            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'forex_{symbol}')],
-            [InlineKeyboardButton("💱 Pilih Pair Lain", callback_data='market_forex')],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
-        ])
+        stale = (
+            await asyncio.to_thread(get_cached_analysis, *cache_key, max_age=ANALYSIS_CACHE_MAX_AGE)
+            if cache_key else None
+        )
+        if stale:
+            analysis_queue.cancel(user_id)
+            await send_cached_analysis(
+                context, chat_id, stale,
+                note="📦 Kuota analisa kamu sedang habis, hasil ini disajikan dari cache.",
+                cleanup_message_id=cleanup_message_id
+            )
+            return
+        
+        delay = budget.reserve(max_wait=USER_MAX_QUEUE_WAIT)
+        if delay is None:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"⏳ Kuota analisa kamu habis. Coba lagi dalam ~{USER_MAX_QUEUE_WAIT // 60} menit."
+            )
+            return
+    
+    if not analysis_queue.submit(user_id, pipeline, delay=delay, on_cancel=budget.refund):
+        budget.refund()
+        await context.bot.send_message(chat_id=chat_id, text=BUSY_MESSAGE)
+        return
+    
+    if delay > 0:
+        # Beri satu putaran event loop agar pipeline yang digantikan keluar dari hitungan antrean
+        await asyncio.sleep(0)
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=f"⏳ Kuota analisa kamu habis sementara. Antrean posisi #{analysis_queue.waiting + 1}, "
+                 f"mulai dalam ~{delay:.0f} detik."
+        )
 
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1856,11 +1403,10 @@ async def handle_crypto_callback(update: Update, context: ContextTypes.DEFAULT_T
         return
     
     info = SUPPORTED_COINS[symbol]
-    if context.user_data is not None:
-        context.user_data['selected_symbol'] = symbol
-        context.user_data['market_type'] = 'crypto'
-    
-    current_price = get_crypto_price(symbol)
+    _, current_price = await asyncio.gather(
+        asyncio.to_thread(chat_state.update, query.message.chat.id, selected_symbol=symbol, market_type='crypto'),
+        asyncio.to_thread(get_crypto_price, symbol)
+    )
     price_text = f"💵 Harga saat ini: ${current_price:,.2f}" if current_price else ""
     
     await query.edit_message_text(
@@ -1883,11 +1429,10 @@ async def handle_forex_callback(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     info = FOREX_PAIRS[symbol]
-    if context.user_data is not None:
-        context.user_data['selected_symbol'] = symbol
-        context.user_data['market_type'] = 'forex'
-    
-    current_price = get_forex_price(symbol)
+    _, current_price = await asyncio.gather(
+        asyncio.to_thread(chat_state.update, query.message.chat.id, selected_symbol=symbol, market_type='forex'),
+        asyncio.to_thread(get_forex_price, symbol)
+    )
     if current_price:
         if info["category"] == "commodity":
             price_text = f"💵 Harga saat ini: ${current_price:,.2f}"
@@ -1936,35 +1481,59 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
     
     chat_id = query.message.chat.id
     current_message_id = query.message.message_id
+    user_id = update.effective_user.id if update.effective_user else chat_id
     
-    user_data = context.user_data or {}
-    for key in ['last_chart_message_id', 'last_analysis_message_id', 'last_button_message_id']:
-        if key in user_data:
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=user_data[key])
-            except:
-                pass
-            user_data.pop(key, None)
-    
-    status_message = await context.bot.send_message(
-        chat_id=chat_id,
-        text=f"⏳ Mengambil data {info['emoji']} {symbol} ({interval})..."
+    await dispatch_analysis(
+        context, chat_id, user_id,
+        lambda: run_timeframe_analysis(context, chat_id, current_message_id, symbol, interval, market_type, info),
+        cache_key=(market_type, symbol, interval),
+        cleanup_message_id=current_message_id
     )
+
+
+def build_analysis_texts(info, symbol, interval, market_type, signal_text, formatted):
+    """Caption chart dan teks hasil (Markdown) untuk analisa satu timeframe, dari tombol maupun /analyze"""
+    if market_type == "crypto":
+        new_caption = f"{info['emoji']} {symbol}/USDT ({interval})\n{signal_text}"
+        title = f"{symbol}/USDT ({interval})"
+    else:
+        new_caption = f"{info['emoji']} {symbol} - {info['name']} ({interval})\n{signal_text}"
+        title = f"{symbol} ({interval})"
     
+    result_text = f"""{info['emoji']} *Hasil Analisa {title}*
+━━━━━━━━━━━━━━━━━━━━
+
+{formatted}
+
+━━━━━━━━━━━━━━━━━━━━
+⚠️ _Peringatan: Ini bukan saran keuangan._"""
+    return new_caption, result_text
+
+
+def remove_chart(chart_path):
     try:
-        await context.bot.delete_message(chat_id=chat_id, message_id=current_message_id)
-    except:
+        os.remove(chart_path)
+    except OSError:
         pass
+
+
+async def run_timeframe_analysis(context, chat_id, current_message_id, symbol, interval, market_type, info):
+    """
+    Pipeline analisa satu timeframe: fetch -> chart + konfluensi -> Gemini (dapat dibatalkan antar tahap).
+    Pesan tombol yang ditekan menjadi pesan status lalu hasil akhir (dengan keyboard lanjutan), sehingga
+    satu analisa hanya butuh edit status + hapus massal, kirim chart, lalu edit caption + hasil bersamaan.
+    """
+    status_message_id = await claim_status_message(
+        context, chat_id, current_message_id,
+        f"⏳ Menganalisa {info['emoji']} {symbol} ({interval})...\nData → chart & konfluensi → AI"
+    )
     
-    if market_type == "crypto":
-        data = fetch_crypto_data(symbol, interval)
-    else:
-        data = fetch_forex_data(symbol, interval)
+    data = await run_stage("fetch", fetch_market_data, symbol, interval, market_type)
     
     if not data:
         await context.bot.edit_message_text(
             chat_id=chat_id,
-            message_id=status_message.message_id,
+            message_id=status_message_id,
             text=f"❌ Gagal mengambil data {symbol}. Coba lagi nanti.\n\n{info['emoji']} Pilih timeframe lain:",
             reply_markup=get_timeframe_keyboard(symbol, market_type)
         )
@@ -1973,136 +1542,75 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
     if len(data) < 20:
         await context.bot.edit_message_text(
             chat_id=chat_id,
-            message_id=status_message.message_id,
+            message_id=status_message_id,
             text=f"❌ Data terlalu sedikit ({len(data)} candle). Coba timeframe lain.",
             reply_markup=get_timeframe_keyboard(symbol, market_type)
         )
         return
     
-    await context.bot.edit_message_text(
-        chat_id=chat_id,
-        message_id=status_message.message_id,
-        text=f"📊 Membuat chart & menghitung konfluensi {info['emoji']} {symbol} ({interval})..."
-    )
-    
     filename = f"chart_{symbol}_{interval}_{int(datetime.now().timestamp())}.png"
-    chart_path, confluence = generate_chart_with_confluence(data, filename, symbol, interval, market_type)
+    chart_path, confluence = await run_stage(
+        "render", generate_chart_with_confluence, data, filename, symbol, interval, market_type
+    )
     
     if not chart_path:
         await context.bot.edit_message_text(
             chat_id=chat_id,
-            message_id=status_message.message_id,
+            message_id=status_message_id,
             text=f"❌ Gagal membuat chart.\n\n{info['emoji']} Pilih timeframe:",
             reply_markup=get_timeframe_keyboard(symbol, market_type)
         )
         return
     
     try:
-        with open(chart_path, "rb") as photo:
-            if market_type == "crypto":
-                caption = f"{info['emoji']} {symbol}/USDT ({interval})\n⏳ Menganalisa dengan AI..."
-            else:
-                caption = f"{info['emoji']} {symbol} - {info['name']} ({interval})\n⏳ Menganalisa dengan AI..."
-            
-            photo_message = await context.bot.send_photo(
-                chat_id=chat_id,
-                photo=photo,
-                caption=caption
-            )
-            if context.user_data is not None:
-                context.user_data['last_chart_message_id'] = photo_message.message_id
-    except Exception as e:
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=status_message.message_id,
-            text="❌ Gagal mengirim chart.",
-            reply_markup=get_timeframe_keyboard(symbol, market_type)
-        )
-        return
-    
-    await context.bot.edit_message_text(
-        chat_id=chat_id,
-        message_id=status_message.message_id,
-        text=f"🤖 Menganalisa chart {symbol} dengan AI + Konfluensi Multi-Indikator..."
-    )
-    
-    analysis = analyze_with_gemini(chart_path, symbol, market_type, interval, confluence)
-    formatted = format_analysis_reply(analysis)
-    
-    signal_code, signal_text = extract_signal_from_analysis(analysis)
-    
-    if not signal_text:
-        signal_text = "✅ Analisa selesai"
-    
-    try:
-        if market_type == "crypto":
-            new_caption = f"{info['emoji']} {symbol}/USDT ({interval})\n{signal_text}"
-        else:
-            new_caption = f"{info['emoji']} {symbol} - {info['name']} ({interval})\n{signal_text}"
-        
-        await context.bot.edit_message_caption(
-            chat_id=chat_id,
-            message_id=photo_message.message_id,
-            caption=new_caption
-        )
-    except Exception as e:
-        logger.warning(f"Gagal update caption chart: {e}")
-    
-    if market_type == "crypto":
-        result_text = f"""{info['emoji']} *Hasil Analisa {symbol}/USDT ({interval})*
-━━━━━━━━━━━━━━━━━━━━
-
-{formatted}
-
-━━━━━━━━━━━━━━━━━━━━
-⚠️ _Peringatan: Ini bukan saran keuangan._"""
-    else:
-        result_text = f"""{info['emoji']} *Hasil Analisa {symbol} ({interval})*
-━━━━━━━━━━━━━━━━━━━━
-
-{formatted}
-
-━━━━━━━━━━━━━━━━━━━━
-⚠️ _Peringatan: Ini bukan saran keuangan._"""
-    
-    try:
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=status_message.message_id,
-            text=result_text,
-            parse_mode='Markdown'
-        )
-        if context.user_data is not None:
-            context.user_data['last_analysis_message_id'] = status_message.message_id
-    except:
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=status_message.message_id,
-            text=result_text.replace('*', '').replace('_', '')
-        )
-    
-    try:
-        button_message = await context.bot.send_message(
-            chat_id=chat_id,
-            text="📊 *Lanjutkan analisa:*",
-            parse_mode='Markdown',
-            reply_markup=get_after_analysis_keyboard(symbol, market_type)
-        )
-        if context.user_data is not None:
-            context.user_data['last_button_message_id'] = button_message.message_id
-    except:
-        button_message = await context.bot.send_message(
-            chat_id=chat_id,
-            text="📊 Lanjutkan analisa:",
-            reply_markup=get_after_analysis_keyboard(symbol, market_type)
-        )
-        if context.user_data is not None:
-            context.user_data['last_button_message_id'] = button_message.message_id
-    
-    try:
-        os.remove(chart_path)
-    except:
-        pass
+        try:
+            with open(chart_path, "rb") as photo:
+                if market_type == "crypto":
+                    caption = f"{info['emoji']} {symbol}/USDT ({interval})\n⏳ Menganalisa dengan AI..."
+                else:
+                    caption = f"{info['emoji']} {symbol} - {info['name']} ({interval})\n⏳ Menganalisa dengan AI..."
+            
+                photo_message = await context.bot.send_photo(
+                    chat_id=chat_id,
+                    photo=photo,
+                    caption=caption
+                )
+                await asyncio.to_thread(chat_state.update, chat_id, last_chart_message_id=photo_message.message_id)
+        except Exception as e:
+            logger.warning("Gagal mengirim chart %s %s: %s", symbol, interval, e)
+            await context.bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=status_message_id,
+                text="❌ Gagal mengirim chart.",
+                reply_markup=get_timeframe_keyboard(symbol, market_type)
+            )
+            return
+        
+        analysis = await run_stage("gemini", analyze_with_gemini, chart_path, symbol, market_type, interval, confluence)
+        formatted = format_analysis_reply(analysis)
+        
+        signal_code, signal_text = extract_signal_from_analysis(analysis)
+        
+        if not signal_text:
+            signal_text = "✅ Analisa selesai"
+        
+        new_caption, result_text = build_analysis_texts(info, symbol, interval, market_type, signal_text, formatted)
+        
+        if signal_code and photo_message.photo:
+            await asyncio.to_thread(
+                store_cached_analysis,
+                market_type, symbol, interval, photo_message.photo[-1].file_id, new_caption, result_text, 'Markdown'
+            )
+        
+        await asyncio.gather(
+            edit_caption_quietly(context, chat_id, photo_message.message_id, new_caption),
+            edit_result_message(
+                context, chat_id, status_message_id, result_text,
+                reply_markup=get_after_analysis_keyboard(symbol, market_type)
+            )
+        )
+    finally:
+        remove_chart(chart_path)
 
 
 async def cmd_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2154,65 +1662,205 @@ async def cmd_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    await update.message.reply_text(f"⏳ Mengambil data {info['emoji']} {symbol} ({interval})...")
+    message = update.message
+    user_id = update.effective_user.id if update.effective_user else message.chat.id
+    await dispatch_analysis(
+        context, message.chat.id, user_id,
+        lambda: run_command_analysis(message, context, symbol, interval, market_type, info),
+        cache_key=(market_type, symbol, interval)
+    )
+
+
+async def run_command_analysis(message, context, symbol, interval, market_type, info):
+    """
+    Pipeline /analyze: satu pesan status yang di-edit menjadi hasil akhir, chart dikirim di bawahnya.
+    Pesan dicatat di chat_state seperti jalur tombol, sehingga analisa berikutnya bisa membersihkannya.
+    """
+    chat_id = message.chat.id
+    status_message, _ = await asyncio.gather(
+        message.reply_text(f"⏳ Menganalisa {info['emoji']} {symbol} ({interval})...\nData → chart & konfluensi → AI"),
+        delete_previous_analysis(context, chat_id)
+    )
+    # Dicatat sejak awal agar request pengganti bisa menghapus pesan status pipeline yang dibatalkan
+    await asyncio.to_thread(chat_state.update, chat_id, last_analysis_message_id=status_message.message_id)
     
-    if market_type == "crypto":
-        data = fetch_crypto_data(symbol, interval)
-    else:
-        data = fetch_forex_data(symbol, interval)
+    data = await run_stage("fetch", fetch_market_data, symbol, interval, market_type)
     
     if not data or len(data) < 20:
-        await update.message.reply_text("❌ Gagal mengambil data atau data terlalu sedikit.")
+        await status_message.edit_text("❌ Gagal mengambil data atau data terlalu sedikit.")
         return
     
-    await update.message.reply_text("📊 Membuat chart & menghitung konfluensi...")
-    
     filename = f"chart_{symbol}_{interval}_{int(datetime.now().timestamp())}.png"
-    chart_path, confluence = generate_chart_with_confluence(data, filename, symbol, interval, market_type)
+    chart_path, confluence = await run_stage(
+        "render", generate_chart_with_confluence, data, filename, symbol, interval, market_type
+    )
     
     if not chart_path:
-        await update.message.reply_text("❌ Gagal membuat chart.")
+        await status_message.edit_text("❌ Gagal membuat chart.")
         return
     
-    with open(chart_path, "rb") as photo:
-        if market_type == "crypto":
-            caption = f"{info['emoji']} {symbol}/USDT ({interval})\n⏳ Menganalisa dengan AI..."
-        else:
-            caption = f"{info['emoji']} {symbol} ({interval})\n⏳ Menganalisa dengan AI..."
-        photo_msg = await update.message.reply_photo(photo=photo, caption=caption)
+    try:
+        with open(chart_path, "rb") as photo:
+            if market_type == "crypto":
+                caption = f"{info['emoji']} {symbol}/USDT ({interval})\n⏳ Menganalisa dengan AI..."
+            else:
+                caption = f"{info['emoji']} {symbol} - {info['name']} ({interval})\n⏳ Menganalisa dengan AI..."
+            photo_msg = await message.reply_photo(photo=photo, caption=caption)
+            await asyncio.to_thread(chat_state.update, chat_id, last_chart_message_id=photo_msg.message_id)
+        
+        analysis = await run_stage("gemini", analyze_with_gemini, chart_path, symbol, market_type, interval, confluence)
+        formatted = format_analysis_reply(analysis)
+        
+        signal_code, signal_text = extract_signal_from_analysis(analysis)
+        
+        if not signal_text:
+            signal_text = "✅ Analisa selesai"
+        
+        new_caption, result_text = build_analysis_texts(info, symbol, interval, market_type, signal_text, formatted)
+        if signal_code and photo_msg.photo:
+            await asyncio.to_thread(
+                store_cached_analysis,
+                market_type, symbol, interval, photo_msg.photo[-1].file_id, new_caption, result_text, 'Markdown'
+            )
+        
+        await asyncio.gather(
+            edit_caption_quietly(context, chat_id, photo_msg.message_id, new_caption),
+            edit_result_message(
+                context, chat_id, status_message.message_id, result_text,
+                reply_markup=get_after_analysis_keyboard(symbol, market_type)
+            )
+        )
+    finally:
+        remove_chart(chart_path)
+
+
+async def send_mtf_analysis(context, chat_id, symbol, market_type):
+    """Pipeline multi-timeframe: fetch + konfluensi paralel, satu chart gabungan, satu panggilan Gemini"""
+    info = SUPPORTED_COINS[symbol] if market_type == "crypto" else FOREX_PAIRS[symbol]
+    
+    status_message = await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"⏳ Menghitung konfluensi semua timeframe {info['emoji']} {symbol}..."
+    )
+    
+    mtf_results = await run_stage("fetch", calculate_mtf_confluence, symbol, market_type)
     
-    analysis = analyze_with_gemini(chart_path, symbol, market_type, interval, confluence)
-    formatted = format_analysis_reply(analysis)
+    if not mtf_results:
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=status_message.message_id,
+            text=f"❌ Gagal mengambil data {symbol}. Coba lagi nanti."
+        )
+        return
     
-    signal_code, signal_text = extract_signal_from_analysis(analysis)
+    alignment = summarize_mtf_alignment(mtf_results)
+    matrix = format_mtf_matrix(mtf_results)
     
-    if not signal_text:
-        signal_text = "✅ Analisa selesai"
+    filename = f"mtf_{symbol}_{int(datetime.now().timestamp())}.png"
+    chart_path = await run_stage("render", generate_mtf_chart, mtf_results, filename, symbol)
     
-    try:
-        if market_type == "crypto":
-            new_caption = f"{info['emoji']} {symbol}/USDT ({interval})\n{signal_text}"
-        else:
-            new_caption = f"{info['emoji']} {symbol} ({interval})\n{signal_text}"
-        
-        await context.bot.edit_message_caption(
-            chat_id=update.message.chat.id,
-            message_id=photo_msg.message_id,
-            caption=new_caption
+    async def update_status():
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=status_message.message_id,
+            text=f"🤖 Menganalisa {len(mtf_results)} timeframe {symbol} dengan AI..."
         )
-    except Exception as e:
-        logger.warning(f"Gagal update caption chart: {e}")
     
-    await update.message.reply_text(
-        f"{info['emoji']} Hasil Analisa Pro {symbol} ({interval}):\n\n{formatted}\n\n"
-        "⚠️ Peringatan: Ini bukan saran keuangan.",
+    async def send_chart():
+        try:
+            with open(chart_path, "rb") as photo:
+                await context.bot.send_photo(
+                    chat_id=chat_id,
+                    photo=photo,
+                    caption=f"{info['emoji']} {symbol} Multi-Timeframe\n🧭 {alignment['bias']}"
+                )
+        except Exception as e:
+            logger.warning("Gagal mengirim chart MTF: %s", e)
+    
+    if chart_path:
+        # Status dan chart tidak bergantung pada jawaban Gemini: dikirim selama Gemini berjalan
+        try:
+            analysis, _, _ = await asyncio.gather(
+                run_stage("gemini", analyze_mtf_with_gemini, chart_path, symbol, mtf_results, market_type),
+                update_status(),
+                send_chart()
+            )
+        finally:
+            remove_chart(chart_path)
+    else:
+        analysis = None
+    
+    formatted = format_analysis_reply(analysis) if analysis else "Analisa AI tidak tersedia."
+    result_text = f"""{info['emoji']} *Matriks Multi-Timeframe {symbol}*
+━━━━━━━━━━━━━━━━━━━━
+
+```
+{matrix}
+```
+🧭 *Keselarasan:* {alignment['bias']} ({len(alignment['bullish'])}🟢 / {len(alignment['bearish'])}🔴 dari {alignment['total']})
+
+{formatted}
+
+━━━━━━━━━━━━━━━━━━━━
+⚠️ _Peringatan: Ini bukan saran keuangan._"""
+    
+    await edit_result_message(
+        context, chat_id, status_message.message_id, result_text,
         reply_markup=get_after_analysis_keyboard(symbol, market_type)
     )
+
+
+async def cmd_mtf(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk command /mtf [symbol]"""
+    if not update.message:
+        return
     
-    try:
-        os.remove(chart_path)
-    except:
-        pass
+    args = context.args or []
+    
+    if not args:
+        await update.message.reply_text(
+            "📊 *Cara Penggunaan:*\n"
+            "/mtf <simbol>\n\n"
+            "*Contoh:*\n"
+            "/mtf BTC\n"
+            "/mtf XAUUSD",
+            parse_mode='Markdown'
+        )
+        return
+    
+    symbol = args[0].upper()
+    
+    if symbol in SUPPORTED_COINS:
+        market_type = "crypto"
+    elif symbol in FOREX_PAIRS:
+        market_type = "forex"
+    else:
+        await update.message.reply_text(f"❌ Simbol tidak valid: {symbol}")
+        return
+    
+    chat_id = update.message.chat.id
+    user_id = update.effective_user.id if update.effective_user else chat_id
+    await dispatch_analysis(context, chat_id, user_id, lambda: send_mtf_analysis(context, chat_id, symbol, market_type))
+
+
+async def handle_mtf_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk callback tombol analisa multi-timeframe"""
+    query = update.callback_query
+    if not query or not query.data or not query.message:
+        return
+    await query.answer()
+    
+    parts = query.data.replace('mtf_', '').split('_')
+    if len(parts) < 2:
+        return
+    
+    market_type, symbol = parts[0], parts[1]
+    if symbol not in (SUPPORTED_COINS if market_type == "crypto" else FOREX_PAIRS):
+        return
+    
+    chat_id = query.message.chat.id
+    user_id = update.effective_user.id if update.effective_user else chat_id
+    await dispatch_analysis(context, chat_id, user_id, lambda: send_mtf_analysis(context, chat_id, symbol, market_type))
 
 
 async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2237,7 +1885,7 @@ async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if symbol in SUPPORTED_COINS:
         info = SUPPORTED_COINS[symbol]
-        price = get_crypto_price(symbol)
+        price = await asyncio.to_thread(get_crypto_price, symbol)
         if price:
             await update.message.reply_text(
                 f"{info['emoji']} *Harga {symbol} ({info['name']}) Saat Ini*\n\n"
@@ -2249,7 +1897,7 @@ async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(f"❌ Gagal mengambil harga {symbol}. Coba lagi nanti.")
     elif symbol in FOREX_PAIRS:
         info = FOREX_PAIRS[symbol]
-        price = get_forex_price(symbol)
+        price = await asyncio.to_thread(get_forex_price, symbol)
         if price:
             if info["category"] == "commodity":
                 price_str = f"${price:,.2f}"
@@ -2267,6 +1915,186 @@ async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Simbol tidak valid: {symbol}")
 
 
+async def cmd_alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk command /alert <simbol> <harga> | /alert <simbol> <tf> <kondisi> | /alert list | /alert hapus <id>"""
+    if not update.message:
+        return
+    
+    args = context.args or []
+    chat_id = update.message.chat.id
+    
+    if not args or args[0].lower() in ("list", "daftar"):
+        alerts, indicator_list = await asyncio.gather(
+            asyncio.to_thread(price_alerts.list_for_chat, chat_id),
+            asyncio.to_thread(indicator_alerts.list_for_chat, chat_id),
+        )
+        if alerts or indicator_list:
+            lines = []
+            for alert in alerts:
+                arrow = "⬆️" if alert["direction"] == "above" else "⬇️"
+                lines.append(f"#{alert['id']} {arrow} {alert['symbol']} {format_symbol_price(alert['symbol'], alert['threshold'])}")
+            for alert in indicator_list:
+                lines.append(f"#{alert['id']} 📐 {alert['symbol']} {alert['interval']} {alert['label']}")
+            alert_list = "\n".join(lines)
+        else:
+            alert_list = "_Belum ada alert aktif._"
+        
+        await update.message.reply_text(
+            f"🔔 *Alert Aktif*\n\n{alert_list}\n\n"
+            f"*Cara Penggunaan:*\n"
+            f"/alert <simbol> <harga> - Notifikasi saat harga menembus level\n"
+            f"/alert <simbol> <timeframe> <kondisi> - Notifikasi saat candle close memenuhi kondisi\n"
+            f"/alert hapus <id> - Hapus alert\n\n"
+            f"*Kondisi:* RSI<30, RSI>70, STOCHRSI<20, ADX>25, GOLDEN\\_CROSS, DEATH\\_CROSS, "
+            f"MACD\\_CROSS\\_UP, MACD\\_CROSS\\_DOWN, STRONG\\_BUY, BUY, SELL, STRONG\\_SELL\n\n"
+            f"*Contoh:*\n"
+            f"/alert XAUUSD 2400\n"
+            f"/alert BTC 100000\n"
+            f"/alert ETH 1hour RSI<30",
+            parse_mode='Markdown'
+        )
+        return
+    
+    if args[0].lower() in ("hapus", "del", "delete"):
+        if len(args) < 2 or not args[1].lstrip('#').isdigit():
+            await update.message.reply_text("❌ Gunakan: /alert hapus <id>")
+            return
+        alert_id = int(args[1].lstrip('#'))
+        removed = (
+            await asyncio.to_thread(price_alerts.remove, chat_id, alert_id)
+            or await asyncio.to_thread(indicator_alerts.remove, chat_id, alert_id)
+        )
+        if removed:
+            await update.message.reply_text(f"✅ Alert #{args[1].lstrip('#')} dihapus.")
+        else:
+            await update.message.reply_text(f"❌ Alert #{args[1].lstrip('#')} tidak ditemukan.")
+        return
+    
+    symbol = args[0].upper()
+    
+    if symbol in SUPPORTED_COINS:
+        market_type = "crypto"
+    elif symbol in FOREX_PAIRS:
+        market_type = "forex"
+    else:
+        await update.message.reply_text(f"❌ Simbol tidak valid: {symbol}")
+        return
+    
+    counts = await asyncio.gather(
+        asyncio.to_thread(price_alerts.count_for_chat, chat_id),
+        asyncio.to_thread(indicator_alerts.count_for_chat, chat_id),
+    )
+    if sum(counts) >= MAX_ALERTS_PER_CHAT:
+        await update.message.reply_text(f"❌ Maksimal {MAX_ALERTS_PER_CHAT} alert aktif per chat. Hapus alert lama terlebih dahulu.")
+        return
+    
+    if len(args) > 2 and args[1].lower() in TIMEFRAME_SECONDS:
+        interval = args[1].lower()
+        condition = parse_indicator_condition(" ".join(args[2:]))
+        if not condition:
+            await update.message.reply_text(
+                "❌ Kondisi tidak dikenali.\nContoh: /alert ETH 1hour RSI<30 atau /alert BTC 4hour GOLDEN_CROSS"
+            )
+            return
+        
+        alert = await asyncio.to_thread(indicator_alerts.add, chat_id, symbol, market_type, interval, condition)
+        await update.message.reply_text(
+            f"✅ *Alert #{alert['id']} dibuat*\n\n"
+            f"📐 Notifikasi saat {symbol} ({interval}) memenuhi *{condition['label']}*\n"
+            f"🕐 Dicek setiap candle {interval} close",
+            parse_mode='Markdown'
+        )
+        return
+    
+    try:
+        threshold = float(args[1].replace(',', '')) if len(args) > 1 else None
+    except ValueError:
+        threshold = None
+    
+    if not threshold or threshold <= 0:
+        await update.message.reply_text("❌ Gunakan: /alert <simbol> <harga>\nContoh: /alert XAUUSD 2400")
+        return
+    
+    get_price = get_crypto_price if market_type == "crypto" else get_forex_price
+    current_price = await asyncio.to_thread(get_price, symbol)
+    
+    if not current_price:
+        await update.message.reply_text(f"❌ Gagal mengambil harga {symbol}. Coba lagi nanti.")
+        return
+    
+    alert = await asyncio.to_thread(price_alerts.add, chat_id, symbol, market_type, threshold, current_price)
+    movement = "naik menembus" if alert["direction"] == "above" else "turun menembus"
+    
+    await update.message.reply_text(
+        f"✅ *Alert #{alert['id']} dibuat*\n\n"
+        f"🔔 Notifikasi saat {symbol} {movement} {format_symbol_price(symbol, threshold)}\n"
+        f"💵 Harga saat ini: {format_symbol_price(symbol, current_price)}",
+        parse_mode='Markdown'
+    )
+
+
+async def cmd_subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk command /subscribe <simbol> [timeframe] - digest otomatis setiap candle close"""
+    if not update.message:
+        return
+    
+    args = context.args or []
+    chat_id = update.message.chat.id
+    
+    if not args or args[0].lower() in ("list", "daftar"):
+        subscriptions = await asyncio.to_thread(digest_subscriptions.list_for_chat, chat_id)
+        sub_list = "\n".join(f"• {symbol} {interval}" for symbol, interval in subscriptions) or "Belum ada langganan."
+        await update.message.reply_text(
+            f"📬 Langganan Digest\n\n{sub_list}\n\n"
+            f"Cara Penggunaan:\n"
+            f"/subscribe <simbol> [timeframe] - Ringkasan konfluensi setiap candle close (default {DEFAULT_DIGEST_INTERVAL})\n"
+            f"/unsubscribe <simbol> [timeframe] | all - Berhenti berlangganan\n\n"
+            f"Contoh: /subscribe BTC 4hour"
+        )
+        return
+    
+    symbol = args[0].upper()
+    interval = args[1].lower() if len(args) > 1 else DEFAULT_DIGEST_INTERVAL
+    
+    if symbol not in SUPPORTED_COINS and symbol not in FOREX_PAIRS:
+        await update.message.reply_text(f"❌ Simbol tidak valid: {symbol}")
+        return
+    
+    if interval not in TIMEFRAME_SECONDS:
+        await update.message.reply_text(f"❌ Timeframe tidak valid: {interval}\nPilihan: {', '.join(TIMEFRAME_SECONDS)}")
+        return
+    
+    if len(await asyncio.to_thread(digest_subscriptions.list_for_chat, chat_id)) >= MAX_SUBSCRIPTIONS_PER_CHAT:
+        await update.message.reply_text(f"❌ Maksimal {MAX_SUBSCRIPTIONS_PER_CHAT} langganan per chat.")
+        return
+    
+    await asyncio.to_thread(digest_subscriptions.subscribe, chat_id, symbol, interval)
+    next_close = datetime.fromtimestamp(get_next_candle_close(interval), tz=tz("Asia/Jakarta")).strftime("%d/%m %H:%M WIB")
+    await update.message.reply_text(
+        f"✅ Berlangganan digest {symbol} {interval}.\n📬 Digest berikutnya setelah candle close {next_close}."
+    )
+
+
+async def cmd_unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler untuk command /unsubscribe <simbol> [timeframe] | all"""
+    if not update.message:
+        return
+    
+    args = context.args or []
+    chat_id = update.message.chat.id
+    
+    if not args or args[0].lower() in ("all", "semua"):
+        removed = await asyncio.to_thread(digest_subscriptions.unsubscribe, chat_id)
+    else:
+        interval = args[1].lower() if len(args) > 1 else None
+        removed = await asyncio.to_thread(digest_subscriptions.unsubscribe, chat_id, args[0].upper(), interval)
+    
+    if removed:
+        await update.message.reply_text(f"✅ {removed} langganan digest dihapus.")
+    else:
+        await update.message.reply_text("❌ Langganan tidak ditemukan. Lihat /subscribe list")
+
+
 async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler untuk command /help"""
     if not update.message:
@@ -2280,12 +2108,17 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
 *Perintah:*
 /start - Mulai bot dan pilih pasar
 /analyze <simbol> <tf> - Analisa langsung
+/mtf <simbol> - Matriks semua timeframe sekaligus
 /price <simbol> - Lihat harga terkini
+/alert <simbol> <harga> - Notifikasi saat harga menembus level
+/alert <simbol> <tf> <kondisi> - Alert indikator (mis. RSI<30)
+/subscribe <simbol> [tf] - Digest otomatis setiap candle close
 /help - Tampilkan bantuan ini
 
 *Contoh:*
 /analyze BTC 15min
 /analyze XAUUSD 4hour
+/mtf BTC
 /price ETH
 
 *Cryptocurrency ({len(SUPPORTED_COINS)}):*
@@ -2334,7 +2167,7 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
     if "Query is too old" in error_str:
         return
     
-    logger.error(f"Exception saat menangani update: {context.error}")
+    logger.error("Exception saat menangani update: %s", context.error)
     
     if "Conflict" in error_str:
         logger.warning("Konflik bot terdeteksi - mungkin ada instance lain yang berjalan")
@@ -2386,23 +2219,77 @@ def get_webhook_path():
 WEBHOOK_URL = get_webhook_url()
 WEBHOOK_PATH = get_webhook_path()
 
+# Mode webhook multi-worker: supervisor di WEBHOOK_PORT, worker (BOT_WORKERS) di WORKER_BASE_PORT + index
+WORKER_BASE_PORT = int(os.environ.get("WORKER_BASE_PORT", str(WEBHOOK_PORT + 1)))
+WORKER_INDEX = os.environ.get("BOT_WORKER_INDEX")
+
+
+def is_worker_supervisor():
+    return BOT_MODE == "webhook" and BOT_WORKERS > 1 and WORKER_INDEX is None and bool(WEBHOOK_URL)
+
+
+def load_shared_books():
+    for book in (price_alerts, indicator_alerts, digest_subscriptions):
+        book.sync()
+    logger.info(
+        "Dimuat dari store: %s alert harga, %s alert indikator, %s langganan digest",
+        price_alerts.size, indicator_alerts.size, digest_subscriptions.size
+    )
+
+
+async def release_leadership(application):
+    """Lepas lease saat bot berhenti agar worker lain langsung mengambil alih job alert dan digest"""
+    alert_leader.stop()
+
+
+async def post_init(application):
+    """Menyimpan event loop dan bot untuk thread latar, lalu memuat modul berat di latar"""
+    runtime["loop"] = asyncio.get_running_loop()
+    runtime["bot"] = application.bot
+    # Indeks alert dan langganan dibangun ulang dari store (mis. setelah worker di-restart supervisor)
+    await asyncio.to_thread(load_shared_books)
+    threading.Thread(target=prewarm_modules, name="prewarm", daemon=True).start()
+    # Cache konteks Gemini dibuat di latar, bukan oleh analisa pertama per template
+    prewarm_context_caches()
+    if TV_AVAILABLE:
+        # Sesi TradingView dihangatkan di thread pool sendiri, bukan saat fetch pertama
+        get_tv_pool()
+
 
 def setup_application():
     """Setup bot application dengan handlers"""
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    builder = (
+        Application.builder().token(TELEGRAM_BOT_TOKEN).post_init(post_init).post_shutdown(release_leadership)
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+    )
+    if TELEGRAM_API_BASE_URL:
+        builder = builder.base_url(f"{TELEGRAM_API_BASE_URL}/bot").base_file_url(f"{TELEGRAM_API_BASE_URL}/file/bot")
+    app = builder.build()
     
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("analyze", cmd_analyze))
+    app.add_handler(CommandHandler("mtf", cmd_mtf))
     app.add_handler(CommandHandler("price", cmd_price))
+    app.add_handler(CommandHandler("alert", cmd_alert))
+    app.add_handler(CommandHandler("subscribe", cmd_subscribe))
+    app.add_handler(CommandHandler("unsubscribe", cmd_unsubscribe))
     app.add_handler(CommandHandler("help", cmd_help))
     
     app.add_handler(CallbackQueryHandler(handle_market_callback, pattern=r'^(market_|back_to_main|ignore)'))
     app.add_handler(CallbackQueryHandler(handle_crypto_callback, pattern=r'^crypto_'))
     app.add_handler(CallbackQueryHandler(handle_forex_callback, pattern=r'^forex_'))
     app.add_handler(CallbackQueryHandler(handle_timeframe_callback, pattern=r'^tf_'))
+    app.add_handler(CallbackQueryHandler(handle_mtf_callback, pattern=r'^mtf_'))
     
     app.add_error_handler(error_handler)
     
+    # Lease leader di store bersama: setiap worker menerima /alert dan /subscribe, evaluasi hanya di leader
+    alert_leader.start()
+    if app.job_queue:
+        app.job_queue.run_repeating(check_price_alerts_job, interval=ALERT_POLL_INTERVAL, first=ALERT_POLL_INTERVAL)
+        schedule_candle_close_jobs(app.job_queue, indicator_alerts_close_job, "indicator_alerts")
+        schedule_candle_close_jobs(app.job_queue, broadcast_digest_job, "digest")
+    
     return app
 
 
@@ -2430,16 +2317,28 @@ def run_webhook_mode(app):
     webhook_path_clean = WEBHOOK_PATH.lstrip('/')
     webhook_full_url = f"{WEBHOOK_URL.rstrip('/')}/{webhook_path_clean}"
     
-    log_info(f"Mode: WEBHOOK (Production)")
-    log_success(f"Webhook URL: {webhook_full_url}")
-    log_info(f"Port: {WEBHOOK_PORT}")
-    log_info(f"Path: /{webhook_path_clean}")
+    log_info("Mode: WEBHOOK (Production)")
+    log_success("Webhook URL: %s", webhook_full_url)
+    log_info("Port: %s", WEBHOOK_PORT)
+    log_info("Path: /%s", webhook_path_clean)
     print()
     print(f"{Colors.GREEN}{Colors.BOLD}  ══════════════════════════════════════════{Colors.RESET}")
     print(f"{Colors.GREEN}  Bot berjalan (Webhook)... Tekan Ctrl+C untuk berhenti{Colors.RESET}")
     print(f"{Colors.GREEN}{Colors.BOLD}  ══════════════════════════════════════════{Colors.RESET}")
     print()
     
+    if WORKER_INDEX is not None:
+        # Worker di belakang supervisor: hanya menerima dari localhost, webhook tetap URL publik
+        app.run_webhook(
+            listen="127.0.0.1",
+            port=int(os.environ["BOT_WORKER_PORT"]),
+            url_path=webhook_path_clean,
+            webhook_url=webhook_full_url,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=os.environ.get("BOT_WORKER_DROP_PENDING") == "1"
+        )
+        return
+    
     app.run_webhook(
         listen="0.0.0.0",
         port=WEBHOOK_PORT,
@@ -2450,10 +2349,136 @@ def run_webhook_mode(app):
     )
 
 
+def run_worker_supervisor():
+    """BOT_WORKERS > 1: router webhook di WEBHOOK_PORT + N proses worker (sticky per chat id)"""
+    from engine.config import SHARED_STORE
+    from engine.workers import WebhookRouter, WorkerSupervisor
+    
+    env = {}
+    if SHARED_STORE == "memory":
+        env["SHARED_STORE"] = "sqlite:///shared_store.db"
+        log_warning("SHARED_STORE=memory tidak dibagi antar worker - memakai sqlite:///shared_store.db")
+    
+    webhook_path_clean = WEBHOOK_PATH.lstrip('/')
+    log_info("Mode: WEBHOOK MULTI-WORKER (%s worker)", BOT_WORKERS)
+    log_success("Webhook URL: %s/%s", WEBHOOK_URL.rstrip('/'), webhook_path_clean)
+    log_info(
+        "Port router: %s | Port worker: %s-%s",
+        WEBHOOK_PORT, WORKER_BASE_PORT, WORKER_BASE_PORT + BOT_WORKERS - 1
+    )
+    log_info("Store bersama: %s", env.get('SHARED_STORE', SHARED_STORE))
+    
+    supervisor = WorkerSupervisor(os.path.abspath(__file__), BOT_WORKERS, WORKER_BASE_PORT, env)
+    router = WebhookRouter("0.0.0.0", WEBHOOK_PORT, webhook_path_clean, supervisor.ports)
+    supervisor.start()
+    
+    print()
+    print(f"{Colors.GREEN}{Colors.BOLD}  ══════════════════════════════════════════{Colors.RESET}")
+    print(f"{Colors.GREEN}  Router webhook berjalan... Tekan Ctrl+C untuk berhenti{Colors.RESET}")
+    print(f"{Colors.GREEN}{Colors.BOLD}  ══════════════════════════════════════════{Colors.RESET}")
+    print()
+    
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=router.shutdown).start())
+    try:
+        router.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log_info("Menghentikan worker...")
+        supervisor.stop()
+        router.server_close()
+
+
+# Modul berat yang sengaja ditunda sampai dipakai; dimuat di thread latar setelah bot siap
+DEFERRED_MODULES = ["pandas", "mplfinance", "matplotlib.figure", "yfinance", "requests", "websocket"]
+PREWARM_MODULES = ["pandas", "mplfinance", "matplotlib.figure", "requests"]
+STARTUP_BUDGET_MS = int(os.environ.get("STARTUP_BUDGET_MS", "1000"))
+
+
+def prewarm_modules():
+    """Import modul berat di latar agar analisa pertama tidak menanggung biaya import"""
+    for name in PREWARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def parse_importtime(stderr):
+    """Jumlahkan waktu import 'self' (ms) per paket top-level dari output python -X importtime"""
+    per_package = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0.0) + int(self_us) / 1000
+    return per_package
+
+
+def profile_startup():
+    """--profile-startup: biaya import per modul dan waktu sampai aplikasi siap polling"""
+    import subprocess
+    
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN=TELEGRAM_BOT_TOKEN or "0:profile", LIVE_FEED="off")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    startup_script = (
+        "import time; t0 = time.perf_counter(); import main; t1 = time.perf_counter(); "
+        "main.setup_application(); t2 = time.perf_counter(); "
+        "print((t1 - t0) * 1000, (t2 - t1) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", startup_script],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        log_error("Profil startup gagal: %s", result.stderr.strip().splitlines()[-1:])
+        return
+    
+    import_ms, setup_ms = map(float, result.stdout.split()[-2:])
+    per_package = parse_importtime(result.stderr)
+    
+    print(f"{Colors.WHITE}{Colors.BOLD}  Biaya import saat startup (self time per paket):{Colors.RESET}")
+    print()
+    for package, ms in sorted(per_package.items(), key=lambda item: -item[1])[:15]:
+        print(f"    {package:<24} {ms:8.1f} ms")
+    print()
+    
+    deferred_script = (
+        "import importlib, time\n"
+        f"for name in {DEFERRED_MODULES!r}:\n"
+        "    t0 = time.perf_counter()\n"
+        "    try:\n"
+        "        importlib.import_module(name)\n"
+        "    except ImportError:\n"
+        "        continue\n"
+        "    print(name, (time.perf_counter() - t0) * 1000)\n"
+    )
+    deferred = subprocess.run([sys.executable, "-c", deferred_script], cwd=cwd, env=env, capture_output=True, text=True)
+    
+    print(f"{Colors.WHITE}{Colors.BOLD}  Modul yang ditunda (dimuat saat dipakai / prewarm):{Colors.RESET}")
+    print()
+    for line in deferred.stdout.splitlines():
+        name, ms = line.rsplit(" ", 1)
+        print(f"    {name:<24} {float(ms):8.1f} ms")
+    print()
+    
+    total_ms = import_ms + setup_ms
+    log_info("import main: %.0f ms | setup_application: %.0f ms", import_ms, setup_ms)
+    if total_ms <= STARTUP_BUDGET_MS:
+        log_success("Siap polling dalam %.0f ms (budget %s ms)", total_ms, STARTUP_BUDGET_MS)
+    else:
+        log_warning("Siap polling dalam %.0f ms - melebihi budget %s ms", total_ms, STARTUP_BUDGET_MS)
+
+
 def main():
     """Fungsi utama untuk menjalankan bot"""
     print_banner()
     
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+        return
+    
     print(f"{Colors.WHITE}{Colors.BOLD}  Memeriksa konfigurasi...{Colors.RESET}")
     print()
     
@@ -2474,44 +2499,60 @@ def main():
     print()
     
     if TV_AVAILABLE:
-        log_success(f"TradingView: Aktif")
+        log_success("TradingView: Aktif")
     else:
-        log_warning(f"TradingView: Tidak tersedia (fallback ke Yahoo/KuCoin)")
+        log_warning("TradingView: Tidak tersedia (fallback ke Yahoo/KuCoin)")
     
     if yf:
-        log_success(f"Yahoo Finance: Aktif")
+        log_success("Yahoo Finance: Aktif")
+    else:
+        log_warning("Yahoo Finance: Tidak tersedia")
+    
+    if is_worker_supervisor():
+        log_info("Live feed: dijalankan worker leader, worker lain membaca harga dari store bersama")
+    elif live.LIVE_FEED_ENABLED:
+        live.get_live_feed().add_tick_listener(check_price_alerts_on_tick)
+        # Feed dimulai/dihentikan mengikuti lease alert_leader (dijalankan di setup_application)
+        alert_leader.add_listener(run_live_feed_on_leader)
+        log_success("Live feed: Aktif di leader (KuCoin + TradingView)")
     else:
-        log_warning(f"Yahoo Finance: Tidak tersedia")
+        log_warning("Live feed: Nonaktif (harga diambil per request)")
     
-    log_info(f"Cryptocurrency: {len(SUPPORTED_COINS)} koin didukung")
-    log_info(f"Forex & Komoditas: {len(FOREX_PAIRS)} pasangan didukung")
+    log_info("Cryptocurrency: %s koin didukung", len(SUPPORTED_COINS))
+    log_info("Forex & Komoditas: %s pasangan didukung", len(FOREX_PAIRS))
     
     print()
     print(f"{Colors.WHITE}{Colors.BOLD}  Konfigurasi Bot Mode:{Colors.RESET}")
     print()
-    log_info(f"BOT_MODE: {BOT_MODE.upper()}")
+    log_info("BOT_MODE: %s", BOT_MODE.upper())
     if BOT_MODE == "webhook":
         manual_url = os.environ.get("WEBHOOK_URL", "")
         manual_path = os.environ.get("WEBHOOK_PATH", "")
         
         if manual_url:
-            log_info(f"WEBHOOK_URL: {WEBHOOK_URL} (manual)")
+            log_info("WEBHOOK_URL: %s (manual)", WEBHOOK_URL)
         elif WEBHOOK_URL:
-            log_success(f"WEBHOOK_URL: {WEBHOOK_URL} (auto-detect)")
+            log_success("WEBHOOK_URL: %s (auto-detect)", WEBHOOK_URL)
         else:
-            log_warning(f"WEBHOOK_URL: (tidak terdeteksi)")
+            log_warning("WEBHOOK_URL: (tidak terdeteksi)")
         
-        log_info(f"WEBHOOK_PORT: {WEBHOOK_PORT}")
+        log_info("WEBHOOK_PORT: %s", WEBHOOK_PORT)
+        if BOT_WORKERS > 1:
+            log_info(f"BOT_WORKERS: {BOT_WORKERS}" + (f" (worker {WORKER_INDEX})" if WORKER_INDEX is not None else ""))
         
         if manual_path:
-            log_info(f"WEBHOOK_PATH: {WEBHOOK_PATH} (manual)")
+            log_info("WEBHOOK_PATH: %s (manual)", WEBHOOK_PATH)
         else:
-            log_success(f"WEBHOOK_PATH: {WEBHOOK_PATH} (auto-generate)")
+            log_success("WEBHOOK_PATH: %s (auto-generate)", WEBHOOK_PATH)
     
     print()
     print(f"{Colors.WHITE}{Colors.BOLD}  Memulai bot...{Colors.RESET}")
     print()
     
+    if is_worker_supervisor():
+        run_worker_supervisor()
+        return
+    
     app = setup_application()
     
     log_success("Bot siap menerima pesan!")
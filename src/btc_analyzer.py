@@ -5,699 +5,25 @@ Tool CLI untuk analisa teknikal crypto menggunakan Telegram Bot dan Gemini AI Vi
 Mendukung: BTC, ETH, SOL, BNB, XRP, ADA, DOGE, AVAX, MATIC, LINK, DOT, ATOM, UNI, LTC
 """
 
-import logging
-import base64
-import json
-import re
 import os
 import sys
-import requests
-import mplfinance as mpf
-import pandas as pd
-from datetime import datetime, timezone
+from datetime import datetime
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-from pytz import timezone as tz
-import asyncio
 
-try:
-    from xnoxs_fetcher import XnoxsFetcher, TimeFrame
-    fetcher = XnoxsFetcher()
-    TV_AVAILABLE = True
-    TV_INTERVAL_MAP = {
-        "1min": TimeFrame.MINUTE_1,
-        "5min": TimeFrame.MINUTE_5,
-        "15min": TimeFrame.MINUTE_15,
-        "30min": TimeFrame.MINUTE_30,
-        "1hour": TimeFrame.HOUR_1,
-        "4hour": TimeFrame.HOUR_4,
-        "1day": TimeFrame.DAILY,
-        "1week": TimeFrame.WEEKLY,
-    }
-except ImportError:
-    TV_AVAILABLE = False
-    fetcher = None
-    TV_INTERVAL_MAP = {
-        "1min": None,
-        "5min": None,
-        "15min": None,
-        "30min": None,
-        "1hour": None,
-        "4hour": None,
-        "1day": None,
-        "1week": None,
-    }
+# Jalankan langsung (python src/...): paket engine ada di root repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import yfinance as yf
-except ImportError:
-    yf = None
+from engine.console import get_logger
+from engine.config import GEMINI_API_KEY, INTERVAL_MAP, SUPPORTED_COINS
+from engine.data import fetch_crypto_data, get_crypto_price
+from engine.charting import generate_chart_with_confluence
+from engine.llm import analyze_with_gemini
+from engine.formatting import format_analysis_reply
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-
-SUPPORTED_COINS = {
-    "BTC": {"name": "Bitcoin", "emoji": "₿", "color": "#F7931A", "yf_symbol": "BTC-USD", "tv_symbol": "BTCUSDT"},
-    "ETH": {"name": "Ethereum", "emoji": "Ξ", "color": "#627EEA", "yf_symbol": "ETH-USD", "tv_symbol": "ETHUSDT"},
-    "SOL": {"name": "Solana", "emoji": "◎", "color": "#00FFA3", "yf_symbol": "SOL-USD", "tv_symbol": "SOLUSDT"},
-    "BNB": {"name": "BNB", "emoji": "🔶", "color": "#F3BA2F", "yf_symbol": "BNB-USD", "tv_symbol": "BNBUSDT"},
-    "XRP": {"name": "Ripple", "emoji": "✕", "color": "#23292F", "yf_symbol": "XRP-USD", "tv_symbol": "XRPUSDT"},
-    "ADA": {"name": "Cardano", "emoji": "₳", "color": "#0033AD", "yf_symbol": "ADA-USD", "tv_symbol": "ADAUSDT"},
-    "DOGE": {"name": "Dogecoin", "emoji": "🐕", "color": "#C2A633", "yf_symbol": "DOGE-USD", "tv_symbol": "DOGEUSDT"},
-    "AVAX": {"name": "Avalanche", "emoji": "🔺", "color": "#E84142", "yf_symbol": "AVAX-USD", "tv_symbol": "AVAXUSDT"},
-    "MATIC": {"name": "Polygon", "emoji": "⬡", "color": "#8247E5", "yf_symbol": "MATIC-USD", "tv_symbol": "MATICUSDT"},
-    "LINK": {"name": "Chainlink", "emoji": "⬡", "color": "#2A5ADA", "yf_symbol": "LINK-USD", "tv_symbol": "LINKUSDT"},
-    "DOT": {"name": "Polkadot", "emoji": "●", "color": "#E6007A", "yf_symbol": "DOT-USD", "tv_symbol": "DOTUSDT"},
-    "ATOM": {"name": "Cosmos", "emoji": "⚛", "color": "#2E3148", "yf_symbol": "ATOM-USD", "tv_symbol": "ATOMUSDT"},
-    "UNI": {"name": "Uniswap", "emoji": "🦄", "color": "#FF007A", "yf_symbol": "UNI-USD", "tv_symbol": "UNIUSDT"},
-    "LTC": {"name": "Litecoin", "emoji": "Ł", "color": "#345D9D", "yf_symbol": "LTC-USD", "tv_symbol": "LTCUSDT"},
-}
-
-INTERVAL_MAP = {
-    "1min": "1m", "5min": "5m", "15min": "15m",
-    "30min": "30m", "1hour": "1h", "4hour": "4h",
-    "1day": "1d", "1week": "1wk"
-}
-
-KUCOIN_INTERVAL_MAP = {
-    "1min": 60, "3min": 180, "5min": 300, "15min": 900,
-    "30min": 1800, "1hour": 3600, "2hour": 7200,
-    "4hour": 14400, "6hour": 21600, "8hour": 28800,
-    "12hour": 43200, "1day": 86400, "1week": 604800
-}
-
-
-def fetch_crypto_from_tradingview(symbol="BTC", interval="1hour", n_bars=200):
-    """Mengambil data candlestick Crypto dari TradingView menggunakan xnoxs-fetcher"""
-    
-    if not TV_AVAILABLE:
-        logger.error("xnoxs-fetcher library tidak tersedia")
-        return None
-    
-    if interval not in TV_INTERVAL_MAP:
-        logger.error(f"Interval tidak valid untuk TradingView: {interval}")
-        return None
-    
-    if symbol not in SUPPORTED_COINS:
-        logger.error(f"Symbol tidak valid: {symbol}")
-        return None
-    
-    tv_interval = TV_INTERVAL_MAP[interval]
-    tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-    
-    exchanges = ['BINANCE', 'BYBIT', 'COINBASE', 'KRAKEN', 'BITSTAMP']
-    
-    for exchange in exchanges:
-        try:
-            logger.info(f"Mencoba mengambil data {tv_symbol} dari TradingView ({exchange}) interval {interval}...")
-            
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange=exchange,
-                timeframe=tv_interval,
-                bars=n_bars
-            )
-            
-            if df is not None and not df.empty:
-                df = df.dropna()
-                if df.empty:
-                    continue
-                
-                candles = []
-                for timestamp, row in df.iterrows():
-                    candles.append([
-                        int(timestamp.timestamp()),
-                        float(row["open"]),
-                        float(row["close"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["volume"]) if "volume" in row else 0
-                    ])
-                
-                logger.info(f"Berhasil mengambil {len(candles)} candle {tv_symbol} dari TradingView ({exchange})")
-                return candles
-                
-        except Exception as e:
-            logger.warning(f"Gagal dari {exchange}: {e}")
-            continue
-    
-    logger.error(f"Gagal mengambil data {tv_symbol} dari semua exchange TradingView")
-    return None
-
-
-def fetch_crypto_from_yfinance(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto dari Yahoo Finance (fallback)"""
-    
-    if not yf:
-        logger.error("yfinance library tidak tersedia")
-        return None
-    
-    if interval not in INTERVAL_MAP:
-        logger.error(f"Interval tidak valid: {interval}")
-        return None
-    
-    if symbol not in SUPPORTED_COINS:
-        logger.error(f"Symbol tidak valid: {symbol}")
-        return None
-
-    try:
-        yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-        logger.info(f"Mengambil data {symbol} dari Yahoo Finance ({yf_symbol}) interval {interval}...")
-        
-        yf_interval = INTERVAL_MAP[interval]
-        ticker = yf.Ticker(yf_symbol)
-        
-        if interval in ["1min", "5min", "15min", "30min"]:
-            period = "3d"
-        else:
-            period = "1y"
-        
-        df = ticker.history(period=period, interval=yf_interval)
-        
-        if df.empty:
-            logger.warning(f"Tidak ada data {symbol} dari Yahoo Finance")
-            return None
-        
-        df = df.dropna()
-        if df.empty:
-            logger.warning(f"Semua data {symbol} adalah NaN")
-            return None
-        
-        candles = []
-        for timestamp, row in df.iterrows():
-            volume = float(row["Volume"]) if "Volume" in row and pd.notna(row["Volume"]) else 0
-            candles.append([
-                int(timestamp.timestamp()),
-                float(row["Open"]),
-                float(row["Close"]),
-                float(row["High"]),
-                float(row["Low"]),
-                volume
-            ])
-        
-        logger.info(f"Berhasil mengambil {len(candles)} candle {symbol} dari Yahoo Finance")
-        return candles[-200:] if len(candles) > 200 else candles
-        
-    except Exception as e:
-        logger.error(f"Error mengambil data {symbol} dari Yahoo Finance: {e}")
-        return None
-
-
-def fetch_crypto_kucoin(symbol="BTC", interval="15min", candle_limit=200):
-    """Mengambil data candlestick dari KuCoin API untuk berbagai coin (fallback)"""
-    pair = f"{symbol}-USDT"
-    
-    if interval not in KUCOIN_INTERVAL_MAP:
-        logger.error(f"Interval tidak valid untuk KuCoin: {interval}")
-        return None
-    
-    end_at = int(datetime.now(timezone.utc).timestamp())
-    start_at = end_at - KUCOIN_INTERVAL_MAP[interval] * candle_limit
-
-    try:
-        logger.info(f"Mengambil data {pair} dari KuCoin interval {interval}...")
-        response = requests.get(
-            "https://api.kucoin.com/api/v1/market/candles",
-            params={
-                "symbol": pair,
-                "type": interval,
-                "startAt": start_at,
-                "endAt": end_at
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("code") != "200000":
-            logger.error(f"KuCoin API error: {data.get('msg', 'Unknown error')}")
-            return None
-        
-        candles = data.get("data", [])
-        if not candles:
-            logger.warning("Tidak ada data candle yang diterima dari KuCoin")
-            return None
-            
-        sorted_candles = sorted(candles, key=lambda x: int(x[0]))
-        logger.info(f"Berhasil mengambil {len(sorted_candles)} candle untuk {pair} dari KuCoin")
-        return sorted_candles
-        
-    except requests.exceptions.Timeout:
-        logger.error("Timeout saat mengambil data dari KuCoin")
-        return None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error request KuCoin: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Error tidak terduga: {e}")
-        return None
-
-
-def fetch_crypto_data(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto - prioritas TradingView, fallback ke Yahoo Finance, lalu KuCoin"""
-    
-    if symbol not in SUPPORTED_COINS:
-        logger.error(f"Symbol tidak valid: {symbol}")
-        return None
-    
-    data = fetch_crypto_from_tradingview(symbol, interval)
-    
-    if data and len(data) >= 20:
-        logger.info(f"Data {symbol} berhasil diambil dari TradingView")
-        return data
-    
-    logger.info("Fallback ke Yahoo Finance...")
-    data = fetch_crypto_from_yfinance(symbol, interval)
-    
-    if data and len(data) >= 20:
-        logger.info(f"Data {symbol} berhasil diambil dari Yahoo Finance")
-        return data
-    
-    logger.info("Fallback ke KuCoin...")
-    data = fetch_crypto_kucoin(symbol, interval)
-    
-    if data and len(data) >= 20:
-        logger.info(f"Data {symbol} berhasil diambil dari KuCoin")
-        return data
-    
-    logger.error(f"Gagal mengambil data {symbol} dari semua sumber")
-    return None
-
-
-def get_current_price(symbol="BTC"):
-    """Mengambil harga terkini - prioritas TradingView"""
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-    
-    if TV_AVAILABLE:
-        try:
-            tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange='BINANCE',
-                timeframe=TimeFrame.MINUTE_1,
-                bars=1
-            )
-            if df is not None and not df.empty:
-                return float(df.iloc[-1]["close"])
-        except Exception as e:
-            logger.warning(f"Error getting {symbol} price from TradingView: {e}")
-    
-    if yf:
-        try:
-            yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return float(data.iloc[-1]["Close"])
-        except Exception as e:
-            logger.warning(f"Error getting {symbol} price from Yahoo: {e}")
-    
-    pair = f"{symbol}-USDT"
-    try:
-        response = requests.get(
-            f"https://api.kucoin.com/api/v1/market/orderbook/level1",
-            params={"symbol": pair},
-            timeout=10
-        )
-        data = response.json()
-        if data.get("code") == "200000" and data.get("data"):
-            return float(data["data"].get("price", 0))
-    except Exception as e:
-        logger.error(f"Error getting price from KuCoin: {e}")
-    
-    return None
-
-
-def calculate_rsi(series, period=14):
-    """Calculate RSI (Relative Strength Index)"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    """Calculate MACD (Moving Average Convergence Divergence)"""
-    ema_fast = series.ewm(span=fast, adjust=False).mean()
-    ema_slow = series.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-
-def calculate_bollinger_bands(series, period=20, std_dev=2):
-    """Calculate Bollinger Bands"""
-    sma = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    return upper_band, sma, lower_band
-
-
-def calculate_fibonacci_levels(df):
-    """Calculate Fibonacci retracement levels based on recent swing high/low"""
-    high = df['High'].max()
-    low = df['Low'].min()
-    diff = high - low
-    
-    levels = {
-        '0.0%': high,
-        '23.6%': high - (diff * 0.236),
-        '38.2%': high - (diff * 0.382),
-        '50.0%': high - (diff * 0.5),
-        '61.8%': high - (diff * 0.618),
-        '78.6%': high - (diff * 0.786),
-        '100.0%': low
-    }
-    return levels
-
-
-def generate_candlestick_chart(data, filename="chart.png", symbol="BTC", tf="15min"):
-    """Generate chart candlestick dengan RSI, MACD, Bollinger Bands, dan Fibonacci"""
-    if not data:
-        logger.error("Data kosong, tidak bisa generate chart")
-        return None
-    
-    coin_info = SUPPORTED_COINS.get(symbol, {"name": symbol, "color": "#26a69a"})
-    
-    try:
-        ohlc = []
-        for item in data:
-            ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
-            ohlc.append([
-                ts,
-                float(item[1]),
-                float(item[3]),
-                float(item[4]),
-                float(item[2]),
-                float(item[5])
-            ])
-        
-        df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
-        df.set_index("Date", inplace=True)
-
-        mc = mpf.make_marketcolors(
-            up='#00AA00', down='#FF0000',
-            wick={'up': '#00AA00', 'down': '#FF0000'},
-            volume={'up': '#00AA00', 'down': '#FF0000'}
-        )
-        style = mpf.make_mpf_style(
-            marketcolors=mc,
-            gridstyle=':',
-            gridcolor='#cccccc',
-            facecolor='#f5f5f5',
-            edgecolor='#666666'
-        )
-
-        ema20 = df['Close'].ewm(span=20, adjust=False).mean()
-        ema50 = df['Close'].ewm(span=50, adjust=False).mean()
-        
-        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(df['Close'])
-        
-        rsi = calculate_rsi(df['Close'])
-        rsi_overbought = pd.Series([70] * len(df), index=df.index)
-        rsi_oversold = pd.Series([30] * len(df), index=df.index)
-        
-        macd_line, signal_line, macd_histogram = calculate_macd(df['Close'])
-        
-        fib_levels = calculate_fibonacci_levels(df)
-        fib_236 = pd.Series([fib_levels['23.6%']] * len(df), index=df.index)
-        fib_382 = pd.Series([fib_levels['38.2%']] * len(df), index=df.index)
-        fib_500 = pd.Series([fib_levels['50.0%']] * len(df), index=df.index)
-        fib_618 = pd.Series([fib_levels['61.8%']] * len(df), index=df.index)
-        
-        macd_colors = ['#00AA00' if val >= 0 else '#FF0000' for val in macd_histogram]
-        
-        addplots = [
-            mpf.make_addplot(ema20, color='blue', width=1.2),
-            mpf.make_addplot(ema50, color='orange', width=1.2),
-            
-            mpf.make_addplot(bb_upper, color='purple', width=0.8, linestyle='--'),
-            mpf.make_addplot(bb_middle, color='purple', width=0.5, linestyle=':'),
-            mpf.make_addplot(bb_lower, color='purple', width=0.8, linestyle='--'),
-            
-            mpf.make_addplot(fib_236, color='#FFD700', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_382, color='#FFA500', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_500, color='#FF6347', width=0.7, linestyle='-.'),
-            mpf.make_addplot(fib_618, color='#FF4500', width=0.5, linestyle='-.'),
-            
-            mpf.make_addplot(rsi, panel=2, color='#9C27B0', width=1.2, ylabel='RSI'),
-            mpf.make_addplot(rsi_overbought, panel=2, color='red', width=0.5, linestyle='--'),
-            mpf.make_addplot(rsi_oversold, panel=2, color='green', width=0.5, linestyle='--'),
-            
-            mpf.make_addplot(macd_line, panel=3, color='blue', width=1, ylabel='MACD'),
-            mpf.make_addplot(signal_line, panel=3, color='red', width=1),
-            mpf.make_addplot(macd_histogram, panel=3, type='bar', color=macd_colors, width=0.7),
-        ]
-
-        mpf.plot(
-            df, type='candle', volume=True, style=style,
-            title=f"\n{symbol}/USDT ({tf}) - Technical Analysis",
-            ylabel="Price (USDT)",
-            ylabel_lower="Volume",
-            savefig=dict(fname=filename, dpi=150, bbox_inches='tight'),
-            figratio=(16, 12),
-            figscale=1.5,
-            tight_layout=True,
-            addplot=addplots,
-            warn_too_much_data=500,
-            panel_ratios=(6, 2, 2, 2)
-        )
-        
-        logger.info(f"Chart berhasil disimpan: {filename}")
-        return filename
-        
-    except Exception as e:
-        logger.error(f"Error generate chart: {e}")
-        return None
-
-
-def analyze_image_with_gemini(image_path, symbol="BTC"):
-    """Analisa chart menggunakan Gemini Vision API"""
-    if not GEMINI_API_KEY:
-        return "GEMINI_API_KEY tidak ditemukan. Set environment variable terlebih dahulu."
-    
-    coin_info = SUPPORTED_COINS.get(symbol, {"name": symbol})
-    
-    try:
-        with open(image_path, "rb") as f:
-            img_b64 = base64.b64encode(f.read()).decode("utf-8")
-    except FileNotFoundError:
-        return f"File tidak ditemukan: {image_path}"
-    except Exception as e:
-        return f"Error membaca file: {e}"
-
-    prompt = f"""Analisa chart candlestick {symbol}/USDT ({coin_info.get('name', symbol)}) ini secara teknikal. 
-
-Chart ini memiliki indikator:
-- EMA 20 (biru) dan EMA 50 (orange)
-- Bollinger Bands (ungu, garis putus-putus)
-- Fibonacci Retracement (garis kuning-orange)
-- RSI (panel bawah pertama, dengan garis overbought 70 dan oversold 30)
-- MACD (panel bawah kedua, dengan histogram hijau/merah)
-
-Berikan analisa dalam format berikut:
-
-SINYAL: [BUY/SELL/HOLD] - [Alasan singkat]
-ENTRY: [Harga entry yang disarankan]
-TAKE PROFIT: [Target TP1] dan [Target TP2]
-STOP LOSS: [Harga SL yang disarankan]
-POLA: [Pola candlestick yang terlihat, misalnya: Bullish Engulfing, Doji, Hammer, dll]
-TREND: [Trend saat ini: Uptrend/Downtrend/Sideways]
-RSI: [Nilai RSI dan kondisi: Overbought/Oversold/Netral]
-MACD: [Kondisi MACD: Bullish Crossover/Bearish Crossover/Momentum positif/negatif]
-BOLLINGER: [Posisi harga terhadap Bollinger Bands: Upper/Middle/Lower band]
-FIBONACCI: [Level Fibonacci terdekat yang signifikan]
-SUPPORT: [Level support terdekat]
-RESISTANCE: [Level resistance terdekat]
-KESIMPULAN: [Ringkasan analisa dalam 2-3 kalimat berdasarkan semua indikator]
-
-Berikan angka spesifik berdasarkan chart yang terlihat. Jika tidak bisa menentukan harga exact, berikan estimasi range."""
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-    
-    payload = {
-        "contents": [{
-            "role": "user",
-            "parts": [
-                {"text": prompt},
-                {"inline_data": {"mime_type": "image/png", "data": img_b64}}
-            ]
-        }],
-        "generationConfig": {
-            "temperature": 0.3,
-            "topP": 0.8,
-            "maxOutputTokens": 1024
-        }
-    }
-    
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        logger.info(f"Mengirim chart {symbol} ke Gemini untuk analisa...")
-        response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            if "candidates" in result and len(result["candidates"]) > 0:
-                candidate = result["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    text = candidate["content"]["parts"][0].get("text", "")
-                    if text:
-                        logger.info("Analisa Gemini berhasil")
-                        return text
-            
-            logger.warning(f"Format respons tidak sesuai: {result}")
-            return "Format respons Gemini tidak sesuai. Coba lagi."
-            
-        elif response.status_code == 400:
-            error_detail = response.json()
-            logger.error(f"Bad request: {error_detail}")
-            return f"Error: Request tidak valid - {error_detail.get('error', {}).get('message', 'Unknown')}"
-            
-        elif response.status_code == 403:
-            return "Error: API key tidak valid atau tidak memiliki akses"
-            
-        elif response.status_code == 429:
-            return "Error: Rate limit tercapai. Tunggu beberapa saat dan coba lagi."
-            
-        else:
-            logger.error(f"Gemini API error: {response.status_code} - {response.text}")
-            return f"Error dari Gemini API (status: {response.status_code})"
-            
-    except requests.exceptions.Timeout:
-        return "Timeout saat menghubungi Gemini API. Coba lagi."
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error: {e}")
-        return f"Error koneksi: {e}"
-    except Exception as e:
-        logger.error(f"Error tidak terduga: {e}")
-        return f"Error: {e}"
-
-
-def format_analysis_reply(text):
-    """Format hasil analisa menjadi lebih readable dengan spacing yang baik"""
-    if not text or text.startswith("Error") or text.startswith("Timeout"):
-        return text
-    
-    text_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text_clean = re.sub(r'\*([^*]+)\*', r'\1', text_clean)
-    text_clean = re.sub(r'`([^`]+)`', r'\1', text_clean)
-    text_clean = re.sub(r'^\s*[-•]\s*', '', text_clean, flags=re.MULTILINE)
-    
-    section_keywords = [
-        {'keywords': ['sinyal', 'signal'], 'emoji': '📊', 'group': 'signal'},
-        {'keywords': ['entry', 'masuk'], 'emoji': '🎯', 'group': 'trading'},
-        {'keywords': ['take profit', 'target', 'tp1', 'tp2', 'tp 1', 'tp 2'], 'emoji': '💰', 'group': 'trading'},
-        {'keywords': ['stop loss', 'stoploss', 'sl', 'cut loss'], 'emoji': '🛑', 'group': 'trading'},
-        {'keywords': ['pola', 'pattern', 'candlestick', 'candle'], 'emoji': '🕯️', 'group': 'analysis'},
-        {'keywords': ['trend', 'arah'], 'emoji': '📈', 'group': 'analysis'},
-        {'keywords': ['rsi'], 'emoji': '📉', 'group': 'indicators'},
-        {'keywords': ['macd'], 'emoji': '📊', 'group': 'indicators'},
-        {'keywords': ['bollinger', 'bb'], 'emoji': '〰️', 'group': 'indicators'},
-        {'keywords': ['fibonacci', 'fib'], 'emoji': '🔢', 'group': 'indicators'},
-        {'keywords': ['support', 'suport', 's1', 's2', 's3'], 'emoji': '🔻', 'group': 'levels'},
-        {'keywords': ['resistance', 'resisten', 'r1', 'r2', 'r3'], 'emoji': '🔺', 'group': 'levels'},
-        {'keywords': ['kesimpulan', 'conclusion', 'ringkasan', 'summary'], 'emoji': '🧠', 'group': 'conclusion'},
-    ]
-    
-    sections = {
-        'signal': [],
-        'trading': [],
-        'analysis': [],
-        'indicators': [],
-        'levels': [],
-        'conclusion': [],
-        'other': []
-    }
-    
-    lines = text_clean.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        if ':' in line:
-            parts = line.split(':', 1)
-            key = parts[0].strip().lower()
-            value = parts[1].strip() if len(parts) > 1 else ''
-            
-            if not value:
-                continue
-            
-            matched = False
-            for config in section_keywords:
-                for keyword in config['keywords']:
-                    if keyword in key or key in keyword:
-                        emoji = config['emoji']
-                        label = parts[0].strip().upper()
-                        formatted_line = f"{emoji} *{label}:*\n{value}"
-                        sections[config['group']].append(formatted_line)
-                        matched = True
-                        break
-                if matched:
-                    break
-            
-            if not matched and value and len(value) > 3:
-                sections['other'].append(f"• {parts[0].strip()}: {value}")
-        else:
-            skip_phrases = ['oke', 'berikut', 'analisa', 'berdasarkan', 'chart', 'gambar']
-            should_skip = any(phrase in line.lower() for phrase in skip_phrases)
-            if line and not should_skip and len(line) > 10:
-                sections['other'].append(line)
-    
-    result_parts = []
-    
-    if sections['signal']:
-        result_parts.append('\n\n'.join(sections['signal']))
-    
-    if sections['trading']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Trading Setup ───')
-        result_parts.append('\n\n'.join(sections['trading']))
-    
-    if sections['levels']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Support & Resistance ───')
-        result_parts.append('\n\n'.join(sections['levels']))
-    
-    if sections['analysis']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Technical Analysis ───')
-        result_parts.append('\n\n'.join(sections['analysis']))
-    
-    if sections['indicators']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Indicators ───')
-        result_parts.append('\n\n'.join(sections['indicators']))
-    
-    if sections['conclusion']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Kesimpulan ───')
-        result_parts.append('\n\n'.join(sections['conclusion']))
-    
-    if result_parts:
-        return '\n'.join(result_parts)
-    else:
-        return text
 
 
 def get_coin_keyboard():
@@ -795,7 +121,7 @@ async def handle_coin_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     
     context.user_data['selected_coin'] = symbol
     
-    current_price = get_current_price(symbol)
+    current_price = get_crypto_price(symbol)
     price_text = f"💵 Harga: ${current_price:,.2f}" if current_price else ""
     
     text = f"""{coin_info['emoji']} *{symbol}/USDT* - {coin_info['name']}
@@ -907,7 +233,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
     )
     
     filename = f"chart_{symbol}_{interval}_{int(datetime.now().timestamp())}.png"
-    chart_path = generate_candlestick_chart(data, filename, symbol, interval)
+    chart_path, confluence = generate_chart_with_confluence(data, filename, symbol, interval, "crypto")
     
     if not chart_path:
         await context.bot.edit_message_text(
@@ -943,7 +269,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
         text=f"🤖 Menganalisa chart {symbol} dengan AI..."
     )
     
-    analysis = analyze_image_with_gemini(chart_path, symbol)
+    analysis = analyze_with_gemini(chart_path, symbol, "crypto", interval, confluence)
     formatted = format_analysis_reply(analysis)
     
     result_text = f"""{coin_info['emoji']} *Hasil Analisa {symbol}/USDT ({interval})*
@@ -1037,7 +363,7 @@ async def cmd_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("📊 Generating chart...")
     
     filename = f"chart_{symbol}_{interval}_{int(datetime.now().timestamp())}.png"
-    chart_path = generate_candlestick_chart(data, filename, symbol, interval)
+    chart_path, confluence = generate_chart_with_confluence(data, filename, symbol, interval, "crypto")
     
     if not chart_path:
         await update.message.reply_text("❌ Gagal membuat chart.")
@@ -1049,7 +375,7 @@ async def cmd_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
             caption=f"{coin_info['emoji']} {symbol}/USDT ({interval})\n⏳ Menganalisa..."
         )
     
-    analysis = analyze_image_with_gemini(chart_path, symbol)
+    analysis = analyze_with_gemini(chart_path, symbol, "crypto", interval, confluence)
     formatted = format_analysis_reply(analysis)
     
     await update.message.reply_text(
@@ -1069,7 +395,7 @@ async def cmd_coins(update: Update, context: ContextTypes.DEFAULT_TYPE):
     coins_text = "📊 *Daftar Cryptocurrency yang Didukung:*\n\n"
     
     for symbol, info in SUPPORTED_COINS.items():
-        price = get_current_price(symbol)
+        price = get_crypto_price(symbol)
         price_str = f"${price:,.2f}" if price else "N/A"
         coins_text += f"{info['emoji']} *{symbol}* - {info['name']}\n   └ Harga: {price_str}\n\n"
     
@@ -5,41 +5,50 @@ Tool CLI untuk analisa teknikal menggunakan Telegram Bot dan Gemini AI Vision
 Mendukung: Cryptocurrency (14 koin) dan Forex/Komoditas (16 pasangan)
 Fitur Tambahan: History tracking untuk verifikasi akurasi analisa Gemini
 """
-
-import logging
-import base64
-import json
-import re
 import os
+import re
 import sys
-import requests
-import mplfinance as mpf
-import pandas as pd
+import time
 from datetime import datetime, timezone, timedelta
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, JobQueue
+from telegram import Update
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 from pytz import timezone as tz
-import asyncio
-from dotenv import load_dotenv
-import threading
-import time
-
-load_dotenv()
-
-analysis_history = {}
 
-TIMEFRAME_SECONDS = {
-    "1min": 60,
-    "5min": 300,
-    "15min": 900,
-    "30min": 1800,
-    "1hour": 3600,
-    "4hour": 14400,
-    "1day": 86400,
-    "1week": 604800
-}
+from engine.lazy import yf
+from engine.analysis import AnalysisResult
+from engine.console import Colors, get_logger, log_debug, log_error, log_info, log_success, log_warning
+from engine.config import (
+    CANDLE_SYNC_BUFFER, FOREX_PAIRS, GEMINI_API_KEY, INTERVAL_MAP, SUPPORTED_COINS, TIMEFRAME_SECONDS,
+)
+from engine.data import TV_AVAILABLE, fetch_crypto_data, fetch_forex_data, get_crypto_price, get_forex_price
+from engine.charting import generate_chart_with_confluence
+from engine.llm import analyze_with_gemini
+from engine.prompts import get_timeframe_context
+from engine.formatting import extract_signal_from_analysis, format_analysis_reply
+from engine.keyboards import (
+    get_after_analysis_keyboard, get_crypto_keyboard, get_forex_keyboard, get_main_menu_keyboard,
+    get_timeframe_keyboard,
+)
+from engine.leader import LeaderElection, leader_only
+
+logger = get_logger(__name__)
+
+# History analisa ("history:<id>") dan verifikasi tertunda ("verify:<id>") ada di store lease leader
+# (SHARED_STORE, atau file SQLite jika SHARED_STORE=memory), sehingga leader melihat verifikasi semua
+# instance dan verifikasi tetap jalan tepat sekali walau instance yang menjadwalkannya mati
+HISTORY_TTL = 30 * 86400
+VERIFY_POLL_INTERVAL = int(os.environ.get("VERIFY_POLL_INTERVAL", "5"))
+# Klaim per verifikasi (detik) dan percobaan ulang jika pengiriman gagal
+VERIFY_CLAIM_SECONDS = 120
+VERIFY_MAX_ATTEMPTS = 3
+VERIFY_RETRY_DELAY = 60
+
+verification_leader = LeaderElection("test_bot_verification")
+
+
+def get_history_store():
+    return verification_leader.store
 
-CANDLE_SYNC_BUFFER = 5
 
 def calculate_next_candle_close(interval: str, current_time: datetime = None) -> datetime:
     """
@@ -216,69 +225,6 @@ PIP_VALUES = {
 }
 
 
-class Colors:
-    RESET = '\033[0m'
-    BOLD = '\033[1m'
-    DIM = '\033[2m'
-    
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    MAGENTA = '\033[95m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    
-    BG_RED = '\033[41m'
-    BG_GREEN = '\033[42m'
-    BG_BLUE = '\033[44m'
-
-
-class ColoredFormatter(logging.Formatter):
-    FORMATS = {
-        logging.DEBUG: f"{Colors.DIM}%(message)s{Colors.RESET}",
-        logging.INFO: f"{Colors.CYAN}%(message)s{Colors.RESET}",
-        logging.WARNING: f"{Colors.YELLOW}%(message)s{Colors.RESET}",
-        logging.ERROR: f"{Colors.RED}{Colors.BOLD}%(message)s{Colors.RESET}",
-        logging.CRITICAL: f"{Colors.BG_RED}{Colors.WHITE}{Colors.BOLD}%(message)s{Colors.RESET}",
-    }
-
-    def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno, "%(message)s")
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
-
-
-class QuietFilter(logging.Filter):
-    def filter(self, record):
-        noisy_messages = [
-            'HTTP Request',
-            'httpx',
-            'httpcore',
-            'urllib3',
-            'Retrying',
-            'Starting new HTTP',
-        ]
-        return not any(msg in record.getMessage() for msg in noisy_messages)
-
-
-logging.getLogger('httpx').setLevel(logging.WARNING)
-logging.getLogger('httpcore').setLevel(logging.WARNING)
-logging.getLogger('urllib3').setLevel(logging.WARNING)
-logging.getLogger('telegram').setLevel(logging.WARNING)
-logging.getLogger('yfinance').setLevel(logging.WARNING)
-
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(ColoredFormatter())
-console_handler.addFilter(QuietFilter())
-
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.handlers = []
-logger.addHandler(console_handler)
-logger.propagate = False
-
-
 def print_banner():
     banner = f"""
 {Colors.CYAN}{Colors.BOLD}╔══════════════════════════════════════════════════════════╗
@@ -292,479 +238,7 @@ def print_banner():
     print(banner)
 
 
-def log_success(message):
-    print(f"{Colors.GREEN}  ✓ {message}{Colors.RESET}")
-
-
-def log_warning(message):
-    print(f"{Colors.YELLOW}  ⚠ {message}{Colors.RESET}")
-
-
-def log_error(message):
-    print(f"{Colors.RED}  ✗ {message}{Colors.RESET}")
-
-
-def log_info(message):
-    print(f"{Colors.CYAN}  ℹ {message}{Colors.RESET}")
-
-
-def log_data(message):
-    print(f"{Colors.MAGENTA}  📡 {message}{Colors.RESET}")
-
-
-def log_analysis(message):
-    print(f"{Colors.BLUE}  🤖 {message}{Colors.RESET}")
-
-
-try:
-    from xnoxs_fetcher import XnoxsFetcher, TimeFrame
-    fetcher = XnoxsFetcher()
-    TV_AVAILABLE = True
-    TV_INTERVAL_MAP = {
-        "1min": TimeFrame.MINUTE_1,
-        "5min": TimeFrame.MINUTE_5,
-        "15min": TimeFrame.MINUTE_15,
-        "30min": TimeFrame.MINUTE_30,
-        "1hour": TimeFrame.HOUR_1,
-        "4hour": TimeFrame.HOUR_4,
-        "1day": TimeFrame.DAILY,
-        "1week": TimeFrame.WEEKLY,
-    }
-except ImportError:
-    TV_AVAILABLE = False
-    fetcher = None
-    TV_INTERVAL_MAP = {
-        "1min": None,
-        "5min": None,
-        "15min": None,
-        "30min": None,
-        "1hour": None,
-        "4hour": None,
-        "1day": None,
-        "1week": None,
-    }
-
-try:
-    import yfinance as yf
-except ImportError:
-    yf = None
-
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-
-SUPPORTED_COINS = {
-    "BTC": {"name": "Bitcoin", "emoji": "₿", "color": "#F7931A", "yf_symbol": "BTC-USD", "tv_symbol": "BTCUSDT"},
-    "ETH": {"name": "Ethereum", "emoji": "Ξ", "color": "#627EEA", "yf_symbol": "ETH-USD", "tv_symbol": "ETHUSDT"},
-    "SOL": {"name": "Solana", "emoji": "◎", "color": "#00FFA3", "yf_symbol": "SOL-USD", "tv_symbol": "SOLUSDT"},
-    "BNB": {"name": "BNB", "emoji": "🔶", "color": "#F3BA2F", "yf_symbol": "BNB-USD", "tv_symbol": "BNBUSDT"},
-    "XRP": {"name": "Ripple", "emoji": "✕", "color": "#23292F", "yf_symbol": "XRP-USD", "tv_symbol": "XRPUSDT"},
-    "ADA": {"name": "Cardano", "emoji": "₳", "color": "#0033AD", "yf_symbol": "ADA-USD", "tv_symbol": "ADAUSDT"},
-    "DOGE": {"name": "Dogecoin", "emoji": "🐕", "color": "#C2A633", "yf_symbol": "DOGE-USD", "tv_symbol": "DOGEUSDT"},
-    "AVAX": {"name": "Avalanche", "emoji": "🔺", "color": "#E84142", "yf_symbol": "AVAX-USD", "tv_symbol": "AVAXUSDT"},
-    "MATIC": {"name": "Polygon", "emoji": "⬡", "color": "#8247E5", "yf_symbol": "MATIC-USD", "tv_symbol": "MATICUSDT"},
-    "LINK": {"name": "Chainlink", "emoji": "⬡", "color": "#2A5ADA", "yf_symbol": "LINK-USD", "tv_symbol": "LINKUSDT"},
-    "DOT": {"name": "Polkadot", "emoji": "●", "color": "#E6007A", "yf_symbol": "DOT-USD", "tv_symbol": "DOTUSDT"},
-    "ATOM": {"name": "Cosmos", "emoji": "⚛", "color": "#2E3148", "yf_symbol": "ATOM-USD", "tv_symbol": "ATOMUSDT"},
-    "UNI": {"name": "Uniswap", "emoji": "🦄", "color": "#FF007A", "yf_symbol": "UNI-USD", "tv_symbol": "UNIUSDT"},
-    "LTC": {"name": "Litecoin", "emoji": "Ł", "color": "#345D9D", "yf_symbol": "LTC-USD", "tv_symbol": "LTCUSDT"},
-}
-
-FOREX_PAIRS = {
-    "XAUUSD": {"name": "Emas", "emoji": "🥇", "yf_symbol": "GC=F", "category": "commodity"},
-    "XAGUSD": {"name": "Perak", "emoji": "🥈", "yf_symbol": "SI=F", "category": "commodity"},
-    "EURUSD": {"name": "EUR/USD", "emoji": "💶", "yf_symbol": "EURUSD=X", "category": "major"},
-    "GBPUSD": {"name": "GBP/USD", "emoji": "💷", "yf_symbol": "GBPUSD=X", "category": "major"},
-    "USDJPY": {"name": "USD/JPY", "emoji": "💴", "yf_symbol": "USDJPY=X", "category": "major"},
-    "USDCHF": {"name": "USD/CHF", "emoji": "🇨🇭", "yf_symbol": "USDCHF=X", "category": "major"},
-    "AUDUSD": {"name": "AUD/USD", "emoji": "🇦🇺", "yf_symbol": "AUDUSD=X", "category": "major"},
-    "USDCAD": {"name": "USD/CAD", "emoji": "🇨🇦", "yf_symbol": "USDCAD=X", "category": "major"},
-    "NZDUSD": {"name": "NZD/USD", "emoji": "🇳🇿", "yf_symbol": "NZDUSD=X", "category": "major"},
-    "EURGBP": {"name": "EUR/GBP", "emoji": "🇪🇺", "yf_symbol": "EURGBP=X", "category": "cross"},
-    "EURJPY": {"name": "EUR/JPY", "emoji": "🇪🇺", "yf_symbol": "EURJPY=X", "category": "cross"},
-    "GBPJPY": {"name": "GBP/JPY", "emoji": "🇬🇧", "yf_symbol": "GBPJPY=X", "category": "cross"},
-    "AUDJPY": {"name": "AUD/JPY", "emoji": "🇦🇺", "yf_symbol": "AUDJPY=X", "category": "cross"},
-    "EURAUD": {"name": "EUR/AUD", "emoji": "🇪🇺", "yf_symbol": "EURAUD=X", "category": "cross"},
-    "EURCHF": {"name": "EUR/CHF", "emoji": "🇪🇺", "yf_symbol": "EURCHF=X", "category": "cross"},
-    "USOIL": {"name": "Minyak Mentah", "emoji": "🛢️", "yf_symbol": "CL=F", "category": "commodity"},
-}
-
-INTERVAL_MAP = {
-    "1min": "1m", "5min": "5m", "15min": "15m",
-    "30min": "30m", "1hour": "1h", "4hour": "4h",
-    "1day": "1d", "1week": "1wk"
-}
-
-KUCOIN_INTERVAL_MAP = {
-    "1min": 60, "3min": 180, "5min": 300, "15min": 900,
-    "30min": 1800, "1hour": 3600, "2hour": 7200,
-    "4hour": 14400, "6hour": 21600, "8hour": 28800,
-    "12hour": 43200, "1day": 86400, "1week": 604800
-}
-
-
-def fetch_crypto_from_tradingview(symbol="BTC", interval="1hour", n_bars=200):
-    """Mengambil data candlestick Crypto dari TradingView"""
-    
-    if not TV_AVAILABLE:
-        return None
-    
-    if interval not in TV_INTERVAL_MAP:
-        return None
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-    
-    tv_interval = TV_INTERVAL_MAP[interval]
-    tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-    
-    exchanges = ['BINANCE', 'BYBIT', 'COINBASE', 'KRAKEN', 'BITSTAMP']
-    
-    for exchange in exchanges:
-        try:
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange=exchange,
-                timeframe=tv_interval,
-                bars=n_bars
-            )
-            
-            if df is not None and not df.empty:
-                df = df.dropna()
-                if df.empty:
-                    continue
-                
-                candles = []
-                for timestamp, row in df.iterrows():
-                    candles.append([
-                        int(timestamp.timestamp()),
-                        float(row["open"]),
-                        float(row["close"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["volume"]) if "volume" in row else 0
-                    ])
-                
-                log_data(f"{symbol} ({interval}): {len(candles)} candle dari TradingView")
-                return candles
-                
-        except Exception:
-            continue
-    
-    return None
-
-
-def fetch_crypto_from_yfinance(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto dari Yahoo Finance (cadangan)"""
-    
-    if not yf:
-        return None
-    
-    if interval not in INTERVAL_MAP:
-        return None
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-
-    try:
-        yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-        yf_interval = INTERVAL_MAP[interval]
-        ticker = yf.Ticker(yf_symbol)
-        
-        if interval in ["1min", "5min", "15min", "30min"]:
-            period = "3d"
-        else:
-            period = "1y"
-        
-        df = ticker.history(period=period, interval=yf_interval)
-        
-        if df.empty:
-            return None
-        
-        df = df.dropna()
-        if df.empty:
-            return None
-        
-        candles = []
-        for timestamp, row in df.iterrows():
-            volume = float(row["Volume"]) if "Volume" in row and pd.notna(row["Volume"]) else 0
-            candles.append([
-                int(timestamp.timestamp()),
-                float(row["Open"]),
-                float(row["Close"]),
-                float(row["High"]),
-                float(row["Low"]),
-                volume
-            ])
-        
-        log_data(f"{symbol} ({interval}): {len(candles)} candle dari Yahoo Finance")
-        return candles[-200:] if len(candles) > 200 else candles
-        
-    except Exception:
-        return None
-
-
-def fetch_crypto_kucoin(symbol="BTC", interval="15min", candle_limit=200):
-    """Mengambil data candlestick dari KuCoin API (cadangan)"""
-    pair = f"{symbol}-USDT"
-    
-    if interval not in KUCOIN_INTERVAL_MAP:
-        return None
-    
-    end_at = int(datetime.now(timezone.utc).timestamp())
-    start_at = end_at - KUCOIN_INTERVAL_MAP[interval] * candle_limit
-
-    try:
-        response = requests.get(
-            "https://api.kucoin.com/api/v1/market/candles",
-            params={
-                "symbol": pair,
-                "type": interval,
-                "startAt": start_at,
-                "endAt": end_at
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("code") != "200000":
-            return None
-        
-        candles = data.get("data", [])
-        if not candles:
-            return None
-            
-        sorted_candles = sorted(candles, key=lambda x: int(x[0]))
-        log_data(f"{symbol} ({interval}): {len(sorted_candles)} candle dari KuCoin")
-        return sorted_candles
-        
-    except Exception:
-        return None
-
-
-def fetch_crypto_data(symbol="BTC", interval="1hour"):
-    """Mengambil data candlestick Crypto - prioritas TradingView, cadangan Yahoo Finance, lalu KuCoin"""
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-    
-    data = fetch_crypto_from_tradingview(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_crypto_from_yfinance(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_crypto_kucoin(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    log_error(f"Gagal mengambil data {symbol}")
-    return None
-
-
-def fetch_forex_from_tradingview(symbol="XAUUSD", interval="1hour", n_bars=200):
-    """Mengambil data candlestick Forex dari TradingView"""
-    
-    if not TV_AVAILABLE:
-        return None
-    
-    if interval not in TV_INTERVAL_MAP or interval == "1week":
-        return None
-    
-    if symbol not in FOREX_PAIRS:
-        return None
-    
-    tv_interval = TV_INTERVAL_MAP[interval]
-    
-    exchanges = ['OANDA', 'FXCM', 'FX_IDC', 'FOREXCOM', 'CAPITALCOM']
-    
-    for exchange in exchanges:
-        try:
-            df = fetcher.get_historical_data(
-                symbol=symbol,
-                exchange=exchange,
-                timeframe=tv_interval,
-                bars=n_bars
-            )
-            
-            if df is not None and not df.empty:
-                df = df.dropna()
-                if df.empty:
-                    continue
-                
-                candles = []
-                for timestamp, row in df.iterrows():
-                    candles.append([
-                        int(timestamp.timestamp()),
-                        float(row["open"]),
-                        float(row["close"]),
-                        float(row["high"]),
-                        float(row["low"]),
-                        float(row["volume"]) if "volume" in row else 0
-                    ])
-                
-                log_data(f"{symbol} ({interval}): {len(candles)} candle dari TradingView")
-                return candles
-                
-        except Exception:
-            continue
-    
-    return None
-
-
-def fetch_forex_from_yfinance(symbol="XAUUSD", interval="1hour"):
-    """Mengambil data candlestick Forex dari Yahoo Finance (cadangan)"""
-    
-    if not yf:
-        return None
-    
-    forex_interval_map = {k: v for k, v in INTERVAL_MAP.items() if k != "1week"}
-    
-    if interval not in forex_interval_map:
-        return None
-    
-    if symbol not in FOREX_PAIRS:
-        return None
-
-    try:
-        yf_symbol = FOREX_PAIRS[symbol]["yf_symbol"]
-        yf_interval = forex_interval_map[interval]
-        ticker = yf.Ticker(yf_symbol)
-        
-        if interval in ["1min", "5min", "15min", "30min"]:
-            period = "3d"
-        else:
-            period = "1y"
-        
-        df = ticker.history(period=period, interval=yf_interval)
-        
-        if df.empty:
-            return None
-        
-        df = df.dropna()
-        if df.empty:
-            return None
-        
-        candles = []
-        for timestamp, row in df.iterrows():
-            volume = float(row["Volume"]) if "Volume" in row and pd.notna(row["Volume"]) else 0
-            candles.append([
-                int(timestamp.timestamp()),
-                float(row["Open"]),
-                float(row["Close"]),
-                float(row["High"]),
-                float(row["Low"]),
-                volume
-            ])
-        
-        log_data(f"{symbol} ({interval}): {len(candles)} candle dari Yahoo Finance")
-        return candles[-200:] if len(candles) > 200 else candles
-        
-    except Exception:
-        return None
-
-
-def fetch_forex_data(symbol="XAUUSD", interval="1hour"):
-    """Mengambil data candlestick Forex - prioritas TradingView, cadangan Yahoo Finance"""
-    
-    forex_interval_map = {k: v for k, v in INTERVAL_MAP.items() if k != "1week"}
-    
-    if interval not in forex_interval_map:
-        return None
-    
-    if symbol not in FOREX_PAIRS:
-        return None
-    
-    data = fetch_forex_from_tradingview(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    data = fetch_forex_from_yfinance(symbol, interval)
-    if data and len(data) >= 20:
-        return data
-    
-    log_error(f"Gagal mengambil data {symbol}")
-    return None
-
-
-def get_crypto_price(symbol="BTC"):
-    """Mengambil harga crypto terkini"""
-    
-    if symbol not in SUPPORTED_COINS:
-        return None
-    
-    if TV_AVAILABLE:
-        try:
-            tv_symbol = SUPPORTED_COINS[symbol].get("tv_symbol", f"{symbol}USDT")
-            df = fetcher.get_historical_data(
-                symbol=tv_symbol,
-                exchange='BINANCE',
-                timeframe=TimeFrame.MINUTE_1,
-                bars=1
-            )
-            if df is not None and not df.empty:
-                return float(df.iloc[-1]["close"])
-        except Exception:
-            pass
-    
-    if yf:
-        try:
-            yf_symbol = SUPPORTED_COINS[symbol]["yf_symbol"]
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return float(data.iloc[-1]["Close"])
-        except Exception:
-            pass
-    
-    pair = f"{symbol}-USDT"
-    try:
-        response = requests.get(
-            f"https://api.kucoin.com/api/v1/market/orderbook/level1",
-            params={"symbol": pair},
-            timeout=10
-        )
-        data = response.json()
-        if data.get("code") == "200000" and data.get("data"):
-            return float(data["data"].get("price", 0))
-    except Exception:
-        pass
-    
-    return None
-
-
-def get_forex_price(symbol="XAUUSD"):
-    """Mengambil harga forex/komoditas terkini"""
-    
-    if symbol not in FOREX_PAIRS:
-        return None
-    
-    if TV_AVAILABLE:
-        try:
-            df = fetcher.get_historical_data(
-                symbol=symbol,
-                exchange='OANDA',
-                timeframe=TimeFrame.MINUTE_1,
-                bars=1
-            )
-            if df is not None and not df.empty:
-                return float(df.iloc[-1]["close"])
-        except Exception:
-            pass
-    
-    if yf:
-        try:
-            yf_symbol = FOREX_PAIRS[symbol]["yf_symbol"]
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period="1d", interval="1m")
-            if not data.empty:
-                return float(data.iloc[-1]["Close"])
-        except Exception:
-            pass
-    
-    return None
 
 
 def get_latest_candle_close_crypto(symbol="BTC", interval="1min"):
@@ -778,11 +252,11 @@ def get_latest_candle_close_crypto(symbol="BTC", interval="1min"):
     if symbol not in SUPPORTED_COINS:
         return None, None
     
-    log_info(f"Fetching latest CLOSED candle for {symbol} ({interval})...")
+    log_info("Fetching latest CLOSED candle for %s (%s)...", symbol, interval)
     
     data = fetch_crypto_data(symbol, interval)
     if not data or len(data) < 3:
-        log_warning(f"Tidak cukup data candle untuk {symbol} - fallback ke real-time price")
+        log_warning("Tidak cukup data candle untuk %s - fallback ke real-time price", symbol)
         fallback_price = get_crypto_price(symbol)
         candle_info = {
             "close": fallback_price,
@@ -813,7 +287,10 @@ def get_latest_candle_close_crypto(symbol="BTC", interval="1min"):
         "is_fallback": False
     }
     
-    log_info(f"CLOSED candle {symbol} ({interval}): Close=${close_price:,.4f}, Time={candle_info['time']}, Direction={candle_info['direction']}")
+    log_info(
+        "CLOSED candle %s (%s): Close=$%.4f, Time=%s, Direction=%s",
+        symbol, interval, close_price, candle_info['time'], candle_info['direction']
+    )
     
     return close_price, candle_info
 
@@ -829,11 +306,11 @@ def get_latest_candle_close_forex(symbol="XAUUSD", interval="1min"):
     if symbol not in FOREX_PAIRS:
         return None, None
     
-    log_info(f"Fetching latest CLOSED candle for {symbol} ({interval})...")
+    log_info("Fetching latest CLOSED candle for %s (%s)...", symbol, interval)
     
     data = fetch_forex_data(symbol, interval)
     if not data or len(data) < 3:
-        log_warning(f"Tidak cukup data candle untuk {symbol} - fallback ke real-time price")
+        log_warning("Tidak cukup data candle untuk %s - fallback ke real-time price", symbol)
         fallback_price = get_forex_price(symbol)
         candle_info = {
             "close": fallback_price,
@@ -864,987 +341,18 @@ def get_latest_candle_close_forex(symbol="XAUUSD", interval="1min"):
         "is_fallback": False
     }
     
-    log_info(f"CLOSED candle {symbol} ({interval}): Close=${close_price:,.4f}, Time={candle_info['time']}, Direction={candle_info['direction']}")
+    log_info(
+        "CLOSED candle %s (%s): Close=$%.4f, Time=%s, Direction=%s",
+        symbol, interval, close_price, candle_info['time'], candle_info['direction']
+    )
     
     return close_price, candle_info
 
 
-def calculate_rsi(series, period=14):
-    """Menghitung RSI (Relative Strength Index)"""
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def calculate_macd(series, fast=12, slow=26, signal=9):
-    """Menghitung MACD (Moving Average Convergence Divergence)"""
-    ema_fast = series.ewm(span=fast, adjust=False).mean()
-    ema_slow = series.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
-    return macd_line, signal_line, histogram
-
-
-def calculate_bollinger_bands(series, period=20, std_dev=2):
-    """Menghitung Bollinger Bands"""
-    sma = series.rolling(window=period).mean()
-    std = series.rolling(window=period).std()
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    return upper_band, sma, lower_band
-
-
-def calculate_fibonacci_levels(df):
-    """Menghitung level Fibonacci retracement"""
-    high = df['High'].max()
-    low = df['Low'].min()
-    diff = high - low
-    
-    levels = {
-        '0.0%': high,
-        '23.6%': high - (diff * 0.236),
-        '38.2%': high - (diff * 0.382),
-        '50.0%': high - (diff * 0.5),
-        '61.8%': high - (diff * 0.618),
-        '78.6%': high - (diff * 0.786),
-        '100.0%': low
-    }
-    return levels
-
-
-def calculate_atr(df, period=14):
-    """Menghitung ATR (Average True Range) - untuk volatilitas dan penentuan SL/TP"""
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    return atr
-
-
-def calculate_stochastic_rsi(series, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3):
-    """Menghitung Stochastic RSI - lebih sensitif dari RSI biasa"""
-    rsi = calculate_rsi(series, rsi_period)
-    
-    rsi_min = rsi.rolling(window=stoch_period).min()
-    rsi_max = rsi.rolling(window=stoch_period).max()
-    
-    stoch_rsi = ((rsi - rsi_min) / (rsi_max - rsi_min)) * 100
-    stoch_rsi = stoch_rsi.fillna(50)
-    
-    stoch_k = stoch_rsi.rolling(window=smooth_k).mean()
-    stoch_d = stoch_k.rolling(window=smooth_d).mean()
-    
-    return stoch_k, stoch_d
-
-
-def calculate_adx(df, period=14):
-    """Menghitung ADX (Average Directional Index) - mengukur kekuatan tren"""
-    high = df['High']
-    low = df['Low']
-    close = df['Close']
-    
-    plus_dm = high.diff()
-    minus_dm = -low.diff()
-    
-    plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0)
-    minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0)
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift(1))
-    tr3 = abs(low - close.shift(1))
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    atr = tr.rolling(window=period).mean()
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-    
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(window=period).mean()
-    
-    return adx, plus_di, minus_di
-
-
-def calculate_vwap(df):
-    """Menghitung VWAP (Volume Weighted Average Price)"""
-    typical_price = (df['High'] + df['Low'] + df['Close']) / 3
-    vwap = (typical_price * df['Volume']).cumsum() / df['Volume'].cumsum()
-    return vwap
-
-
-def calculate_ema(series, period):
-    """Menghitung EMA dengan period tertentu"""
-    return series.ewm(span=period, adjust=False).mean()
-
-
-def detect_rsi_divergence(df, rsi, lookback=10):
-    """Mendeteksi RSI divergence (bullish/bearish)"""
-    close = df['Close']
-    divergence = []
-    
-    for i in range(lookback, len(df)):
-        price_window = close.iloc[i-lookback:i+1]
-        rsi_window = rsi.iloc[i-lookback:i+1]
-        
-        price_min_idx = price_window.idxmin()
-        price_max_idx = price_window.idxmax()
-        
-        current_price = close.iloc[i]
-        current_rsi = rsi.iloc[i]
-        
-        if current_price <= price_window.min() * 1.01:
-            rsi_at_prev_low = rsi.loc[price_min_idx] if price_min_idx in rsi.index else current_rsi
-            if current_rsi > rsi_at_prev_low:
-                divergence.append("bullish")
-                continue
-        
-        if current_price >= price_window.max() * 0.99:
-            rsi_at_prev_high = rsi.loc[price_max_idx] if price_max_idx in rsi.index else current_rsi
-            if current_rsi < rsi_at_prev_high:
-                divergence.append("bearish")
-                continue
-        
-        divergence.append("none")
-    
-    result = ['none'] * lookback + divergence
-    return result[-1] if result else "none"
-
-
-def detect_macd_divergence(df, macd_line, lookback=10):
-    """Mendeteksi MACD divergence (bullish/bearish)"""
-    close = df['Close']
-    
-    for i in range(lookback, len(df)):
-        price_window = close.iloc[i-lookback:i+1]
-        macd_window = macd_line.iloc[i-lookback:i+1]
-        
-        current_price = close.iloc[i]
-        current_macd = macd_line.iloc[i]
-        
-        if current_price <= price_window.min() * 1.01:
-            prev_macd_at_low = macd_window.min()
-            if current_macd > prev_macd_at_low:
-                return "bullish"
-        
-        if current_price >= price_window.max() * 0.99:
-            prev_macd_at_high = macd_window.max()
-            if current_macd < prev_macd_at_high:
-                return "bearish"
-    
-    return "none"
-
-
-def calculate_confluence_score(df, market_type="crypto"):
-    """Menghitung skor konfluensi dari berbagai indikator untuk sinyal trading"""
-    close = df['Close']
-    current_price = close.iloc[-1]
-    
-    ema20 = calculate_ema(close, 20)
-    ema50 = calculate_ema(close, 50)
-    ema200 = calculate_ema(close, 200)
-    
-    rsi = calculate_rsi(close, 14)
-    current_rsi = rsi.iloc[-1]
-    
-    macd_line, signal_line, histogram = calculate_macd(close)
-    current_macd = macd_line.iloc[-1]
-    current_signal = signal_line.iloc[-1]
-    current_hist = histogram.iloc[-1]
-    prev_hist = histogram.iloc[-2] if len(histogram) > 1 else 0
-    
-    bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(close)
-    
-    stoch_k, stoch_d = calculate_stochastic_rsi(close)
-    current_stoch_k = stoch_k.iloc[-1]
-    current_stoch_d = stoch_d.iloc[-1]
-    
-    adx, plus_di, minus_di = calculate_adx(df)
-    current_adx = adx.iloc[-1] if not pd.isna(adx.iloc[-1]) else 20
-    current_plus_di = plus_di.iloc[-1] if not pd.isna(plus_di.iloc[-1]) else 25
-    current_minus_di = minus_di.iloc[-1] if not pd.isna(minus_di.iloc[-1]) else 25
-    
-    atr = calculate_atr(df)
-    current_atr = atr.iloc[-1] if not pd.isna(atr.iloc[-1]) else 0
-    
-    rsi_divergence = detect_rsi_divergence(df, rsi)
-    macd_divergence = detect_macd_divergence(df, macd_line)
-    
-    bullish_signals = 0
-    bearish_signals = 0
-    neutral_signals = 0
-    total_weight = 0
-    
-    signal_details = {
-        "bullish": [],
-        "bearish": [],
-        "neutral": []
-    }
-    
-    weight = 2
-    total_weight += weight
-    if current_price > ema20.iloc[-1] and current_price > ema50.iloc[-1]:
-        bullish_signals += weight
-        signal_details["bullish"].append("Harga di atas EMA20 & EMA50")
-    elif current_price < ema20.iloc[-1] and current_price < ema50.iloc[-1]:
-        bearish_signals += weight
-        signal_details["bearish"].append("Harga di bawah EMA20 & EMA50")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append("Harga di antara EMA20 & EMA50")
-    
-    if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]):
-        weight = 1.5
-        total_weight += weight
-        if current_price > ema200.iloc[-1]:
-            bullish_signals += weight
-            signal_details["bullish"].append("Harga di atas EMA200 (tren jangka panjang bullish)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("Harga di bawah EMA200 (tren jangka panjang bearish)")
-    
-    weight = 1.5
-    total_weight += weight
-    if ema20.iloc[-1] > ema50.iloc[-1]:
-        if ema20.iloc[-2] <= ema50.iloc[-2]:
-            bullish_signals += weight * 1.5
-            signal_details["bullish"].append("Golden Cross EMA20/EMA50 (sinyal kuat)")
-        else:
-            bullish_signals += weight
-            signal_details["bullish"].append("EMA20 di atas EMA50")
-    else:
-        if ema20.iloc[-2] >= ema50.iloc[-2]:
-            bearish_signals += weight * 1.5
-            signal_details["bearish"].append("Death Cross EMA20/EMA50 (sinyal kuat)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("EMA20 di bawah EMA50")
-    
-    weight = 2
-    total_weight += weight
-    if current_rsi < 30:
-        bullish_signals += weight
-        signal_details["bullish"].append(f"RSI oversold ({current_rsi:.1f})")
-    elif current_rsi > 70:
-        bearish_signals += weight
-        signal_details["bearish"].append(f"RSI overbought ({current_rsi:.1f})")
-    elif current_rsi > 50:
-        bullish_signals += weight * 0.5
-        signal_details["bullish"].append(f"RSI bullish zone ({current_rsi:.1f})")
-    else:
-        bearish_signals += weight * 0.5
-        signal_details["bearish"].append(f"RSI bearish zone ({current_rsi:.1f})")
-    
-    weight = 2
-    total_weight += weight
-    if current_macd > current_signal:
-        if macd_line.iloc[-2] <= signal_line.iloc[-2]:
-            bullish_signals += weight * 1.5
-            signal_details["bullish"].append("MACD Bullish Crossover (sinyal beli)")
-        else:
-            bullish_signals += weight
-            signal_details["bullish"].append("MACD di atas Signal Line")
-    else:
-        if macd_line.iloc[-2] >= signal_line.iloc[-2]:
-            bearish_signals += weight * 1.5
-            signal_details["bearish"].append("MACD Bearish Crossover (sinyal jual)")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append("MACD di bawah Signal Line")
-    
-    weight = 1
-    total_weight += weight
-    if current_hist > 0 and current_hist > prev_hist:
-        bullish_signals += weight
-        signal_details["bullish"].append("MACD histogram meningkat (momentum bullish)")
-    elif current_hist < 0 and current_hist < prev_hist:
-        bearish_signals += weight
-        signal_details["bearish"].append("MACD histogram menurun (momentum bearish)")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append("MACD histogram netral")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_price <= bb_lower.iloc[-1]:
-        bullish_signals += weight
-        signal_details["bullish"].append("Harga di bawah Lower Bollinger Band (oversold)")
-    elif current_price >= bb_upper.iloc[-1]:
-        bearish_signals += weight
-        signal_details["bearish"].append("Harga di atas Upper Bollinger Band (overbought)")
-    else:
-        bb_position = (current_price - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
-        if bb_position < 0.3:
-            bullish_signals += weight * 0.5
-            signal_details["bullish"].append("Harga mendekati Lower BB")
-        elif bb_position > 0.7:
-            bearish_signals += weight * 0.5
-            signal_details["bearish"].append("Harga mendekati Upper BB")
-        else:
-            neutral_signals += weight
-            signal_details["neutral"].append("Harga di tengah Bollinger Bands")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_stoch_k < 20:
-        bullish_signals += weight
-        signal_details["bullish"].append(f"Stochastic RSI oversold ({current_stoch_k:.1f})")
-    elif current_stoch_k > 80:
-        bearish_signals += weight
-        signal_details["bearish"].append(f"Stochastic RSI overbought ({current_stoch_k:.1f})")
-    elif current_stoch_k > current_stoch_d:
-        bullish_signals += weight * 0.5
-        signal_details["bullish"].append("Stochastic RSI bullish")
-    else:
-        bearish_signals += weight * 0.5
-        signal_details["bearish"].append("Stochastic RSI bearish")
-    
-    weight = 1.5
-    total_weight += weight
-    if current_adx > 25:
-        if current_plus_di > current_minus_di:
-            bullish_signals += weight
-            signal_details["bullish"].append(f"ADX kuat ({current_adx:.1f}) dengan +DI dominan")
-        else:
-            bearish_signals += weight
-            signal_details["bearish"].append(f"ADX kuat ({current_adx:.1f}) dengan -DI dominan")
-    else:
-        neutral_signals += weight
-        signal_details["neutral"].append(f"ADX lemah ({current_adx:.1f}) - tren tidak jelas")
-    
-    weight = 2
-    if rsi_divergence == "bullish":
-        bullish_signals += weight
-        signal_details["bullish"].append("RSI Bullish Divergence terdeteksi (sinyal reversal)")
-    elif rsi_divergence == "bearish":
-        bearish_signals += weight
-        signal_details["bearish"].append("RSI Bearish Divergence terdeteksi (sinyal reversal)")
-    
-    if macd_divergence == "bullish":
-        bullish_signals += weight
-        signal_details["bullish"].append("MACD Bullish Divergence terdeteksi")
-    elif macd_divergence == "bearish":
-        bearish_signals += weight
-        signal_details["bearish"].append("MACD Bearish Divergence terdeteksi")
-    
-    total_signals = bullish_signals + bearish_signals + neutral_signals
-    
-    if total_signals > 0:
-        bullish_pct = (bullish_signals / total_signals) * 100
-        bearish_pct = (bearish_signals / total_signals) * 100
-    else:
-        bullish_pct = 50
-        bearish_pct = 50
-    
-    if bullish_signals > bearish_signals * 1.3:
-        if bullish_pct >= 70:
-            signal = "STRONG_BUY"
-            confidence = "TINGGI"
-        else:
-            signal = "BUY"
-            confidence = "SEDANG"
-    elif bearish_signals > bullish_signals * 1.3:
-        if bearish_pct >= 70:
-            signal = "STRONG_SELL"
-            confidence = "TINGGI"
-        else:
-            signal = "SELL"
-            confidence = "SEDANG"
-    else:
-        signal = "HOLD"
-        confidence = "RENDAH"
-    
-    trend_strength = "TIDAK JELAS"
-    if current_adx > 40:
-        trend_strength = "SANGAT KUAT"
-    elif current_adx > 25:
-        trend_strength = "KUAT"
-    elif current_adx > 20:
-        trend_strength = "SEDANG"
-    else:
-        trend_strength = "LEMAH"
-    
-    if current_price > ema20.iloc[-1] > ema50.iloc[-1]:
-        trend_direction = "UPTREND"
-    elif current_price < ema20.iloc[-1] < ema50.iloc[-1]:
-        trend_direction = "DOWNTREND"
-    else:
-        trend_direction = "SIDEWAYS"
-    
-    atr_pct = (current_atr / current_price) * 100 if current_price > 0 else 0
-    
-    return {
-        "signal": signal,
-        "confidence": confidence,
-        "bullish_score": bullish_signals,
-        "bearish_score": bearish_signals,
-        "neutral_score": neutral_signals,
-        "bullish_pct": bullish_pct,
-        "bearish_pct": bearish_pct,
-        "trend_direction": trend_direction,
-        "trend_strength": trend_strength,
-        "adx": current_adx,
-        "rsi": current_rsi,
-        "stoch_rsi": current_stoch_k,
-        "atr": current_atr,
-        "atr_pct": atr_pct,
-        "rsi_divergence": rsi_divergence,
-        "macd_divergence": macd_divergence,
-        "signal_details": signal_details,
-        "ema20": ema20.iloc[-1],
-        "ema50": ema50.iloc[-1],
-        "ema200": ema200.iloc[-1] if len(ema200) > 0 and not pd.isna(ema200.iloc[-1]) else None,
-        "bb_upper": bb_upper.iloc[-1],
-        "bb_lower": bb_lower.iloc[-1],
-        "bb_middle": bb_middle.iloc[-1],
-        "macd": current_macd,
-        "macd_signal": current_signal,
-        "macd_hist": current_hist
-    }
-
-
-def generate_chart(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
-    """Generate chart candlestick dengan RSI, MACD, Bollinger Bands, Fibonacci, Stochastic RSI, dan EMA200"""
-    if not data:
-        return None
-    
-    try:
-        ohlc = []
-        for item in data:
-            ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
-            ohlc.append([
-                ts,
-                float(item[1]),
-                float(item[3]),
-                float(item[4]),
-                float(item[2]),
-                float(item[5])
-            ])
-        
-        df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
-        df.set_index("Date", inplace=True)
-
-        mc = mpf.make_marketcolors(
-            up='#00AA00', down='#FF0000',
-            wick={'up': '#00AA00', 'down': '#FF0000'},
-            volume={'up': '#00AA00', 'down': '#FF0000'}
-        )
-        style = mpf.make_mpf_style(
-            marketcolors=mc,
-            gridstyle=':',
-            gridcolor='#cccccc',
-            facecolor='#f5f5f5',
-            edgecolor='#666666'
-        )
-
-        ema20 = df['Close'].ewm(span=20, adjust=False).mean()
-        ema50 = df['Close'].ewm(span=50, adjust=False).mean()
-        ema200 = df['Close'].ewm(span=200, adjust=False).mean()
-        
-        bb_upper, bb_middle, bb_lower = calculate_bollinger_bands(df['Close'])
-        
-        rsi = calculate_rsi(df['Close'])
-        rsi_overbought = pd.Series([70] * len(df), index=df.index)
-        rsi_oversold = pd.Series([30] * len(df), index=df.index)
-        rsi_middle = pd.Series([50] * len(df), index=df.index)
-        
-        stoch_k, stoch_d = calculate_stochastic_rsi(df['Close'])
-        stoch_overbought = pd.Series([80] * len(df), index=df.index)
-        stoch_oversold = pd.Series([20] * len(df), index=df.index)
-        
-        macd_line, signal_line, macd_histogram = calculate_macd(df['Close'])
-        
-        fib_levels = calculate_fibonacci_levels(df)
-        fib_236 = pd.Series([fib_levels['23.6%']] * len(df), index=df.index)
-        fib_382 = pd.Series([fib_levels['38.2%']] * len(df), index=df.index)
-        fib_500 = pd.Series([fib_levels['50.0%']] * len(df), index=df.index)
-        fib_618 = pd.Series([fib_levels['61.8%']] * len(df), index=df.index)
-        
-        macd_colors = ['#00AA00' if val >= 0 else '#FF0000' for val in macd_histogram]
-        
-        addplots = [
-            mpf.make_addplot(ema20, color='blue', width=1.2),
-            mpf.make_addplot(ema50, color='orange', width=1.2),
-            mpf.make_addplot(ema200, color='red', width=1.5, linestyle='-'),
-            
-            mpf.make_addplot(bb_upper, color='purple', width=0.8, linestyle='--'),
-            mpf.make_addplot(bb_middle, color='purple', width=0.5, linestyle=':'),
-            mpf.make_addplot(bb_lower, color='purple', width=0.8, linestyle='--'),
-            
-            mpf.make_addplot(fib_236, color='#FFD700', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_382, color='#FFA500', width=0.5, linestyle='-.'),
-            mpf.make_addplot(fib_500, color='#FF6347', width=0.7, linestyle='-.'),
-            mpf.make_addplot(fib_618, color='#FF4500', width=0.5, linestyle='-.'),
-            
-            mpf.make_addplot(rsi, panel=2, color='#9C27B0', width=1.2, ylabel='RSI'),
-            mpf.make_addplot(rsi_overbought, panel=2, color='red', width=0.5, linestyle='--'),
-            mpf.make_addplot(rsi_oversold, panel=2, color='green', width=0.5, linestyle='--'),
-            mpf.make_addplot(rsi_middle, panel=2, color='gray', width=0.3, linestyle=':'),
-            
-            mpf.make_addplot(stoch_k, panel=3, color='#2196F3', width=1.2, ylabel='Stoch RSI'),
-            mpf.make_addplot(stoch_d, panel=3, color='#FF9800', width=1),
-            mpf.make_addplot(stoch_overbought, panel=3, color='red', width=0.5, linestyle='--'),
-            mpf.make_addplot(stoch_oversold, panel=3, color='green', width=0.5, linestyle='--'),
-            
-            mpf.make_addplot(macd_line, panel=4, color='blue', width=1, ylabel='MACD'),
-            mpf.make_addplot(signal_line, panel=4, color='red', width=1),
-            mpf.make_addplot(macd_histogram, panel=4, type='bar', color=macd_colors, width=0.7),
-        ]
-
-        if market_type == "crypto":
-            ylabel = "Harga (USDT)"
-        else:
-            ylabel = "Harga"
-
-        mpf.plot(
-            df, type='candle', volume=True, style=style,
-            ylabel=ylabel,
-            ylabel_lower="Volume",
-            savefig=dict(fname=filename, dpi=150, bbox_inches='tight'),
-            figratio=(16, 14),
-            figscale=1.5,
-            tight_layout=True,
-            addplot=addplots,
-            warn_too_much_data=500,
-            panel_ratios=(6, 2, 1.5, 1.5, 1.5)
-        )
-        
-        log_success(f"Chart {symbol} ({tf}) dibuat")
-        return filename
-        
-    except Exception:
-        return None
-
-
-def generate_chart_with_confluence(data, filename="chart.png", symbol="BTC", tf="15min", market_type="crypto"):
-    """Generate chart dan hitung confluence score"""
-    if not data:
-        return None, None
-    
-    try:
-        ohlc = []
-        for item in data:
-            ts = datetime.fromtimestamp(int(item[0]), tz=tz("Asia/Jakarta"))
-            ohlc.append([
-                ts,
-                float(item[1]),
-                float(item[3]),
-                float(item[4]),
-                float(item[2]),
-                float(item[5])
-            ])
-        
-        df = pd.DataFrame(ohlc, columns=["Date", "Open", "High", "Low", "Close", "Volume"])
-        df.set_index("Date", inplace=True)
-        
-        confluence = calculate_confluence_score(df, market_type)
-        
-        chart_path = generate_chart(data, filename, symbol, tf, market_type)
-        
-        return chart_path, confluence
-        
-    except Exception:
-        return None, None
-
-
-def get_timeframe_context(interval):
-    """Mendapatkan konteks berdasarkan timeframe untuk analisa yang lebih akurat"""
-    timeframe_configs = {
-        "1min": {
-            "name": "1 Menit",
-            "type": "Scalping",
-            "tp_range": "0.1% - 0.3%",
-            "sl_range": "0.05% - 0.15%",
-            "hold_time": "1-15 menit",
-            "volatility": "sangat tinggi",
-            "reliability": "rendah (noise tinggi)",
-            "rr_ratio": "1:1 hingga 1:2",
-            "next_candle": "1 menit ke depan",
-            "prediction_horizon": "1-5 menit"
-        },
-        "5min": {
-            "name": "5 Menit",
-            "type": "Scalping",
-            "tp_range": "0.2% - 0.5%",
-            "sl_range": "0.1% - 0.25%",
-            "hold_time": "5-30 menit",
-            "volatility": "tinggi",
-            "reliability": "rendah-sedang",
-            "rr_ratio": "1:1.5 hingga 1:2",
-            "next_candle": "5 menit ke depan",
-            "prediction_horizon": "5-15 menit"
-        },
-        "15min": {
-            "name": "15 Menit",
-            "type": "Intraday",
-            "tp_range": "0.3% - 0.8%",
-            "sl_range": "0.15% - 0.4%",
-            "hold_time": "15 menit - 2 jam",
-            "volatility": "sedang-tinggi",
-            "reliability": "sedang",
-            "rr_ratio": "1:1.5 hingga 1:2.5",
-            "next_candle": "15 menit ke depan",
-            "prediction_horizon": "15-45 menit"
-        },
-        "30min": {
-            "name": "30 Menit",
-            "type": "Intraday",
-            "tp_range": "0.5% - 1.2%",
-            "sl_range": "0.25% - 0.6%",
-            "hold_time": "30 menit - 4 jam",
-            "volatility": "sedang",
-            "reliability": "sedang-baik",
-            "rr_ratio": "1:2 hingga 1:3",
-            "next_candle": "30 menit ke depan",
-            "prediction_horizon": "30-90 menit"
-        },
-        "1hour": {
-            "name": "1 Jam",
-            "type": "Swing Trading",
-            "tp_range": "1% - 2.5%",
-            "sl_range": "0.5% - 1.2%",
-            "hold_time": "2-24 jam",
-            "volatility": "sedang",
-            "reliability": "baik",
-            "rr_ratio": "1:2 hingga 1:3",
-            "next_candle": "1 jam ke depan",
-            "prediction_horizon": "1-4 jam"
-        },
-        "4hour": {
-            "name": "4 Jam",
-            "type": "Swing Trading",
-            "tp_range": "2% - 5%",
-            "sl_range": "1% - 2.5%",
-            "hold_time": "1-7 hari",
-            "volatility": "sedang-rendah",
-            "reliability": "baik-sangat baik",
-            "rr_ratio": "1:2 hingga 1:4",
-            "next_candle": "4 jam ke depan",
-            "prediction_horizon": "4-12 jam"
-        },
-        "1day": {
-            "name": "Harian",
-            "type": "Position Trading",
-            "tp_range": "3% - 10%",
-            "sl_range": "1.5% - 5%",
-            "hold_time": "3-30 hari",
-            "volatility": "rendah",
-            "reliability": "sangat baik",
-            "rr_ratio": "1:2 hingga 1:5",
-            "next_candle": "1 hari ke depan",
-            "prediction_horizon": "1-3 hari"
-        },
-        "1week": {
-            "name": "Mingguan",
-            "type": "Position/Investment",
-            "tp_range": "5% - 20%",
-            "sl_range": "3% - 10%",
-            "hold_time": "2-12 minggu",
-            "volatility": "sangat rendah",
-            "reliability": "sangat baik (tren utama)",
-            "rr_ratio": "1:2 hingga 1:5",
-            "next_candle": "1 minggu ke depan",
-            "prediction_horizon": "1-4 minggu"
-        }
-    }
-    return timeframe_configs.get(interval, timeframe_configs["1hour"])
-
-
-def analyze_with_gemini(image_path, symbol, market_type="crypto", interval="1hour", confluence=None):
-    """Analisa chart menggunakan Gemini Vision API dengan konteks timeframe dan confluence score"""
-    if not GEMINI_API_KEY:
-        return "GEMINI_API_KEY tidak ditemukan. Silakan set environment variable terlebih dahulu."
-    
-    if interval not in INTERVAL_MAP:
-        logger.warning(f"Interval tidak valid: {interval}, menggunakan default 1hour")
-        interval = "1hour"
-    
-    try:
-        with open(image_path, "rb") as f:
-            img_b64 = base64.b64encode(f.read()).decode("utf-8")
-    except FileNotFoundError:
-        return f"File tidak ditemukan: {image_path}"
-    except Exception as e:
-        return f"Error membaca file: {e}"
-
-    if market_type == "crypto":
-        coin_info = SUPPORTED_COINS.get(symbol, {"name": symbol})
-        asset_name = f"{symbol}/USDT ({coin_info.get('name', symbol)})"
-    else:
-        pair_info = FOREX_PAIRS.get(symbol, {"name": symbol})
-        asset_name = f"{symbol} ({pair_info.get('name', symbol)})"
-
-    tf_context = get_timeframe_context(interval)
-    
-    confluence_context = ""
-    if confluence:
-        bullish_details = "\n  - ".join(confluence['signal_details']['bullish'][:5]) if confluence['signal_details']['bullish'] else "Tidak ada"
-        bearish_details = "\n  - ".join(confluence['signal_details']['bearish'][:5]) if confluence['signal_details']['bearish'] else "Tidak ada"
-        
-        ema200_str = f"{confluence['ema200']:.4f}" if confluence['ema200'] else "N/A"
-        adx_status = "(Tren Kuat)" if confluence['adx'] > 25 else "(Tren Lemah)"
-        rsi_status = "(Overbought - Potensi Turun)" if confluence['rsi'] > 70 else "(Oversold - Potensi Naik)" if confluence['rsi'] < 30 else "(Netral)"
-        stoch_status = "(Overbought)" if confluence['stoch_rsi'] > 80 else "(Oversold)" if confluence['stoch_rsi'] < 20 else "(Netral)"
-        rsi_div_status = "(Sinyal Reversal Kuat!)" if confluence['rsi_divergence'] != 'none' else ""
-        macd_div_status = "(Sinyal Reversal Kuat!)" if confluence['macd_divergence'] != 'none' else ""
-        
-        confluence_context = f"""
-DATA ANALISA KUANTITATIF (SUDAH DIHITUNG):
-- Sinyal Sistem: {confluence['signal']} (Keyakinan: {confluence['confidence']})
-- Skor Bullish: {confluence['bullish_pct']:.1f}% | Skor Bearish: {confluence['bearish_pct']:.1f}%
-- Arah Tren: {confluence['trend_direction']} | Kekuatan Tren: {confluence['trend_strength']}
-- ADX (Kekuatan Tren): {confluence['adx']:.1f} {adx_status}
-- RSI: {confluence['rsi']:.1f} {rsi_status}
-- Stochastic RSI: {confluence['stoch_rsi']:.1f} {stoch_status}
-- ATR (Volatilitas): {confluence['atr']:.4f} ({confluence['atr_pct']:.2f}% dari harga)
-- RSI Divergence: {confluence['rsi_divergence'].upper()} {rsi_div_status}
-- MACD Divergence: {confluence['macd_divergence'].upper()} {macd_div_status}
-- EMA20: {confluence['ema20']:.4f} | EMA50: {confluence['ema50']:.4f} | EMA200: {ema200_str}
-- Bollinger Upper: {confluence['bb_upper']:.4f} | Middle: {confluence['bb_middle']:.4f} | Lower: {confluence['bb_lower']:.4f}
-- MACD: {confluence['macd']:.6f} | Signal: {confluence['macd_signal']:.6f} | Histogram: {confluence['macd_hist']:.6f}
-
-SINYAL BULLISH TERDETEKSI:
-  - {bullish_details}
-
-SINYAL BEARISH TERDETEKSI:
-  - {bearish_details}
-"""
-
-    prompt = f"""Kamu adalah analis teknikal profesional dengan pengalaman 15+ tahun. Analisa chart candlestick {asset_name} pada timeframe {tf_context['name']} dengan SANGAT TELITI.
-
-KONTEKS TIMEFRAME {tf_context['name'].upper()}:
-- Tipe Trading: {tf_context['type']}
-- Target Profit Wajar: {tf_context['tp_range']} dari harga entry
-- Stop Loss Wajar: {tf_context['sl_range']} dari harga entry (Gunakan 1.5-2x ATR untuk presisi)
-- Estimasi Waktu Hold: {tf_context['hold_time']}
-- Volatilitas: {tf_context['volatility']}
-- Keandalan Sinyal: {tf_context['reliability']}
-- Rasio Risk:Reward Minimal: {tf_context['rr_ratio']}
-- Horizon Prediksi: {tf_context['next_candle']} ({tf_context['prediction_horizon']})
-{confluence_context}
-INDIKATOR PADA CHART (5 Panel):
-1. Panel Utama - Price Action:
-   - EMA 20 (biru) - tren jangka pendek
-   - EMA 50 (orange) - tren jangka menengah  
-   - EMA 200 (merah tebal) - tren jangka panjang PENTING
-   - Bollinger Bands (ungu putus-putus) - volatilitas dan overbought/oversold
-   - Fibonacci Retracement (kuning-orange) - level support/resistance kunci
-
-2. Panel RSI (14):
-   - Level 70 = Overbought (potensi koreksi turun)
-   - Level 30 = Oversold (potensi bounce naik)
-   - Level 50 = Garis tengah (konfirmasi tren)
-
-3. Panel Stochastic RSI:
-   - Garis K (biru) dan D (orange)
-   - Level 80 = Overbought ekstrem
-   - Level 20 = Oversold ekstrem
-   - Cross bullish/bearish = sinyal entry
-
-4. Panel MACD:
-   - MACD line (biru) vs Signal line (merah)
-   - Histogram hijau = momentum bullish
-   - Histogram merah = momentum bearish
-   - Crossover = sinyal penting
-
-METODOLOGI ANALISA MULTI-KONFLUENSI:
-1. TREN PRIMER: Tentukan arah tren dari EMA20/50/200 dan posisi harga relatif
-2. MOMENTUM: Konfirmasi dengan RSI, Stochastic RSI, dan MACD
-3. DIVERGENCE: Perhatikan RSI/MACD divergence untuk sinyal reversal
-4. VOLATILITAS: Gunakan Bollinger Bands dan ATR untuk placement SL/TP
-5. SUPPORT/RESISTANCE: Kombinasikan Fibonacci dengan high/low sebelumnya
-6. KONFIRMASI: Minimal 3 dari 5 indikator harus setuju untuk sinyal kuat
-
-ATURAN KETAT:
-- Jika ADX < 20: Pasar ranging, JANGAN trade melawan batas range
-- Jika RSI > 70 DAN Stoch RSI > 80: SANGAT OVERBOUGHT, risiko koreksi tinggi
-- Jika RSI < 30 DAN Stoch RSI < 20: SANGAT OVERSOLD, potensi bounce
-- Jika ada Divergence: Prioritaskan sinyal divergence di atas indikator lain
-- Jika harga di bawah EMA200: Tren primer bearish, hati-hati long
-- Jika harga di atas EMA200: Tren primer bullish, hati-hati short
-- Pastikan RR minimal 1:2 untuk setiap trade
-
-Berikan analisa dalam format LENGKAP berikut (Bahasa Indonesia):
-
-PREDIKSI {tf_context['next_candle'].upper()}: [NAIK/TURUN/SIDEWAYS] - Keyakinan [Tinggi/Sedang/Rendah] - [Alasan spesifik berdasarkan 2-3 indikator utama]
-
-PERKIRAAN PERGERAKAN: Dalam {tf_context['prediction_horizon']}, harga diperkirakan [naik/turun/sideways] dari [harga saat ini] menuju [target spesifik] dengan probabilitas [persentase berdasarkan konfluensi]
-
-SINYAL: [STRONG BUY/BUY/HOLD/SELL/STRONG SELL] - [Penjelasan mengapa, sebutkan minimal 3 indikator pendukung]
-
-KEKUATAN SINYAL: [X dari 8 indikator mendukung] - [daftar indikator yang setuju]
-
-HARGA SAAT INI: [Harga terakhir dari chart - HARUS AKURAT]
-HARGA MASUK IDEAL: [Harga entry optimal - bisa sama dengan harga saat ini atau tunggu pullback]
-
-TARGET PROFIT 1: [TP1 dengan persentase dari entry - target konservatif]
-TARGET PROFIT 2: [TP2 dengan persentase dari entry - target moderat]  
-TARGET PROFIT 3: [TP3 dengan persentase dari entry - target ambisius jika tren kuat]
-
-STOP LOSS: [Harga SL berdasarkan ATR dan support/resistance - WAJIB dengan jarak yang jelas]
-RASIO RR: [Risk:Reward ratio yang tepat, minimal 1:2]
-POTENSI PROFIT: [Persentase potensi profit jika TP1 tercapai]
-POTENSI LOSS: [Persentase potensi loss jika SL terkena]
-
-WAKTU HOLD: {tf_context['hold_time']}
-
-ANALISA TEKNIKAL DETAIL:
-POLA CANDLESTICK: [Pola yang teridentifikasi dan implikasinya]
-TREN EMA: [Posisi EMA20 vs EMA50 vs EMA200 dan maknanya]
-KONDISI RSI: [Nilai RSI, kondisi, dan apakah ada divergence]
-KONDISI STOCH RSI: [Nilai K/D, cross, dan kondisi overbought/oversold]
-KONDISI MACD: [Posisi MACD vs Signal, histogram, dan momentum]
-POSISI BOLLINGER: [Dimana harga relatif terhadap BB dan apakah ada squeeze]
-LEVEL FIBONACCI: [Level Fib aktif saat ini dan target berikutnya]
-
-SUPPORT KUNCI:
-- S1: [Level support pertama - terdekat]
-- S2: [Level support kedua]
-- S3: [Level support kuat jika breakdown]
-
-RESISTANCE KUNCI:
-- R1: [Level resistance pertama - terdekat]
-- R2: [Level resistance kedua]
-- R3: [Level resistance kuat jika breakout]
-
-PERINGATAN RISIKO: [Sebutkan skenario yang bisa membatalkan analisa ini]
-
-KESIMPULAN: Dalam {tf_context['next_candle']}, harga {asset_name} diprediksi [NAIK/TURUN/SIDEWAYS] dengan keyakinan [tinggi/sedang/rendah] karena [alasan utama 2-3 kalimat yang jelas dan spesifik berdasarkan konfluensi indikator].
-
-CATATAN: Berikan angka SPESIFIK dan PRESISI berdasarkan chart. JANGAN menebak - baca nilai dari chart dengan teliti. Target dan SL harus REALISTIS sesuai timeframe {tf_context['name']}."""
-
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-    
-    payload = {
-        "contents": [{
-            "role": "user",
-            "parts": [
-                {"text": prompt},
-                {"inline_data": {"mime_type": "image/png", "data": img_b64}}
-            ]
-        }],
-        "generationConfig": {
-            "temperature": 0.2,
-            "topP": 0.85,
-            "maxOutputTokens": 2048
-        }
-    }
-    
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        log_analysis(f"Menganalisa {symbol} dengan AI (Enhanced)...")
-        response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=90)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            if "candidates" in result and len(result["candidates"]) > 0:
-                candidate = result["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    text = candidate["content"]["parts"][0].get("text", "")
-                    if text:
-                        log_success(f"Analisa {symbol} selesai (Enhanced)")
-                        return text
-            
-            return "Format respons Gemini tidak sesuai. Coba lagi."
-            
-        elif response.status_code == 400:
-            error_detail = response.json()
-            return f"Error: Request tidak valid - {error_detail.get('error', {}).get('message', 'Tidak diketahui')}"
-            
-        elif response.status_code == 403:
-            return "Error: API key tidak valid atau tidak memiliki akses"
-            
-        elif response.status_code == 429:
-            return "Error: Batas permintaan tercapai. Tunggu beberapa saat dan coba lagi."
-            
-        else:
-            return f"Error dari Gemini API (status: {response.status_code})"
-            
-    except requests.exceptions.Timeout:
-        return "Timeout saat menghubungi Gemini API. Coba lagi."
-    except requests.exceptions.RequestException as e:
-        return f"Error koneksi: {e}"
-    except Exception as e:
-        return f"Error: {e}"
-
-
-def extract_signal_from_analysis(text):
-    """Mengekstrak sinyal trading dari hasil analisa Gemini"""
-    if not text or text.startswith("Error") or text.startswith("Timeout"):
-        return None, None
-    
-    text_upper = text.upper()
-    
-    signal_patterns = [
-        (r'SINYAL[:\s]*\*?\[?(STRONG[\s_]?BUY)\]?\*?', 'STRONG_BUY'),
-        (r'SINYAL[:\s]*\*?\[?(STRONG[\s_]?SELL)\]?\*?', 'STRONG_SELL'),
-        (r'SINYAL[:\s]*\*?\[?(BUY)\]?\*?', 'BUY'),
-        (r'SINYAL[:\s]*\*?\[?(SELL)\]?\*?', 'SELL'),
-        (r'SINYAL[:\s]*\*?\[?(HOLD|NETRAL|NEUTRAL)\]?\*?', 'HOLD'),
-        (r'SIGNAL[:\s]*\*?\[?(STRONG[\s_]?BUY)\]?\*?', 'STRONG_BUY'),
-        (r'SIGNAL[:\s]*\*?\[?(STRONG[\s_]?SELL)\]?\*?', 'STRONG_SELL'),
-        (r'SIGNAL[:\s]*\*?\[?(BUY)\]?\*?', 'BUY'),
-        (r'SIGNAL[:\s]*\*?\[?(SELL)\]?\*?', 'SELL'),
-        (r'SIGNAL[:\s]*\*?\[?(HOLD|NETRAL|NEUTRAL)\]?\*?', 'HOLD'),
-        (r'\[STRONG[\s_]?BUY\]', 'STRONG_BUY'),
-        (r'\[STRONG[\s_]?SELL\]', 'STRONG_SELL'),
-        (r'\[BUY\]', 'BUY'),
-        (r'\[SELL\]', 'SELL'),
-        (r'\[HOLD\]', 'HOLD'),
-        (r'REKOMENDASI[:\s]*\*?(STRONG[\s_]?BUY)\*?', 'STRONG_BUY'),
-        (r'REKOMENDASI[:\s]*\*?(STRONG[\s_]?SELL)\*?', 'STRONG_SELL'),
-        (r'REKOMENDASI[:\s]*\*?(BUY|BELI)\*?', 'BUY'),
-        (r'REKOMENDASI[:\s]*\*?(SELL|JUAL)\*?', 'SELL'),
-        (r'REKOMENDASI[:\s]*\*?(HOLD|TAHAN|NETRAL)\*?', 'HOLD'),
-        (r'AKSI[:\s]*\*?(STRONG[\s_]?BUY)\*?', 'STRONG_BUY'),
-        (r'AKSI[:\s]*\*?(STRONG[\s_]?SELL)\*?', 'STRONG_SELL'),
-        (r'AKSI[:\s]*\*?(BUY|BELI)\*?', 'BUY'),
-        (r'AKSI[:\s]*\*?(SELL|JUAL)\*?', 'SELL'),
-        (r'AKSI[:\s]*\*?(HOLD|TAHAN)\*?', 'HOLD'),
-    ]
-    
-    for pattern, signal in signal_patterns:
-        match = re.search(pattern, text_upper)
-        if match:
-            signal_emoji = {
-                "STRONG_BUY": "🟢🟢", 
-                "BUY": "🟢", 
-                "HOLD": "🟡", 
-                "SELL": "🔴", 
-                "STRONG_SELL": "🔴🔴"
-            }.get(signal, "⚪")
-            
-            signal_display = signal.replace("_", " ")
-            log_info(f"Signal ditemukan: {signal} dari pattern: {pattern}")
-            return signal, f"{signal_emoji} Sinyal AI: {signal_display}"
-    
-    if "STRONG BUY" in text_upper or "STRONG_BUY" in text_upper:
-        return "STRONG_BUY", "🟢🟢 Sinyal AI: STRONG BUY"
-    elif "STRONG SELL" in text_upper or "STRONG_SELL" in text_upper:
-        return "STRONG_SELL", "🔴🔴 Sinyal AI: STRONG SELL"
-    elif "BUY" in text_upper or "BELI" in text_upper:
-        return "BUY", "🟢 Sinyal AI: BUY"
-    elif "SELL" in text_upper or "JUAL" in text_upper:
-        return "SELL", "🔴 Sinyal AI: SELL"
-    elif "HOLD" in text_upper or "TAHAN" in text_upper or "NETRAL" in text_upper:
-        return "HOLD", "🟡 Sinyal AI: HOLD"
-    
-    log_warning(f"Tidak dapat menemukan sinyal dalam analisa. Text (100 karakter pertama): {text[:100]}")
-    return None, None
-
-
 def extract_price_from_analysis(text):
     """Mengekstrak harga saat ini dari hasil analisa Gemini"""
+    if isinstance(text, AnalysisResult):
+        return text.current_price or text.entry
     if not text:
         return None
     
@@ -1922,56 +430,94 @@ def evaluate_prediction(signal, entry_price, current_price):
 
 
 def save_analysis_to_history(chat_id, symbol, market_type, interval, signal, entry_price, analysis_time):
-    """Menyimpan analisa ke history untuk verifikasi nanti (dengan waktu sinkron TradingView)"""
+    """Menyimpan analisa ke history dan menjadwalkan verifikasinya (dengan waktu sinkron TradingView)"""
     history_id = f"{chat_id}_{symbol}_{interval}_{int(analysis_time.timestamp())}"
     
     sync_info = format_sync_time_info(interval)
+    store = get_history_store()
     
-    analysis_history[history_id] = {
+    store.set(f"history:{history_id}", {
         "chat_id": chat_id,
         "symbol": symbol,
         "market_type": market_type,
         "interval": interval,
         "signal": signal,
         "entry_price": entry_price,
-        "analysis_time": analysis_time,
-        "check_time": sync_info["next_close_wib"],
+        "analysis_time": analysis_time.isoformat(),
+        "check_time": sync_info["next_close_wib"].isoformat(),
         "sync_time_utc": sync_info["formatted_utc"],
         "sync_time_wib": sync_info["formatted_wib"],
         "verified": False
-    }
+    }, ttl=HISTORY_TTL)
+    store.set(f"verify:{history_id}", {
+        "history_id": history_id,
+        "chat_id": chat_id,
+        "check_at": time.time() + sync_info["delay_seconds"],
+        "sync_time_utc": sync_info["formatted_utc"],
+        "sync_time_wib": sync_info["formatted_wib"],
+    }, ttl=HISTORY_TTL)
     
-    log_info(f"History disimpan: {history_id} - Signal: {signal}, Entry: {entry_price}")
-    log_info(f"Candle close sync: {sync_info['formatted_wib']} / {sync_info['formatted_utc']}")
+    log_info("History disimpan: %s - Signal: %s, Entry: %s", history_id, signal, entry_price)
+    log_info("Candle close sync: %s / %s", sync_info['formatted_wib'], sync_info['formatted_utc'])
     return history_id
 
 
+@leader_only(verification_leader)
 async def verify_analysis_job(context: ContextTypes.DEFAULT_TYPE):
-    """Job untuk memverifikasi analisa setelah candle close (tersinkronisasi dengan TradingView)"""
-    log_info("=== VERIFY JOB STARTED (TRADINGVIEW SYNC) ===")
+    """Job singleton (hanya di leader): verifikasi setiap analisa yang candle-nya sudah close"""
+    store = get_history_store()
+    now = time.time()
+    for key in store.keys("verify:"):
+        if not verification_leader.is_leader:
+            return
+        pending = store.get(key)
+        if not pending or pending["check_at"] > now:
+            continue
+        
+        # Klaim atomik sebelum mengirim: leader lain yang membaca entri yang sama gagal mengambil lease ini,
+        # dan entri sudah hilang dari antrean saat klaim itu kedaluwarsa
+        claim = f"claim:{key}"
+        if not store.acquire_lease(claim, verification_leader.owner, VERIFY_CLAIM_SECONDS):
+            continue
+        if not store.get(key):
+            continue
+        store.delete(key)
+        
+        if not await verify_analysis(context.bot, pending):
+            attempts = pending.get("attempts", 0) + 1
+            if attempts < VERIFY_MAX_ATTEMPTS:
+                retry = {**pending, "attempts": attempts, "check_at": time.time() + VERIFY_RETRY_DELAY}
+                store.set(key, retry, ttl=HISTORY_TTL)
+            else:
+                log_error("Verifikasi %s gagal %sx, dilewati", pending.get('history_id'), attempts)
+            store.release_lease(claim, verification_leader.owner)
+
+
+async def verify_analysis(bot, job_data):
+    """
+    Memverifikasi satu analisa setelah candle close (tersinkronisasi dengan TradingView).
+    False jika hasil verifikasi gagal dikirim sehingga perlu diantrekan ulang, selain itu True.
+    """
+    log_debug("=== VERIFY JOB STARTED (TRADINGVIEW SYNC) ===")
+    store = get_history_store()
     try:
-        job_data = context.job.data
         history_id = job_data.get("history_id")
         chat_id_from_job = job_data.get("chat_id")
         sync_time_utc = job_data.get("sync_time_utc", "N/A")
         sync_time_wib = job_data.get("sync_time_wib", "N/A")
         
-        current_utc = datetime.now(timezone.utc).strftime("%H:%M:%S UTC")
-        log_info(f"Job executed at: {current_utc}")
-        log_info(f"Expected sync time (UTC): {sync_time_utc}")
-        log_info(f"Expected sync time (WIB): {sync_time_wib}")
-        log_info(f"Job data: {job_data}")
-        log_info(f"History ID: {history_id}")
-        log_info(f"Analysis history keys: {list(analysis_history.keys())}")
-        
-        if not history_id or history_id not in analysis_history:
-            log_warning(f"History ID tidak ditemukan: {history_id}")
-            return
+        log_debug(
+            "Verifikasi %s dijalankan %s (sync UTC %s / WIB %s), job data: %s",
+            history_id, datetime.now(timezone.utc), sync_time_utc, sync_time_wib, job_data
+        )
         
-        record = analysis_history[history_id]
+        record = store.get(f"history:{history_id}") if history_id else None
+        if not record:
+            log_warning("History ID tidak ditemukan: %s", history_id)
+            return True
         
         if record.get("verified", False):
-            return
+            return True
         
         symbol = record.get("symbol")
         market_type = record.get("market_type", "crypto")
@@ -1981,13 +527,13 @@ async def verify_analysis_job(context: ContextTypes.DEFAULT_TYPE):
         chat_id = record.get("chat_id")
         
         if not all([symbol, signal, entry_price, chat_id]):
-            log_error(f"Data tidak lengkap untuk verifikasi: {history_id}")
+            log_error("Data tidak lengkap untuk verifikasi: %s", history_id)
             record["verified"] = True
             record["result_text"] = "DATA_TIDAK_LENGKAP"
-            return
+            store.set(f"history:{history_id}", record, ttl=HISTORY_TTL)
+            return True
         
-        log_info(f"=== FETCHING LATEST CANDLE DATA ===")
-        log_info(f"Symbol: {symbol}, Market: {market_type}, Interval: {interval}")
+        log_debug("Fetch candle terbaru: %s, market %s, interval %s", symbol, market_type, interval)
         
         if market_type == "crypto":
             current_price, candle_info = get_latest_candle_close_crypto(symbol, interval)
@@ -2001,42 +547,32 @@ async def verify_analysis_job(context: ContextTypes.DEFAULT_TYPE):
             is_closed = candle_info.get("is_closed", False)
             
             if is_fallback:
-                log_warning(f"Using FALLBACK real-time price for {symbol}")
-                log_warning(f"  - Reason: {candle_info.get('fallback_reason', 'Unknown')}")
-                log_warning(f"  - Price: ${current_price:,.4f}")
+                log_warning("Using FALLBACK real-time price for %s", symbol)
+                log_warning("  - Reason: %s", candle_info.get('fallback_reason', 'Unknown'))
+                log_warning("  - Price: $%.4f", current_price)
             else:
-                log_info(f"Candle data retrieved successfully:")
-                log_info(f"  - Close: ${current_price:,.4f}")
-                log_info(f"  - Time: {candle_info['time']}")
-                log_info(f"  - Direction: {candle_info['direction']}")
-                log_info(f"  - Is Closed: {is_closed}")
-                if 'open' in candle_info:
-                    log_info(f"  - OHLC: O=${candle_info['open']:,.4f} H=${candle_info['high']:,.4f} L=${candle_info['low']:,.4f} C=${candle_info['close']:,.4f}")
+                log_debug(
+                    "Candle %s: close %s, waktu %s, arah %s, closed %s, candle %s",
+                    symbol, current_price, candle_info['time'], candle_info['direction'], is_closed, candle_info
+                )
         else:
-            log_warning(f"No candle info available for {symbol}")
+            log_warning("No candle info available for %s", symbol)
         
         if not current_price or current_price <= 0:
-            log_error(f"Gagal mendapatkan harga terbaru untuk {symbol}")
+            log_error("Gagal mendapatkan harga terbaru untuk %s", symbol)
             try:
-                await context.bot.send_message(
+                await bot.send_message(
                     chat_id=chat_id,
                     text=f"⚠️ Verifikasi gagal untuk {symbol} - tidak bisa mendapatkan harga terbaru.",
                     parse_mode='Markdown'
                 )
             except:
                 pass
-            return
+            return True
         
         pips = calculate_pips(symbol, entry_price, current_price, market_type)
         is_correct, result_text = evaluate_prediction(signal, entry_price, current_price)
         
-        record["verified"] = True
-        record["exit_price"] = current_price
-        record["pips"] = pips
-        record["is_correct"] = is_correct
-        record["result_text"] = result_text
-        record["candle_info"] = candle_info
-        
         if pips >= 0:
             pip_display = f"+{pips:.1f} pip"
             pip_emoji = "📈"
@@ -2097,271 +633,29 @@ async def verify_analysis_job(context: ContextTypes.DEFAULT_TYPE):
 {data_source}"""
 
         try:
-            await context.bot.send_message(
+            await bot.send_message(
                 chat_id=chat_id,
                 text=verification_text,
                 parse_mode='Markdown'
             )
-            log_success(f"Verifikasi {history_id}: {result_text} ({pip_display})")
+            log_success("Verifikasi %s: %s (%s)", history_id, result_text, pip_display)
         except Exception as e:
-            log_error(f"Gagal mengirim verifikasi: {e}")
-    
-    except Exception as e:
-        log_error(f"Error dalam verify_analysis_job: {e}")
-
-
-def format_analysis_reply(text):
-    """Format hasil analisa menjadi lebih mudah dibaca"""
-    if not text or text.startswith("Error") or text.startswith("Timeout"):
-        return text
-    
-    text_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text_clean = re.sub(r'\*([^*]+)\*', r'\1', text_clean)
-    text_clean = re.sub(r'`([^`]+)`', r'\1', text_clean)
-    text_clean = re.sub(r'^\s*[-•]\s*', '', text_clean, flags=re.MULTILINE)
-    
-    section_keywords = [
-        {'keywords': ['prediksi 1 menit', 'prediksi 5 menit', 'prediksi 15 menit', 'prediksi 30 menit', 
-                      'prediksi 1 jam', 'prediksi 4 jam', 'prediksi 1 hari', 'prediksi 1 minggu',
-                      'prediksi arah', 'prediksi'], 'emoji': '🔮', 'group': 'prediction'},
-        {'keywords': ['perkiraan pergerakan', 'perkiraan'], 'emoji': '📍', 'group': 'prediction'},
-        {'keywords': ['sinyal', 'signal', 'kekuatan sinyal'], 'emoji': '📊', 'group': 'signal'},
-        {'keywords': ['harga saat ini', 'harga sekarang', 'current price'], 'emoji': '💵', 'group': 'trading'},
-        {'keywords': ['harga masuk ideal', 'harga masuk', 'entry', 'masuk'], 'emoji': '🎯', 'group': 'trading'},
-        {'keywords': ['target profit 1', 'tp1', 'tp 1'], 'emoji': '💰', 'group': 'trading'},
-        {'keywords': ['target profit 2', 'tp2', 'tp 2'], 'emoji': '💎', 'group': 'trading'},
-        {'keywords': ['target profit 3', 'tp3', 'tp 3'], 'emoji': '🏆', 'group': 'trading'},
-        {'keywords': ['target profit', 'take profit', 'target'], 'emoji': '💰', 'group': 'trading'},
-        {'keywords': ['stop loss', 'stoploss', 'sl'], 'emoji': '🛑', 'group': 'trading'},
-        {'keywords': ['rasio rr', 'rasio risk', 'risk reward', 'rr ratio'], 'emoji': '⚖️', 'group': 'trading'},
-        {'keywords': ['potensi profit', 'potensi keuntungan'], 'emoji': '📈', 'group': 'trading'},
-        {'keywords': ['potensi loss', 'potensi rugi'], 'emoji': '📉', 'group': 'trading'},
-        {'keywords': ['waktu hold', 'holding time', 'durasi'], 'emoji': '⏱️', 'group': 'trading'},
-        {'keywords': ['pola candlestick', 'pola', 'pattern', 'candlestick'], 'emoji': '🕯️', 'group': 'analysis'},
-        {'keywords': ['tren ema', 'tren', 'trend'], 'emoji': '📈', 'group': 'analysis'},
-        {'keywords': ['kondisi rsi', 'rsi'], 'emoji': '📉', 'group': 'indicators'},
-        {'keywords': ['kondisi stoch', 'stoch rsi', 'stochastic'], 'emoji': '📊', 'group': 'indicators'},
-        {'keywords': ['kondisi macd', 'macd'], 'emoji': '📊', 'group': 'indicators'},
-        {'keywords': ['posisi bollinger', 'bollinger', 'bb'], 'emoji': '〰️', 'group': 'indicators'},
-        {'keywords': ['level fibonacci', 'fibonacci', 'fib'], 'emoji': '🔢', 'group': 'indicators'},
-        {'keywords': ['support kunci', 'support', 's1', 's2', 's3'], 'emoji': '🔻', 'group': 'levels'},
-        {'keywords': ['resistance kunci', 'resistance', 'r1', 'r2', 'r3'], 'emoji': '🔺', 'group': 'levels'},
-        {'keywords': ['konfirmasi', 'confirmation'], 'emoji': '✅', 'group': 'confirmation'},
-        {'keywords': ['peringatan risiko', 'peringatan', 'risiko', 'warning'], 'emoji': '⚠️', 'group': 'warning'},
-        {'keywords': ['kesimpulan', 'conclusion', 'ringkasan'], 'emoji': '🧠', 'group': 'conclusion'},
-        {'keywords': ['analisa teknikal detail', 'analisa teknikal'], 'emoji': '📋', 'group': 'analysis'},
-    ]
-    
-    sections = {
-        'prediction': [],
-        'signal': [],
-        'trading': [],
-        'analysis': [],
-        'indicators': [],
-        'levels': [],
-        'confirmation': [],
-        'warning': [],
-        'conclusion': [],
-        'other': []
-    }
-    
-    lines = text_clean.strip().split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+            log_error("Gagal mengirim verifikasi: %s", e)
+            return False
         
-        if ':' in line:
-            parts = line.split(':', 1)
-            key = parts[0].strip().lower()
-            value = parts[1].strip() if len(parts) > 1 else ''
-            
-            if not value:
-                continue
-            
-            matched = False
-            for config in section_keywords:
-                for keyword in config['keywords']:
-                    if keyword in key:
-                        sections[config['group']].append(f"{config['emoji']} *{parts[0].strip().upper()}:*\n{value}")
-                        matched = True
-                        break
-                if matched:
-                    break
-            
-            if not matched and value and len(value) > 3:
-                sections['other'].append(f"• {parts[0].strip()}: {value}")
-    
-    result_parts = []
-    if sections['prediction']:
-        result_parts.append('─── Prediksi Harga ───')
-        result_parts.append('\n\n'.join(sections['prediction']))
-    if sections['signal']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('\n\n'.join(sections['signal']))
-    if sections['trading']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Setup Trading ───')
-        result_parts.append('\n\n'.join(sections['trading']))
-    if sections['levels']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Support & Resistance ───')
-        result_parts.append('\n\n'.join(sections['levels']))
-    if sections['analysis']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Analisa Teknikal ───')
-        result_parts.append('\n\n'.join(sections['analysis']))
-    if sections['indicators']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Indikator ───')
-        result_parts.append('\n\n'.join(sections['indicators']))
-    if sections['confirmation']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Konfirmasi Sinyal ───')
-        result_parts.append('\n\n'.join(sections['confirmation']))
-    if sections['warning']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Peringatan ───')
-        result_parts.append('\n\n'.join(sections['warning']))
-    if sections['conclusion']:
-        if result_parts:
-            result_parts.append('')
-        result_parts.append('─── Kesimpulan ───')
-        result_parts.append('\n\n'.join(sections['conclusion']))
-    
-    return '\n'.join(result_parts) if result_parts else text
-
-
-def get_main_menu_keyboard():
-    """Generate keyboard untuk menu utama"""
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("💰 Cryptocurrency", callback_data='market_crypto')],
-        [InlineKeyboardButton("💱 Forex & Komoditas", callback_data='market_forex')],
-    ])
-
-
-def get_crypto_keyboard():
-    """Generate keyboard untuk pilihan cryptocurrency"""
-    buttons = []
-    row = []
-    for symbol, info in SUPPORTED_COINS.items():
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'crypto_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
-    return InlineKeyboardMarkup(buttons)
-
-
-def get_forex_keyboard():
-    """Generate keyboard untuk pilihan forex"""
-    commodities = [s for s, info in FOREX_PAIRS.items() if info["category"] == "commodity"]
-    majors = [s for s, info in FOREX_PAIRS.items() if info["category"] == "major"]
-    crosses = [s for s, info in FOREX_PAIRS.items() if info["category"] == "cross"]
-    
-    buttons = []
-    
-    buttons.append([InlineKeyboardButton("─── Komoditas ───", callback_data='ignore')])
-    row = []
-    for symbol in commodities:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("─── Pasangan Utama ───", callback_data='ignore')])
-    row = []
-    for symbol in majors:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
-    
-    buttons.append([InlineKeyboardButton("─── Pasangan Silang ───", callback_data='ignore')])
-    row = []
-    for symbol in crosses:
-        info = FOREX_PAIRS[symbol]
-        row.append(InlineKeyboardButton(f"{info['emoji']} {symbol}", callback_data=f'forex_{symbol}'))
-        if len(row) == 3:
-            buttons.append(row)
-            row = []
-    if row:
-        buttons.append(row)
+        # Ditandai terverifikasi hanya setelah terkirim, agar percobaan ulang tidak dilewati
+        record["verified"] = True
+        record["exit_price"] = current_price
+        record["pips"] = pips
+        record["is_correct"] = is_correct
+        record["result_text"] = result_text
+        record["candle_info"] = candle_info
+        store.set(f"history:{history_id}", record, ttl=HISTORY_TTL)
+        return True
     
-    buttons.append([InlineKeyboardButton("⬅️ Kembali ke Menu Utama", callback_data='back_to_main')])
-    return InlineKeyboardMarkup(buttons)
-
-
-def get_timeframe_keyboard(symbol, market_type):
-    """Generate keyboard untuk pilihan timeframe"""
-    if market_type == "crypto":
-        return InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("1m", callback_data=f'tf_crypto_{symbol}_1min'),
-                InlineKeyboardButton("5m", callback_data=f'tf_crypto_{symbol}_5min'),
-                InlineKeyboardButton("15m", callback_data=f'tf_crypto_{symbol}_15min'),
-                InlineKeyboardButton("30m", callback_data=f'tf_crypto_{symbol}_30min'),
-            ],
-            [
-                InlineKeyboardButton("1j", callback_data=f'tf_crypto_{symbol}_1hour'),
-                InlineKeyboardButton("4j", callback_data=f'tf_crypto_{symbol}_4hour'),
-                InlineKeyboardButton("1h", callback_data=f'tf_crypto_{symbol}_1day'),
-                InlineKeyboardButton("1mg", callback_data=f'tf_crypto_{symbol}_1week'),
-            ],
-            [
-                InlineKeyboardButton("⬅️ Kembali ke Daftar Koin", callback_data='market_crypto'),
-            ],
-        ])
-    else:
-        return InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("1m", callback_data=f'tf_forex_{symbol}_1min'),
-                InlineKeyboardButton("5m", callback_data=f'tf_forex_{symbol}_5min'),
-                InlineKeyboardButton("15m", callback_data=f'tf_forex_{symbol}_15min'),
-                InlineKeyboardButton("30m", callback_data=f'tf_forex_{symbol}_30min'),
-            ],
-            [
-                InlineKeyboardButton("1j", callback_data=f'tf_forex_{symbol}_1hour'),
-                InlineKeyboardButton("4j", callback_data=f'tf_forex_{symbol}_4hour'),
-                InlineKeyboardButton("1h", callback_data=f'tf_forex_{symbol}_1day'),
-            ],
-            [
-                InlineKeyboardButton("⬅️ Kembali ke Daftar Pair", callback_data='market_forex'),
-            ],
-        ])
-
-
-def get_after_analysis_keyboard(symbol, market_type):
-    """Generate keyboard setelah analisa"""
-    if market_type == "crypto":
-        return InlineKeyboardMarkup([
-            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'crypto_{symbol}')],
-            [InlineKeyboardButton("💰 Pilih Koin Lain", callback_data='market_crypto')],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
-        ])
-    else:
-        return InlineKeyboardMarkup([
-            [InlineKeyboardButton(f"🔄 Analisa {symbol} Lagi", callback_data=f'forex_{symbol}')],
-            [InlineKeyboardButton("💱 Pilih Pair Lain", callback_data='market_forex')],
-            [InlineKeyboardButton("🏠 Menu Utama", callback_data='back_to_main')],
-        ])
+    except Exception as e:
+        log_error("Error dalam verify_analysis: %s", e)
+        return False
 
 
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2455,7 +749,7 @@ async def handle_crypto_callback(update: Update, context: ContextTypes.DEFAULT_T
     
     await query.edit_message_text(
         f"{info['emoji']} *{symbol} - {info['name']}*\n{price_text}\n\n*Pilih timeframe:*",
-        reply_markup=get_timeframe_keyboard(symbol, 'crypto'),
+        reply_markup=get_timeframe_keyboard(symbol, 'crypto', show_mtf=False),
         parse_mode='Markdown'
     )
 
@@ -2488,7 +782,7 @@ async def handle_forex_callback(update: Update, context: ContextTypes.DEFAULT_TY
     
     await query.edit_message_text(
         f"{info['emoji']} *{symbol} - {info['name']}*\n{price_text}\n\n*Pilih timeframe:*",
-        reply_markup=get_timeframe_keyboard(symbol, 'forex'),
+        reply_markup=get_timeframe_keyboard(symbol, 'forex', show_mtf=False),
         parse_mode='Markdown'
     )
 
@@ -2518,7 +812,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
         if interval == "1week":
             await query.edit_message_text(
                 "❌ Timeframe mingguan tidak tersedia untuk Forex.\n\n*Pilih timeframe lain:*",
-                reply_markup=get_timeframe_keyboard(symbol, 'forex'),
+                reply_markup=get_timeframe_keyboard(symbol, 'forex', show_mtf=False),
                 parse_mode='Markdown'
             )
             return
@@ -2556,7 +850,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             chat_id=chat_id,
             message_id=status_message.message_id,
             text=f"❌ Gagal mengambil data {symbol}. Coba lagi nanti.\n\n{info['emoji']} Pilih timeframe lain:",
-            reply_markup=get_timeframe_keyboard(symbol, market_type)
+            reply_markup=get_timeframe_keyboard(symbol, market_type, show_mtf=False)
         )
         return
     
@@ -2565,7 +859,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             chat_id=chat_id,
             message_id=status_message.message_id,
             text=f"❌ Data terlalu sedikit ({len(data)} candle). Coba timeframe lain.",
-            reply_markup=get_timeframe_keyboard(symbol, market_type)
+            reply_markup=get_timeframe_keyboard(symbol, market_type, show_mtf=False)
         )
         return
     
@@ -2583,7 +877,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             chat_id=chat_id,
             message_id=status_message.message_id,
             text=f"❌ Gagal membuat chart.\n\n{info['emoji']} Pilih timeframe:",
-            reply_markup=get_timeframe_keyboard(symbol, market_type)
+            reply_markup=get_timeframe_keyboard(symbol, market_type, show_mtf=False)
         )
         return
     
@@ -2606,7 +900,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             chat_id=chat_id,
             message_id=status_message.message_id,
             text="❌ Gagal mengirim chart.",
-            reply_markup=get_timeframe_keyboard(symbol, market_type)
+            reply_markup=get_timeframe_keyboard(symbol, market_type, show_mtf=False)
         )
         return
     
@@ -2636,7 +930,7 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             caption=new_caption
         )
     except Exception as e:
-        logger.warning(f"Gagal update caption chart: {e}")
+        logger.warning("Gagal update caption chart: %s", e)
     
     if market_type == "crypto":
         result_text = f"""{info['emoji']} *Hasil Analisa {symbol}/USDT ({interval})*
@@ -2689,25 +983,23 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
         if context.user_data is not None:
             context.user_data['last_button_message_id'] = button_message.message_id
     
-    log_info(f"=== DEBUG VERIFIKASI ===")
-    log_info(f"Signal code: {signal_code}")
-    log_info(f"Symbol: {symbol}, Market: {market_type}, Interval: {interval}")
+    log_debug("Verifikasi %s: signal %s, market %s, interval %s", symbol, signal_code, market_type, interval)
     
     if signal_code:
         if market_type == "crypto":
             entry_price = get_crypto_price(symbol)
-            log_info(f"Crypto price untuk {symbol}: {entry_price}")
+            log_debug("Crypto price untuk %s: %s", symbol, entry_price)
         else:
             entry_price = get_forex_price(symbol)
-            log_info(f"Forex price untuk {symbol}: {entry_price}")
+            log_debug("Forex price untuk %s: %s", symbol, entry_price)
         
         if not entry_price:
             extracted_price = extract_price_from_analysis(analysis)
-            log_info(f"Extracted price dari analisa: {extracted_price}")
+            log_debug("Extracted price dari analisa: %s", extracted_price)
             if extracted_price:
                 entry_price = extracted_price
         
-        log_info(f"Final entry price: {entry_price}")
+        log_debug("Final entry price: %s", entry_price)
         
         if entry_price and entry_price > 0:
             analysis_time = datetime.now(tz("Asia/Jakarta"))
@@ -2727,30 +1019,20 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
             next_close_utc = sync_info["formatted_utc"]
             delay_formatted = sync_info["delay_formatted"]
             
-            log_info(f"=== TRADINGVIEW SYNC ===")
-            log_info(f"Interval: {interval}")
-            log_info(f"Next candle close (UTC): {next_close_utc}")
-            log_info(f"Next candle close (WIB): {next_close_wib}")
-            log_info(f"Delay until verification: {delay_seconds} detik ({delay_formatted})")
+            log_debug(
+                "Sync TradingView %s: candle close berikutnya %s / %s, verifikasi dalam %s detik (%s)",
+                interval, next_close_utc, next_close_wib, delay_seconds, delay_formatted
+            )
             
             tf_context = get_timeframe_context(interval)
             
             try:
-                log_info(f"Job queue tersedia: {context.job_queue is not None}")
                 if context.job_queue:
-                    context.job_queue.run_once(
-                        verify_analysis_job,
-                        when=delay_seconds,
-                        data={
-                            "history_id": history_id, 
-                            "chat_id": chat_id,
-                            "sync_time_utc": next_close_utc,
-                            "sync_time_wib": next_close_wib
-                        },
-                        name=f"verify_{history_id}",
-                        chat_id=chat_id
+                    # Verifikasi tertunda sudah tersimpan di store; dijalankan oleh job leader saat jatuh tempo
+                    log_success(
+                        "Verifikasi dijadwalkan: %s dalam %s detik (sync TradingView)",
+                        history_id, delay_seconds
                     )
-                    log_success(f"Job verifikasi dijadwalkan: {history_id} dalam {delay_seconds} detik (sync TradingView)")
                     
                     await context.bot.send_message(
                         chat_id=chat_id,
@@ -2768,13 +1050,13 @@ async def handle_timeframe_callback(update: Update, context: ContextTypes.DEFAUL
                 else:
                     log_error("Job queue TIDAK tersedia!")
             except Exception as e:
-                log_error(f"Gagal menjadwalkan verifikasi: {e}")
+                log_error("Gagal menjadwalkan verifikasi: %s", e)
                 import traceback
                 traceback.print_exc()
         else:
-            log_warning(f"Tidak dapat mendapatkan harga entry untuk {symbol} - verifikasi tidak dijadwalkan")
+            log_warning("Tidak dapat mendapatkan harga entry untuk %s - verifikasi tidak dijadwalkan", symbol)
     else:
-        log_warning(f"Signal code kosong/None - verifikasi tidak dijadwalkan")
+        log_warning("Signal code kosong/None - verifikasi tidak dijadwalkan")
     
     try:
         os.remove(chart_path)
@@ -2878,7 +1160,7 @@ async def cmd_analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
             caption=new_caption
         )
     except Exception as e:
-        logger.warning(f"Gagal update caption chart: {e}")
+        logger.warning("Gagal update caption chart: %s", e)
     
     await update.message.reply_text(
         f"{info['emoji']} Hasil Analisa Pro {symbol} ({interval}):\n\n{formatted}\n\n"
@@ -2920,7 +1202,7 @@ async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"{info['emoji']} *Harga {symbol} ({info['name']}) Saat Ini*\n\n"
                 f"💵 *${price:,.2f}*",
                 parse_mode='Markdown',
-                reply_markup=get_timeframe_keyboard(symbol, 'crypto')
+                reply_markup=get_timeframe_keyboard(symbol, 'crypto', show_mtf=False)
             )
         else:
             await update.message.reply_text(f"❌ Gagal mengambil harga {symbol}. Coba lagi nanti.")
@@ -2936,7 +1218,7 @@ async def cmd_price(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"{info['emoji']} *Harga {symbol} ({info['name']}) Saat Ini*\n\n"
                 f"💵 *{price_str}*",
                 parse_mode='Markdown',
-                reply_markup=get_timeframe_keyboard(symbol, 'forex')
+                reply_markup=get_timeframe_keyboard(symbol, 'forex', show_mtf=False)
             )
         else:
             await update.message.reply_text(f"❌ Gagal mengambil harga {symbol}. Coba lagi nanti.")
@@ -2951,7 +1233,12 @@ async def cmd_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     chat_id = update.message.chat.id
     
-    user_history = {k: v for k, v in analysis_history.items() if v["chat_id"] == chat_id}
+    store = get_history_store()
+    user_history = {}
+    for key in store.keys(f"history:{chat_id}_"):
+        record = store.get(key)
+        if record:
+            user_history[key.split(":", 1)[1]] = dict(record, analysis_time=datetime.fromisoformat(record["analysis_time"]))
     
     if not user_history:
         await update.message.reply_text(
@@ -3080,12 +1367,17 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
     if "Query is too old" in error_str:
         return
     
-    logger.error(f"Exception saat menangani update: {context.error}")
+    logger.error("Exception saat menangani update: %s", context.error)
     
     if "Conflict" in error_str:
         logger.warning("Konflik bot terdeteksi - mungkin ada instance lain yang berjalan")
 
 
+async def release_leadership(application):
+    """Lepas lease saat bot berhenti agar instance lain langsung mengambil alih job verifikasi"""
+    verification_leader.stop()
+
+
 def main():
     """Fungsi utama untuk menjalankan bot"""
     print_banner()
@@ -3110,23 +1402,23 @@ def main():
     print()
     
     if TV_AVAILABLE:
-        log_success(f"TradingView: Aktif")
+        log_success("TradingView: Aktif")
     else:
-        log_warning(f"TradingView: Tidak tersedia (fallback ke Yahoo/KuCoin)")
+        log_warning("TradingView: Tidak tersedia (fallback ke Yahoo/KuCoin)")
     
     if yf:
-        log_success(f"Yahoo Finance: Aktif")
+        log_success("Yahoo Finance: Aktif")
     else:
-        log_warning(f"Yahoo Finance: Tidak tersedia")
+        log_warning("Yahoo Finance: Tidak tersedia")
     
-    log_info(f"Cryptocurrency: {len(SUPPORTED_COINS)} koin didukung")
-    log_info(f"Forex & Komoditas: {len(FOREX_PAIRS)} pasangan didukung")
+    log_info("Cryptocurrency: %s koin didukung", len(SUPPORTED_COINS))
+    log_info("Forex & Komoditas: %s pasangan didukung", len(FOREX_PAIRS))
     
     print()
     print(f"{Colors.WHITE}{Colors.BOLD}  Memulai bot...{Colors.RESET}")
     print()
     
-    app = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    app = Application.builder().token(TELEGRAM_BOT_TOKEN).post_shutdown(release_leadership).build()
     
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("analyze", cmd_analyze))
@@ -3141,6 +1433,11 @@ def main():
     
     app.add_error_handler(error_handler)
     
+    # Lease leader di SHARED_STORE: beberapa instance boleh berjalan, verifikasi hanya dijalankan leader
+    verification_leader.start()
+    if app.job_queue:
+        app.job_queue.run_repeating(verify_analysis_job, interval=VERIFY_POLL_INTERVAL, first=VERIFY_POLL_INTERVAL)
+    
     log_success("Bot siap menerima pesan!")
     log_info("Fitur History Tracking aktif - verifikasi otomatis setelah timeframe")
     print()
@@ -0,0 +1,55 @@
+"""Admission analisa: antrean satu pipeline per user dan budget token (UserWorkQueue, TokenBucket di main.py)"""
+
+import asyncio
+
+from main import TokenBucket, UserWorkQueue
+
+
+def test_refund_restores_token_up_to_capacity():
+    bucket = TokenBucket(rate=1 / 60, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    bucket.refund()
+    assert bucket.try_acquire()
+    bucket.refund()
+    bucket.refund()
+    bucket.refund()
+    assert bucket.tokens <= 2
+
+
+def test_superseded_pipeline_refunds_budget():
+    bucket = TokenBucket(rate=1 / 60, capacity=3)
+    finished = []
+
+    async def main():
+        queue = UserWorkQueue(max_concurrent=2)
+
+        async def pipeline(tag, seconds):
+            await asyncio.sleep(seconds)
+            finished.append(tag)
+
+        for tag in ("first", "second"):
+            assert bucket.try_acquire()
+            assert queue.submit(1, lambda tag=tag: pipeline(tag, 0.05), on_cancel=bucket.refund)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert finished == ["second"]
+    # Dua tekanan tombol, satu hasil: hanya satu token yang terpakai
+    assert 1.9 < bucket.tokens < 2.1
+
+
+def test_completed_pipeline_keeps_charge():
+    bucket = TokenBucket(rate=1 / 60, capacity=3)
+    refunds = []
+
+    async def main():
+        queue = UserWorkQueue(max_concurrent=1)
+        assert bucket.try_acquire()
+        queue.submit(1, lambda: asyncio.sleep(0), on_cancel=lambda: refunds.append(1))
+        await asyncio.sleep(0.05)
+        queue.cancel(1)
+
+    asyncio.run(main())
+    assert refunds == []
@@ -0,0 +1,100 @@
+"""Alert dan langganan digest di store bersama (PriceAlertBook, IndicatorAlertBook, DigestSubscriptions di main.py)"""
+
+import pandas as pd
+import pytest
+
+import main
+from engine.store import MemoryStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(main, "get_alert_store", lambda: store)
+    return store
+
+
+def test_price_alerts_survive_restart(store):
+    book = main.PriceAlertBook()
+    first = book.add(1, "BTC", "crypto", 110, 100)
+    book.add(1, "BTC", "crypto", 90, 100)
+    book.add(2, "ETH", "crypto", 5000, 4000)
+    assert [alert["id"] for alert in book.list_for_chat(1)] == [1, 2]
+    assert book.count_for_chat(2) == 1
+
+    # Worker baru (mis. setelah di-restart supervisor) membangun indeks dari store
+    restarted = main.PriceAlertBook()
+    restarted.sync()
+    assert restarted.size == 3
+    assert sorted(restarted.symbols()) == ["BTC", "ETH"]
+    assert restarted.check("BTC", 111) == [first]
+    assert [alert["id"] for alert in book.list_for_chat(1)] == [2]
+
+
+def test_alert_removed_on_other_worker_does_not_fire(store):
+    leader = main.PriceAlertBook()
+    worker = main.PriceAlertBook()
+    alert = worker.add(1, "BTC", "crypto", 110, 100)
+    leader.sync()
+    assert worker.remove(1, alert["id"])
+    assert not worker.remove(1, alert["id"])
+    assert leader.check("BTC", 120) == []
+
+
+def test_sync_picks_up_alerts_from_other_workers(store):
+    leader = main.PriceAlertBook()
+    leader.sync()
+    assert leader.symbols() == []
+    main.PriceAlertBook().add(3, "SOL", "crypto", 50, 100)
+    leader.sync()
+    assert [alert["chat_id"] for alert in leader.check("SOL", 49)] == [3]
+
+
+def test_alert_ids_are_per_chat_and_not_reused(store):
+    prices = main.PriceAlertBook()
+    indicators = main.IndicatorAlertBook()
+    first = prices.add(1, "BTC", "crypto", 110, 100)
+    assert prices.remove(1, first["id"])
+    condition = main.parse_indicator_condition("RSI<30")
+    assert indicators.add(1, "BTC", "crypto", "1hour", condition)["id"] == 2
+    assert prices.add(2, "BTC", "crypto", 110, 100)["id"] == 1
+
+
+def test_indicator_edge_state_is_shared_between_leaders(store):
+    main.IndicatorAlertBook().add(1, "BTC", "crypto", "1hour", main.parse_indicator_condition("ADX>0"))
+    df = pd.DataFrame({
+        "Open": [float(i) for i in range(60)],
+        "High": [float(i) + 2 for i in range(60)],
+        "Low": [float(i) - 1 for i in range(60)],
+        "Close": [float(i) + 1 for i in range(60)],
+        "Volume": [1.0] * 60,
+    })
+
+    leader = main.IndicatorAlertBook()
+    leader.sync()
+    assert leader.symbols_for_interval("1hour") == ["BTC"]
+    assert [alert["chat_id"] for alert in leader.evaluate("BTC", "1hour", df)] == [1]
+    assert leader.evaluate("BTC", "1hour", df) == []
+
+    # Leader baru tidak mengirim ulang kondisi yang masih terpenuhi
+    successor = main.IndicatorAlertBook()
+    successor.sync()
+    assert successor.evaluate("BTC", "1hour", df) == []
+
+
+def test_digest_subscriptions_shared(store):
+    worker = main.DigestSubscriptions()
+    worker.subscribe(1, "BTC", "4hour")
+    worker.subscribe(2, "BTC", "4hour")
+    worker.subscribe(1, "XAUUSD", "1day")
+    assert worker.list_for_chat(1) == [("BTC", "4hour"), ("XAUUSD", "1day")]
+
+    leader = main.DigestSubscriptions()
+    leader.sync()
+    assert leader.subscribers("BTC", "4hour") == [1, 2]
+    assert leader.symbols_for_interval("1day") == ["XAUUSD"]
+
+    assert worker.unsubscribe(1) == 2
+    leader.sync()
+    assert leader.subscribers("BTC", "4hour") == [2]
+    assert leader.symbols_for_interval("1day") == []
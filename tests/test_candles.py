@@ -0,0 +1,64 @@
+"""Batas candle UTC dan resampling (engine/candles.py)"""
+
+from engine.candles import get_candle_bucket_start, get_next_candle_close, resample_candles
+from engine.data import get_resample_source
+
+# Senin, 1 Januari 2024 00:00 UTC
+MONDAY = 1704067200
+
+
+def test_bucket_start_intraday():
+    assert get_candle_bucket_start(MONDAY + 3599, "1hour") == MONDAY
+    assert get_candle_bucket_start(MONDAY + 3600, "1hour") == MONDAY + 3600
+    assert get_candle_bucket_start(MONDAY + 5 * 3600 + 10, "4hour") == MONDAY + 4 * 3600
+    assert get_candle_bucket_start(MONDAY + 899, "15min") == MONDAY
+
+
+def test_bucket_start_weekly_starts_on_monday():
+    sunday_night = MONDAY + 7 * 86400 - 1
+    assert get_candle_bucket_start(sunday_night, "1week") == MONDAY
+    assert get_candle_bucket_start(MONDAY + 7 * 86400, "1week") == MONDAY + 7 * 86400
+    # Kamis sebelumnya (epoch jatuh pada hari Kamis) masih ikut minggu sebelumnya
+    assert get_candle_bucket_start(MONDAY - 4 * 86400, "1week") == MONDAY - 7 * 86400
+
+
+def test_next_candle_close():
+    assert get_next_candle_close("1hour", now=MONDAY + 10) == MONDAY + 3600
+    assert get_next_candle_close("1day", now=MONDAY) == MONDAY + 86400
+
+
+def test_resample_hourly_to_4hour():
+    candles = [[MONDAY + i * 3600, 100 + i, 101 + i, 102 + i, 99 + i, 1.5] for i in range(8)]
+    result = resample_candles(candles, "4hour")
+    assert result == [
+        [MONDAY, 100.0, 104.0, 105.0, 99.0, 6.0],
+        [MONDAY + 4 * 3600, 104.0, 108.0, 109.0, 103.0, 6.0],
+    ]
+
+
+def test_resample_drops_incomplete_first_bucket():
+    # Seri dasar dimulai di jam ke-2 dari candle 4 jam pertama
+    candles = [[MONDAY + i * 3600, 10, 11, 12, 9, 1] for i in range(2, 8)]
+    result = resample_candles(candles, "4hour")
+    assert [candle[0] for candle in result] == [MONDAY + 4 * 3600]
+    assert result[0][5] == 4.0
+
+
+def test_resample_accepts_string_rows_without_volume():
+    candles = [[str(MONDAY), "1", "2", "3", "0.5"], [str(MONDAY + 60), "2", "4", "5", "1"]]
+    assert resample_candles(candles, "5min") == [[MONDAY, 1.0, 4.0, 5.0, 0.5, 0]]
+
+
+def test_resample_invalid_input():
+    assert resample_candles([], "1hour") == []
+    assert resample_candles([[MONDAY, 1, 1, 1, 1, 1]], "2hour") == []
+
+
+def test_resample_source_per_market():
+    assert get_resample_source("crypto", "1day") == "1hour"
+    assert get_resample_source("crypto", "4hour") == "1hour"
+    assert get_resample_source("forex", "4hour") == "1hour"
+    # Candle harian/mingguan forex mengikuti rollover sesi FX, bukan tengah malam UTC
+    assert get_resample_source("forex", "1day") is None
+    assert get_resample_source("forex", "1week") is None
+    assert get_resample_source("crypto", "1min") is None
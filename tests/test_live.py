@@ -0,0 +1,114 @@
+"""LiveMarketFeed lewat LocalTickSource: harga terakhir, candle berjalan, dan harga bersama antar worker"""
+
+import time
+
+from engine import live
+from engine.live import LiveMarketFeed, LocalTickSource
+from engine.store import SQLiteStore
+
+MONDAY = 1704067200
+
+
+def make_feed(intervals=("1min", "5min")):
+    feed = LiveMarketFeed(intervals=intervals)
+    source = feed.add_source(LocalTickSource())
+    feed.start()
+    return feed, source
+
+
+def test_price_updates():
+    feed, source = make_feed()
+    now = time.time()
+    source.push("BTC", 42000, timestamp=now - 1)
+    source.push("BTC", "42100.5", timestamp=now)
+    assert feed.get_price("BTC") == 42100.5
+    assert feed.get_price("ETH") is None
+
+
+def test_price_goes_stale():
+    feed, source = make_feed()
+    source.push("BTC", 42000, timestamp=time.time() - 120)
+    assert feed.get_price("BTC", max_age=30) is None
+    assert feed.get_price("BTC", max_age=300) == 42000
+
+
+def test_tick_listener_receives_ticks():
+    feed, source = make_feed()
+    seen = []
+    feed.add_tick_listener(lambda symbol, price, timestamp: seen.append((symbol, price, timestamp)))
+    source.replay([("BTC", 1, 0, MONDAY), ("ETH", 2, 0, MONDAY + 1)])
+    assert seen == [("BTC", 1.0, MONDAY), ("ETH", 2.0, MONDAY + 1)]
+
+
+def test_forming_candle_aggregates_ticks():
+    feed, source = make_feed()
+    source.replay([
+        ("BTC", 100, 1, MONDAY + 5),
+        ("BTC", 105, 2, MONDAY + 20),
+        ("BTC", 98, 1, MONDAY + 40),
+        ("BTC", 101, 3, MONDAY + 59),
+    ])
+    assert feed.get_forming_candle("BTC", "1min") == [MONDAY, 100.0, 101.0, 105.0, 98.0, 7.0]
+    assert feed.get_forming_candle("BTC", "5min") == [MONDAY, 100.0, 101.0, 105.0, 98.0, 7.0]
+    assert feed.get_forming_candle("ETH", "1min") is None
+
+
+def test_forming_candle_rolls_over_at_bucket_boundary():
+    feed, source = make_feed()
+    closed = []
+    feed.add_candle_close_listener(lambda symbol, interval, candle: closed.append((symbol, interval, list(candle))))
+
+    source.push("BTC", 100, 1, MONDAY + 10)
+    source.push("BTC", 102, 1, MONDAY + 59)
+    assert closed == []
+
+    # Tick pertama di menit berikutnya menutup candle 1 menit, candle 5 menit masih berjalan
+    source.push("BTC", 103, 2, MONDAY + 60)
+    assert closed == [("BTC", "1min", [MONDAY, 100.0, 102.0, 102.0, 100.0, 2.0])]
+    assert feed.get_forming_candle("BTC", "1min") == [MONDAY + 60, 103.0, 103.0, 103.0, 103.0, 2.0]
+    assert feed.get_forming_candle("BTC", "5min") == [MONDAY, 100.0, 103.0, 103.0, 100.0, 4.0]
+
+    source.push("BTC", 99, 1, MONDAY + 300)
+    assert closed[1:] == [
+        ("BTC", "1min", [MONDAY + 60, 103.0, 103.0, 103.0, 103.0, 2.0]),
+        ("BTC", "5min", [MONDAY, 100.0, 103.0, 103.0, 100.0, 4.0]),
+    ]
+    assert feed.get_forming_candle("BTC", "5min") == [MONDAY + 300, 99.0, 99.0, 99.0, 99.0, 1.0]
+
+
+def test_late_tick_does_not_reopen_closed_candle():
+    feed, source = make_feed(intervals=("1min",))
+    source.push("BTC", 100, 1, MONDAY + 61)
+    source.push("BTC", 50, 1, MONDAY + 30)
+    assert feed.get_forming_candle("BTC", "1min") == [MONDAY + 60, 100.0, 100.0, 100.0, 100.0, 1.0]
+    # Harga terakhir tetap mengikuti tick yang terakhir diterima
+    assert feed.get_price("BTC", max_age=time.time()) == 50.0
+
+
+def test_failing_listener_does_not_break_feed():
+    feed, source = make_feed(intervals=("1min",))
+    feed.add_tick_listener(lambda *args: 1 / 0)
+    source.push("BTC", 100, timestamp=time.time())
+    assert feed.get_price("BTC") == 100.0
+
+
+def test_leader_prices_reach_other_workers(tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    feed, source = make_feed(intervals=("1min",))
+    feed.store = store
+    now = time.time()
+    source.push("BTC", 100, timestamp=now)
+    # Dipublikasikan paling sering sekali per LIVE_PRICE_PUBLISH_INTERVAL per simbol
+    source.push("BTC", 101, timestamp=now)
+    source.push("ETH", 2000, timestamp=now)
+    assert store.get("live_price:BTC") == [100.0, now]
+
+    # Worker tanpa WebSocket (bukan leader) membaca harga leader dari store
+    monkeypatch.setattr(live, "live_feed", None)
+    monkeypatch.setattr(live, "get_store", lambda: store)
+    assert live.get_live_price("BTC") == 100.0
+    assert live.get_live_price("ETH") == 2000.0
+    assert live.get_live_price("SOL") is None
+    store.set("live_price:BTC", [100.0, now - 120])
+    assert live.get_live_price("BTC", max_age=30) is None
+    store.close()
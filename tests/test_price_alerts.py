@@ -0,0 +1,58 @@
+"""Indeks threshold alert harga (PriceAlertIndex di main.py)"""
+
+from main import PriceAlertIndex
+
+
+def build(alerts):
+    index = PriceAlertIndex()
+    for alert_id, threshold, direction in alerts:
+        index.add(alert_id, threshold, direction)
+    return index
+
+
+def test_nothing_triggers_between_thresholds():
+    index = build([(1, 110, "above"), (2, 90, "below")])
+    assert index.pop_triggered(100) == []
+    assert len(index) == 2
+
+
+def test_above_triggers_when_price_crosses_up():
+    index = build([(1, 105, "above"), (2, 110, "above"), (3, 120, "above")])
+    assert sorted(index.pop_triggered(111)) == [1, 2]
+    assert len(index) == 1
+    assert index.pop_triggered(119.99) == []
+    assert index.pop_triggered(120) == [3]
+
+
+def test_below_triggers_when_price_crosses_down():
+    index = build([(1, 95, "below"), (2, 90, "below"), (3, 80, "below")])
+    assert sorted(index.pop_triggered(90)) == [1, 2]
+    assert index.pop_triggered(85) == []
+    assert index.pop_triggered(10) == [3]
+    assert len(index) == 0
+
+
+def test_triggered_alerts_fire_only_once():
+    index = build([(1, 110, "above"), (2, 90, "below")])
+    assert index.pop_triggered(115) == [1]
+    assert index.pop_triggered(115) == []
+    assert index.pop_triggered(80) == [2]
+    assert index.pop_triggered(80) == []
+
+
+def test_gap_crosses_both_sides_in_one_price():
+    index = build([(1, 110, "above"), (2, 90, "below")])
+    # Harga melompat melewati dua arah sekaligus (mis. data ulang setelah reconnect)
+    index.add(3, 200, "below")
+    assert sorted(index.pop_triggered(150)) == [1, 3]
+    assert len(index) == 1
+
+
+def test_remove_with_duplicate_thresholds():
+    index = build([(1, 110, "above"), (2, 110, "above"), (3, 110, "below")])
+    assert index.remove(2, 110, "above")
+    assert not index.remove(2, 110, "above")
+    assert not index.remove(1, 110, "below")
+    # Harga tepat di threshold memicu kedua arah
+    assert sorted(index.pop_triggered(110)) == [1, 3]
+    assert len(index) == 0
@@ -0,0 +1,59 @@
+"""Batas kirim global Telegram yang dibagi antar worker (SharedSendRate di main.py)"""
+
+import time
+from collections import Counter
+
+import pytest
+
+import main
+from engine.store import MemoryStore, SQLiteStore
+
+
+@pytest.fixture
+def shared_store(tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    monkeypatch.setattr(main, "get_store", lambda: store)
+    yield store
+    store.close()
+
+
+def test_workers_share_one_global_rate(shared_store):
+    # Dua worker masing-masing ingin mengirim 50 pesan dengan batas global 25/detik
+    workers = [main.SharedSendRate(25, workers=2) for _ in range(2)]
+    start = time.time()
+    send_times = []
+    for _ in range(50):
+        for worker in workers:
+            wait = worker.reserve()
+            send_times.append(time.time() + wait)
+
+    # Slot jatuh tepat di awal jendela; dihitung relatif ke jendela pertama agar pembulatan float tidak menggeser
+    window = workers[0].window
+    origin = int(start / window) * window
+    windows = Counter(int((t - origin) / window + 1e-6) for t in send_times)
+    assert max(windows.values()) <= workers[0].per_window
+    # 100 pesan pada 25/detik butuh sekitar 4 detik, bukan 2 seperti jika tiap worker punya batas sendiri
+    assert max(send_times) - start >= 3.6
+
+
+def test_retry_after_holds_every_worker(shared_store):
+    first, second = main.SharedSendRate(25), main.SharedSendRate(25)
+    first.penalize(3)
+    assert second.reserve() >= 2.5
+
+
+def test_store_failure_falls_back_to_worker_share(shared_store, monkeypatch):
+    limiter = main.SharedSendRate(20, workers=4)
+    monkeypatch.setattr(shared_store, "incr", lambda key, ttl: None)
+    waits = [limiter.reserve() for _ in range(10)]
+    # Bucket cadangan 20 / 4 = 5 pesan/detik (burst 5)
+    assert waits[4] == 0.0
+    assert waits[9] == pytest.approx(1.0, abs=0.05)
+
+
+def test_memory_store_uses_local_bucket(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(main, "get_store", lambda: store)
+    limiter = main.SharedSendRate(25)
+    assert [limiter.reserve() for _ in range(25)] == [0.0] * 25
+    assert store.keys("send_rate:") == []
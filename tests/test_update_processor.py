@@ -0,0 +1,94 @@
+"""Dispatch update per chat (ChatOrderedUpdateProcessor di main.py)"""
+
+import asyncio
+from types import SimpleNamespace
+
+from main import ChatOrderedUpdateProcessor
+
+
+def make_update(chat_id=None, user_id=None):
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id) if chat_id is not None else None,
+        effective_user=SimpleNamespace(id=user_id) if user_id is not None else None,
+    )
+
+
+def run_updates(processor, updates, handler):
+    """Jalankan update lewat process_update seperti Application; tiap update memanggil handler(tag)"""
+
+    async def main():
+        await asyncio.gather(*(
+            processor.process_update(update, handler(tag)) for update, tag in updates
+        ))
+
+    asyncio.run(main())
+
+
+def test_updates_of_one_chat_run_in_order():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    events = []
+
+    async def handler(tag):
+        events.append(("start", tag))
+        # Update awal lebih lambat: tanpa jalur per chat update berikutnya akan mendahuluinya
+        await asyncio.sleep(0.03 if tag == 1 else 0.001)
+        events.append(("end", tag))
+
+    run_updates(processor, [(make_update(chat_id=7), tag) for tag in range(1, 5)], handler)
+    assert events == [(kind, tag) for tag in range(1, 5) for kind in ("start", "end")]
+    assert processor.chat_stats[7]["processed"] == 4
+    assert processor.chat_stats[7]["max_depth"] == 3
+    assert processor.summary()["active_chats"] == 0
+
+
+def test_different_chats_run_concurrently():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    running = 0
+    peak = 0
+
+    async def handler(tag):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    run_updates(processor, [(make_update(chat_id=chat_id), chat_id) for chat_id in range(5)], handler)
+    assert peak == 5
+
+
+def test_failing_update_does_not_stop_the_lane():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=4)
+    done = []
+
+    async def handler(tag):
+        await asyncio.sleep(0)
+        if tag == "bad":
+            raise RuntimeError("handler gagal")
+        done.append(tag)
+
+    updates = [(make_update(chat_id=1), "a"), (make_update(chat_id=1), "bad"), (make_update(chat_id=1), "b")]
+    run_updates(processor, updates, handler)
+    assert done == ["a", "b"]
+    assert processor.chat_stats[1]["processed"] == 3
+
+
+def test_user_lane_and_updates_without_chat():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=4)
+    order = []
+
+    async def handler(tag):
+        await asyncio.sleep(0.02 if tag in ("u1", "p1") else 0)
+        order.append(tag)
+
+    updates = [
+        (make_update(user_id=9), "u1"),
+        (make_update(user_id=9), "u2"),
+        (make_update(), "p1"),
+        (make_update(), "p2"),
+    ]
+    run_updates(processor, updates, handler)
+    # Update inline milik user yang sama tetap berurutan; update tanpa chat/user tidak diberi jalur
+    assert order.index("u1") < order.index("u2")
+    assert order.index("p2") < order.index("p1")
+    assert 9 in processor.chat_stats and None not in processor.chat_stats